@@ -15,7 +15,7 @@ from pants.backend.core.targets.prep_command import PrepCommand
 from pants.backend.core.targets.resources import Resources
 from pants.backend.core.tasks.builddictionary import BuildBuildDictionary
 from pants.backend.core.tasks.changed_target_goals import CompileChanged, TestChanged
-from pants.backend.core.tasks.clean import Cleaner, Invalidator
+from pants.backend.core.tasks.clean import ArtifactCacheGarbageCollector, Cleaner, Invalidator
 from pants.backend.core.tasks.confluence_publish import ConfluencePublish
 from pants.backend.core.tasks.deferred_sources_mapper import DeferredSourcesMapper
 from pants.backend.core.tasks.dependees import ReverseDepmap
@@ -121,6 +121,9 @@ def register_goals():
       '[deprecated] Clean all build output in a background process.')
   clean_all_async.install(invalidate, first=True)
 
+  task(name='gc-artifact-cache', action=ArtifactCacheGarbageCollector).install().with_description(
+      'Collect garbage in content-addressed local artifact caches.')
+
   # Reporting.
   task(name='server', action=RunServer, serialize=False).install().with_description(
       'Run the pants reporting server.')
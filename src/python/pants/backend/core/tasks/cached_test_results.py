@@ -0,0 +1,132 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+from abc import abstractmethod
+from hashlib import sha1
+
+from pants.base.exceptions import TaskError
+from pants.base.fingerprint_strategy import FingerprintStrategy
+from pants.util.dirutil import safe_rmtree
+from pants.util.meta import AbstractClass
+
+
+class TestResultsFingerprintStrategy(FingerprintStrategy):
+  """Fingerprints targets for deciding whether the tests that depend on them must run again.
+
+  Each target's payload fingerprint is combined with a fingerprint of the environment the tests
+  run in, e.g., their jvm options or interpreter. Subclasses may also mix in what a target resolved
+  to, for targets whose payload alone doesn't pin that down, e.g., a jar with a dynamic revision.
+  """
+
+  def __init__(self, environment_fingerprint):
+    """
+    :param string environment_fingerprint: A fingerprint of everything besides the targets
+      themselves that can affect the outcome of their tests.
+    """
+    self._environment_fingerprint = environment_fingerprint
+
+  def resolved_fingerprint(self, target):
+    """Returns a fingerprint of what the target resolved to in this run, or None.
+
+    Subclasses override this for the target types whose resolution can change while their payload
+    does not.
+    """
+    return None
+
+  def compute_fingerprint(self, target):
+    fingerprint = target.payload.fingerprint()
+    resolved_fingerprint = self.resolved_fingerprint(target)
+    if fingerprint is None and resolved_fingerprint is None:
+      return None
+    hasher = sha1()
+    hasher.update(self._environment_fingerprint.encode('utf-8'))
+    hasher.update(fingerprint or b'')
+    hasher.update(resolved_fingerprint or b'')
+    return hasher.hexdigest()
+
+  def __hash__(self):
+    return hash((type(self), self._environment_fingerprint))
+
+  def __eq__(self, other):
+    return (type(self) == type(other) and
+            self._environment_fingerprint == other._environment_fingerprint)
+
+
+class CachedTestResultsMixin(AbstractClass):
+  """A mixin for test tasks that can skip the targets whose tests already passed.
+
+  A test target is skipped if its tests passed in a previous run, or in a run whose results are in
+  the artifact cache, and neither it, nor anything it depends on, nor the environment its tests run
+  in, has changed since. The results of passing targets are saved in per-target results dirs, and
+  cached as their artifacts, so that the results of skipped targets can still be reported.
+  """
+
+  @classmethod
+  def register_options(cls, register):
+    super(CachedTestResultsMixin, cls).register_options(register)
+    register('--cache-results', action='store_true',
+             help='Skip test targets whose tests passed in a previous run, or in a run whose '
+                  'results are in the artifact cache, when neither they nor anything they depend '
+                  'on have changed since.')
+
+  @abstractmethod
+  def test_results_fingerprint_strategy(self, targets):
+    """Returns the TestResultsFingerprintStrategy to invalidate the given test targets with."""
+
+  def results_dir(self, target):
+    """Returns the directory the results of the given test target are saved in."""
+    return os.path.join(self.workdir, 'results', target.id)
+
+  def results_files(self, target):
+    """Returns the paths of the saved results of the given test target."""
+    results_dir = self.results_dir(target)
+    if not os.path.isdir(results_dir):
+      return []
+    return [os.path.join(results_dir, name) for name in sorted(os.listdir(results_dir))]
+
+  def run_tests_with_cached_results(self, targets, run_tests):
+    """Runs the tests of just those targets that haven't passed since they, or their deps, changed.
+
+    :param list targets: The test targets.
+    :param run_tests: A function that runs the tests of the list of targets it's passed, saves
+      the results of each target that it ran to completion in `results_dir(target)`, and raises a
+      TaskError naming the failed targets if any failed. A target counts as passed if it did not
+      fail and has saved results.
+    :returns: The targets that were skipped.
+    """
+    with self.invalidated(targets,
+                          invalidate_dependents=True,
+                          partition_size_hint=0,
+                          fingerprint_strategy=self.test_results_fingerprint_strategy(targets)
+                          ) as invalidation_check:
+      invalid_vts = invalidation_check.invalid_vts
+      invalid_targets = set(vt.target for vt in invalid_vts)
+      skipped_targets = [target for target in targets if target not in invalid_targets]
+      if skipped_targets:
+        self.context.log.info('Skipping {} test targets that already passed.'
+                              .format(len(skipped_targets)))
+      if invalid_vts:
+        for vt in invalid_vts:
+          safe_rmtree(self.results_dir(vt.target))
+        try:
+          run_tests([vt.target for vt in invalid_vts])
+        except TaskError as e:
+          self._record_passed(invalid_vts, failed_targets=e.failed_targets)
+          raise
+        self._record_passed(invalid_vts, failed_targets=())
+    return skipped_targets
+
+  def _record_passed(self, invalid_vts, failed_targets):
+    failed_targets = set(failed_targets)
+    passed = [(vt, self.results_files(vt.target)) for vt in invalid_vts
+              if vt.target not in failed_targets]
+    passed = [(vt, results_files) for vt, results_files in passed if results_files]
+    for vt, _ in passed:
+      vt.update()
+    if passed and self.artifact_cache_writes_enabled():
+      self.update_artifact_cache(passed)
@@ -6,10 +6,14 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+from collections import OrderedDict
 
 from pants.backend.core.tasks.task import Task
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
+from pants.cache.content_addressed_artifact_cache import BLOB_DIR, collect_garbage
+from pants.goal.goal import Goal
+from pants.option.options import Options
 from pants.util.dirutil import safe_rmtree
 
 
@@ -32,3 +36,36 @@ class Cleaner(Task):
   """Clean all current build products."""
   def execute(self):
     _cautious_rmtree(self.get_options().pants_workdir)
+
+
+class ArtifactCacheGarbageCollector(Task):
+  """Collect garbage in content-addressed local artifact caches, evicting artifacts as needed.
+
+  Collects the local caches among the read and write artifact caches configured for any task,
+  evicting the least recently used artifacts from those larger than their configured maximum size.
+  A store configured with several maximum sizes is held to the smallest.
+  """
+  def _scopes(self):
+    yield Options.GLOBAL_SCOPE
+    for goal in Goal.all():
+      for scope in goal.known_scopes():
+        yield scope
+
+  def execute(self):
+    max_size_bytes_by_store_root = OrderedDict()
+    for scope in self._scopes():
+      options = self.context.options.for_scope(scope)
+      max_size_bytes = options.local_artifact_cache_max_size_mb * 1024 * 1024
+      for spec in (options.read_artifact_caches or []) + (options.write_artifact_caches or []):
+        for path in spec.split('|'):
+          if path.startswith('/') or path.startswith('~'):
+            store_root = os.path.realpath(os.path.expanduser(path))
+            if os.path.isdir(os.path.join(store_root, BLOB_DIR)):
+              sizes = filter(None, [max_size_bytes_by_store_root.get(store_root), max_size_bytes])
+              max_size_bytes_by_store_root[store_root] = min(sizes) if sizes else 0
+
+    for store_root, max_size_bytes in max_size_bytes_by_store_root.items():
+      gc = collect_garbage(store_root, max_size_bytes)
+      self.context.log.info('Collected {} artifacts and {} blobs ({} bytes) from {}, leaving {} '
+                            'bytes.'.format(gc.manifests_deleted, gc.blobs_deleted, gc.bytes_freed,
+                                            store_root, gc.bytes_kept))
@@ -0,0 +1,34 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import heapq
+
+from six.moves import range
+
+
+def shard_by_duration(items, durations, num_shards):
+  """Splits items into at most num_shards lists with total durations as even as possible.
+
+  Items are assigned longest first, each to the shard with the least total duration so far. Items
+  with no known duration are assumed to take as long as the mean known duration.
+
+  :param list items: The items to split, e.g. tests.
+  :param dict durations: {item: seconds} for the items whose duration is known.
+  :param int num_shards: The maximum number of shards to split into.
+  :returns: A list of non-empty lists of items.
+  """
+  known = [durations[item] for item in items if item in durations]
+  default_duration = sum(known) / len(known) if known else 1.0
+  # Ties are broken by the items themselves, so that the same history always yields the same shards.
+  by_duration = sorted(items, key=lambda item: (-durations.get(item, default_duration), item))
+
+  shards = [(0.0, i, []) for i in range(min(num_shards, len(items)))]
+  for item in by_duration:
+    total, i, shard = heapq.heappop(shards)
+    shard.append(item)
+    heapq.heappush(shards, (total + durations.get(item, default_duration), i, shard))
+  return [shard for _, _, shard in sorted(shards, key=lambda entry: entry[1])]
@@ -14,11 +14,14 @@ from contextlib import contextmanager
 
 from twitter.common.collections.orderedset import OrderedSet
 
-from pants.base.build_invalidator import BuildInvalidator, CacheKeyGenerator
+from pants.base.build_invalidator import (BuildInvalidator, CacheKeyGenerator,
+                                          IndexedBuildInvalidator)
 from pants.base.cache_manager import InvalidationCacheManager, InvalidationCheck
 from pants.base.exceptions import TaskError
 from pants.base.worker_pool import Work
-from pants.cache.artifact_cache import UnreadableArtifact, call_insert, call_use_cached_files
+from pants.cache.artifact_cache import (UnreadableArtifact, call_insert, call_use_cached_files,
+                                        call_with_metrics)
+from pants.cache.artifact_cache_metrics import ArtifactCacheMetrics
 from pants.cache.cache_setup import create_artifact_cache
 from pants.cache.read_write_artifact_cache import ReadWriteArtifactCache
 from pants.reporting.reporting_utils import items_to_report_element
@@ -173,6 +176,7 @@ class TaskBase(AbstractClass):
       self.context.options.for_global_scope().pants_workdir,
       'build_invalidator',
       self.__class__.__name__)
+    self._build_invalidator = None
 
   def get_options(self):
     """Returns the option values for this task's scope."""
@@ -216,15 +220,20 @@ class TaskBase(AbstractClass):
   def _create_artifact_cache(self, spec, action):
     if len(spec) > 0:
       pants_workdir = self.context.options.for_global_scope().pants_workdir
-      compression = self.get_options().cache_compression
+      options = self.get_options()
       my_name = self.__class__.__name__
       return create_artifact_cache(
         log=self.context.log,
         artifact_root=pants_workdir,
         spec=spec,
         task_name=my_name,
-        compression=compression,
-        action=action)
+        compression=options.cache_compression,
+        action=action,
+        max_concurrent_reads=options.cache_max_concurrent_reads,
+        local_layout=options.local_artifact_cache_layout,
+        local_max_size_bytes=options.local_artifact_cache_max_size_mb * 1024 * 1024,
+        local_hardlinks=options.local_artifact_cache_hardlinks,
+        artifact_format=options.cache_artifact_format)
     else:
       return None
 
@@ -252,9 +261,19 @@ class TaskBase(AbstractClass):
     """
     return []
 
+  def _get_build_invalidator(self):
+    # Shared by all of this task's cache managers, so that an indexed invalidator's in-memory view
+    # of its entries is never stale.
+    if self._build_invalidator is None:
+      if self.context.options.for_global_scope().build_invalidator_layout == 'indexed':
+        self._build_invalidator = IndexedBuildInvalidator(self._build_invalidator_dir)
+      else:
+        self._build_invalidator = BuildInvalidator(self._build_invalidator_dir)
+    return self._build_invalidator
+
   def invalidate(self):
     """Invalidates all targets for this task."""
-    BuildInvalidator(self._build_invalidator_dir).force_invalidate_all()
+    self._get_build_invalidator().force_invalidate_all()
 
   def create_cache_manager(self, invalidate_dependents, fingerprint_strategy=None):
     """Creates a cache manager that can be used to invalidate targets on behalf of this task.
@@ -270,7 +289,9 @@ class TaskBase(AbstractClass):
     return InvalidationCacheManager(self._cache_key_generator,
                                     self._build_invalidator_dir,
                                     invalidate_dependents,
-                                    fingerprint_strategy=fingerprint_strategy)
+                                    fingerprint_strategy=fingerprint_strategy,
+                                    build_invalidator=self._get_build_invalidator(),
+                                    build_graph=self.context.build_graph)
 
   @contextmanager
   def invalidated(self,
@@ -363,9 +384,13 @@ class TaskBase(AbstractClass):
         self.context.log.info(*msg_elements)
 
     # Yield the result, and then mark the targets as up to date.
-    yield invalidation_check
-    for vt in invalidation_check.invalid_vts:
-      vt.update()  # In case the caller doesn't update.
+    try:
+      yield invalidation_check
+      for vt in invalidation_check.invalid_vts:
+        vt.update()  # In case the caller doesn't update.
+    finally:
+      # Persist whatever partial progress the caller marked valid, even on failure.
+      cache_manager.flush()
 
   def check_artifact_cache_for(self, invalidation_check):
     """Decides which VTS to check the artifact cache for.
@@ -396,9 +421,11 @@ class TaskBase(AbstractClass):
     uncached_vts = OrderedSet(vts)
 
     cache = self.get_artifact_cache()
-    items = [(cache, vt.cache_key) for vt in vts]
-
-    res = self.context.subproc_map(call_use_cached_files, items)
+    if cache.batches_reads():
+      res = cache.use_cached_files_many([vt.cache_key for vt in vts])
+    else:
+      items = [(cache, vt.cache_key) for vt in vts]
+      res = self._subproc_map_with_metrics(call_use_cached_files, items)
 
     for vt, was_in_cache in zip(vts, res):
       if was_in_cache:
@@ -455,10 +482,19 @@ class TaskBase(AbstractClass):
         overwrite = always_overwrite or vts.cache_key in self._cache_key_errors
         args_tuples.append((cache, vts.cache_key, artifactfiles, overwrite))
 
-      return Work(lambda x: self.context.subproc_map(call_insert, x), [(args_tuples,)], 'insert')
+      return Work(lambda x: self._subproc_map_with_metrics(call_insert, x), [(args_tuples,)],
+                  'insert')
     else:
       return None
 
+  def _subproc_map_with_metrics(self, f, items):
+    """Maps an artifact cache helper over items in subprocesses, keeping the metrics they record."""
+    results = self.context.subproc_map(call_with_metrics, [(f, item) for item in items])
+    metrics = ArtifactCacheMetrics.instance()
+    for _, snapshot in results:
+      metrics.merge(snapshot)
+    return [res for res, _ in results]
+
   def _report_targets(self, prefix, targets, suffix):
     self.context.log.info(
       prefix,
@@ -6,13 +6,19 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import errno
+import hashlib
 import logging
+import marshal
 import os
 import pkgutil
+import shutil
 import threading
-import xml
+import time
+import uuid
+import xml.etree.ElementTree as ET
 from collections import OrderedDict, defaultdict, namedtuple
 from contextlib import contextmanager
+from StringIO import StringIO
 
 from twitter.common.collections import OrderedSet, maybe_list
 
@@ -24,7 +30,8 @@ from pants.base.generator import Generator, TemplateData
 from pants.base.revision import Revision
 from pants.base.target import Target
 from pants.ivy.bootstrapper import Bootstrapper
-from pants.util.dirutil import safe_mkdir, safe_open
+from pants.util.dirutil import safe_mkdir, safe_open, safe_rmtree
+from pants.util.fileutil import atomic_copy, atomic_write, modified_within_racy_window, stat_key
 
 
 IvyArtifact = namedtuple('IvyArtifact', ['path', 'classifier'])
@@ -43,6 +50,9 @@ class IvyModuleRef(object):
   def __eq__(self, other):
     return self.org == other.org and self.name == other.name and self.rev == other.rev
 
+  def __ne__(self, other):
+    return not self.__eq__(other)
+
   def __hash__(self):
     return hash((self.org, self.name, self.rev))
 
@@ -66,6 +76,10 @@ class IvyInfo(object):
     self._deps_by_caller = defaultdict(OrderedSet)
     # Map from _unversioned_ ref to OrderedSet of IvyArtifact instances.
     self._artifacts_by_ref = defaultdict(OrderedSet)
+    # Map from ref to the OrderedSet of refs it transitively depends on, including itself.
+    self._closure_by_ref = {}
+    # Map from (ref, classifiers) to the transitive artifacts of ref with those classifiers.
+    self._artifacts_by_closure = {}
 
   def add_module(self, module):
     self.modules_by_ref[module.ref] = module
@@ -75,6 +89,56 @@ class IvyInfo(object):
     for caller in module.callers:
       self._deps_by_caller[caller.unversioned].add(module.ref)
     self._artifacts_by_ref[module.ref.unversioned].update(module.artifacts)
+    self._closure_by_ref.clear()
+    self._artifacts_by_closure.clear()
+
+  def transitive_closure(self, ref):
+    """Returns the refs ref transitively depends on, including ref itself, as an OrderedSet.
+
+    Refs appear in depth-first pre-order, the order `traverse_dependency_graph` collects them in.
+    Closures are indexed as they are computed, so repeated lookups just return the stored result.
+    Callers must not modify the returned set.
+    """
+    closure = self._closure_by_ref.get(ref)
+    if closure is None:
+      closure = OrderedSet()
+      stack = [ref]
+      while stack:
+        current = stack.pop()
+        if current in closure:
+          # Ivy allows for circular dependencies.
+          continue
+        closure.add(current)
+        stack.extend(reversed(self._deps_by_caller.get(current.unversioned, ())))
+      self._closure_by_ref[ref] = closure
+    return closure
+
+  def _transitive_artifacts(self, ref, classifiers):
+    key = (ref, classifiers)
+    artifacts = self._artifacts_by_closure.get(key)
+    if artifacts is None:
+      artifacts = [artifact for module_ref in self.transitive_closure(ref)
+                   for artifact in self._artifacts_by_ref.get(module_ref.unversioned, ())
+                   if artifact.classifier in classifiers]
+      self._artifacts_by_closure[key] = artifacts
+    return artifacts
+
+  def to_tuples(self):
+    """Returns the modules of this IvyInfo as nested tuples of strings, for serialization."""
+    return tuple((module.ref.org, module.ref.name, module.ref.rev,
+                  tuple((artifact.path, artifact.classifier) for artifact in module.artifacts),
+                  tuple((caller.org, caller.name, caller.rev) for caller in module.callers))
+                 for module in self.modules_by_ref.values())
+
+  @classmethod
+  def from_tuples(cls, modules):
+    """Returns the IvyInfo of modules, as returned by `to_tuples`."""
+    ret = cls()
+    for org, name, rev, artifacts, callers in modules:
+      ret.add_module(IvyModule(IvyModuleRef(org, name, rev),
+                               [IvyArtifact(path, classifier) for path, classifier in artifacts],
+                               [IvyModuleRef(*caller) for caller in callers]))
+    return ret
 
   def traverse_dependency_graph(self, ref, collector, memo=None, visited=None):
     """Traverses module graph, starting with ref, collecting values for each ref into the sets
@@ -109,7 +173,7 @@ class IvyInfo(object):
     memo[ref] = acc
     return acc
 
-  def get_artifacts_for_jar_library(self, jar_library, memo=None):
+  def get_artifacts_for_jar_library(self, jar_library):
     """Collects IvyArtifact instances for the passed jar_library.
 
     Because artifacts are only fetched for the "winning" version of a module, the artifacts
@@ -118,38 +182,25 @@ class IvyInfo(object):
     This method is transitive within the library's jar_dependencies, but will NOT
     walk into its non-jar dependencies.
 
+    Lookups are memoized by the IvyInfo itself.
+
     :param jar_library A JarLibrary to collect the transitive artifacts for.
-    :param memo see `traverse_dependency_graph`
     """
     artifacts = OrderedSet()
-    def create_collection(dep):
-      return OrderedSet([dep])
     for jar in jar_library.jar_dependencies:
       jar_module_ref = IvyModuleRef(jar.org, jar.name, jar.rev)
-      valid_classifiers = jar.artifact_classifiers
-      artifacts_for_jar = []
-      for module_ref in self.traverse_dependency_graph(jar_module_ref, create_collection, memo):
-        artifacts_for_jar.extend(
-          artifact for artifact in self._artifacts_by_ref[module_ref.unversioned]
-          if artifact.classifier in valid_classifiers
-        )
-
-      artifacts.update(artifacts_for_jar)
+      artifacts.update(self._transitive_artifacts(jar_module_ref,
+                                                  frozenset(jar.artifact_classifiers)))
     return artifacts
 
-  def get_jars_for_ivy_module(self, jar, memo=None):
-    """Collects dependency references of the passed jar
+  def get_jars_for_ivy_module(self, jar):
+    """Collects dependency references of the passed jar, memoized by the IvyInfo itself.
+
     :param jar an IvyModuleRef for a third party dependency.
-    :param memo see `traverse_dependency_graph`
     """
 
     ref = IvyModuleRef(jar.org, jar.name, jar.rev)
-    def create_collection(dep):
-      s = OrderedSet()
-      if ref != dep:
-        s.add(dep)
-      return s
-    return self.traverse_dependency_graph(ref, create_collection, memo)
+    return OrderedSet(dep for dep in self.transitive_closure(ref) if dep != ref)
 
 
 class IvyUtils(object):
@@ -254,35 +305,149 @@ class IvyUtils(object):
 
     return cls._parse_xml_report(path)
 
+  # Bump this to discard all previously persisted report graphs.
+  IVY_INFO_VERSION = 1
+
+  _ivy_info_by_report = {}
+  _ivy_info_lock = threading.Lock()
+
+  # The element paths, below the root, of the elements of interest in a report.
+  _MODULE_PATH = ('dependencies', 'module')
+  _REVISION_PATH = _MODULE_PATH + ('revision',)
+  _CALLER_PATH = _REVISION_PATH + ('caller',)
+  _ARTIFACT_PATH = _REVISION_PATH + ('artifacts', 'artifact')
+
   @classmethod
   def _parse_xml_report(cls, path):
-    if not os.path.exists(path):
+    """Returns the IvyInfo for the report at path, or None if there is no report.
+
+    Parsed reports are memoized for the life of the process, and their graphs are persisted next to
+    the report, so that a report is parsed at most once while it is unchanged.
+    """
+    try:
+      stat = os.stat(path)
+    except OSError:
       return None
+    key = cls._report_key(stat)
+
+    with cls._ivy_info_lock:
+      memoized = cls._ivy_info_by_report.get(path)
+    if memoized and memoized[0] == key:
+      return memoized[1]
+
+    graph_path = path + '.ivyinfo'
+    ret = cls._read_ivy_info(graph_path, key)
+    if ret is None:
+      parsed_at = time.time()
+      ret = cls._iterparse_xml_report(path)
+      if not modified_within_racy_window(stat.st_mtime, parsed_at):
+        cls._write_ivy_info(graph_path, key, ret)
+
+    with cls._ivy_info_lock:
+      cls._ivy_info_by_report[path] = (key, ret)
+    return ret
 
+  @classmethod
+  def _report_key(cls, stat):
+    return (cls.IVY_INFO_VERSION,) + stat_key(stat)
+
+  @classmethod
+  def _iterparse_xml_report(cls, path):
+    """Parses the report at path in a single streaming pass, discarding each module once read."""
     ret = IvyInfo()
-    etree = xml.etree.ElementTree.parse(path)
-    doc = etree.getroot()
-    for module in doc.findall('dependencies/module'):
-      org = module.get('organisation')
-      name = module.get('name')
-      for revision in module.findall('revision'):
-        rev = revision.get('name')
-        artifacts = []
-        for artifact in revision.findall('artifacts/artifact'):
-          artifacts.append(IvyArtifact(path=artifact.get('location'),
-                                       classifier=artifact.get('extra-classifier')))
-        callers = []
-        for caller in revision.findall('caller'):
-          callers.append(IvyModuleRef(caller.get('organisation'),
-                                      caller.get('name'),
-                                      caller.get('callerrev')))
-        ret.add_module(IvyModule(IvyModuleRef(org, name, rev), artifacts, callers))
+    tags = []
+    org = name = rev = None
+    artifacts = callers = None
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+      if event == 'start':
+        tags.append(elem.tag)
+        element_path = tuple(tags[1:])
+        if element_path == cls._MODULE_PATH:
+          org = elem.get('organisation')
+          name = elem.get('name')
+        elif element_path == cls._REVISION_PATH:
+          rev = elem.get('name')
+          artifacts = []
+          callers = []
+        elif element_path == cls._CALLER_PATH:
+          callers.append(IvyModuleRef(elem.get('organisation'),
+                                      elem.get('name'),
+                                      elem.get('callerrev')))
+        elif element_path == cls._ARTIFACT_PATH:
+          artifacts.append(IvyArtifact(path=elem.get('location'),
+                                       classifier=elem.get('extra-classifier')))
+      else:
+        element_path = tuple(tags[1:])
+        if element_path == cls._REVISION_PATH:
+          ret.add_module(IvyModule(IvyModuleRef(org, name, rev), artifacts, callers))
+        elif element_path == cls._MODULE_PATH:
+          elem.clear()
+        tags.pop()
     return ret
 
+  @staticmethod
+  def _read_ivy_info(graph_path, key):
+    try:
+      with open(graph_path, 'rb') as fp:
+        persisted_key, modules = marshal.load(fp)
+    except (IOError, EOFError, ValueError, TypeError):
+      # A missing or corrupt graph is just a cold one.
+      return None
+    if persisted_key != key:
+      return None
+    return IvyInfo.from_tuples(modules)
+
+  @staticmethod
+  def _write_ivy_info(graph_path, key, ivy_info):
+    try:
+      with atomic_write(graph_path, 'wb') as fp:
+        marshal.dump((key, ivy_info.to_tuples()), fp)
+    except (IOError, OSError) as e:
+      # The report dir may not be writable, e.g., a shared read-only ivy cache.
+      logger.debug('Failed to persist the graph of ivy report {}: {}'.format(graph_path, e))
+
   @classmethod
   def generate_ivy(cls, targets, jars, excludes, ivyxml, confs):
     org, name = cls.identify(targets)
+    safe_mkdir(os.path.dirname(ivyxml))
+    with open(ivyxml, 'w') as output:
+      cls._write_ivy_xml(org, name, jars, excludes, confs, output)
 
+  @classmethod
+  def resolution_fingerprint(cls, jars, excludes, confs, ivy_settings=None, args=()):
+    """Returns a fingerprint of the resolve of the given jars, whichever targets they came from.
+
+    The fingerprint covers the ivy.xml for the jars, with the targets' module identity left out and
+    the jars and excludes sorted, the contents of the ivy settings file and any extra ivy args.
+
+    Returns None if the resolve isn't reproducible, because some jar is mutable or has a dynamic
+    revision, so its resolved classpath may change without the fingerprint changing.
+    """
+    jars = list(jars)
+    if any(cls._is_mutable(jar) or cls._is_dynamic_rev(jar.rev) for jar in jars):
+      return None
+
+    hasher = hashlib.sha1()
+    ivy_xml = StringIO()
+    cls._write_ivy_xml('internal', 'resolution', sorted(jars),
+                       sorted(excludes, key=lambda exclude: (exclude.org, exclude.name or '')),
+                       sorted(confs), ivy_xml)
+    hasher.update(ivy_xml.getvalue().encode('utf-8'))
+    if ivy_settings and os.path.exists(ivy_settings):
+      with open(ivy_settings, 'rb') as fp:
+        hasher.update(fp.read())
+    for arg in args:
+      hasher.update(b'\0')
+      hasher.update(arg.encode('utf-8'))
+    return hasher.hexdigest()
+
+  @staticmethod
+  def _is_dynamic_rev(rev):
+    # E.g., latest.integration, 1.0+ and version ranges like [1.0,2.0).
+    return rev.startswith('latest.') or rev.endswith('+') or any(c in rev for c in '[]()')
+
+  @classmethod
+  def _write_ivy_xml(cls, org, name, jars, excludes, confs, output):
     # As it turns out force is not transitive - it only works for dependencies pants knows about
     # directly (declared in BUILD files - present in generated ivy.xml). The user-level ivy docs
     # don't make this clear [1], but the source code docs do (see isForce docs) [2]. I was able to
@@ -308,12 +473,10 @@ class IvyUtils(object):
         excludes=excludes,
         overrides=overrides)
 
-    safe_mkdir(os.path.dirname(ivyxml))
-    with open(ivyxml, 'w') as output:
-      generator = Generator(pkgutil.get_data(__name__, cls.IVY_TEMPLATE_PATH),
-                            root_dir=get_buildroot(),
-                            lib=template_data)
-      generator.write(output)
+    generator = Generator(pkgutil.get_data(__name__, cls.IVY_TEMPLATE_PATH),
+                          root_dir=get_buildroot(),
+                          lib=template_data)
+    generator.write(output)
 
   @classmethod
   def calculate_classpath(cls, targets):
@@ -402,3 +565,82 @@ class IvyUtils(object):
         artifacts=jar.artifacts,
         configurations=maybe_list(confs))
     return template
+
+
+class IvyResolutionCache(object):
+  """Caches the results of ivy resolves by their IvyUtils.resolution_fingerprint.
+
+  An entry holds the raw classpath ivy resolved, with paths into the ivy cache, and the xml report
+  for each conf resolved. Restoring an entry writes them where a resolve would have, so that
+  equivalent resolves for different target roots, or in different workspaces sharing an ivy cache,
+  need not start ivy at all. The symlink map is rebuilt from the restored raw classpath.
+
+  Entries are written to a temporary dir and renamed into place, so a cache may be shared by
+  concurrent pants runs.
+  """
+
+  _CLASSPATH_FILE = 'classpath.raw'
+
+  def __init__(self, cache_dir):
+    """
+    :param string cache_dir: The directory holding the entries. Created on demand.
+    """
+    self._cache_dir = cache_dir
+
+  def _report_file(self, conf):
+    return 'report-{}.xml'.format(conf)
+
+  def restore(self, fingerprint, raw_classpath_path, report_paths):
+    """Restores the entry for the fingerprint, if any, returning True if it was restored.
+
+    An entry whose classpath refers to jars no longer in the ivy cache is not restored.
+
+    :param string fingerprint: The resolution fingerprint.
+    :param string raw_classpath_path: Where to write the raw classpath.
+    :param dict report_paths: The path to write the report to, keyed by conf.
+    """
+    entry_dir = os.path.join(self._cache_dir, fingerprint)
+    classpath_file = os.path.join(entry_dir, self._CLASSPATH_FILE)
+    if not os.path.exists(classpath_file):
+      return False
+    report_files = dict((conf, os.path.join(entry_dir, self._report_file(conf)))
+                        for conf in report_paths)
+    if not all(os.path.exists(report_file) for report_file in report_files.values()):
+      return False
+    with IvyUtils.cachepath(classpath_file) as classpath:
+      if not all(os.path.exists(path) for path in classpath):
+        return False
+
+    self._copy(classpath_file, raw_classpath_path)
+    for conf, report_path in report_paths.items():
+      self._copy(report_files[conf], report_path)
+    return True
+
+  def store(self, fingerprint, raw_classpath_path, report_paths):
+    """Stores the results of a resolve under the fingerprint.
+
+    :param string fingerprint: The resolution fingerprint.
+    :param string raw_classpath_path: The raw classpath ivy resolved.
+    :param dict report_paths: The path of the report ivy generated, keyed by conf.
+    """
+    entry_dir = os.path.join(self._cache_dir, fingerprint)
+    if os.path.exists(entry_dir):
+      return
+    tmp_dir = '{}.{}.tmp'.format(entry_dir, uuid.uuid4().hex)
+    safe_mkdir(tmp_dir)
+    try:
+      shutil.copy(raw_classpath_path, os.path.join(tmp_dir, self._CLASSPATH_FILE))
+      for conf, report_path in report_paths.items():
+        shutil.copy(report_path, os.path.join(tmp_dir, self._report_file(conf)))
+      os.rename(tmp_dir, entry_dir)
+    except OSError as e:
+      # Another run may have stored the same resolve concurrently.
+      if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+        raise
+    finally:
+      safe_rmtree(tmp_dir)
+
+  @staticmethod
+  def _copy(src, dst):
+    safe_mkdir(os.path.dirname(dst))
+    atomic_copy(src, dst)
@@ -129,7 +129,6 @@ class IvyResolve(IvyTaskMixin, NailgunTask, JvmToolTaskMixin):
     ivy_jar_products = self._generate_ivy_jar_products(relevant_targets)
     symlink_map = self.context.products.get_data('ivy_resolve_symlink_map')
     for conf in self.confs:
-      ivy_jar_memo = {}
       ivy_info_list = ivy_jar_products[conf]
       if not ivy_info_list:
         continue
@@ -144,7 +143,7 @@ class IvyResolve(IvyTaskMixin, NailgunTask, JvmToolTaskMixin):
           continue
         # Add the artifacts from each dependency module.
         artifact_paths = []
-        for artifact in ivy_info.get_artifacts_for_jar_library(target, memo=ivy_jar_memo):
+        for artifact in ivy_info.get_artifacts_for_jar_library(target):
           artifact_paths.append(symlink_map[artifact.path])
         compile_classpath.add_for_target(target, [(conf, entry) for entry in artifact_paths])
 
@@ -14,7 +14,7 @@ from hashlib import sha1
 
 from twitter.common.collections import maybe_list
 
-from pants.backend.jvm.ivy_utils import IvyUtils
+from pants.backend.jvm.ivy_utils import IvyResolutionCache, IvyUtils
 from pants.backend.jvm.targets.jar_library import JarLibrary
 from pants.backend.jvm.targets.jvm_target import JvmTarget
 from pants.base.cache_manager import VersionedTargetSet
@@ -72,6 +72,10 @@ class IvyTaskMixin(object):
     register('--soft-excludes', action='store_true', default=False, advanced=True,
              help='If a target depends on a jar that is excluded by another target '
                   'resolve this jar anyway')
+    register('--resolution-cache', action='store_true', default=True, advanced=True,
+             help='Reuse the results of an earlier resolve of the same set of jars, excludes and '
+                  'confs, for any targets and in any workspace sharing the ivy cache, instead of '
+                  'running ivy.')
 
   # Protect writes to the global map of jar path -> symlinks to that jar.
   symlink_map_lock = threading.Lock()
@@ -132,22 +136,42 @@ class IvyTaskMixin(object):
       # Note that it's possible for all targets to be valid but for no classpath file to exist at
       # target_classpath_file, e.g., if we previously built a superset of targets.
       if report_missing or invalidation_check.invalid_vts or not os.path.exists(raw_target_classpath_file):
-        args = ['-cachepath', raw_target_classpath_file_tmp] + (custom_args if custom_args else [])
-
-        self.exec_ivy(
-            target_workdir=target_workdir,
-            targets=global_vts.targets,
-            args=args,
-            executor=executor,
-            ivy=ivy,
-            workunit_name=workunit_name,
-            confs=confs)
-
-        if not os.path.exists(raw_target_classpath_file_tmp):
-          raise TaskError('Ivy failed to create classpath file at {}'
-                          .format(raw_target_classpath_file_tmp))
-        shutil.move(raw_target_classpath_file_tmp, raw_target_classpath_file)
-        logger.debug('Moved ivy classfile file to {dest}'.format(dest=raw_target_classpath_file))
+        # A resolve of the same jars may have been done before, for other targets or in another
+        # workspace. If so, we reuse its results rather than running ivy.
+        resolution_fingerprint = None
+        report_paths = dict((conf, IvyUtils.xml_report_path(global_vts.targets, conf))
+                            for conf in report_confs)
+        resolution_cache = IvyResolutionCache(os.path.join(ivy.ivy_cache_dir, 'pants-resolutions'))
+        if self.get_options().resolution_cache:
+          jars, excludes = self._calculate_jars_and_excludes(global_vts.targets)
+          resolution_fingerprint = IvyUtils.resolution_fingerprint(jars, excludes, report_confs,
+                                                                   ivy_settings=ivy.ivy_settings,
+                                                                   args=custom_args or ())
+
+        if resolution_fingerprint and resolution_cache.restore(resolution_fingerprint,
+                                                               raw_target_classpath_file,
+                                                               report_paths):
+          logger.debug('Reused the results of resolve {}'.format(resolution_fingerprint))
+        else:
+          args = ['-cachepath', raw_target_classpath_file_tmp] + list(custom_args or [])
+
+          self.exec_ivy(
+              target_workdir=target_workdir,
+              targets=global_vts.targets,
+              args=args,
+              executor=executor,
+              ivy=ivy,
+              workunit_name=workunit_name,
+              confs=confs)
+
+          if not os.path.exists(raw_target_classpath_file_tmp):
+            raise TaskError('Ivy failed to create classpath file at {}'
+                            .format(raw_target_classpath_file_tmp))
+          shutil.move(raw_target_classpath_file_tmp, raw_target_classpath_file)
+          logger.debug('Moved ivy classfile file to {dest}'.format(dest=raw_target_classpath_file))
+
+          if resolution_fingerprint:
+            resolution_cache.store(resolution_fingerprint, raw_target_classpath_file, report_paths)
 
         if self.artifact_cache_writes_enabled():
           self.update_artifact_cache([(global_vts, [raw_target_classpath_file])])
@@ -255,9 +279,7 @@ class IvyTaskMixin(object):
     ivyxml = os.path.join(target_workdir, 'ivy.xml')
 
     if not jars:
-      jars, excludes = IvyUtils.calculate_classpath(targets)
-      if self.get_options().soft_excludes:
-        excludes = filter(self._exclude_is_not_contained_in_jars(jars), excludes)
+      jars, excludes = self._calculate_jars_and_excludes(targets)
     else:
       excludes = set()
 
@@ -279,6 +301,12 @@ class IvyTaskMixin(object):
       except runner.executor.Error as e:
         raise TaskError(e)
 
+  def _calculate_jars_and_excludes(self, targets):
+    jars, excludes = IvyUtils.calculate_classpath(targets)
+    if self.get_options().soft_excludes:
+      excludes = filter(self._exclude_is_not_contained_in_jars(jars), excludes)
+    return jars, excludes
+
   @staticmethod
   def _exclude_is_not_contained_in_jars(jars):
     """
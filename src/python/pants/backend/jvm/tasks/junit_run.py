@@ -8,6 +8,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import copy
 import fnmatch
 import os
+import shutil
 import sys
 from abc import abstractmethod
 from collections import defaultdict, namedtuple
@@ -16,11 +17,18 @@ from six.moves import range
 from twitter.common.collections import OrderedSet
 
 from pants import binary_util
+from pants.backend.core.tasks.cached_test_results import (CachedTestResultsMixin,
+                                                          TestResultsFingerprintStrategy)
+from pants.backend.core.tasks.duration_sharding import shard_by_duration
+from pants.backend.jvm.targets.jar_library import JarLibrary
 from pants.backend.jvm.targets.java_tests import JavaTests as junit_tests
 from pants.backend.jvm.tasks.jvm_task import JvmTask
 from pants.backend.jvm.tasks.jvm_tool_task_mixin import JvmToolTaskMixin
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
+from pants.base.file_digest_cache import FileDigestCache
+from pants.base.hash_utils import hash_all
+from pants.base.worker_pool import Work, WorkerPool
 from pants.base.workunit import WorkUnit
 from pants.java.jar.shader import Shader
 from pants.java.util import execute_java
@@ -64,6 +72,52 @@ def _classfile_to_classname(cls):
   return clsname
 
 
+def _report_path(report_dir, test):
+  return os.path.join(report_dir, 'TEST-{0}.xml'.format(test))
+
+
+def _hash_strings(strs):
+  return hash_all(s.encode('utf-8') + b'\0' for s in strs)
+
+
+class _JUnitResultsFingerprintStrategy(TestResultsFingerprintStrategy):
+  """Also fingerprints the contents of the jars that each jar library resolved to.
+
+  A jar library's payload doesn't pin down the jars it resolves to when, e.g., a revision is
+  dynamic, or a snapshot is republished.
+  """
+
+  def __init__(self, environment_fingerprint, compile_classpath):
+    super(_JUnitResultsFingerprintStrategy, self).__init__(environment_fingerprint)
+    self._compile_classpath = compile_classpath
+
+  def resolved_fingerprint(self, target):
+    if not isinstance(target, JarLibrary) or self._compile_classpath is None:
+      return None
+    jars = sorted(set(path for _, path in self._compile_classpath.get_for_target(target)
+                      if os.path.isfile(path)))
+    if not jars:
+      return None
+    return _hash_strings(jar + FileDigestCache.digest_file(jar) for jar in jars)
+
+
+def _read_test_durations(report_dir, tests):
+  """Returns {test: seconds} for the tests with a readable XML report in report_dir.
+
+  A test spec may name a single method, as in classname#methodname, in which case the duration of
+  its whole class is used.
+  """
+  durations = {}
+  for test in tests:
+    report = _report_path(report_dir, test.partition('#')[0])
+    if os.path.exists(report):
+      try:
+        durations[test] = float(XmlParser.from_file(report).get_attribute('testsuite', 'time'))
+      except (XmlParser.XmlError, ValueError):
+        pass
+  return durations
+
+
 class _JUnitRunner(object):
   """Helper class to run JUnit tests with or without coverage.
 
@@ -85,6 +139,10 @@ class _JUnitRunner(object):
              help='Run classes without @TestParallel or @TestSerial annotations in parallel.')
     register('--parallel-threads', type=int, default=0,
              help='Number of threads to run tests in parallel. 0 for autoset.')
+    register('--parallel-jvms', type=int, default=1,
+             help='Run test classes in this many concurrent JVMs. Classes are spread across the '
+                  'JVMs by their durations in the XML reports of previous runs. Unlike '
+                  '--parallel-threads, tests in different JVMs share no static state.')
     register('--test-shard',
              help='Subset of tests to run, in the form M/N, 0 <= M < N. '
                   'For example, 1/3 means run tests number 2, 5, 8, 11, ...')
@@ -108,16 +166,20 @@ class _JUnitRunner(object):
     self._tests_to_run = options.test
     self._batch_size = options.batch_size
     self._fail_fast = options.fail_fast
+    self._parallel_jvms = options.parallel_jvms
     self._working_dir = self._pick_working_dir(options.cwd, context)
     self._args = copy.copy(task_exports.args)
+    # The -outdir arg is added per JVM, as concurrent JVMs each write to a directory of their own.
+    self._outdir = None
     if options.xml_report or options.suppress_output:
       if self._fail_fast:
         self._args.append('-fail-fast')
       if options.xml_report:
         self._args.append('-xmlreport')
       self._args.append('-suppress-output')
-      self._args.append('-outdir')
-      self._args.append(task_exports.workdir)
+    # Test results can only be saved if we know where the reports are written.
+    if options.xml_report or options.suppress_output or options.cache_results:
+      self._outdir = task_exports.workdir
 
     if options.per_test_timer:
       self._args.append('-per-test-timer')
@@ -228,6 +290,19 @@ class _JUnitRunner(object):
     else:
       return get_buildroot()
 
+  def test_output_files(self, target):
+    """Returns the paths the tests of the given target write their results to.
+
+    :returns: A (report, stdout, stderr) tuple of paths for each test class of the target. There is
+      no report for a class with no tests, e.g., a helper class.
+    """
+    if not self._outdir:
+      return []
+    return [(_report_path(self._outdir, test),
+             os.path.join(self._outdir, '{0}.out.txt'.format(test)),
+             os.path.join(self._outdir, '{0}.err.txt'.format(test)))
+            for test, _ in self._calculate_tests_from_targets([target])]
+
   def _get_failed_targets(self, tests_and_targets):
     """Return a list of failed targets.
 
@@ -236,16 +311,13 @@ class _JUnitRunner(object):
     :tests_and_targets: {test: target} mapping.
     """
 
-    def get_test_filename(test):
-      return os.path.join(self._task_exports.workdir, 'TEST-{0}.xml'.format(test))
-
     failed_targets = []
 
     for test, target in tests_and_targets.items():
       if target is None:
         self._context.log.warning('Unknown target for test %{0}'.format(test))
 
-      filename = get_test_filename(test)
+      filename = _report_path(self._task_exports.workdir, test)
 
       if os.path.exists(filename):
         try:
@@ -262,30 +334,80 @@ class _JUnitRunner(object):
 
   def _run_tests(self, tests_and_targets, classpath, main, extra_jvm_options=None):
     extra_jvm_options = extra_jvm_options or []
+    tests = tests_and_targets.keys()
+
+    if self._parallel_jvms > 1 and len(tests) > 1:
+      result = self._run_tests_in_parallel_jvms(tests, classpath, main, extra_jvm_options)
+    else:
+      outdir_args = ['-outdir', self._outdir] if self._outdir else []
+      result = self._run_batches(tests, classpath, main, extra_jvm_options, outdir_args)
 
+    if result != 0:
+      failed_targets = self._get_failed_targets(tests_and_targets)
+      raise TaskError(
+        'java {0} ... exited non-zero ({1})'.format(main, result),
+        failed_targets=failed_targets
+      )
+
+  def _run_batches(self, tests, classpath, main, extra_jvm_options, outdir_args,
+                   should_stop=lambda: False):
     result = 0
-    for batch in self._partition(tests_and_targets.keys()):
+    for batch in self._partition(tests):
       with binary_util.safe_args(batch, self._task_exports.task_options) as batch_tests:
         result += abs(execute_java(
           classpath=classpath,
           main=main,
           jvm_options=self._task_exports.jvm_options + extra_jvm_options,
-          args=self._args + batch_tests + [u'-xmlreport'],
+          args=self._args + outdir_args + batch_tests + [u'-xmlreport'],
           workunit_factory=self._context.new_workunit,
           workunit_name='run',
           workunit_labels=[WorkUnit.TEST],
           cwd=self._working_dir
         ))
 
-        if result != 0 and self._fail_fast:
+        if (result != 0 and self._fail_fast) or should_stop():
           break
+    return result
 
-    if result != 0:
-      failed_targets = self._get_failed_targets(tests_and_targets)
-      raise TaskError(
-        'java {0} ... exited non-zero ({1})'.format(main, result),
-        failed_targets=failed_targets
-      )
+  def _run_tests_in_parallel_jvms(self, tests, classpath, main, extra_jvm_options):
+    """Runs the tests spread across concurrent JVMs, each running its share in batches.
+
+    Each JVM writes its reports to a directory of its own, and once all are done the reports are
+    merged into the workdir, where a serial run would have written them, so that failures can be
+    mapped back to targets and durations read by the next run as usual.
+    """
+    workdir = self._task_exports.workdir
+    shards = shard_by_duration(tests, _read_test_durations(workdir, tests), self._parallel_jvms)
+    shard_outdirs = [os.path.join(workdir, 'jvms', str(i)) for i in range(len(shards))]
+    for outdir in shard_outdirs:
+      safe_rmtree(outdir)
+      safe_mkdir(outdir)
+
+    failed = []
+
+    def run_shard(shard, outdir):
+      result = self._run_batches(shard, classpath, main, extra_jvm_options, ['-outdir', outdir],
+                                 should_stop=lambda: self._fail_fast and bool(failed))
+      if result != 0:
+        failed.append(result)
+      return result
+
+    with self._context.new_workunit('parallel-jvms') as workunit:
+      worker_pool = WorkerPool(workunit, self._context.run_tracker, len(shards))
+      try:
+        results = worker_pool.submit_work_and_wait(Work(run_shard, list(zip(shards, shard_outdirs))),
+                                                   workunit_parent=workunit)
+      finally:
+        worker_pool.shutdown()
+        self._merge_reports(shard_outdirs, workdir)
+    return sum(results)
+
+  @staticmethod
+  def _merge_reports(shard_outdirs, outdir):
+    safe_mkdir(outdir)
+    for shard_outdir in shard_outdirs:
+      for name in os.listdir(shard_outdir):
+        os.rename(os.path.join(shard_outdir, name), os.path.join(outdir, name))
 
   def _partition(self, tests):
     stride = min(self._batch_size, len(tests))
@@ -372,6 +494,11 @@ class _Coverage(_JUnitRunner):
   def __init__(self, task_exports, context):
     super(_Coverage, self).__init__(task_exports, context)
     options = task_exports.task_options
+    if self._parallel_jvms > 1:
+      # Concurrent JVMs would clobber each other's writes to the single coverage data file.
+      context.log.warn('Ignoring --parallel-jvms={0}: coverage runs in a single JVM.'
+                       .format(self._parallel_jvms))
+      self._parallel_jvms = 1
     self._coverage = options.coverage
     self._coverage_filters = options.coverage_patterns or []
 
@@ -710,7 +837,7 @@ class Cobertura(_Coverage):
                         " 'failed to report'".format(main, result))
 
 
-class JUnitRun(JvmTask, JvmToolTaskMixin):
+class JUnitRun(CachedTestResultsMixin, JvmTask, JvmToolTaskMixin):
   _MAIN = 'com.twitter.common.junit.runner.ConsoleRunner'
 
   @classmethod
@@ -758,4 +885,65 @@ class JUnitRun(JvmTask, JvmToolTaskMixin):
   def execute(self):
     if not self.get_options().skip:
       targets = self.context.targets()
-      self._runner.execute(targets)
+      options = self.get_options()
+      # Coverage must see all the tests run, and explicitly requested tests must run regardless.
+      if options.cache_results and not isinstance(self._runner, _Coverage) and not options.test:
+        self._execute_with_cached_results(targets)
+      else:
+        self._runner.execute(targets)
+
+  def test_results_fingerprint_strategy(self, targets):
+    environment = (self.jvm_options + self.args + self.confs +
+                   [self.get_options().test_shard or ''] +
+                   [FileDigestCache.digest_file(path) for path in self.tool_classpath('junit')])
+    return _JUnitResultsFingerprintStrategy(_hash_strings(environment),
+                                            self.context.products.get_data('compile_classpath'))
+
+  def _execute_with_cached_results(self, targets):
+    test_targets = [target for target in targets if isinstance(target, junit_tests)]
+
+    def run_tests(invalid_targets):
+      invalid_targets = set(invalid_targets)
+      # Stale results of earlier runs must not be mistaken for results of this run.
+      for target in invalid_targets:
+        for paths in self._runner.test_output_files(target):
+          for path in paths:
+            safe_delete(path)
+      # The other targets stay, as they contribute to the classpath that tests run with.
+      targets_to_run = [target for target in targets
+                        if target in invalid_targets or not isinstance(target, junit_tests)]
+      try:
+        self._runner.execute(targets_to_run)
+      except TaskError:
+        # With --fail-fast, the tests of targets that didn't fail may not have run at all.
+        if not self.get_options().fail_fast:
+          self._save_results(invalid_targets)
+        raise
+      self._save_results(invalid_targets)
+
+    for target in self.run_tests_with_cached_results(test_targets, run_tests):
+      for path in self.results_files(target):
+        shutil.copy(path, self.workdir)
+
+  def _save_results(self, targets):
+    for target in targets:
+      paths = []
+      for report, stdout, stderr in self._runner.test_output_files(target):
+        if os.path.exists(report):
+          if not self._report_passed(report):
+            break
+          paths.extend(path for path in (report, stdout, stderr) if os.path.exists(path))
+      else:
+        if paths:
+          results_dir = self.results_dir(target)
+          safe_mkdir(results_dir)
+          for path in paths:
+            shutil.copy(path, results_dir)
+
+  def _report_passed(self, report):
+    try:
+      xml = XmlParser.from_file(report)
+      return all(int(xml.get_attribute('testsuite', attribute)) == 0
+                 for attribute in ('failures', 'errors'))
+    except (XmlParser.XmlError, ValueError):
+      return False
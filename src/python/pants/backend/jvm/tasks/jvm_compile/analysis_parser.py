@@ -74,6 +74,23 @@ class AnalysisParser(object):
         # Now see if this section is empty or not.
         return self.parse_num_items(infile.next()) > 0
 
+  def write_compact_to_path(self, analysis, outfile_path):
+    """Write an analysis in this parser's compact format.
+
+    Compact files are only for pants' own use, e.g., in artifact cache entries. The default compact
+    format is just the text format.
+    """
+    analysis.write_to_path(outfile_path)
+
+  def rebase_from_path(self, infile_path, outfile_path, rebasings):
+    """Rebase file paths in an analysis file, writing it in the same format it was read in.
+
+    rebasings: A list of path prefix pairs [from_prefix, to_prefix] to rewrite.
+               to_prefix may be None, in which case matching paths are removed entirely.
+    """
+    analysis = self.parse_from_path(infile_path)
+    analysis.write_to_path(outfile_path, rebasings=rebasings)
+
   def parse_from_path(self, infile_path):
     """Parse an analysis instance from a text file."""
     with open(infile_path, 'r') as infile:
@@ -7,6 +7,8 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import os
 import shutil
+import threading
+from collections import OrderedDict
 
 from pants.base.build_environment import get_buildroot
 from pants.util.contextutil import temporary_dir
@@ -38,18 +40,32 @@ class AnalysisTools(object):
     split out to that path.
     """
     analysis = self.parser.parse_from_path(analysis_path)
+    self.split_analysis_to_paths(analysis, split_path_pairs, catchall_path)
+
+  def split_analysis_to_paths(self, analysis, split_path_pairs, catchall_path=None, compact=False):
+    """Split an in-memory analysis, writing the splits out as for `split_to_paths`.
+
+    If compact is True, the splits are written in the parser's compact format, which only pants
+    itself can read.
+    """
     splits, output_paths = zip(*split_path_pairs)
     split_analyses = analysis.split(splits, catchall_path is not None)
     if catchall_path is not None:
       output_paths = output_paths + (catchall_path, )
     for analysis, path in zip(split_analyses, output_paths):
-      analysis.write_to_path(path)
+      if compact:
+        self.parser.write_compact_to_path(analysis, path)
+      else:
+        analysis.write_to_path(path)
 
   def merge_from_paths(self, analysis_paths, merged_analysis_path):
     """Merge multiple analysis files into one."""
     analyses = [self.parser.parse_from_path(path) for path in analysis_paths]
-    merged_analysis = self._analysis_cls.merge(analyses)
-    merged_analysis.write_to_path(merged_analysis_path)
+    self.merge(analyses).write_to_path(merged_analysis_path)
+
+  def merge(self, analyses):
+    """Merge multiple in-memory analyses into one."""
+    return self._analysis_cls.merge(analyses)
 
   def relativize(self, src_analysis, relativized_analysis):
     with temporary_dir() as tmp_analysis_dir:
@@ -86,5 +102,76 @@ class AnalysisTools(object):
     rebasings: A list of path prefix pairs [from_prefix, to_prefix] to rewrite.
                to_prefix may be None, in which case matching paths are removed entirely.
     """
-    analysis = self.parser.parse_from_path(input_analysis_path)
-    analysis.write_to_path(output_analysis_path, rebasings=rebasings)
+    self.parser.rebase_from_path(input_analysis_path, output_analysis_path, rebasings)
+
+
+class AnalysisWriter(object):
+  """Writes analyses to files on a background thread.
+
+  Only the latest analysis given for each path is written: an analysis superseded before its write
+  starts is never written. Each file is replaced atomically, so it's never seen half-written.
+
+  Analyses must not be mutated once given to the writer.
+  """
+
+  def __init__(self):
+    self._cond = threading.Condition()
+    self._pending = OrderedDict()  # path -> analysis.
+    self._writing = None  # The path being written, if any.
+    self._writer_thread = None
+    self._errors = OrderedDict()  # path -> the error from the failed write to it.
+
+  def write(self, analysis, path):
+    """Schedules a write of the analysis to path, replacing any pending write to the same path."""
+    with self._cond:
+      self._pending.pop(path, None)
+      self._pending[path] = analysis
+      if self._writer_thread is None:
+        # Not a daemon, so pending writes complete even if the main thread exits first.
+        self._writer_thread = threading.Thread(target=self._write_pending,
+                                               name='analysis-writer')
+        self._writer_thread.start()
+
+  def flush(self, path=None):
+    """Waits for the scheduled writes to the given path, or if none is given all scheduled writes,
+    to complete.
+
+    Raises the error from any failed write waited for.
+    """
+    with self._cond:
+      while self._is_pending(path):
+        self._cond.wait(1)  # With a timeout, so we can ctrl-c out.
+      if path is None:
+        error = next(iter(self._errors.values()), None)
+        self._errors.clear()
+      else:
+        error = self._errors.pop(path, None)
+    if error:
+      raise error
+
+  def _is_pending(self, path):
+    if path is None:
+      return self._writer_thread is not None
+    return path in self._pending or path == self._writing
+
+  def _write_pending(self):
+    while True:
+      with self._cond:
+        if not self._pending:
+          self._writer_thread = None
+          self._cond.notify_all()
+          return
+        path, analysis = self._pending.popitem(last=False)
+        self._writing = path
+      error = None
+      try:
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        analysis.write_to_path(tmp_path)
+        os.rename(tmp_path, path)
+      except Exception as e:
+        error = e
+      with self._cond:
+        self._writing = None
+        if error:
+          self._errors.setdefault(path, error)
+        self._cond.notify_all()
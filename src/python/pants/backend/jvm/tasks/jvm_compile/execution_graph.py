@@ -0,0 +1,167 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import Queue
+from collections import OrderedDict
+
+from pants.base.worker_pool import Work
+
+
+class Job(object):
+  """A unit of work in an ExecutionGraph.
+
+  :param key: A hashable that uniquely identifies the job, e.g., the target it compiles.
+  :param fn: A callable taking no args, run on a worker thread.
+  :param dependencies: The keys of the jobs that must succeed before this job may run.
+  :param on_success: A callable taking no args, run on the thread executing the graph after `fn`
+                     succeeds and before any dependees of this job are started.
+  :param on_failure: A callable taking no args, run on the thread executing the graph after `fn`
+                     fails.
+  """
+
+  def __init__(self, key, fn, dependencies, on_success=None, on_failure=None):
+    self.key = key
+    self.fn = fn
+    self.dependencies = dependencies
+    self.on_success = on_success
+    self.on_failure = on_failure
+
+  def __repr__(self):
+    return 'Job({!r})'.format(self.key)
+
+
+class ExecutionFailure(Exception):
+  """Raised when any job in an ExecutionGraph fails.
+
+  :param failures: A list of (key, exception) pairs, one per failed job.
+  :param canceled: The keys of the jobs that were never started because of the failures.
+  """
+
+  def __init__(self, failures, canceled):
+    super(ExecutionFailure, self).__init__('Failed jobs: {}{}'.format(
+      ', '.join('{} ({})'.format(key, e) for key, e in failures),
+      '. Canceled {} jobs.'.format(len(canceled)) if canceled else ''))
+    self.failures = failures
+    self.canceled = canceled
+
+
+class ExecutionGraph(object):
+  """A DAG of jobs, each run as soon as all the jobs it depends on have succeeded.
+
+  Jobs run concurrently on a WorkerPool, while their `on_success` and `on_failure` callbacks run
+  serially on the thread executing the graph, so the callbacks may safely update shared state.
+
+  Execution fails fast: once any job fails no further jobs are started, and the graph raises an
+  ExecutionFailure as soon as the jobs already running have finished.
+  """
+
+  class InvalidGraph(Exception):
+    """Indicates a graph with unknown dependencies or cycles."""
+
+  # The number of seconds to wait for a job at a time. We wait with a timeout, because otherwise
+  # python ignores SIGINT when waiting on a condition variable, so we couldn't ctrl-c out.
+  _POLL_SECS = 1
+
+  def __init__(self, jobs):
+    """
+    :param list jobs: The jobs to execute. Jobs with no dependencies between them are started in
+                      this order.
+    """
+    self._jobs = OrderedDict()
+    for job in jobs:
+      if job.key in self._jobs:
+        raise self.InvalidGraph('Duplicate job key: {}'.format(job.key))
+      self._jobs[job.key] = job
+
+    self._dependees = dict((key, []) for key in self._jobs)
+    for job in self._jobs.values():
+      for dep in job.dependencies:
+        if dep not in self._jobs:
+          raise self.InvalidGraph('{} depends on unknown job {}'.format(job.key, dep))
+        self._dependees[dep].append(job.key)
+    self._check_acyclic()
+
+  def _check_acyclic(self):
+    # Kahn's algorithm: the graph is acyclic iff repeatedly removing jobs with no remaining
+    # dependencies eventually removes every job.
+    remaining = dict((key, len(job.dependencies)) for key, job in self._jobs.items())
+    ready = [key for key, count in remaining.items() if count == 0]
+    removed = 0
+    while ready:
+      key = ready.pop()
+      removed += 1
+      for dependee in self._dependees[key]:
+        remaining[dependee] -= 1
+        if remaining[dependee] == 0:
+          ready.append(dependee)
+    if removed != len(self._jobs):
+      cycle = sorted(str(key) for key, count in remaining.items() if count > 0)
+      raise self.InvalidGraph('Cycle among jobs: {}'.format(', '.join(cycle)))
+
+  def execute(self, pool, log):
+    """Runs all jobs on the given WorkerPool, returning once they've all succeeded.
+
+    :param WorkerPool pool: The pool to run jobs on. Its size bounds how many jobs run at once.
+    :param log: A logger for reporting failures, e.g., `context.log`.
+    :raises ExecutionFailure: if any job failed.
+    """
+    finished = Queue.Queue()
+
+    def run(job):
+      try:
+        job.fn()
+        finished.put((job.key, None))
+      except Exception as e:
+        finished.put((job.key, e))
+
+    unfinished_deps = dict((key, len(job.dependencies)) for key, job in self._jobs.items())
+    ready = [key for key in self._jobs if unfinished_deps[key] == 0]
+    started = set()
+    failures = []
+    running = 0
+
+    while True:
+      if not failures:
+        for key in ready:
+          started.add(key)
+          running += 1
+          pool.submit_async_work(Work(run, [(self._jobs[key],)]))
+      ready = []
+
+      if running == 0:
+        break
+
+      key, error = self._next_finished(finished)
+      running -= 1
+      job = self._jobs[key]
+      if error is None:
+        try:
+          if job.on_success:
+            job.on_success()
+        except Exception as e:
+          error = e
+      if error is None:
+        for dependee in self._dependees[key]:
+          unfinished_deps[dependee] -= 1
+          if unfinished_deps[dependee] == 0:
+            ready.append(dependee)
+      else:
+        log.error('{} failed: {}'.format(key, error))
+        failures.append((key, error))
+        if job.on_failure:
+          job.on_failure()
+
+    if failures:
+      canceled = [key for key in self._jobs if key not in started]
+      raise ExecutionFailure(failures, canceled)
+
+  def _next_finished(self, finished):
+    while True:
+      try:
+        return finished.get(timeout=self._POLL_SECS)
+      except Queue.Empty:
+        pass
@@ -85,8 +85,10 @@ class JavaCompile(JvmCompile):
     # to correctly include these files in its analysis.
     self._depfile_folder = os.path.join(self.workdir, 'jmake-depfiles')
 
-  @property
-  def _depfile(self):
+  def _depfile(self, analysis_file):
+    # Isolated compiles may run concurrently, so each target gets a depfile next to its analysis.
+    if self.get_options().strategy == 'isolated':
+      return '{}.depfile'.format(analysis_file)
     safe_mkdir(self._depfile_folder)
     return os.path.join(self._depfile_folder, 'global_depfile')
 
@@ -100,6 +102,7 @@ class JavaCompile(JvmCompile):
 
   def compile(self, args, classpath, sources, classes_output_dir, upstream_analysis, analysis_file):
     relative_classpath = relativize_paths(classpath, self._buildroot)
+    depfile = self._depfile(analysis_file)
     jmake_classpath = self.tool_classpath('jmake')
     args = [
       '-classpath', ':'.join(relative_classpath),
@@ -110,8 +113,8 @@ class JavaCompile(JvmCompile):
     # TODO: This file should always exist for modern jmake installs; this check should
     # be removed via a Task-level identity bump after:
     # https://github.com/pantsbuild/pants/issues/1351
-    if os.path.exists(self._depfile):
-      args.extend(['-depfile', self._depfile])
+    if os.path.exists(depfile):
+      args.extend(['-depfile', depfile])
 
     compiler_classpath = self.tool_classpath('java-compiler')
     args.extend([
@@ -135,7 +138,7 @@ class JavaCompile(JvmCompile):
     args.extend(filtered_args)
 
     args.append('-C-Tdependencyfile')
-    args.append('-C{}'.format(self._depfile))
+    args.append('-C{}'.format(depfile))
 
     args.extend(sources)
     result = self.runjava(classpath=jmake_classpath,
@@ -13,6 +13,7 @@ from collections import defaultdict
 
 from twitter.common.collections import OrderedSet
 
+from pants.backend.jvm.tasks.jvm_compile.analysis_tools import AnalysisWriter
 from pants.backend.jvm.tasks.jvm_compile.jvm_compile_strategy import JvmCompileStrategy
 from pants.backend.jvm.tasks.jvm_compile.jvm_dependency_analyzer import JvmDependencyAnalyzer
 from pants.backend.jvm.tasks.jvm_compile.resource_mapping import ResourceMapping
@@ -20,11 +21,39 @@ from pants.base.build_environment import get_buildroot, get_scm
 from pants.base.exceptions import TaskError
 from pants.base.target import Target
 from pants.base.worker_pool import Work
+from pants.java.jar.jar_index import JarIndex
 from pants.option.options import Options
-from pants.util.contextutil import open_zip, temporary_dir
 from pants.util.dirutil import safe_mkdir, safe_rmtree, safe_walk
 
 
+class _AnalysisHolder(object):
+  """Holds the current in-memory state of an analysis file.
+
+  The file is parsed lazily, on first access. Updates are made in memory and written out to the
+  file in the background by the given AnalysisWriter.
+  """
+
+  def __init__(self, path, parser, writer):
+    self._path = path
+    self._parser = parser
+    self._writer = writer
+    self._loaded = False
+    self._analysis = None
+
+  def get(self):
+    """Returns the current analysis, or None if there is none."""
+    if not self._loaded:
+      if self._parser.is_nonempty_analysis(self._path):
+        self._analysis = self._parser.parse_from_path(self._path)
+      self._loaded = True
+    return self._analysis
+
+  def set(self, analysis):
+    self._analysis = analysis
+    self._loaded = True
+    self._writer.write(analysis, self._path)
+
+
 class JvmCompileGlobalStrategy(JvmCompileStrategy):
   """A strategy for JVM compilation that uses a global classpath and analysis."""
 
@@ -73,6 +102,14 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
     self._analysis_file = os.path.join(self._analysis_dir, 'global_analysis.valid')
     self._invalid_analysis_file = os.path.join(self._analysis_dir, 'global_analysis.invalid')
 
+    # The global analyses are kept in memory for the duration of the task, and only written back to
+    # their files in the background, or when something outside the task needs to read them.
+    self._analysis_writer = AnalysisWriter()
+    self._valid_analysis = _AnalysisHolder(self._analysis_file, self._analysis_parser,
+                                           self._analysis_writer)
+    self._invalid_analysis = _AnalysisHolder(self._invalid_analysis_file, self._analysis_parser,
+                                             self._analysis_writer)
+
     self._target_sources_dir = os.path.join(workdir, 'target_sources')
 
     # A temporary, but well-known, dir in which to munge analysis/dependency files in before
@@ -164,26 +201,19 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
       invalid_sources = list(itertools.chain.from_iterable(invalid_sources_by_target.values()))
       self._deleted_sources = self._compute_deleted_sources()
 
-      self._ensure_analysis_tmpdir()
-      tmpdir = os.path.join(self._analysis_tmpdir, str(uuid.uuid4()))
-      os.mkdir(tmpdir)
-      valid_analysis_tmp = os.path.join(tmpdir, 'valid_analysis')
-      newly_invalid_analysis_tmp = os.path.join(tmpdir, 'newly_invalid_analysis')
-      invalid_analysis_tmp = os.path.join(tmpdir, 'invalid_analysis')
-      if self._analysis_parser.is_nonempty_analysis(self._analysis_file):
+      valid_analysis = self._valid_analysis.get()
+      if valid_analysis:
         with self.context.new_workunit(name='prepare-analysis'):
-          self._analysis_tools.split_to_paths(self._analysis_file,
-              [(invalid_sources + self._deleted_sources, newly_invalid_analysis_tmp)],
-              valid_analysis_tmp)
-          if self._analysis_parser.is_nonempty_analysis(self._invalid_analysis_file):
-            self._analysis_tools.merge_from_paths(
-              [self._invalid_analysis_file, newly_invalid_analysis_tmp], invalid_analysis_tmp)
+          newly_invalid_analysis, valid_analysis = valid_analysis.split(
+              [invalid_sources + self._deleted_sources], catchall=True)
+          invalid_analysis = self._invalid_analysis.get()
+          if invalid_analysis:
+            invalid_analysis = self._analysis_tools.merge([invalid_analysis,
+                                                           newly_invalid_analysis])
           else:
-            invalid_analysis_tmp = newly_invalid_analysis_tmp
-
-          # Now it's OK to overwrite the main analysis files with the new state.
-          self.move(valid_analysis_tmp, self._analysis_file)
-          self.move(invalid_analysis_tmp, self._invalid_analysis_file)
+            invalid_analysis = newly_invalid_analysis
+          self._valid_analysis.set(valid_analysis)
+          self._invalid_analysis.set(invalid_analysis)
     else:
       self._deleted_sources = []
 
@@ -243,6 +273,7 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
     # Find the invalid sources for this chunk.
     invalid_sources_by_target = {t: self._sources_for_target(t) for t in invalid_targets}
 
+    self._ensure_analysis_tmpdir()
     tmpdir = os.path.join(self._analysis_tmpdir, str(uuid.uuid4()))
     os.mkdir(tmpdir)
 
@@ -262,15 +293,17 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
       analysis_file = os.path.join(partition_tmpdir, 'analysis')
       partitions.append((vts, de_duped_sources, analysis_file))
 
-    # Split per-partition files out of the global invalid analysis.
-    if self._analysis_parser.is_nonempty_analysis(self._invalid_analysis_file) and partitions:
+    # Split per-partition files out of the global invalid analysis. These must be written out
+    # before compiling, as the compiler reads them.
+    invalid_analysis = self._invalid_analysis.get()
+    if invalid_analysis and partitions:
       with self.context.new_workunit(name='partition-analysis'):
         splits = [(x[1], x[2]) for x in partitions]
         # We have to pass the analysis for any deleted files through zinc, to give it
         # a chance to delete the relevant class files.
         if splits:
           splits[0] = (splits[0][0] + self._deleted_sources, splits[0][1])
-        self._analysis_tools.split_to_paths(self._invalid_analysis_file, splits)
+        self._analysis_tools.split_analysis_to_paths(invalid_analysis, splits)
 
     # Now compile partitions one by one.
     for partition_index, partition in enumerate(partitions):
@@ -280,7 +313,9 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
       progress_message = 'partition {} of {}'.format(partition_index + 1, len(partitions))
       # We have to treat the global output dir as an upstream element, so compilers can
       # find valid analysis for previous partitions. We use the global valid analysis
-      # for the upstream.
+      # for the upstream, so it must be fully written before the compiler reads it. The invalid
+      # analysis is only read by us, in memory, so its write can go on in the background.
+      self._analysis_writer.flush(self._analysis_file)
       upstream_analysis = ({self._classes_dir: self._analysis_file}
                            if os.path.exists(self._analysis_file) else {})
       compile_vts(vts,
@@ -294,22 +329,20 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
       # No exception was thrown, therefore the compile succeeded and analysis_file is now valid.
       if os.path.exists(analysis_file):  # The compilation created an analysis.
         # Merge the newly-valid analysis with our global valid analysis.
-        new_valid_analysis = analysis_file + '.valid.new'
-        if self._analysis_parser.is_nonempty_analysis(self._analysis_file):
-          with self.context.new_workunit(name='update-upstream-analysis'):
-            self._analysis_tools.merge_from_paths([self._analysis_file, analysis_file],
-                                                  new_valid_analysis)
-        else:  # We need to keep analysis_file around. Background tasks may need it.
-          shutil.copy(analysis_file, new_valid_analysis)
-
-        # Move the merged valid analysis to its proper location.
         # We do this before checking for missing dependencies, so that we can still
         # enjoy an incremental compile after fixing missing deps.
-        self.move(new_valid_analysis, self._analysis_file)
+        with self.context.new_workunit(name='update-upstream-analysis'):
+          new_analysis = self._analysis_parser.parse_from_path(analysis_file)
+          valid_analysis = self._valid_analysis.get()
+          if valid_analysis:
+            self._valid_analysis.set(self._analysis_tools.merge([valid_analysis, new_analysis]))
+          else:
+            self._valid_analysis.set(new_analysis)
 
         # Update the products with the latest classes. Must happen before the
-        # missing dependencies check.
-        register_vts([self.compile_context(t) for t in vts.targets])
+        # missing dependencies check. The partition's own analysis covers exactly these targets,
+        # so we needn't wait for the global analysis to be written.
+        register_vts([self._partition_compile_context(t, analysis_file) for t in vts.targets])
         if self._dep_analyzer:
           # Check for missing dependencies.
           actual_deps = self._analysis_parser.parse_deps_from_path(analysis_file,
@@ -319,18 +352,17 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
 
         # Kick off the background artifact cache write.
         if update_artifact_cache_vts_work:
-          self._write_to_artifact_cache(analysis_file,
+          self._write_to_artifact_cache(new_analysis,
+                                        analysis_file,
                                         vts,
                                         update_artifact_cache_vts_work)
 
-      if self._analysis_parser.is_nonempty_analysis(self._invalid_analysis_file):
+      invalid_analysis = self._invalid_analysis.get()
+      if invalid_analysis:
         with self.context.new_workunit(name='trim-downstream-analysis'):
           # Trim out the newly-valid sources from our global invalid analysis.
-          new_invalid_analysis = analysis_file + '.invalid.new'
-          discarded_invalid_analysis = analysis_file + '.invalid.discard'
-          self._analysis_tools.split_to_paths(self._invalid_analysis_file,
-            [(sources, discarded_invalid_analysis)], new_invalid_analysis)
-          self.move(new_invalid_analysis, self._invalid_analysis_file)
+          _, new_invalid_analysis = invalid_analysis.split([sources], catchall=True)
+          self._invalid_analysis.set(new_invalid_analysis)
 
       # Record the built target -> sources mapping for future use.
       for target, sources in self._sources_for_targets(vts.targets).items():
@@ -340,6 +372,10 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
       # we can safely mark the targets as valid.
       vts.update()
 
+  def post_compile(self):
+    # Make sure the global analysis files are up to date before any other task reads them.
+    self._analysis_writer.flush()
+
   def compute_resource_mapping(self, compile_contexts):
     return ResourceMapping(self._classes_dir)
 
@@ -360,6 +396,9 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
           raise TaskError('Inconsistent analysis file for the global strategy: {} vs {}'.format(
             compile_context.analysis_file, analysis_file))
 
+    if analysis_file == self._analysis_file:
+      self._analysis_writer.flush(self._analysis_file)
+
     classes_by_src_by_context = defaultdict(dict)
     if os.path.exists(analysis_file):
       # Parse the global analysis once.
@@ -392,7 +431,8 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
     # which we got cache hits. We need to strip out this old analysis, to ensure
     # that the new data incoming from the cache doesn't collide with it during the merge.
     sources_to_strip = []
-    if os.path.exists(self._analysis_file):
+    valid_analysis = self._valid_analysis.get()
+    if valid_analysis:
       for target in cached_targets:
         sources_to_strip.extend(self._get_previous_sources_by_target(target))
 
@@ -409,32 +449,31 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
 
     # Merge them into the global analysis.
     if analyses_to_merge:
-      with temporary_dir() as tmpdir:
-        if sources_to_strip:
-          throwaway = os.path.join(tmpdir, 'throwaway')
-          trimmed_analysis = os.path.join(tmpdir, 'trimmed')
-          self._analysis_tools.split_to_paths(self._analysis_file,
-                                          [(sources_to_strip, throwaway)],
-                                          trimmed_analysis)
-        else:
-          trimmed_analysis = self._analysis_file
-        if os.path.exists(trimmed_analysis):
-          analyses_to_merge.append(trimmed_analysis)
-        tmp_analysis = os.path.join(tmpdir, 'analysis')
-        with self.context.new_workunit(name='merge_analysis'):
-          self._analysis_tools.merge_from_paths(analyses_to_merge, tmp_analysis)
-
-        sources_by_cached_target = self._sources_for_targets(cached_targets)
-
-        # Record the cached target -> sources mapping for future use.
-        for target, sources in sources_by_cached_target.items():
-          self._record_previous_sources_by_target(target, sources)
-
-        # Everything's good so move the merged analysis to its final location.
-        if os.path.exists(tmp_analysis):
-          self.move(tmp_analysis, self._analysis_file)
-
-  def _write_to_artifact_cache(self, analysis_file, vts, get_update_artifact_cache_work):
+      with self.context.new_workunit(name='merge_analysis'):
+        analyses = [self._analysis_parser.parse_from_path(path) for path in analyses_to_merge]
+        if valid_analysis:
+          if sources_to_strip:
+            _, valid_analysis = valid_analysis.split([sources_to_strip], catchall=True)
+          analyses.append(valid_analysis)
+        merged_analysis = self._analysis_tools.merge(analyses)
+
+      sources_by_cached_target = self._sources_for_targets(cached_targets)
+
+      # Record the cached target -> sources mapping for future use.
+      for target, sources in sources_by_cached_target.items():
+        self._record_previous_sources_by_target(target, sources)
+
+      # Everything's good so update the global analysis.
+      self._valid_analysis.set(merged_analysis)
+
+  def _partition_compile_context(self, target, analysis_file):
+    """Returns a compile context for a target whose analysis is in the given partition file."""
+    return self.CompileContext(target,
+                               analysis_file,
+                               self._classes_dir,
+                               self._sources_for_target(target))
+
+  def _write_to_artifact_cache(self, analysis, analysis_file, vts, get_update_artifact_cache_work):
     vt_by_target = dict([(vt.target, vt) for vt in vts.versioned_targets])
 
     vts_targets = [t for t in vts.targets if not t.has_label('no_cache')]
@@ -445,15 +484,17 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
     portable_split_analysis_files = [
         JvmCompileStrategy._portable_analysis_for_target(self._analysis_tmpdir, t) for t in vts_targets]
 
-    # Set up args for splitting the analysis into per-target files.
+    # Set up args for splitting the in-memory analysis into per-target files. Only pants reads
+    # the cached analysis back in, so we write it in the compact format, which is smaller, and
+    # cheaper to rebase.
     splits = zip([self._sources_for_target(t) for t in vts_targets], split_analysis_files)
-    splits_args_tuples = [(analysis_file, splits)]
+    splits_args_tuples = [(analysis, splits, None, True)]
 
     # Set up args for rebasing the splits.
     relativize_args_tuples = zip(split_analysis_files, portable_split_analysis_files)
 
     # Compute the classes and resources for each vts.
-    compile_contexts = [self.compile_context(t) for t in vts_targets]
+    compile_contexts = [self._partition_compile_context(t, analysis_file) for t in vts_targets]
     vts_artifactfiles_pairs = []
     classes_by_source_by_context = self.compute_classes_by_source(compile_contexts)
     resources_by_target = self.context.products.get_data('resources_by_target')
@@ -480,7 +521,7 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
     update_artifact_cache_work = get_update_artifact_cache_work(vts_artifactfiles_pairs)
     if update_artifact_cache_work:
       work_chain = [
-        Work(self._analysis_tools.split_to_paths, splits_args_tuples, 'split'),
+        Work(self._analysis_tools.split_analysis_to_paths, splits_args_tuples, 'split'),
         Work(self._analysis_tools.relativize, relativize_args_tuples, 'relativize'),
         update_artifact_cache_work
       ]
@@ -512,6 +553,7 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
     Paths are relative to buildroot.
     """
     with self.context.new_workunit('find-deleted-sources'):
+      self._analysis_writer.flush(self._analysis_file)
       if os.path.exists(self._analysis_file):
         products = self._analysis_parser.parse_products_from_path(self._analysis_file,
                                                                   self._classes_dir)
@@ -551,15 +593,16 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
 
     if self._upstream_class_to_path is None:
       self._upstream_class_to_path = {}
+      # Jar listings are persisted across runs, so we only open jars that changed since.
+      jar_index = JarIndex.for_workdir(self.context.options.for_global_scope().pants_workdir)
       classpath_entries = filter(non_product, classpath)
       for cp_entry in self._find_all_bootstrap_jars() + classpath_entries:
         # Per the classloading spec, a 'jar' in this context can also be a .zip file.
         if os.path.isfile(cp_entry) and ((cp_entry.endswith('.jar') or cp_entry.endswith('.zip'))):
-          with open_zip(cp_entry, 'r') as jar:
-            for cls in jar.namelist():
-              # First jar with a given class wins, just like when classloading.
-              if cls.endswith(b'.class') and not cls in self._upstream_class_to_path:
-                self._upstream_class_to_path[cls] = cp_entry
+          for cls in jar_index.class_files(cp_entry):
+            # First jar with a given class wins, just like when classloading.
+            if not cls in self._upstream_class_to_path:
+              self._upstream_class_to_path[cls] = cp_entry
         elif os.path.isdir(cp_entry):
           for dirpath, _, filenames in safe_walk(cp_entry, followlinks=True):
             for f in filter(lambda x: x.endswith('.class'), filenames):
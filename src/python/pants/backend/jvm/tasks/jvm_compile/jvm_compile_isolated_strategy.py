@@ -5,16 +5,21 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import functools
 import itertools
 import os
 import shutil
+import threading
 import uuid
 from collections import OrderedDict, defaultdict
 
+from pants.backend.jvm.tasks.jvm_compile.execution_graph import (ExecutionFailure, ExecutionGraph,
+                                                                 Job)
 from pants.backend.jvm.tasks.jvm_compile.jvm_compile_strategy import JvmCompileStrategy
 from pants.backend.jvm.tasks.jvm_compile.resource_mapping import ResourceMapping
 from pants.base.build_environment import get_buildroot
-from pants.base.worker_pool import Work
+from pants.base.exceptions import TaskError
+from pants.base.worker_pool import Work, WorkerPool
 from pants.util.dirutil import safe_mkdir, safe_walk
 
 
@@ -23,8 +28,10 @@ class JvmCompileIsolatedStrategy(JvmCompileStrategy):
 
   @classmethod
   def register_options(cls, register, language):
-    # No strategy specific options.
-    pass
+    register('--worker-count', type=int, default=1, advanced=True,
+             help='The number of targets to compile concurrently. Each concurrent compile uses '
+                  'its own {0} compiler process, so this also bounds the number of those '
+                  'processes.'.format(language))
 
   def __init__(self, context, options, workdir, analysis_tools, sources_predicate):
     super(JvmCompileIsolatedStrategy, self).__init__(context, options, workdir, analysis_tools, sources_predicate)
@@ -33,6 +40,8 @@ class JvmCompileIsolatedStrategy(JvmCompileStrategy):
     self._analysis_dir = os.path.join(workdir, 'isolated-analysis')
     self._classes_dir = os.path.join(workdir, 'isolated-classes')
 
+    self._worker_count = options.worker_count
+
   def name(self):
     return 'isolated'
 
@@ -117,27 +126,31 @@ class JvmCompileIsolatedStrategy(JvmCompileStrategy):
       safe_mkdir(compile_context.classes_dir)
       compile_contexts[target] = compile_context
 
-    # Now compile each invalid target one by one.
+    # Compile targets concurrently, each as soon as the invalid targets it depends on are compiled.
+    # The classpaths and upstream analysis of a target are only complete once its dependencies'
+    # products are registered, so we compute them on the compiling thread under the products lock.
+    # Products are registered, and artifacts cached, on this thread as each compile finishes.
+    products_lock = threading.Lock()
     invalid_vts_count = len(invalidation_check.invalid_vts_partitioned)
-    for idx, vts in enumerate(invalidation_check.invalid_vts_partitioned):
-      # Invalidated targets are a subset of relevant targets: get the context for this one.
-      assert len(vts.targets) == 1, ("Requested one target per partition, got {}".format(vts))
-      compile_context = compile_contexts[vts.targets[0]]
+    progress = itertools.count(1)
 
-      # Generate a classpath specific to this compile and target, and include analysis
-      # for upstream targets.
-      raw_compile_classpath = compile_classpaths.get_for_target(compile_context.target)
-      compile_classpath = extra_compile_time_classpath + list(raw_compile_classpath)
+    def compile_target(vts, compile_context):
+      with products_lock:
+        # Generate a classpath specific to this compile and target, and include analysis
+        # for upstream targets.
+        raw_compile_classpath = compile_classpaths.get_for_target(compile_context.target)
+        compile_classpath = extra_compile_time_classpath + list(raw_compile_classpath)
+        upstream_analysis = dict(self._upstream_analysis(compile_contexts, compile_context.target))
+        progress_message = 'target {} of {}'.format(next(progress), invalid_vts_count)
 
       # Validate that the classpath is located within the working copy, which simplifies
       # relativizing the analysis files.
       self._validate_classpath(compile_classpath)
 
-      # Filter the final classpath and gather upstream analysis.
+      # Filter the final classpath.
       cp_entries = [entry for conf, entry in compile_classpath if conf in self._confs]
-      upstream_analysis = dict(self._upstream_analysis(compile_contexts, compile_context.target))
-      progress_message = 'target {} of {}'.format(idx + 1, invalid_vts_count)
 
+      # Each concurrent compile runs in a nailgun server of its own, leased from the task's pool.
       compile_vts(vts,
                   compile_context.sources,
                   compile_context.analysis_file,
@@ -146,8 +159,10 @@ class JvmCompileIsolatedStrategy(JvmCompileStrategy):
                   compile_context.classes_dir,
                   progress_message)
 
+    def compiled_target(vts, compile_context):
       # Update the products with the latest classes.
-      register_vts([compile_context])
+      with products_lock:
+        register_vts([compile_context])
 
       # Kick off the background artifact cache write.
       if update_artifact_cache_vts_work:
@@ -156,6 +171,31 @@ class JvmCompileIsolatedStrategy(JvmCompileStrategy):
       # Now that all the analysis accounting is complete, we can safely mark the target as valid.
       vts.update()
 
+    invalid_vts_by_target = OrderedDict()
+    for vts in invalidation_check.invalid_vts_partitioned:
+      assert len(vts.targets) == 1, ("Requested one target per partition, got {}".format(vts))
+      invalid_vts_by_target[vts.targets[0]] = vts
+
+    jobs = []
+    for target, vts in invalid_vts_by_target.items():
+      # Invalidated targets are a subset of relevant targets: get the context for this one.
+      compile_context = compile_contexts[target]
+      dependencies = [dep for dep in target.closure()
+                      if dep in invalid_vts_by_target and dep != target]
+      jobs.append(Job(target,
+                      functools.partial(compile_target, vts, compile_context),
+                      dependencies,
+                      on_success=functools.partial(compiled_target, vts, compile_context)))
+
+    with self.context.new_workunit('isolation-compile-pool') as workunit:
+      worker_pool = WorkerPool(workunit, self.context.run_tracker, self._worker_count)
+      try:
+        ExecutionGraph(jobs).execute(worker_pool, self.context.log)
+      except ExecutionFailure as e:
+        raise TaskError('Compilation failure: {}'.format(e))
+      finally:
+        worker_pool.shutdown()
+
   def compute_resource_mapping(self, compile_contexts):
     return ResourceMapping(self._classes_dir)
 
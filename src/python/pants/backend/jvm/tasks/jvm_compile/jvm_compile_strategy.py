@@ -131,6 +131,10 @@ class JvmCompileStrategy(object):
     """Executed once before any compiles."""
     pass
 
+  def post_compile(self):
+    """Executed once after all compiles."""
+    pass
+
   def validate_analysis(self, path):
     """Throws a TaskError for invalid analysis files."""
     try:
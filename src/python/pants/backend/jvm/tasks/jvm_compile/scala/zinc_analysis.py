@@ -76,25 +76,27 @@ class ZincAnalysisElement(object):
     for header, rep in zip(headers, reps):
       self._write_section(outfile, header, rep, inline_vals, rebasings)
 
+  @staticmethod
+  def rebase(txt, rebasings):
+    """Applies rebasings to txt, returning None if txt mentions a path that is to be removed."""
+    for rebase_from, rebase_to in rebasings:
+      if rebase_to is None:
+        if rebase_from in txt:
+          return None
+      else:
+        txt = txt.replace(rebase_from, rebase_to)
+    return txt
+
   def _write_section(self, outfile, header, rep, inline_vals=True, rebasings=None):
     """Write a single section.
 
     Items are sorted, for ease of testing. TODO: Reconsider this if it hurts performance.
     """
-    def rebase(txt):
-      for rebase_from, rebase_to in rebasings:
-        if rebase_to is None:
-          if rebase_from in txt:
-            return None
-        else:
-          txt = txt.replace(rebase_from, rebase_to)
-      return txt
-
     rebasings = rebasings or []
     items = []
     for k, vals in rep.items():
       for v in vals:
-        item = rebase('{} -> {}{}'.format(k, '' if inline_vals else '\n', v))
+        item = self.rebase('{} -> {}{}'.format(k, '' if inline_vals else '\n', v), rebasings)
         if item:
           items.append(item)
 
@@ -0,0 +1,282 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import mmap
+import struct
+import sys
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+
+from pants.backend.jvm.tasks.jvm_compile.analysis_parser import ParseError
+from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis import (APIs, Compilations,
+                                                                     CompileSetup, Relations,
+                                                                     SourceInfos, Stamps,
+                                                                     ZincAnalysis,
+                                                                     ZincAnalysisElement)
+
+
+# A compact binary serialization of ZincAnalysis.
+#
+# Zinc itself only reads the text format, so this format is only for analysis files that only
+# pants reads, e.g., the per-target analysis in artifact cache entries.
+#
+# Every distinct string in the analysis is stored once, in a string table, and each section is an
+# array of indexes into that table. The layout is:
+#
+#   COMPACT_FORMAT_VERSION_LINE
+#   header:        <uint32 num sections> <uint32 string table offset> <uint32 string table length>
+#   section index: <uint32 offset> <uint32 length>, for each section.
+#   sections:      <uint32 num keys> then, for each key, <uint32 key> <uint32 num values> <values>.
+#   string table:  <uint32 num strings> <uint32 length>, for each string, then the utf-8 strings.
+#
+# All integers are little-endian. Sections appear in the same order as in the text format, so a
+# section is identified by its element class and header. The string table comes last, so that
+# rebasing paths need only rewrite the string table, and can copy all the sections verbatim.
+#
+# A string of length DELETED_STRING was removed by rebasing: readers drop all relation items that
+# reference it, just as the text format drops the lines that mention a removed path.
+
+COMPACT_FORMAT_VERSION_LINE = b'compact format version: 1\n'
+
+DELETED_STRING = 0xffffffff
+
+# The elements of an analysis, in file order.
+_ELEMENT_CLASSES = (CompileSetup, Relations, Stamps, APIs, SourceInfos, Compilations)
+
+_SECTION_IDS = dict(((element_cls, header), i) for i, (element_cls, header) in enumerate(
+  (element_cls, header) for element_cls in _ELEMENT_CLASSES for header in element_cls.headers))
+
+_HEADER = struct.Struct(b'<III')
+_INDEX_ENTRY = struct.Struct(b'<II')
+_UINT32 = struct.Struct(b'<I')
+
+_COPY_BUFSIZE = 1024 * 1024
+
+
+def _uint32_array(values=()):
+  ret = array(b'I', values)
+  if ret.itemsize != 4:
+    ret = array(b'L', values)
+  return ret
+
+
+def _to_le(arr):
+  if sys.byteorder != 'little':
+    arr.byteswap()
+  return arr
+
+
+def is_compact_analysis(path):
+  """Returns True if the file at path is an analysis in the compact format."""
+  with open(path, 'rb') as infile:
+    return infile.read(len(COMPACT_FORMAT_VERSION_LINE)) == COMPACT_FORMAT_VERSION_LINE
+
+
+def write_compact(analysis, outfile):
+  """Writes the analysis to the open binary file in the compact format."""
+  string_ids = {}
+  strings = []
+
+  def intern(s):
+    string_id = string_ids.get(s)
+    if string_id is None:
+      string_id = len(strings)
+      string_ids[s] = string_id
+      strings.append(s.encode('utf-8'))
+    return string_id
+
+  sections = []
+  for element in (analysis.compile_setup, analysis.relations, analysis.stamps, analysis.apis,
+                  analysis.source_infos, analysis.compilations):
+    for rep in element.args:
+      data = _uint32_array([0])
+      num_keys = 0
+      # Keys are sorted so that the same analysis always serializes to the same bytes.
+      for k in sorted(rep):
+        vals = rep[k]
+        if vals:
+          num_keys += 1
+          data.append(intern(k))
+          data.append(len(vals))
+          data.extend(intern(v) for v in vals)
+      data[0] = num_keys
+      sections.append(_to_le(data).tostring())
+
+  index_offset = len(COMPACT_FORMAT_VERSION_LINE) + _HEADER.size
+  offset = index_offset + _INDEX_ENTRY.size * len(sections)
+  index = []
+  for section in sections:
+    index.append(_INDEX_ENTRY.pack(offset, len(section)))
+    offset += len(section)
+  string_table = _encode_string_table(strings)
+
+  outfile.write(COMPACT_FORMAT_VERSION_LINE)
+  outfile.write(_HEADER.pack(len(sections), offset, len(string_table)))
+  for entry in index:
+    outfile.write(entry)
+  for section in sections:
+    outfile.write(section)
+  outfile.write(string_table)
+
+
+def write_compact_to_path(analysis, outfile_path):
+  with open(outfile_path, 'wb') as outfile:
+    write_compact(analysis, outfile)
+
+
+def rebase_compact(infile_path, outfile_path, rebasings):
+  """Rebases the paths in a compact analysis file, rewriting only its string table.
+
+  rebasings: A list of path prefix pairs [from_prefix, to_prefix] to rewrite.
+             to_prefix may be None, in which case matching paths are removed entirely.
+  """
+  with open_compact_analysis(infile_path) as reader:
+    strings = [None if s is None else ZincAnalysisElement.rebase(s, rebasings)
+               for s in reader.strings()]
+    sections_end = reader.string_table_offset
+    num_sections = reader.num_sections
+  string_table = _encode_string_table(
+    [None if s is None else s.encode('utf-8') for s in strings])
+
+  with open(infile_path, 'rb') as infile:
+    with open(outfile_path, 'wb') as outfile:
+      pos = len(COMPACT_FORMAT_VERSION_LINE) + _HEADER.size
+      infile.seek(pos)
+      outfile.write(COMPACT_FORMAT_VERSION_LINE)
+      outfile.write(_HEADER.pack(num_sections, sections_end, len(string_table)))
+      # The section index and the sections are copied unchanged.
+      while pos < sections_end:
+        chunk = infile.read(min(_COPY_BUFSIZE, sections_end - pos))
+        if not chunk:
+          raise ParseError('Unexpected end-of-file copying {}'.format(infile_path))
+        outfile.write(chunk)
+        pos += len(chunk)
+      outfile.write(string_table)
+
+
+def _encode_string_table(strings):
+  """Encodes a list of utf-8 byte strings, where None represents a deleted string."""
+  lengths = _uint32_array([DELETED_STRING if s is None else len(s) for s in strings])
+  return b''.join([_UINT32.pack(len(strings)), _to_le(lengths).tostring()] +
+                  [s for s in strings if s is not None])
+
+
+@contextmanager
+def open_compact_analysis(path):
+  """Yields a CompactAnalysisReader over the compact analysis file at path."""
+  with open(path, 'rb') as infile:
+    buf = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+      yield CompactAnalysisReader(buf, path)
+    finally:
+      buf.close()
+
+
+class CompactAnalysisReader(object):
+  """Reads sections of a compact analysis on demand.
+
+  Only the section index is read up front. Each section, and each string in the string table, is
+  decoded only when first needed, so reading a single section of a large analysis is cheap.
+  """
+
+  def __init__(self, buf, path):
+    self._buf = buf
+    self._path = path
+    if buf[:len(COMPACT_FORMAT_VERSION_LINE)] != COMPACT_FORMAT_VERSION_LINE:
+      raise ParseError('Unrecognized compact analysis version in {}'.format(path))
+    pos = len(COMPACT_FORMAT_VERSION_LINE)
+    self.num_sections, self.string_table_offset, self._string_table_length = \
+      self._unpack(_HEADER, pos)
+    if self.num_sections != len(_SECTION_IDS):
+      raise ParseError('Expected {} sections in {}, found {}'.format(
+        len(_SECTION_IDS), path, self.num_sections))
+    if self.string_table_offset + self._string_table_length != len(buf):
+      raise ParseError('Unexpected end-of-file parsing {}'.format(path))
+    pos += _HEADER.size
+    self._index = [self._unpack(_INDEX_ENTRY, pos + i * _INDEX_ENTRY.size)
+                   for i in range(self.num_sections)]
+    self._string_lengths = None
+    self._string_offsets = None
+    self._strings = {}
+
+  def _unpack(self, st, pos):
+    if pos + st.size > len(self._buf):
+      raise ParseError('Unexpected end-of-file parsing {}'.format(self._path))
+    return st.unpack_from(self._buf, pos)
+
+  def _uint32s(self, offset, length):
+    if offset + length > len(self._buf) or length % 4:
+      raise ParseError('Unexpected end-of-file parsing {}'.format(self._path))
+    ret = _uint32_array()
+    ret.fromstring(self._buf[offset:offset + length])
+    return _to_le(ret)
+
+  def _load_string_table(self):
+    if self._string_lengths is None:
+      (num_strings,) = self._unpack(_UINT32, self.string_table_offset)
+      lengths_offset = self.string_table_offset + _UINT32.size
+      self._string_lengths = self._uint32s(lengths_offset, num_strings * 4)
+      self._string_offsets = []
+      offset = lengths_offset + num_strings * 4
+      for length in self._string_lengths:
+        self._string_offsets.append(offset)
+        if length != DELETED_STRING:
+          offset += length
+      if offset > len(self._buf):
+        raise ParseError('Unexpected end-of-file parsing {}'.format(self._path))
+
+  def string(self, string_id):
+    """Returns the string with the given id, or None if it was deleted."""
+    ret = self._strings.get(string_id)
+    if ret is None and string_id not in self._strings:
+      self._load_string_table()
+      if string_id >= len(self._string_lengths):
+        raise ParseError('Bad string id {} in {}'.format(string_id, self._path))
+      length = self._string_lengths[string_id]
+      if length != DELETED_STRING:
+        offset = self._string_offsets[string_id]
+        ret = self._buf[offset:offset + length].decode('utf-8')
+      self._strings[string_id] = ret
+    return ret
+
+  def strings(self):
+    """Returns all the strings in the string table, in id order."""
+    self._load_string_table()
+    return [self.string(i) for i in range(len(self._string_lengths))]
+
+  def num_keys(self, element_cls, header):
+    """Returns the number of keys in a section, without decoding it."""
+    offset, _ = self._index[_SECTION_IDS[(element_cls, header)]]
+    return self._unpack(_UINT32, offset)[0]
+
+  def section(self, element_cls, header):
+    """Returns a section as a dict from key to list of values."""
+    offset, length = self._index[_SECTION_IDS[(element_cls, header)]]
+    data = self._uint32s(offset, length)
+    relation = defaultdict(list)
+    pos = 1
+    try:
+      for _ in range(data[0]):
+        k = self.string(data[pos])
+        num_vals = data[pos + 1]
+        val_ids = data[pos + 2:pos + 2 + num_vals]
+        pos += 2 + num_vals
+        if k is not None:
+          vals = [v for v in (self.string(val_id) for val_id in val_ids) if v is not None]
+          if vals:
+            relation[k] = vals
+    except IndexError:
+      raise ParseError('Unexpected end of section {} in {}'.format(header, self._path))
+    return relation
+
+  def element(self, element_cls):
+    return element_cls([self.section(element_cls, header) for header in element_cls.headers])
+
+  def analysis(self):
+    """Returns the entire ZincAnalysis."""
+    return ZincAnalysis(*[self.element(element_cls) for element_cls in _ELEMENT_CLASSES])
@@ -17,6 +17,10 @@ from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis import (APIs, Compi
                                                                      CompileSetup, Relations,
                                                                      SourceInfos, Stamps,
                                                                      ZincAnalysis)
+from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis_compact import (is_compact_analysis,
+                                                                             open_compact_analysis,
+                                                                             rebase_compact,
+                                                                             write_compact_to_path)
 
 
 class ZincAnalysisParser(AnalysisParser):
@@ -25,6 +29,53 @@ class ZincAnalysisParser(AnalysisParser):
   empty_test_header = 'products'
   current_test_header = ZincAnalysis.FORMAT_VERSION_LINE
 
+  # Files in the compact format are read by section, straight from the file. Text files are read
+  # line by line, as usual.
+
+  def validate_analysis(self, path):
+    if os.path.exists(path) and is_compact_analysis(path):
+      # Raises on a truncated or otherwise mismatched file.
+      with open_compact_analysis(path):
+        return
+    super(ZincAnalysisParser, self).validate_analysis(path)
+
+  def is_nonempty_analysis(self, path):
+    if os.path.exists(path) and is_compact_analysis(path):
+      with open_compact_analysis(path) as reader:
+        return reader.num_keys(Relations, self.empty_test_header) > 0
+    return super(ZincAnalysisParser, self).is_nonempty_analysis(path)
+
+  def parse_from_path(self, infile_path):
+    if is_compact_analysis(infile_path):
+      with open_compact_analysis(infile_path) as reader:
+        return reader.analysis()
+    return super(ZincAnalysisParser, self).parse_from_path(infile_path)
+
+  def parse_products_from_path(self, infile_path, classes_dir):
+    if is_compact_analysis(infile_path):
+      with open_compact_analysis(infile_path) as reader:
+        return reader.section(Relations, 'products')
+    return super(ZincAnalysisParser, self).parse_products_from_path(infile_path, classes_dir)
+
+  def parse_deps_from_path(self, infile_path, classpath_indexer, classes_dir):
+    if is_compact_analysis(infile_path):
+      with open_compact_analysis(infile_path) as reader:
+        bin_deps = reader.section(Relations, 'binary dependencies')
+        src_deps = reader.section(Relations, 'direct source dependencies')
+        ext_deps = reader.section(Relations, 'direct external dependencies')
+      return self._combine_deps(bin_deps, src_deps, ext_deps, classes_dir)
+    return super(ZincAnalysisParser, self).parse_deps_from_path(infile_path, classpath_indexer,
+                                                                classes_dir)
+
+  def write_compact_to_path(self, analysis, outfile_path):
+    write_compact_to_path(analysis, outfile_path)
+
+  def rebase_from_path(self, infile_path, outfile_path, rebasings):
+    if is_compact_analysis(infile_path):
+      rebase_compact(infile_path, outfile_path, rebasings)
+    else:
+      super(ZincAnalysisParser, self).rebase_from_path(infile_path, outfile_path, rebasings)
+
   def parse(self, infile):
     """Parse a ZincAnalysis instance from an open text file."""
     def parse_element(cls):
@@ -54,7 +105,9 @@ class ZincAnalysisParser(AnalysisParser):
       bin_deps = self._find_repeated_at_header(infile, 'binary dependencies')
       src_deps = self._find_repeated_at_header(infile, 'direct source dependencies')
       ext_deps = self._find_repeated_at_header(infile, 'direct external dependencies')
+    return self._combine_deps(bin_deps, src_deps, ext_deps, classes_dir)
 
+  def _combine_deps(self, bin_deps, src_deps, ext_deps, classes_dir):
     # TODO(benjy): Temporary hack until we inject a dep on the scala runtime jar.
     scalalib_re = re.compile(r'scala-library-\d+\.\d+\.\d+\.jar$')
     filtered_bin_deps = defaultdict(list)
@@ -5,7 +5,9 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import multiprocessing
 import os
+import threading
 
 from pants.backend.core.tasks.task import Task, TaskBase
 from pants.backend.jvm.tasks.jvm_tool_task_mixin import JvmToolTaskMixin
@@ -14,23 +16,31 @@ from pants.java import util
 from pants.java.distribution.distribution import Distribution
 from pants.java.executor import SubprocessExecutor
 from pants.java.nailgun_executor import NailgunExecutor
+from pants.java.nailgun_pool import NailgunExecutorPool
 
 
 class NailgunTaskBase(TaskBase, JvmToolTaskMixin):
 
   @staticmethod
-  def killall(everywhere=False):
+  def _executor_root(pants_workdir):
+    return os.path.join(pants_workdir, 'ng')
+
+  @staticmethod
+  def killall(everywhere=False, pants_workdir=None):
     """Kills all nailgun servers launched by pants in the current repo.
 
     Returns ``True`` if all nailguns were successfully killed, ``False`` otherwise.
 
     :param logger: a callable that accepts a message string describing the killed nailgun process
     :param bool everywhere: ``True`` to kill all nailguns servers launched by pants on this machine
+    :param string pants_workdir: The pants workdir of the current repo. If given, nailguns are found
+      through the registry their executors keep under it, rather than by scanning all processes.
     """
     if not NailgunExecutor.killall:
       return False
     else:
-      return NailgunExecutor.killall(everywhere=everywhere)
+      workdir_root = NailgunTaskBase._executor_root(pants_workdir) if pants_workdir else None
+      return NailgunExecutor.killall(everywhere=everywhere, workdir_root=workdir_root)
 
   @classmethod
   def register_options(cls, register):
@@ -38,11 +48,20 @@ class NailgunTaskBase(TaskBase, JvmToolTaskMixin):
     cls.register_jvm_tool(register, 'nailgun-server')
     register('--use-nailgun', action='store_true', default=True,
              help='Use nailgun to make repeated invocations of this task quicker.')
+    register('--nailgun-pool-size', type=int, default=multiprocessing.cpu_count(),
+             help='The maximum number of nailgun servers to run concurrently for each distinct '
+                  'set of JVM options this task runs with. Fewer are started if free memory runs '
+                  'low.')
+    register('--nailgun-idle-timeout', type=int, default=3600, metavar='<seconds>',
+             help='Kill nailgun servers that have been idle for this many seconds.')
 
   def __init__(self, *args, **kwargs):
     super(NailgunTaskBase, self).__init__(*args, **kwargs)
-    self._executor_workdir = os.path.join(self.context.options.for_global_scope().pants_workdir,
-                                          'ng', self.__class__.__name__)
+    self._executor_workdir = os.path.join(
+      self._executor_root(self.context.options.for_global_scope().pants_workdir),
+      self.__class__.__name__)
+    self._nailgun_pool = None
+    self._nailgun_pool_lock = threading.Lock()
     self.set_distribution()  # Use default until told otherwise.
     # TODO: Choose default distribution based on options.
 
@@ -57,6 +76,16 @@ class NailgunTaskBase(TaskBase, JvmToolTaskMixin):
   def nailgun_is_enabled(self):
     return self.get_options().use_nailgun
 
+  def _get_nailgun_pool(self):
+    with self._nailgun_pool_lock:
+      if self._nailgun_pool is None:
+        self._nailgun_pool = NailgunExecutorPool(
+          os.path.join(self._executor_workdir, 'pool'),
+          os.pathsep.join(self.tool_classpath('nailgun-server')),
+          max_servers=self.get_options().nailgun_pool_size,
+          idle_timeout_secs=self.get_options().nailgun_idle_timeout)
+      return self._nailgun_pool
+
   def create_java_executor(self):
     """Create java executor that uses this task's ng daemon, if allowed.
 
@@ -75,9 +104,21 @@ class NailgunTaskBase(TaskBase, JvmToolTaskMixin):
 
     If --no-use-nailgun is specified then the java main is run in a freshly spawned subprocess,
     otherwise a persistent nailgun server dedicated to this Task subclass is used to speed up
-    amortized run times.
+    amortized run times. The server is leased from a pool, so that concurrent invocations, e.g.,
+    from several threads, each run in a warm server of their own.
+
+    May be invoked concurrently.
     """
-    executor = self.create_java_executor()
+    if self.nailgun_is_enabled:
+      with self._get_nailgun_pool().lease(self._dist, jvm_options or [], classpath) as executor:
+        return self._runjava(executor, classpath, main, jvm_options, args, workunit_name,
+                             workunit_labels)
+    else:
+      return self._runjava(SubprocessExecutor(self._dist), classpath, main, jvm_options, args,
+                           workunit_name, workunit_labels)
+
+  def _runjava(self, executor, classpath, main, jvm_options, args, workunit_name,
+               workunit_labels):
     try:
       return util.execute_java(classpath=classpath,
                                main=main,
@@ -105,4 +146,5 @@ class NailgunKillall(Task):
              help='Kill all nailguns servers launched by pants for all workspaces on the system.')
 
   def execute(self):
-    NailgunTaskBase.killall(everywhere=self.get_options().everywhere)
+    NailgunTaskBase.killall(everywhere=self.get_options().everywhere,
+                            pants_workdir=self.context.options.for_global_scope().pants_workdir)
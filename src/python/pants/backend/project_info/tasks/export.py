@@ -94,7 +94,6 @@ class Export(ConsoleTask):
       else:
         ivy_info = None
 
-    ivy_jar_memo = {}
     def process_target(current_target):
       """
       :type current_target:pants.base.target.Target
@@ -119,7 +118,7 @@ class Export(ConsoleTask):
           return OrderedSet()
         transitive_jars = OrderedSet()
         for jar in jar_lib.jar_dependencies:
-          transitive_jars.update(ivy_info.get_jars_for_ivy_module(jar, memo=ivy_jar_memo))
+          transitive_jars.update(ivy_info.get_jars_for_ivy_module(jar))
         return transitive_jars
 
       info = {
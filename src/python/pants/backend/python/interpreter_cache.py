@@ -5,6 +5,7 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import json
 import os
 import shutil
 
@@ -16,6 +17,7 @@ from pex.iterator import Iterator
 from pex.package import EggPackage, SourcePackage
 
 from pants.util.dirutil import safe_mkdir
+from pants.util.fileutil import atomic_write, stat_key
 
 
 # TODO(wickman) Create a safer version of this and add to twitter.common.dirutil
@@ -28,6 +30,9 @@ def _safe_link(src, dst):
 
 
 class PythonInterpreterCache(object):
+  # Bump this to discard all previously persisted interpreter manifests.
+  MANIFEST_VERSION = 1
+
   @staticmethod
   def _matches(interpreter, filters):
     return any(interpreter.identity.matches(filt) for filt in filters)
@@ -55,12 +60,80 @@ class PythonInterpreterCache(object):
     self._interpreters = set()
     self._logger = logger or (lambda msg: True)
     self._default_filters = (python_setup.interpreter_requirement or b'',)
+    # The manifest records the identity of each python binary probed, and the extras each cached
+    # interpreter resolved, keyed by the stat of the binary. So a later run only spawns, or resolves
+    # requirements for, the binaries that changed since.
+    self._manifest_path = os.path.join(python_setup.scratch_dir, 'interpreters.json')
+    self._identities, self._resolved = self._load_manifest()
+    self._manifest_dirty = False
 
   @property
   def interpreters(self):
     """Returns the set of cached interpreters."""
     return self._interpreters
 
+  @staticmethod
+  def _stat_key(binary):
+    try:
+      # A list, as the key is stored in, and compared to entries of, the json manifest.
+      return list(stat_key(os.stat(binary)))
+    except OSError:
+      return None
+
+  def _load_manifest(self):
+    try:
+      with open(self._manifest_path, 'r') as fp:
+        data = json.load(fp)
+    except (IOError, ValueError):
+      # A missing or corrupt manifest just means every binary is probed and resolved again.
+      return {}, {}
+    if not isinstance(data, dict) or data.get('version') != self.MANIFEST_VERSION:
+      return {}, {}
+    return data.get('identities', {}), data.get('resolved', {})
+
+  def _save_manifest(self):
+    if not self._manifest_dirty or not os.path.isdir(os.path.dirname(self._manifest_path)):
+      return
+    with atomic_write(self._manifest_path) as fp:
+      json.dump({'version': self.MANIFEST_VERSION,
+                 'identities': self._identities,
+                 'resolved': self._resolved}, fp)
+    self._manifest_dirty = False
+
+  def _identify(self, binary):
+    """Returns the PythonIdentity of the given binary, or None if it's not a usable interpreter.
+
+    The binary is only spawned to identify it if it changed since it was last identified.
+    """
+    key = self._stat_key(binary)
+    if key is None:
+      return None
+    entry = self._identities.get(binary)
+    if entry and entry[:3] == key:
+      return PythonIdentity.from_path(entry[3]) if entry[3] else None
+
+    try:
+      identity = PythonInterpreter.from_binary(binary).identity
+    except Exception as e:
+      self._logger('Could not identify {}: {}'.format(binary, e))
+      identity = None
+    # We remember binaries that aren't interpreters too, so that we don't spawn them again.
+    self._identities[binary] = key + [str(identity) if identity else None]
+    self._manifest_dirty = True
+    return identity
+
+  def _find_all(self, paths):
+    """Like `PythonInterpreter.all`, but only spawns the binaries that changed since last time."""
+    pythons = []
+    for path in paths:
+      for fn in PythonInterpreter.expand_path(path):
+        basefile = os.path.basename(fn)
+        if any(matcher.match(basefile) is not None for matcher in PythonInterpreter.REGEXEN):
+          identity = self._identify(fn)
+          if identity is not None:
+            pythons.append(PythonInterpreter(fn, identity))
+    return PythonInterpreter.filter(pythons)
+
   def _interpreter_from_path(self, path, filters):
     interpreter_dir = os.path.basename(path)
     identity = PythonIdentity.from_path(interpreter_dir)
@@ -68,6 +141,11 @@ class PythonInterpreterCache(object):
       executable = os.readlink(os.path.join(path, 'python'))
     except OSError:
       return None
+    # The binary may have been replaced since it was set up here, e.g. by an upgrade of the python
+    # installed at the same path, in which case it's set up again under its new identity.
+    # NB: PythonIdentity defines no __ne__.
+    if not self._identify(executable) == identity:
+      return None
     interpreter = PythonInterpreter(executable, identity)
     if self._matches(interpreter, filters):
       return self._resolve(interpreter)
@@ -87,7 +165,7 @@ class PythonInterpreterCache(object):
         self._interpreters.add(pi)
 
   def _setup_paths(self, paths, filters):
-    for interpreter in self._matching(PythonInterpreter.all(paths), filters):
+    for interpreter in self._matching(self._find_all(paths), filters):
       identity_str = str(interpreter.identity)
       cache_path = os.path.join(self._cache_dir, identity_str)
       pi = self._interpreter_from_path(cache_path, filters)
@@ -132,15 +210,41 @@ class PythonInterpreterCache(object):
       matches = list(self.matches(filters))
     if len(matches) == 0:
       self._logger('Found no valid interpreters!')
+    self._save_manifest()
     return matches
 
   def _resolve(self, interpreter):
     """Resolve and cache an interpreter with a setuptools and wheel capability."""
-    interpreter = self._resolve_interpreter(interpreter,
-                                            self._python_setup.setuptools_requirement())
+    requirements = [self._python_setup.setuptools_requirement(),
+                    self._python_setup.wheel_requirement()]
+    resolved = self._resolved_from_manifest(interpreter)
+    if resolved is not None and resolved.satisfies(requirements):
+      return resolved
+
+    interpreter = self._resolve_interpreter(interpreter, requirements[0])
     if interpreter:
-      return self._resolve_interpreter(interpreter, self._python_setup.wheel_requirement())
+      interpreter = self._resolve_interpreter(interpreter, requirements[1])
+    key = self._stat_key(interpreter.binary) if interpreter else None
+    if key is not None:
+      extras = [[name, version, location]
+                for (name, version), location in sorted(interpreter.extras.items())]
+      self._resolved[interpreter.binary] = key + [str(interpreter.identity), extras]
+      self._manifest_dirty = True
+    return interpreter
 
+  def _resolved_from_manifest(self, interpreter):
+    """Returns the interpreter with the extras it last resolved to, if they're still there."""
+    entry = self._resolved.get(interpreter.binary)
+    if not entry or entry[:3] != self._stat_key(interpreter.binary):
+      return None
+    if entry[3] != str(interpreter.identity):
+      return None
+    resolved = interpreter
+    for name, version, location in entry[4]:
+      if not os.path.exists(location):
+        return None
+      resolved = resolved.with_extra(name, version, location)
+    return resolved
 
   def _resolve_interpreter(self, interpreter, requirement):
     """Given a :class:`PythonInterpreter` and a requirement, return an interpreter with the
@@ -72,6 +72,7 @@ class PythonChroot(object):
     self._interpreter = interpreter or PythonInterpreter.get()
     self._builder = builder or PEXBuilder(os.path.realpath(tempfile.mkdtemp()),
                                           interpreter=self._interpreter)
+    self._cached = False
 
     # Note: unrelated to the general pants artifact cache.
     self._egg_cache_root = os.path.join(
@@ -81,8 +82,9 @@ class PythonChroot(object):
     self._build_invalidator = BuildInvalidator( self._egg_cache_root)
 
   def delete(self):
-    """Deletes this chroot from disk if it has been dumped."""
-    safe_rmtree(self.path())
+    """Deletes this chroot from disk if it has been dumped, unless it belongs to a cache."""
+    if not self._cached:
+      safe_rmtree(self.path())
 
   def __del__(self):
     if os.getenv('PANTS_LEAVE_CHROOT') is None:
@@ -101,33 +103,25 @@ class PythonChroot(object):
   def path(self):
     return os.path.realpath(self._builder.path())
 
-  def _dump_library(self, library):
-    def copy_to_chroot(base, path, add_function):
-      src = os.path.join(get_buildroot(), base, path)
-      add_function(src, path)
+  def _library_files(self, library):
+    """Yields the (label, src, dst) of each source and resource file of the given library."""
+    for relpath in library.sources_relative_to_source_root():
+      yield 'source', os.path.join(get_buildroot(), library.target_base, relpath), relpath
+    for resources_tgt in library.resources:
+      for relpath in resources_tgt.sources_relative_to_source_root():
+        yield 'resource', os.path.join(get_buildroot(), resources_tgt.target_base, relpath), relpath
 
+  def _dump_library(self, library):
     self.debug('  Dumping library: {}'.format(library))
-    for relpath in library.sources_relative_to_source_root():
+    for label, src, dst in self._library_files(library):
+      add_function = self._builder.add_source if label == 'source' else self._builder.add_resource
       try:
-        copy_to_chroot(library.target_base, relpath, self._builder.add_source)
+        add_function(src, dst)
       except OSError as e:
         logger.error("Failed to copy {path} for library {library}"
-                     .format(path=os.path.join(library.target_base, relpath),
-                             library=library))
+                     .format(path=src, library=library))
         raise
 
-    for resources_tgt in library.resources:
-      for resource_file_from_source_root in resources_tgt.sources_relative_to_source_root():
-        try:
-          copy_to_chroot(resources_tgt.target_base, resource_file_from_source_root,
-                         self._builder.add_resource)
-        except OSError as e:
-          logger.error("Failed to copy {path} for resource {resource}"
-                       .format(path=os.path.join(resources_tgt.target_base,
-                                                 resource_file_from_source_root),
-                               resource=resources_tgt.address.spec))
-          raise
-
   def _dump_requirement(self, req):
     self.debug('  Dumping requirement: {}'.format(req))
     self._builder.add_requirement(req)
@@ -170,13 +164,7 @@ class PythonChroot(object):
       target.walk(add_dep)
     return children
 
-  def dump(self):
-    self.debug('Building chroot for {}:'.format(self._targets))
-    targets = self.resolve(self._targets)
-
-    for lib in targets['libraries'] | targets['binaries']:
-      self._dump_library(lib)
-
+  def _requirements_to_build(self, targets):
     generated_reqs = OrderedSet()
     if targets['thrifts']:
       for thr in set(targets['thrifts']):
@@ -195,17 +183,15 @@ class PythonChroot(object):
         reqs_from_libraries.add(req)
 
     reqs_to_build = OrderedSet()
-    find_links = []
-
     for req in reqs_from_libraries | generated_reqs | self._extra_requirements:
       if not req.should_build(self._interpreter.python, Platform.current()):
         self.debug('Skipping {} based upon version filter'.format(req))
         continue
       reqs_to_build.add(req)
-      self._dump_requirement(req.requirement)
-      if req.repository:
-        find_links.append(req.repository)
+    return reqs_to_build
 
+  def _resolve_distributions(self, reqs_to_build):
+    find_links = [req.repository for req in reqs_to_build if req.repository]
     distributions = resolve_multi(
          self._python_setup,
          self._python_repos,
@@ -219,9 +205,57 @@ class PythonChroot(object):
     for platform, dist_set in distributions.items():
       for dist in dist_set:
         if dist.location not in locations:
-          self._dump_distribution(dist)
+          yield dist
         locations.add(dist.location)
 
+  def dump(self):
+    self.debug('Building chroot for {}:'.format(self._targets))
+    targets = self.resolve(self._targets)
+
+    for lib in targets['libraries'] | targets['binaries']:
+      self._dump_library(lib)
+
+    reqs_to_build = self._requirements_to_build(targets)
+    for req in reqs_to_build:
+      self._dump_requirement(req.requirement)
+
+    for dist in self._resolve_distributions(reqs_to_build):
+      self._dump_distribution(dist)
+
+    if len(targets['binaries']) > 1:
+      print('WARNING: Target has multiple python_binary targets!', file=sys.stderr)
+
+    return self._builder
+
+  def dump_cached(self, cache):
+    """Like dump, but makes this chroot's builder a frozen builder for a PEX from the given cache.
+
+    The PEX is built and added to the cache only if it is not in the cache already. It belongs to
+    the cache, so it is not deleted with this chroot.
+
+    :param cache: The :class:`pants.backend.python.python_chroot_cache.PythonChrootCache` to use.
+    """
+    self.debug('Building cached chroot for {}:'.format(self._targets))
+    targets = self.resolve(self._targets)
+
+    sources = []
+    for lib in targets['libraries'] | targets['binaries']:
+      sources.extend(self._library_files(lib))
+    reqs_to_build = self._requirements_to_build(targets)
+
+    builder = cache.frozen_builder(
+      interpreter=self._interpreter,
+      pex_info=self._builder.info,
+      sources=sources,
+      requirements=reqs_to_build,
+      resolve=lambda: self._resolve_distributions(reqs_to_build),
+      platforms=self._platforms,
+      requirements_ttl=self.context.options.for_global_scope().python_chroot_requirements_ttl)
+    # The builder we were created with was never written to, so we discard its dir.
+    self.delete()
+    self._builder = builder
+    self._cached = True
+
     if len(targets['binaries']) > 1:
       print('WARNING: Target has multiple python_binary targets!', file=sys.stderr)
 
@@ -0,0 +1,317 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from pex.common import Chroot
+from pex.pex_builder import PEXBuilder
+from pex.pex_info import PexInfo
+
+from pants.base.file_digest_cache import FileDigestCache
+from pants.util.dirutil import safe_mkdir, safe_rmtree
+
+
+logger = logging.getLogger(__name__)
+
+
+class CachedPEXBuilder(PEXBuilder):
+  """A frozen PEXBuilder for a PEX held by a PythonChrootCache."""
+
+  def __init__(self, path, interpreter, files):
+    """
+    :param string path: The directory of the frozen PEX.
+    :param interpreter: The interpreter the PEX was built for.
+    :param files: The (label, relpath) of each file in the PEX, so that it can be built into a
+      .pex file.
+    """
+    chroot = Chroot(path)
+    for label, relpath in files:
+      # Touching an existing file registers it with the chroot without changing it.
+      chroot.touch(relpath, label)
+    super(CachedPEXBuilder, self).__init__(chroot=chroot,
+                                           interpreter=interpreter,
+                                           pex_info=PexInfo.from_pex(path))
+    self._frozen = True
+
+
+class PythonChrootCache(object):
+  """A persistent cache of frozen PEX environments, built from the targets of PythonChroots.
+
+  Each PEX is keyed by two fingerprints: one of the requirements it resolves, and one of its
+  source and resource files and PEX-INFO. The resolved distributions of each requirements
+  fingerprint are kept in a requirements layer of their own, so that a PEX for sources that changed
+  links in an existing layer rather than resolving its requirements again.
+
+  The PEXes are shared by all consumers of the cache, and must not be modified or deleted by them.
+  """
+
+  # Bump this to discard all previously cached PEXes.
+  VERSION = 2
+
+  # The maximum number of requirements layers to keep, along with their PEXes, and the maximum
+  # number of PEXes to keep per requirements layer. The least recently used are pruned.
+  MAX_REQUIREMENTS = 16
+  MAX_PEXES_PER_REQUIREMENTS = 8
+
+  # Layers and PEXes used within this many seconds are never pruned, as a concurrent run may still
+  # be building on or about to run them.
+  PRUNE_GRACE_SECS = 10 * 60
+
+  # The manifests recording the contents of requirements layers and PEXes. These are dotfiles, so
+  # that pex ignores them when computing the code hash of a PEX.
+  _REQUIREMENTS_MANIFEST = '.pants-requirements.json'
+  _PEX_MANIFEST = '.pants-chroot.json'
+
+  @staticmethod
+  def _is_pinned(requirement):
+    return len(requirement.specs) == 1 and requirement.specs[0][0] in ('==', '===')
+
+  @classmethod
+  def requirements_fingerprint(cls, interpreter, platforms, requirements, requirements_ttl,
+                               now=None):
+    """Returns the fingerprint of the distributions the given requirements resolve to.
+
+    An open-ended requirement, e.g. "flask>=0.2", is re-resolved once its last resolution is older
+    than the requirements ttl, so the fingerprint of such requirements changes every ttl period.
+
+    :param interpreter: The interpreter the requirements are resolved for.
+    :param platforms: The platforms the requirements are resolved for.
+    :param requirements: The PythonRequirements to resolve.
+    :param int requirements_ttl: The time in seconds before re-resolving open-ended requirements.
+    """
+    components = [str(cls.VERSION), str(interpreter.identity)]
+    components.extend(sorted(str(platform) for platform in platforms or ()))
+    components.extend(sorted('{}@{}'.format(req.requirement, req.repository or '')
+                             for req in requirements))
+    if not all(cls._is_pinned(req.requirement) for req in requirements):
+      now = time.time() if now is None else now
+      components.append(str(int(now // requirements_ttl)) if requirements_ttl > 0 else str(now))
+    return cls._hash(components)
+
+  @classmethod
+  def sources_fingerprint(cls, pex_info, sources, digests):
+    """Returns the fingerprint of a PEX's files, other than its distributions.
+
+    :param pex_info: The PexInfo of the PEX, before any requirements are added to it.
+    :param sources: The (label, src, dst) of the PEX's source and resource files.
+    :param dict digests: The content digest of each src.
+    """
+    components = [str(cls.VERSION), json.dumps(json.loads(pex_info.dump()), sort_keys=True)]
+    components.extend(sorted('{}:{}:{}'.format(label, dst, digests[src])
+                             for label, src, dst in sources))
+    return cls._hash(components)
+
+  @staticmethod
+  def _hash(components):
+    hasher = hashlib.sha1()
+    for component in components:
+      hasher.update(component.encode('utf-8'))
+      hasher.update(b'\0')
+    return hasher.hexdigest()
+
+  def __init__(self, root):
+    """
+    :param string root: The directory to keep the cached PEXes in.
+    """
+    self._root = root
+    self.hits = 0
+    self.misses = 0
+
+  def frozen_builder(self, interpreter, pex_info, sources, requirements, resolve,
+                     platforms=None, requirements_ttl=0):
+    """Returns a frozen PEXBuilder for the given PEX environment, building it if not yet cached.
+
+    :param interpreter: The interpreter to build the PEX for.
+    :param pex_info: The PexInfo of the PEX, before any requirements are added to it.
+    :param sources: The (label, src, dst) of the PEX's files, where label is 'source' or
+      'resource', src is the absolute path of the file and dst its path in the PEX.
+    :param requirements: The PythonRequirements of the PEX.
+    :param resolve: A function that returns the distributions the requirements resolve to. Only
+      called if no requirements layer for them is cached.
+    :param platforms: The platforms the requirements are resolved for.
+    :param int requirements_ttl: The time in seconds before re-resolving open-ended requirements.
+    :rtype: :class:`CachedPEXBuilder`
+    """
+    requirements = list(requirements)
+    requirements_fingerprint = self.requirements_fingerprint(interpreter, platforms, requirements,
+                                                             requirements_ttl)
+    digests = dict((src, FileDigestCache.digest_file(src)) for _, src, _ in sources)
+    sources_fingerprint = self.sources_fingerprint(pex_info, sources, digests)
+
+    pex_path = self._pex_path(requirements_fingerprint, sources_fingerprint)
+    builder = self._load_pex(pex_path, interpreter)
+    if builder is not None:
+      self.hits += 1
+      return builder
+
+    self.misses += 1
+    layer = self._requirements_layer(requirements_fingerprint, interpreter, resolve)
+    tmp_path, sources_fingerprint = self._build_pex(requirements_fingerprint, interpreter, pex_info,
+                                                    sources, requirements, layer)
+    # The sources may have changed since we fingerprinted them, in which case the PEX is published
+    # under the fingerprint of the contents that it was actually built from.
+    pex_path = self._pex_path(requirements_fingerprint, sources_fingerprint)
+    self._publish(tmp_path, pex_path)
+    self._prune(requirements_fingerprint)
+    return self._load_pex(pex_path, interpreter)
+
+  def _pex_path(self, requirements_fingerprint, sources_fingerprint):
+    return os.path.join(self._pexes_path(requirements_fingerprint), sources_fingerprint)
+
+  def _pexes_path(self, requirements_fingerprint):
+    return os.path.join(self._root, 'pex', requirements_fingerprint)
+
+  def _layer_path(self, requirements_fingerprint):
+    return os.path.join(self._root, 'requirements', requirements_fingerprint)
+
+  def _load_pex(self, pex_path, interpreter):
+    try:
+      with open(os.path.join(pex_path, self._PEX_MANIFEST), 'r') as fp:
+        files = json.load(fp)['files']
+    except (IOError, OSError, ValueError, KeyError):
+      return None
+    # Record the use of the PEX and of its requirements, so that they survive pruning.
+    self._touch(pex_path)
+    self._touch(os.path.dirname(pex_path))
+    return CachedPEXBuilder(pex_path, interpreter, files)
+
+  @staticmethod
+  def _touch(path):
+    try:
+      os.utime(path, None)
+    except OSError as e:
+      # The cache may be read-only, in which case we can use, but not prune, it.
+      logger.debug('Failed to record the use of {}: {}'.format(path, e))
+
+  def _requirements_layer(self, requirements_fingerprint, interpreter, resolve):
+    """Returns the path and the (name, hash) of each distribution of a requirements layer."""
+    layer_path = self._layer_path(requirements_fingerprint)
+    manifest_path = os.path.join(layer_path, self._REQUIREMENTS_MANIFEST)
+    try:
+      with open(manifest_path, 'r') as fp:
+        distributions = json.load(fp)['distributions']
+      self._touch(layer_path)
+      return layer_path, distributions
+    except (IOError, OSError, ValueError, KeyError):
+      pass
+
+    # We lay out the distributions just as pex does in a PEX, so that the layer's files can be
+    # linked straight into each PEX built on it.
+    tmp_path = self._mkdtemp(os.path.dirname(layer_path))
+    builder = PEXBuilder(path=tmp_path, interpreter=interpreter)
+    for dist in resolve():
+      builder.add_distribution(dist)
+    distributions = sorted(builder.info.distributions.items())
+    with open(os.path.join(tmp_path, self._REQUIREMENTS_MANIFEST), 'w') as fp:
+      json.dump({'distributions': distributions}, fp)
+    self._publish(tmp_path, layer_path)
+    return layer_path, distributions
+
+  def _build_pex(self, requirements_fingerprint, interpreter, pex_info, sources, requirements,
+                 layer):
+    layer_path, distributions = layer
+    tmp_path = self._mkdtemp(self._pexes_path(requirements_fingerprint))
+    builder = PEXBuilder(path=tmp_path, interpreter=interpreter, pex_info=pex_info.copy())
+    chroot = builder.chroot()
+
+    # Sources are copied rather than linked, so that editing them in place can't change a cached
+    # PEX. We fingerprint the contents we copy, which are what the PEX is actually built from.
+    digests = {}
+    for label, src, dst in sources:
+      with open(src, 'rb') as fp:
+        content = fp.read()
+      digests[src] = hashlib.sha1(content).hexdigest()
+      chroot.write(content, dst, label)
+    sources_fingerprint = self.sources_fingerprint(pex_info, sources, digests)
+
+    for req in requirements:
+      builder.add_requirement(req.requirement)
+    layer_cache = os.path.join(layer_path, PexInfo.default().internal_cache)
+    for root, _, files in os.walk(layer_cache):
+      for f in files:
+        path = os.path.join(root, f)
+        chroot.link(path, os.path.join(pex_info.internal_cache, os.path.relpath(path, layer_cache)))
+    for name, dist_hash in distributions:
+      builder.info.add_distribution(name, dist_hash)
+
+    builder.freeze()
+    files = [[label, relpath] for label in chroot.labels() for relpath in chroot.get(label)]
+    with open(os.path.join(tmp_path, self._PEX_MANIFEST), 'w') as fp:
+      json.dump({'files': files}, fp)
+    return tmp_path, sources_fingerprint
+
+  @staticmethod
+  def _mkdtemp(parent):
+    safe_mkdir(parent)
+    return tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+
+  @staticmethod
+  def _publish(tmp_path, path):
+    try:
+      os.rename(tmp_path, path)
+    except OSError:
+      if not os.path.isdir(path):
+        safe_rmtree(tmp_path)
+        raise
+      # A concurrent build of the same entry beat us to it, and its entry is just as good.
+      safe_rmtree(tmp_path)
+
+  def _prune(self, requirements_fingerprint):
+    """Prunes the least recently used PEXes of the given requirements layer, and the least recently
+    used requirements layers along with all of their PEXes, beyond the maximum numbers to keep.
+    """
+    pexes_path = self._pexes_path(requirements_fingerprint)
+    self._prune_least_recently_used([[os.path.join(pexes_path, name)]
+                                     for name in self._list_entries(pexes_path)],
+                                    self.MAX_PEXES_PER_REQUIREMENTS)
+
+    # A layer and the PEXes built on it are pruned together. Either may be missing, e.g., if a
+    # run failed to resolve the requirements or to build the PEX.
+    fingerprints = (set(self._list_entries(os.path.join(self._root, 'requirements'))) |
+                    set(self._list_entries(os.path.join(self._root, 'pex'))))
+    self._prune_least_recently_used([[self._layer_path(fingerprint), self._pexes_path(fingerprint)]
+                                     for fingerprint in fingerprints],
+                                    self.MAX_REQUIREMENTS)
+
+  @staticmethod
+  def _list_entries(path):
+    # Skip the temporary dirs of entries being built.
+    try:
+      return [name for name in os.listdir(path) if not name.startswith('.')]
+    except OSError:
+      return []
+
+  def _prune_least_recently_used(self, entries, max_entries):
+    """Deletes the least recently used of the given entries beyond max_entries.
+
+    :param list entries: The paths of each entry. An entry was last used when the most recently
+      modified of its paths was.
+    :param int max_entries: The number of entries to keep.
+    """
+    if len(entries) <= max_entries:
+      return
+
+    def last_used(path):
+      try:
+        return os.path.getmtime(path)
+      except OSError:
+        return 0
+
+    entries = sorted((max(last_used(path) for path in paths), paths) for paths in entries)
+    now = time.time()
+    for used_at, paths in entries[:-max_entries]:
+      if now - used_at < self.PRUNE_GRACE_SECS:
+        # The rest were used even more recently.
+        break
+      for path in paths:
+        logger.debug('Pruning cached {}'.format(path))
+        safe_rmtree(path)
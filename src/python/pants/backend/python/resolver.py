@@ -5,12 +5,20 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import hashlib
+import json
 import os
+import tempfile
+import time
 
+from pex.base import requirement_is_exact
 from pex.fetcher import Fetcher
 from pex.interpreter import PythonInterpreter
 from pex.platforms import Platform
 from pex.resolver import resolve
+from pex.util import DistributionHelper
+
+from pants.util.dirutil import safe_mkdir
 
 
 def get_platforms(platform_list):
@@ -19,6 +27,118 @@ def get_platforms(platform_list):
   return tuple(set(map(translate, platform_list)))
 
 
+class ResolutionMemo(object):
+  """A persistent memo of the exact distributions that sets of requirements resolved to.
+
+  Entries are keyed by the normalized requirement set, the interpreter identity, the platform and
+  the repos resolved against, and index the distributions pex left in its local cache. So resolving
+  a requirement set whose whole transitive closure is pinned again is a single read of its entry,
+  crawling neither the repos nor the local cache. An entry with an open-ended requirement anywhere
+  in its closure is only used within the ttl of its resolution, just as pex only reuses locally
+  cached matches for open-ended requirements within the ttl.
+  """
+
+  # Bump this to discard all previously memoized resolutions.
+  VERSION = 2
+
+  @staticmethod
+  def _normalize(requirement):
+    extras = ','.join(sorted(requirement.extras))
+    specs = ','.join(sorted(op + version for op, version in requirement.specs))
+    return '{}[{}]{}{}'.format(requirement.key, extras, specs,
+                               ' 2to3' if requirement.use_2to3 else '')
+
+  @staticmethod
+  def closure_is_pinned(requirements, distributions):
+    """Returns True if the requirements, and those of the distributions they resolved to, are exact.
+
+    The requirements of every extra of a distribution are considered, whether or not it was asked
+    for.
+    """
+    return (all(requirement_is_exact(req) for req in requirements) and
+            all(requirement_is_exact(req)
+                for dist in distributions for req in dist.requires(dist.extras)))
+
+  @classmethod
+  def key(cls, requirements, interpreter, platform, repos):
+    """Returns the memo key of resolving the given requirements.
+
+    :param requirements: The :class:`PythonRequirement`s resolved.
+    :param interpreter: The :class:`PythonInterpreter` they're resolved for.
+    :param string platform: The platform they're resolved for.
+    :param repos: The repos, indexes and find_links they're resolved against.
+    """
+    hasher = hashlib.sha1()
+    components = [str(cls.VERSION), str(interpreter.identity), str(platform)]
+    components.extend(sorted(set(cls._normalize(req) for req in requirements)))
+    components.append('')
+    components.extend(sorted(set(repos)))
+    for component in components:
+      hasher.update(component.encode('utf-8'))
+      hasher.update(b'\0')
+    return hasher.hexdigest()
+
+  def __init__(self, root):
+    """
+    :param string root: The directory to keep the memo's entries in.
+    """
+    self._root = root
+    self.hits = 0
+    self.misses = 0
+
+  def _entry_path(self, key):
+    return os.path.join(self._root, key[:2], key[2:] + '.json')
+
+  def get(self, key, max_age=None):
+    """Returns the set of distributions memoized under key, or None.
+
+    :param string key: A key returned by `ResolutionMemo.key`.
+    :param int max_age: The age in seconds past which an entry whose closure is not pinned is not
+      used, or None if any age will do.
+    """
+    distributions = self._load(key, max_age)
+    if distributions is None:
+      self.misses += 1
+    else:
+      self.hits += 1
+    return distributions
+
+  def _load(self, key, max_age):
+    try:
+      with open(self._entry_path(key), 'r') as fp:
+        entry = json.load(fp)
+      resolved_at, pinned = entry['resolved_at'], entry['pinned']
+      locations = entry['distributions']
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+      return None
+    if not pinned and max_age is not None and time.time() - resolved_at >= max_age:
+      return None
+    distributions = set()
+    for location in locations:
+      # The local cache may have been cleaned since.
+      if not os.path.exists(location):
+        return None
+      dist = DistributionHelper.distribution_from_path(location)
+      if dist is None:
+        return None
+      distributions.add(dist)
+    return distributions
+
+  def put(self, key, distributions, pinned):
+    """Memoizes the distributions resolved under key.
+
+    :param bool pinned: Whether the whole closure of the resolved requirements is pinned, as
+      determined by `ResolutionMemo.closure_is_pinned`.
+    """
+    entry_path = self._entry_path(key)
+    safe_mkdir(os.path.dirname(entry_path))
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path))
+    with os.fdopen(fd, 'w') as fp:
+      json.dump({'resolved_at': time.time(),
+                 'pinned': pinned,
+                 'distributions': sorted(dist.location for dist in distributions)}, fp)
+    os.rename(tmp_path, entry_path)
+
 
 def resolve_multi(python_setup,
                   python_repos,
@@ -44,6 +164,10 @@ def resolve_multi(python_setup,
                  "flask>=0.2" if a matching distribution is available on disk.  Defaults
                  to 3600.
      :param find_links: Additional paths to search for source packages during resolution.
+
+     Resolutions are memoized in a :class:`ResolutionMemo`, so repeating one only resolves
+     requirements again if they, or any of their transitive requirements, are open-ended and their
+     last resolution is older than the ttl.
   """
   distributions = dict()
   interpreter = interpreter or PythonInterpreter.get()
@@ -57,14 +181,22 @@ def resolve_multi(python_setup,
     fetchers.extend(Fetcher([path]) for path in find_links)
   context = python_repos.get_network_context()
 
+  memo = ResolutionMemo(os.path.join(python_setup.scratch_dir, 'resolutions'))
+  repos = list(python_repos.repos) + list(python_repos.indexes) + list(find_links or ())
+
   for platform in platforms:
-    distributions[platform] = resolve(
-        requirements=requirements,
-        interpreter=interpreter,
-        fetchers=fetchers,
-        platform=platform,
-        context=context,
-        cache=cache,
-        cache_ttl=ttl)
+    key = memo.key(requirements, interpreter, platform, repos)
+    dists = memo.get(key, max_age=ttl)
+    if dists is None:
+      dists = resolve(
+          requirements=requirements,
+          interpreter=interpreter,
+          fetchers=fetchers,
+          platform=platform,
+          context=context,
+          cache=cache,
+          cache_ttl=ttl)
+      memo.put(key, dists, pinned=memo.closure_is_pinned(requirements, dists))
+    distributions[platform] = dists
 
   return distributions
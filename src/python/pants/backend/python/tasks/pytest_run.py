@@ -6,12 +6,17 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import itertools
+import json
 import logging
 import os
 import re
 import shutil
+import subprocess
+import tempfile
 import time
 import traceback
+import xml.etree.ElementTree as ET
+from collections import defaultdict
 from contextlib import contextmanager
 from textwrap import dedent
 
@@ -20,16 +25,23 @@ from pex.pex_builder import PEXBuilder
 from six import StringIO
 from six.moves import configparser
 
+from pants.backend.core.tasks.cached_test_results import (CachedTestResultsMixin,
+                                                          TestResultsFingerprintStrategy)
+from pants.backend.core.tasks.duration_sharding import shard_by_duration
 from pants.backend.python.python_chroot import PythonChroot
 from pants.backend.python.python_requirement import PythonRequirement
+from pants.backend.python.targets.python_requirement_library import PythonRequirementLibrary
 from pants.backend.python.targets.python_tests import PythonTests
 from pants.backend.python.tasks.python_task import PythonTask
+from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
+from pants.base.hash_utils import hash_all
 from pants.base.target import Target
+from pants.base.worker_pool import Work, WorkerPool
 from pants.base.workunit import WorkUnit
 from pants.util.contextutil import (environment_as, temporary_dir, temporary_file,
                                     temporary_file_path)
-from pants.util.dirutil import safe_mkdir, safe_open
+from pants.util.dirutil import safe_mkdir, safe_open, touch
 from pants.util.strutil import safe_shlex_split
 
 
@@ -61,6 +73,10 @@ class PythonTestResult(object):
   def __str__(self):
     return self._msg
 
+  @property
+  def exit_code(self):
+    return self._rc
+
   @property
   def success(self):
     return self._rc == 0
@@ -70,7 +86,38 @@ class PythonTestResult(object):
     return self._failed_targets
 
 
-class PytestRun(PythonTask):
+class _PythonTestResultsFingerprintStrategy(TestResultsFingerprintStrategy):
+  """Also expires the results of tests that depend on open-ended requirements.
+
+  An open-ended requirement, e.g. "flask>=0.2", is re-resolved, and so may pick up a newer
+  distribution, once its last resolution is older than the requirements ttl. So results that depend
+  on one are only reused within the same ttl period.
+  """
+
+  def __init__(self, environment_fingerprint, requirements_ttl, now=None):
+    super(_PythonTestResultsFingerprintStrategy, self).__init__(environment_fingerprint)
+    now = time.time() if now is None else now
+    self._period = str(int(now // requirements_ttl)) if requirements_ttl > 0 else str(now)
+
+  @staticmethod
+  def _is_pinned(requirement):
+    return len(requirement.specs) == 1 and requirement.specs[0][0] in ('==', '===')
+
+  def resolved_fingerprint(self, target):
+    if isinstance(target, PythonRequirementLibrary):
+      if not all(self._is_pinned(req) for req in target.payload.requirements):
+        return self._period
+    return None
+
+  def __hash__(self):
+    return hash((super(_PythonTestResultsFingerprintStrategy, self).__hash__(), self._period))
+
+  def __eq__(self, other):
+    return (super(_PythonTestResultsFingerprintStrategy, self).__eq__(other) and
+            self._period == other._period)
+
+
+class PytestRun(CachedTestResultsMixin, PythonTask):
   _TESTING_TARGETS = [
     PythonRequirement('pytest'),
     PythonRequirement('pytest-timeout'),
@@ -86,6 +133,10 @@ class PytestRun(PythonTask):
              help='Run all tests in a single chroot. If turned off, each test target will '
                   'create a new chroot, which will be much slower, but more correct, as the'
                   'isolation verifies that all dependencies are correctly declared.')
+    register('--parallel-processes', type=int, default=1,
+             help='In --fast mode, run the tests in this many concurrent pytest processes, each '
+                  'in a working dir of its own, with the test targets sharded between them by '
+                  'their past durations.')
     register('--options', action='append', help='Pass these options to pytest.')
     register('--coverage',
              help='Emit coverage information for specified paths/modules. Value has two forms: '
@@ -116,7 +167,29 @@ class PytestRun(PythonTask):
         with environment_as(COLUMNS=str(int(cols) - 30)):
           self.run_tests(test_targets, workunit)
 
+  @property
+  def _cache_results(self):
+    # Coverage must see all the tests run.
+    return self.get_options().cache_results and 'PANTS_PY_COVERAGE' not in os.environ
+
+  def test_results_fingerprint_strategy(self, targets):
+    interpreter = self.select_interpreter_for_targets(targets)
+    environment = ([str(interpreter.identity)] +
+                   [str(req.requirement) for req in self._TESTING_TARGETS] +
+                   self.get_options().options + self.get_passthru_args())
+    return _PythonTestResultsFingerprintStrategy(
+      hash_all(s.encode('utf-8') + b'\0' for s in environment),
+      self.context.options.for_global_scope().python_chroot_requirements_ttl)
+
   def run_tests(self, targets, workunit):
+    if self._cache_results:
+      skipped_targets = self.run_tests_with_cached_results(
+        targets, lambda invalid_targets: self._run_tests(invalid_targets, workunit))
+      self._restore_junit_xml(skipped_targets)
+    else:
+      self._run_tests(targets, workunit)
+
+  def _run_tests(self, targets, workunit):
     if self.get_options().fast:
       result = self._do_run_tests(targets, workunit)
       if not result.success:
@@ -140,17 +213,74 @@ class PytestRun(PythonTask):
       if failed_targets:
         raise PythonTestFailure(failed_targets=failed_targets)
 
-  @contextmanager
-  def _maybe_emit_junit_xml(self, targets):
-    args = []
+  @staticmethod
+  def _junit_xml_path(targets):
     xml_base = os.getenv('JUNIT_XML_BASE')
     if xml_base and targets:
       xml_base = os.path.realpath(xml_base)
-      xml_path = os.path.join(xml_base, Target.maybe_readable_identify(targets) + '.xml')
+      return os.path.join(xml_base, Target.maybe_readable_identify(targets) + '.xml')
+    return None
+
+  @contextmanager
+  def _maybe_emit_junit_xml(self, targets):
+    args = []
+    xml_path = self._junit_xml_path(targets)
+    if xml_path:
       safe_mkdir(os.path.dirname(xml_path))
       args.append('--junitxml={}'.format(xml_path))
     yield args
 
+  _RESULTLOG_FILE = 'resultlog'
+  _JUNIT_XML_FILE = 'junit.xml'
+
+  # Args that stop pytest before it has run all the tests it was given.
+  _STOP_EARLY_ARGS = ('-x', '--exitfirst', '--maxfail')
+
+  def _save_results(self, targets, result, args, resultlog_path, junit_xml_path=None):
+    """Saves the results of the targets that passed, so that they can be skipped in later runs.
+
+    Each target's entries in the resultlog are saved, as is the junit xml of a target run on its
+    own, if given.
+    """
+    # Any other exit code means pytest did not get to run all the tests.
+    if result.exit_code not in (0, 1):
+      return
+    if result.exit_code == 1 and any(arg.split('=', 1)[0] in self._STOP_EARLY_ARGS for arg in args):
+      return
+
+    # Each entry is a line with a status letter and a test id, followed by indented detail lines.
+    entries_by_source = defaultdict(list)
+    with open(resultlog_path, 'r') as fp:
+      entry = None
+      for line in fp:
+        if entry is not None and line.startswith(' '):
+          entry.append(line)
+        else:
+          entry = [line]
+          source = line.rstrip('\n').partition(' ')[2].split('::', 1)[0]
+          entries_by_source[source].append(entry)
+
+    junit_xml_path = junit_xml_path if len(targets) == 1 else None
+    for target in targets:
+      entries = list(itertools.chain.from_iterable(
+        entries_by_source[source] for source in target.sources_relative_to_buildroot()))
+      if any(entry[0][:1] in ('F', 'E') for entry in entries):
+        continue
+      results_dir = self.results_dir(target)
+      with safe_open(os.path.join(results_dir, self._RESULTLOG_FILE), 'w') as fp:
+        for entry in entries:
+          fp.writelines(entry)
+      if junit_xml_path and os.path.exists(junit_xml_path):
+        shutil.copy(junit_xml_path, os.path.join(results_dir, self._JUNIT_XML_FILE))
+
+  def _restore_junit_xml(self, targets):
+    for target in targets:
+      junit_xml_path = self._junit_xml_path([target])
+      saved_junit_xml = os.path.join(self.results_dir(target), self._JUNIT_XML_FILE)
+      if junit_xml_path and os.path.exists(saved_junit_xml):
+        safe_mkdir(os.path.dirname(junit_xml_path))
+        shutil.copy(saved_junit_xml, junit_xml_path)
+
   DEFAULT_COVERAGE_CONFIG = dedent(b"""
     [run]
     branch = True
@@ -301,7 +431,8 @@ class PytestRun(PythonTask):
         if not os.path.exists(path) and not os.path.isabs(path):
           # Look for the source in the PEX chroot since its not available from CWD.
           path = os.path.join(chroot, path)
-        coverage_modules.append(path)
+        # Absolute, since tests run in parallel processes don't run in the current dir.
+        coverage_modules.append(os.path.abspath(path))
 
     with self._cov_setup(targets,
                          chroot,
@@ -315,7 +446,10 @@ class PytestRun(PythonTask):
           # Normalize .coverage.raw paths using combine and `paths` config in the rc file.
           # This swaps the /tmp pex chroot source paths for the local original source paths
           # the pex was generated from and which the user understands.
-          shutil.move('.coverage', '.coverage.raw')
+          # Tests run in parallel processes have already moved their data to .coverage.raw.*
+          # files of their own, which combine picks up as well.
+          if os.path.exists('.coverage'):
+            shutil.move('.coverage', '.coverage.raw')
           pex_run(args=['combine', '--rcfile', coverage_rc])
           pex_run(args=['report', '-i', '--rcfile', coverage_rc])
 
@@ -347,8 +481,11 @@ class PytestRun(PythonTask):
       platforms=('current',),
       interpreter=interpreter)
     try:
-      builder = chroot.dump()
-      builder.freeze()
+      if self.chroot_cache:
+        builder = chroot.dump_cached(self.chroot_cache)
+      else:
+        builder = chroot.dump()
+        builder.freeze()
       pex = PEX(builder.path(), interpreter=interpreter)
       with self._maybe_emit_junit_xml(targets) as junit_args:
         with self._maybe_emit_coverage_data(targets,
@@ -359,25 +496,31 @@ class PytestRun(PythonTask):
     finally:
       chroot.delete()
 
+  def _test_environment(self):
+    # The pytest runner we use accepts a --pdb argument that will launch an interactive pdb
+    # session on any test failure.  In order to support use of this pass-through flag we must
+    # turn off stdin buffering that otherwise occurs.  Setting the PYTHONUNBUFFERED env var to
+    # any value achieves this in python2.7.  We'll need a different solution when we support
+    # running pants under CPython 3 which does not unbuffer stdin using this trick.
+    env = {
+      'PYTHONUNBUFFERED': '1',
+    }
+    # If profiling a test run, this will enable profiling on the test code itself.
+    # Note that tests may run in a different cwd, so it's best to set PANTS_PROFILE
+    # to an absolute path to make it easy to find the subprocess profiles later.
+    if 'PANTS_PROFILE' in os.environ:
+      env['PEX_PROFILE'] = '{0}.subprocess.{1:.6f}'.format(os.environ['PANTS_PROFILE'],
+                                                           time.time())
+    return env
+
   def _do_run_tests_with_args(self, pex, workunit, args):
+    with environment_as(**self._test_environment()):
+      return self._run_tests_with_args(pex, workunit, args)
+
+  def _run_tests_with_args(self, pex, workunit, args, cwd=None):
     try:
-      # The pytest runner we use accepts a --pdb argument that will launch an interactive pdb
-      # session on any test failure.  In order to support use of this pass-through flag we must
-      # turn off stdin buffering that otherwise occurs.  Setting the PYTHONUNBUFFERED env var to
-      # any value achieves this in python2.7.  We'll need a different solution when we support
-      # running pants under CPython 3 which does not unbuffer stdin using this trick.
-      env = {
-        'PYTHONUNBUFFERED': '1',
-      }
-      # If profiling a test run, this will enable profiling on the test code itself.
-      # Note that tests may run in a different cwd, so it's best to set PANTS_PROFILE
-      # to an absolute path to make it easy to find the subprocess profiles later.
-      if 'PANTS_PROFILE' in os.environ:
-        env['PEX_PROFILE'] = '{0}.subprocess.{1:.6f}'.format(os.environ['PANTS_PROFILE'],
-                                                             time.time())
-      with environment_as(**env):
-        rc = self._pex_run(pex, workunit, args=args, setsid=True)
-        return PythonTestResult.rc(rc)
+      rc = self._pex_run(pex, workunit, args=args, setsid=True, cwd=cwd)
+      return PythonTestResult.rc(rc)
     except Exception:
       self.context.log.error('Failed to run test!')
       self.context.log.info(traceback.format_exc())
@@ -417,6 +560,11 @@ class PytestRun(PythonTask):
       def run_and_analyze(resultlog_path):
         result = self._do_run_tests_with_args(pex, workunit, args)
         failed_targets = self._get_failed_targets_from_resultlogs(resultlog_path, targets)
+        junit_xml_path = self._junit_xml_path(targets)
+        if self._cache_results:
+          self._save_results(targets, result, args, resultlog_path, junit_xml_path)
+        if junit_xml_path and os.path.exists(junit_xml_path):
+          self._save_durations(self._get_durations_from_junit_xml(junit_xml_path, targets))
         return result.with_failed_targets(failed_targets)
 
       args = []
@@ -427,6 +575,12 @@ class PytestRun(PythonTask):
       for options in self.get_options().options + self.get_passthru_args():
         args.extend(safe_shlex_split(options))
       args.extend(test_args)
+
+      test_targets = [target for target in targets if target.sources_relative_to_buildroot()]
+      num_shards = min(self.get_options().parallel_processes, len(test_targets))
+      if num_shards > 1:
+        return self._run_shards(pex, workunit, test_targets, args, num_shards)
+
       args.extend(sources)
 
       # The user might have already specified the resultlog option. In such case, reuse it.
@@ -439,6 +593,203 @@ class PytestRun(PythonTask):
           args.append('--resultlog={0}'.format(resultlog_path))
           return run_and_analyze(resultlog_path)
 
-  def _pex_run(self, pex, workunit, args, setsid=False):
-    return pex.run(args=args, setsid=setsid,
-                   stdout=workunit.output('stdout'), stderr=workunit.output('stderr'))
+  def _run_shards(self, pex, workunit, targets, args, num_shards):
+    """Runs the tests of the targets sharded across concurrent pytest processes.
+
+    The targets are sharded by their past durations. Each process runs in a working dir of its own,
+    where it writes its own resultlog, junit xml and coverage data. Once all are done, these are
+    merged into the outputs that a single process would have written.
+    """
+    # The outputs of the whole run, which each shard writes its own of instead.
+    resultlogs = [arg.split('=', 1)[-1] for arg in args if arg.startswith('--resultlog=')]
+    junit_xmls = [arg.split('=', 1)[-1] for arg in args if arg.startswith('--junitxml=')]
+    args = [arg for arg in args if not arg.startswith(('--resultlog=', '--junitxml='))]
+
+    targets_by_id = dict((target.id, target) for target in targets)
+    shards = [[targets_by_id[target_id] for target_id in shard]
+              for shard in shard_by_duration(sorted(targets_by_id), self._load_durations(),
+                                             num_shards)]
+    buildroot = get_buildroot()
+
+    with temporary_dir() as shards_dir:
+      shard_dirs = [os.path.join(shards_dir, str(i)) for i in range(len(shards))]
+
+      def run_shard(i, shard):
+        cwd = shard_dirs[i]
+        safe_mkdir(cwd)
+        resultlog_path = os.path.join(cwd, self._RESULTLOG_FILE)
+        junit_xml_path = os.path.join(cwd, self._JUNIT_XML_FILE)
+        # Analyzing the run expects a resultlog, even if pytest fails before writing one.
+        touch(resultlog_path)
+        sources = list(itertools.chain(*[t.sources_relative_to_buildroot() for t in shard]))
+        shard_args = args + ['--resultlog={0}'.format(resultlog_path),
+                             '--junitxml={0}'.format(junit_xml_path)]
+        shard_args.extend(os.path.join(buildroot, source) for source in sources)
+
+        with self.context.new_workunit(name='shard-{0}'.format(i),
+                                       labels=[WorkUnit.TOOL, WorkUnit.TEST]) as shard_workunit:
+          result = self._run_tests_with_args(pex, shard_workunit, shard_args, cwd=cwd)
+
+        # pytest reports tests by their paths relative to its working dir, which we map back to
+        # the paths relative to the buildroot that a process running there would have reported.
+        self._relativize_resultlog(resultlog_path, cwd, sources)
+        if os.path.exists(junit_xml_path):
+          self._relativize_junit_xml(junit_xml_path, cwd, sources)
+        if os.path.exists(os.path.join(cwd, '.coverage')):
+          shutil.move(os.path.join(cwd, '.coverage'), '.coverage.raw.{0}'.format(i))
+
+        failed_targets = self._get_failed_targets_from_resultlogs(resultlog_path, shard)
+        if self._cache_results:
+          self._save_results(shard, result, args, resultlog_path, junit_xml_path)
+        return result.with_failed_targets(failed_targets)
+
+      with environment_as(**self._test_environment()):
+        worker_pool = WorkerPool(workunit, self.context.run_tracker, len(shards))
+        try:
+          results = worker_pool.submit_work_and_wait(Work(run_shard, list(enumerate(shards))),
+                                                     workunit_parent=workunit)
+        finally:
+          worker_pool.shutdown()
+
+      shard_junit_xmls = [os.path.join(shard_dir, self._JUNIT_XML_FILE) for shard_dir in shard_dirs]
+      durations = {}
+      for shard, junit_xml_path in zip(shards, shard_junit_xmls):
+        if os.path.exists(junit_xml_path):
+          durations.update(self._get_durations_from_junit_xml(junit_xml_path, shard))
+      self._save_durations(durations)
+
+      if resultlogs:
+        with safe_open(resultlogs[-1], 'w') as output:
+          for shard_dir in shard_dirs:
+            with open(os.path.join(shard_dir, self._RESULTLOG_FILE), 'r') as fp:
+              shutil.copyfileobj(fp, output)
+      if junit_xmls:
+        self._merge_junit_xmls([path for path in shard_junit_xmls if os.path.exists(path)],
+                               junit_xmls[-1])
+
+    failed_targets = list(itertools.chain.from_iterable(r.failed_targets for r in results))
+    if any(result.exit_code is None for result in results):
+      return PythonTestResult.exception().with_failed_targets(failed_targets)
+    return PythonTestResult.rc(max(result.exit_code for result in results)).with_failed_targets(
+      failed_targets)
+
+  @staticmethod
+  def _buildroot_relpath(path, cwd, sources):
+    """Returns the source a path reported by a pytest process run in cwd refers to, if any.
+
+    :param string path: A path relative to cwd, as pytest reports it.
+    :param string cwd: The dir pytest ran in.
+    :param list sources: The paths relative to the buildroot of the sources pytest ran.
+    """
+    relpath = os.path.relpath(os.path.normpath(os.path.join(cwd, path)), get_buildroot())
+    if relpath in sources:
+      return relpath
+    # Newer pytests report paths relative to the common ancestor of the sources instead.
+    for source in sources:
+      if source.endswith(os.sep + path):
+        return source
+    return path
+
+  @classmethod
+  def _relativize_resultlog(cls, filename, cwd, sources):
+    with open(filename, 'r') as fp:
+      lines = fp.readlines()
+    with open(filename, 'w') as fp:
+      for line in lines:
+        # Entries start with a status letter and a test id, and are followed by indented lines.
+        if not line.startswith(' ') and ' ' in line:
+          status, _, test_id = line.rstrip('\n').partition(' ')
+          path, sep, rest = test_id.partition('::')
+          line = '{0} {1}{2}{3}\n'.format(status, cls._buildroot_relpath(path, cwd, sources), sep,
+                                          rest)
+        fp.write(line)
+
+  @staticmethod
+  def _classname_prefix(path):
+    # As pytest's junit xml plugin mangles the path of a test's source into its classname.
+    return path.replace('.py', '').replace(os.sep, '.')
+
+  @classmethod
+  def _relativize_junit_xml(cls, filename, cwd, sources):
+    buildroot = get_buildroot()
+    prefixes = [(cls._classname_prefix(os.path.relpath(os.path.join(buildroot, source), cwd)),
+                 cls._classname_prefix(source)) for source in sources]
+    tree = ET.parse(filename)
+    for testcase in tree.getroot().iter('testcase'):
+      classname = testcase.get('classname', '')
+      for cwd_prefix, buildroot_prefix in prefixes:
+        if classname == cwd_prefix or classname.startswith(cwd_prefix + '.'):
+          testcase.set('classname', buildroot_prefix + classname[len(cwd_prefix):])
+          break
+    tree.write(filename, encoding='utf-8', xml_declaration=True)
+
+  @staticmethod
+  def _merge_junit_xmls(filenames, output_filename):
+    merged = ET.Element('testsuite', name='pytest')
+    counts = dict((name, 0) for name in ('errors', 'failures', 'skips', 'tests'))
+    total_time = 0.0
+    for filename in filenames:
+      try:
+        testsuite = ET.parse(filename).getroot()
+      except ET.ParseError:
+        continue
+      for name in counts:
+        counts[name] += int(testsuite.get(name, 0))
+      total_time += float(testsuite.get('time', 0))
+      merged.extend(list(testsuite))
+    for name, count in counts.items():
+      merged.set(name, str(count))
+    merged.set('time', '{0:.3f}'.format(total_time))
+    safe_mkdir(os.path.dirname(output_filename))
+    ET.ElementTree(merged).write(output_filename, encoding='utf-8', xml_declaration=True)
+
+  @classmethod
+  def _get_durations_from_junit_xml(cls, filename, targets):
+    """Returns {target id: seconds} for the targets with tests in the given junit xml."""
+    prefixes = [(cls._classname_prefix(source), target) for target in targets
+                for source in target.sources_relative_to_buildroot()]
+    durations = defaultdict(float)
+    try:
+      testcases = ET.parse(filename).getroot().iter('testcase')
+      for testcase in testcases:
+        classname = testcase.get('classname', '')
+        for prefix, target in prefixes:
+          if classname == prefix or classname.startswith(prefix + '.'):
+            durations[target.id] += float(testcase.get('time', 0))
+            break
+    except (ET.ParseError, ValueError):
+      return {}
+    return dict(durations)
+
+  @property
+  def _durations_file(self):
+    return os.path.join(self.workdir, 'durations.json')
+
+  def _load_durations(self):
+    try:
+      with open(self._durations_file, 'r') as fp:
+        return json.load(fp)
+    except (IOError, ValueError):
+      return {}
+
+  def _save_durations(self, durations):
+    if not durations:
+      return
+    all_durations = self._load_durations()
+    all_durations.update(durations)
+    safe_mkdir(self.workdir)
+    fd, tmp_path = tempfile.mkstemp(dir=self.workdir)
+    with os.fdopen(fd, 'w') as fp:
+      json.dump(all_durations, fp)
+    os.rename(tmp_path, self._durations_file)
+
+  def _pex_run(self, pex, workunit, args, setsid=False, cwd=None):
+    if cwd is None:
+      return pex.run(args=args, setsid=setsid,
+                     stdout=workunit.output('stdout'), stderr=workunit.output('stderr'))
+    # PEX.run always runs in the current dir, so we run its command line ourselves.
+    pex.clean_environment(forking=True)
+    process = subprocess.Popen(pex.cmdline(args), cwd=cwd,
+                               preexec_fn=os.setsid if setsid else None,
+                               stdout=workunit.output('stdout'), stderr=workunit.output('stderr'))
+    return process.wait()
@@ -5,6 +5,7 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import os
 import tempfile
 from contextlib import contextmanager
 
@@ -14,6 +15,7 @@ from twitter.common.collections import OrderedSet
 from pants.backend.core.tasks.task import Task
 from pants.backend.python.interpreter_cache import PythonInterpreterCache
 from pants.backend.python.python_chroot import PythonChroot
+from pants.backend.python.python_chroot_cache import PythonChrootCache
 from pants.backend.python.python_setup import PythonRepos, PythonSetup
 from pants.base.exceptions import TaskError
 
@@ -24,6 +26,7 @@ class PythonTask(Task):
     self._compatibilities = self.get_options().interpreter or [b'']
     self._interpreter_cache = None
     self._interpreter = None
+    self._chroot_cache = None
 
   @property
   def interpreter_cache(self):
@@ -42,6 +45,14 @@ class PythonTask(Task):
         self.context.release_lock()
     return self._interpreter_cache
 
+  @property
+  def chroot_cache(self):
+    """The cache of PEX environments shared by all python tasks, or None if it is turned off."""
+    if self._chroot_cache is None and self.context.options.for_global_scope().python_chroot_cache:
+      self._chroot_cache = PythonChrootCache(
+        os.path.join(PythonSetup(self.context.config).scratch_dir, 'chroots'))
+    return self._chroot_cache
+
   @property
   def interpreter(self):
     """Subclasses can use this if they're fine with the default interpreter (the usual case)."""
@@ -89,7 +100,8 @@ class PythonTask(Task):
     """Yields a temporary PythonChroot created with the specified args.
 
     pre_freeze is an optional function run on the chroot just before freezing its builder,
-    to allow for any extra modification.
+    to allow for any extra modification. Chroots without one are taken from the chroot cache,
+    when it is turned on, and must not be modified.
     """
     path = tempfile.mkdtemp()
     builder = PEXBuilder(path=path, interpreter=interpreter, pex_info=pex_info)
@@ -101,9 +113,12 @@ class PythonTask(Task):
         builder=builder,
         platforms=platforms,
         interpreter=interpreter)
-      chroot.dump()
-      if pre_freeze:
-        pre_freeze(chroot)
-      builder.freeze()
+      if pre_freeze is None and self.chroot_cache:
+        chroot.dump_cached(self.chroot_cache)
+      else:
+        chroot.dump()
+        if pre_freeze:
+          pre_freeze(chroot)
+        builder.freeze()
     yield chroot
     chroot.delete()
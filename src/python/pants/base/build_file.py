@@ -9,11 +9,10 @@ import logging
 import os
 import re
 from collections import defaultdict
-from glob import glob1
 
 from twitter.common.collections import OrderedSet
 
-from pants.util.dirutil import safe_walk
+from pants.base.filesystem_snapshot import FilesystemSnapshot
 
 
 logger = logging.getLogger(__name__)
@@ -52,14 +51,21 @@ class BuildFile(object):
       cls._cache[key] = cls(*key)
     return cls._cache[key]
 
+  @classmethod
+  def create_snapshot(cls, path=None):
+    """Returns a new FilesystemSnapshot that indexes BUILD files, persisted to `path` if given."""
+    return FilesystemSnapshot(cls._PATTERN, path=path)
+
+  @classmethod
+  def snapshot(cls):
+    """Returns the FilesystemSnapshot that BUILD files are found through."""
+    return FilesystemSnapshot.active(cls._PATTERN)
+
   @staticmethod
   def _get_all_build_files(path):
     """Returns all the BUILD files on a path"""
-    results = []
-    for build in glob1(path, '{prefix}*'.format(prefix=BuildFile._BUILD_FILE_PREFIX)):
-      if BuildFile._is_buildfile_name(build):
-        results.append(build)
-    return sorted(results)
+    listing = BuildFile.snapshot().listing(path)
+    return listing.files if listing else []
 
   @staticmethod
   def _is_buildfile_name(name):
@@ -76,7 +82,7 @@ class BuildFile(object):
 
     def calc_exclude_roots(root_dir, excludes):
       """Return a map of root directories to subdirectory names suitable for a quick evaluation
-      inside safe_walk()
+      inside the walk.
       """
       result = defaultdict(set)
       for exclude in excludes:
@@ -91,14 +97,9 @@ class BuildFile(object):
     def find_excluded(root, dirs, exclude_roots):
       """Removes any of the directories specified in exclude_roots from dirs.
       """
-      to_remove = []
-      for exclude_root in exclude_roots:
-        # root ends with a /, trim it off
-        if root.rstrip('/') == exclude_root:
-          for subdir in exclude_roots[exclude_root]:
-            if subdir in dirs:
-              to_remove.append(subdir)
-      return to_remove
+      # root ends with a /, trim it off
+      excluded = exclude_roots.get(root.rstrip('/'))
+      return [subdir for subdir in dirs if subdir in excluded] if excluded else []
 
     buildfiles = []
     if not spec_excludes:
@@ -106,7 +107,8 @@ class BuildFile(object):
     else:
       exclude_roots = calc_exclude_roots(root_dir, spec_excludes)
 
-    for root, dirs, files in safe_walk(os.path.join(root_dir, base_path or ''), topdown=True):
+    walk = BuildFile.snapshot().walk(os.path.join(root_dir, base_path or ''))
+    for root, dirs, files in walk:
       to_remove = find_excluded(root, dirs, exclude_roots)
       for subdir in to_remove:
         dirs.remove(subdir)
@@ -232,11 +234,6 @@ class BuildFile(object):
     for sibling in self.siblings():
       yield sibling
 
-  def code(self):
-    """Returns the code object for this BUILD file."""
-    with open(self.full_path, 'rb') as source:
-      return compile(source.read(), self.full_path, 'exec', flags=0, dont_inherit=True)
-
   def __eq__(self, other):
     result = other and (
       type(other) == BuildFile) and (
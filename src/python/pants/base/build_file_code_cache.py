@@ -0,0 +1,105 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import imp
+import marshal
+import os
+import threading
+
+from pants.util.fileutil import atomic_write
+
+
+def _read_source(path):
+  with open(path, 'rb') as source:
+    contents = source.read()
+  return contents, hashlib.sha1(contents).hexdigest()
+
+
+def _compile_source(contents, path):
+  return compile(contents, path, 'exec', flags=0, dont_inherit=True)
+
+
+class BuildFileCodeCache(object):
+  """A cache of the compiled code of BUILD files, keyed by BUILD file path and content digest.
+
+  The cache can optionally be persisted between runs. Only compilation is saved: BUILD files are
+  still executed on every run, as what they define depends on more than their contents.
+  """
+
+  # Bump this to discard all previously persisted entries.
+  VERSION = 1
+
+  def __init__(self, path=None):
+    """
+    :param string path: The file to persist the cache to, or None for an in-memory cache. The file
+      is read, if it exists, on construction.
+    """
+    self._path = path
+    self._lock = threading.Lock()
+    self._entries = self._load()
+    self._dirty = False
+    self.hits = 0
+    self.misses = 0
+
+  def _load(self):
+    if not self._path:
+      return {}
+    try:
+      with open(self._path, 'rb') as fp:
+        data = marshal.load(fp)
+    except (IOError, EOFError, ValueError, TypeError):
+      # A missing or corrupt cache file is just a cold cache.
+      return {}
+    # Code objects are only valid for the interpreter version that marshalled them.
+    if (not isinstance(data, dict) or data.get('version') != self.VERSION or
+        data.get('magic') != imp.get_magic()):
+      return {}
+    return data.get('entries', {})
+
+  def _lookup(self, path, digest):
+    with self._lock:
+      entry = self._entries.get(path)
+    if entry and entry[0] == digest:
+      try:
+        return marshal.loads(entry[1])
+      except (EOFError, ValueError, TypeError):
+        pass
+    return None
+
+  def _store(self, path, digest, marshalled_code):
+    with self._lock:
+      self._entries[path] = (digest, marshalled_code)
+      self._dirty = True
+
+  def code(self, build_file):
+    """Returns the code object for `build_file`, compiling it only if its contents changed.
+
+    :raises SyntaxError: if the BUILD file does not compile.
+    """
+    path = build_file.full_path
+    contents, digest = _read_source(path)
+    code = self._lookup(path, digest)
+    if code is not None:
+      self.hits += 1
+      return code
+    self.misses += 1
+    code = _compile_source(contents, path)
+    self._store(path, digest, marshal.dumps(code))
+    return code
+
+  def save(self):
+    """Atomically persists the cache, if it is backed by a file and changed since it was loaded."""
+    with self._lock:
+      # Check existence in case of a clean-all. We don't want to write anything in that case.
+      if (not self._path or not self._dirty or
+          not os.path.isdir(os.path.dirname(self._path))):
+        return
+      with atomic_write(self._path, 'wb') as fp:
+        marshal.dump({'version': self.VERSION, 'magic': imp.get_magic(), 'entries': self._entries},
+                     fp)
+      self._dirty = False
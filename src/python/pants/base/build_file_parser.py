@@ -10,6 +10,7 @@ import logging
 import six
 
 from pants.base.build_file import BuildFile
+from pants.base.build_file_code_cache import BuildFileCodeCache
 
 
 logger = logging.getLogger(__name__)
@@ -53,10 +54,15 @@ class BuildFileParser(object):
   class ExecuteError(BuildFileParserError):
     """An exception was encountered executing code in the BUILD file"""
 
-  def __init__(self, build_configuration, root_dir, run_tracker=None):
+  def __init__(self, build_configuration, root_dir, run_tracker=None, code_cache=None):
+    """
+    :param code_cache: A BuildFileCodeCache to compile BUILD files through; by default BUILD files
+      are compiled through an in-memory cache.
+    """
     self._build_configuration = build_configuration
     self._root_dir = root_dir
     self.run_tracker = run_tracker
+    self._code_cache = code_cache or BuildFileCodeCache()
 
   @property
   def root_dir(self):
@@ -66,6 +72,10 @@ class BuildFileParser(object):
     """Returns a copy of the registered build file aliases this build file parser uses."""
     return self._build_configuration.registered_aliases()
 
+  @property
+  def code_cache(self):
+    return self._code_cache
+
   def address_map_from_spec_path(self, spec_path):
     try:
       build_file = BuildFile.from_cache(self._root_dir, spec_path)
@@ -127,7 +137,7 @@ class BuildFileParser(object):
                  .format(build_file=build_file))
 
     try:
-      build_file_code = build_file.code()
+      build_file_code = self._code_cache.code(build_file)
     except SyntaxError as e:
       raise self.ParseError(_format_context_msg(e.lineno, e.offset, e.__class__.__name__, e))
     except Exception as e:
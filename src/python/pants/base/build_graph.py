@@ -28,6 +28,9 @@ class BuildGraph(object):
   class TransitiveLookupError(AddressLookupError):
     """Used to append the current node to the error message from an AddressLookupError """
 
+  # The maximum number of unfiltered transitive closures to memoize.
+  _MAX_CACHED_CLOSURES = 64
+
   def __init__(self, address_mapper, run_tracker=None):
     self._address_mapper = address_mapper
     self.run_tracker = run_tracker
@@ -44,6 +47,13 @@ class BuildGraph(object):
     self._target_dependencies_by_address = defaultdict(OrderedSet)
     self._target_dependees_by_address = defaultdict(set)
     self._derived_from_by_derivative_address = {}
+    # (tuple of root addresses, postorder) -> OrderedSet of Targets, in LRU order.
+    self._closure_cache = OrderedDict()
+    # Address -> an ordinal greater than those of all the address's dependencies, or None if the
+    # graph has a cycle. Maintained incrementally as targets and dependencies are injected.
+    self._topological_ordinals = {}
+    self._next_topological_ordinal = 0
+    self._topological_order = None
 
   def contains_address(self, address):
     return address in self._target_by_address
@@ -131,6 +141,16 @@ class BuildGraph(object):
 
     self._target_by_address[address] = target
 
+    self._topological_order = None
+    if self._topological_ordinals is not None:
+      self._topological_ordinals[address] = self._next_topological_ordinal
+      self._next_topological_ordinal += 1
+
+    # A new target is only reachable from memoized closures if something already depended on it.
+    for dependee_address in self._target_dependees_by_address.get(address, ()):
+      self._invalidate_closures_containing(dependee_address)
+      self._order_dependency(dependee_address, address)
+
     for dependency_address in dependencies:
       self.inject_dependency(dependent=address, dependency=dependency_address)
 
@@ -170,6 +190,53 @@ class BuildGraph(object):
     else:
       self._target_dependencies_by_address[dependent].add(dependency)
       self._target_dependees_by_address[dependency].add(dependent)
+      self._invalidate_closures_containing(dependent)
+      self._order_dependency(dependent, dependency)
+
+  def _invalidate_closures_containing(self, address):
+    target = self._target_by_address[address]
+    for key, closure in self._closure_cache.items():
+      if target in closure:
+        del self._closure_cache[key]
+
+  def _order_dependency(self, dependent, dependency):
+    """Restores the topological ordinals invariant after `dependent` gains `dependency`.
+
+    Uses the dynamic topological sort of Pearce & Kelly: only targets whose ordinals lie between
+    those of the two ends of the new edge, and that are connected to them, are renumbered.
+    """
+    self._topological_order = None
+    ordinals = self._topological_ordinals
+    if ordinals is None or dependency not in ordinals:
+      return
+    lower, upper = ordinals[dependent], ordinals[dependency]
+    if upper < lower:
+      return
+
+    def region(start, edges_by_address, in_bounds):
+      found = [start]
+      seen = {start}
+      stack = [start]
+      while stack:
+        for address in edges_by_address.get(stack.pop(), ()):
+          if address not in seen and address in ordinals and in_bounds(ordinals[address]):
+            seen.add(address)
+            found.append(address)
+            stack.append(address)
+      return found
+
+    # Everything that (transitively) depends on `dependent` must now follow `dependency`, and
+    # everything `dependency` (transitively) depends on must now precede `dependent`.
+    dependees = region(dependent, self._target_dependees_by_address, lambda o: o <= upper)
+    if dependency in dependees:
+      # A cycle: fall back to sort_targets, which will raise a CycleException describing it.
+      self._topological_ordinals = None
+      return
+    dependencies = region(dependency, self._target_dependencies_by_address, lambda o: o > lower)
+
+    moved = sorted(dependencies, key=ordinals.get) + sorted(dependees, key=ordinals.get)
+    for address, ordinal in zip(moved, sorted(ordinals[address] for address in moved)):
+      ordinals[address] = ordinal
 
   def targets(self, predicate=None):
     """Returns all the targets in the graph in no particular order.
@@ -180,7 +247,33 @@ class BuildGraph(object):
 
   def sorted_targets(self):
     """:return: targets ordered from most dependent to least."""
-    return sort_targets(self._target_by_address.values())
+    return list(reversed(self.topological_order()))
+
+  def topological_order(self):
+    """Returns all the targets in the graph ordered from least dependent to most.
+
+    The order is memoized and maintained incrementally as the graph is mutated.
+
+    :raises: :class:`CycleException` if the graph contains a cycle.
+    """
+    if self._topological_order is None:
+      self._topological_order = self.topologically_ordered(self._target_by_address.values())
+    return list(self._topological_order)
+
+  def topologically_ordered(self, targets):
+    """Returns the given targets of this graph ordered from least dependent to most.
+
+    Unlike `sort_targets`, this neither walks nor returns the dependencies of `targets`.
+
+    :raises: :class:`CycleException` if the graph contains a cycle among `targets` or their
+      dependencies.
+    """
+    ordinals = self._topological_ordinals
+    if ordinals is None:
+      targets = list(targets)
+      target_set = set(targets)
+      return [t for t in reversed(sort_targets(targets)) if t in target_set]
+    return sorted(targets, key=lambda target: ordinals[target.address])
 
   def walk_transitive_dependency_graph(self, addresses, work, predicate=None, postorder=False):
     """Given a work function, walks the transitive dependency closure of `addresses`.
@@ -195,20 +288,7 @@ class BuildGraph(object):
       walked, nor will its dependencies.  Thus predicate effectively trims out any subgraph
       that would only be reachable through Targets that fail the predicate.
     """
-    walked = set()
-    def _walk_rec(address):
-      if address not in walked:
-        walked.add(address)
-        target = self._target_by_address[address]
-        if not predicate or predicate(target):
-          if not postorder:
-            work(target)
-          for dep_address in self._target_dependencies_by_address[address]:
-            _walk_rec(dep_address)
-          if postorder:
-            work(target)
-    for address in addresses:
-      _walk_rec(address)
+    self._walk(addresses, self._target_dependencies_by_address, work, predicate, postorder)
 
   def walk_transitive_dependee_graph(self, addresses, work, predicate=None, postorder=False):
     """Identical to `walk_transitive_dependency_graph`, but walks dependees preorder (or postorder
@@ -217,20 +297,35 @@ class BuildGraph(object):
     This is identical to reversing the direction of every arrow in the DAG, then calling
     `walk_transitive_dependency_graph`.
     """
-    walked = set()
-    def _walk_rec(address):
+    self._walk(addresses, self._target_dependees_by_address, work, predicate, postorder)
+
+  def _walk(self, addresses, edges_by_address, work, predicate, postorder, walked=None):
+    walked = set() if walked is None else walked
+    # We use an explicit stack of (target, iterator over its edges) rather than recursion, so that
+    # very deep graphs can't exhaust the interpreter's recursion limit.
+    stack = []
+
+    def enter(address):
+      walked.add(address)
+      target = self._target_by_address[address]
+      if not predicate or predicate(target):
+        if not postorder:
+          work(target)
+        stack.append((target, iter(edges_by_address[address])))
+
+    for address in addresses:
       if address not in walked:
-        walked.add(address)
-        target = self._target_by_address[address]
-        if not predicate or predicate(target):
-          if not postorder:
-            work(target)
-          for dep_address in self._target_dependees_by_address[address]:
-            _walk_rec(dep_address)
+        enter(address)
+      while stack:
+        target, edges = stack[-1]
+        for dep_address in edges:
+          if dep_address not in walked:
+            enter(dep_address)
+            break
+        else:
+          stack.pop()
           if postorder:
             work(target)
-    for address in addresses:
-      _walk_rec(address)
 
   def transitive_dependees_of_addresses(self, addresses, predicate=None, postorder=False):
     """Returns all transitive dependees of `address`.
@@ -256,12 +351,38 @@ class BuildGraph(object):
     :param list<Address> addresses: The root addresses to transitively close over.
     :param function predicate: The predicate passed through to
       `walk_transitive_dependencies_graph`.
+
+    Closures computed without a predicate are memoized until a mutation of the graph could change
+    them, so repeated requests for the same roots cost O(result).
     """
-    ret = OrderedSet()
-    self.walk_transitive_dependency_graph(addresses, ret.add,
-                                          predicate=predicate,
-                                          postorder=postorder)
-    return ret
+    if predicate:
+      ret = OrderedSet()
+      self.walk_transitive_dependency_graph(addresses, ret.add,
+                                            predicate=predicate,
+                                            postorder=postorder)
+      return ret
+    return OrderedSet(self._memoized_closure(tuple(addresses), postorder))
+
+  def _memoized_closure(self, addresses, postorder):
+    key = (addresses, postorder)
+    closure = self._closure_cache.pop(key, None)
+    if closure is None:
+      # Walking roots in order with a shared visited set appends each root's unvisited closure, so
+      # the closure of a memoized prefix of `addresses` can be extended rather than recomputed.
+      prefix_len, prefix_closure = 0, ()
+      for (cached_addresses, cached_postorder), cached_closure in self._closure_cache.items():
+        if (cached_postorder == postorder and
+            prefix_len < len(cached_addresses) < len(addresses) and
+            addresses[:len(cached_addresses)] == cached_addresses):
+          prefix_len, prefix_closure = len(cached_addresses), cached_closure
+      closure = OrderedSet(prefix_closure)
+      walked = set(target.address for target in closure)
+      self._walk(addresses[prefix_len:], self._target_dependencies_by_address, closure.add,
+                 predicate=None, postorder=postorder, walked=walked)
+    self._closure_cache[key] = closure
+    while len(self._closure_cache) > self._MAX_CACHED_CLOSURES:
+      self._closure_cache.popitem(last=False)
+    return closure
 
   def inject_synthetic_target(self,
                               address,
@@ -397,37 +518,50 @@ def sort_targets(targets):
   visited = set()
   path = OrderedSet()
 
-  def invert(target):
-    if target in path:
-      path_list = list(path)
-      cycle_head = path_list.index(target)
-      cycle = path_list[cycle_head:] + [target]
-      raise CycleException(cycle)
+  # Both passes use explicit stacks of (target, iterator over its edges) rather than recursion, so
+  # that very deep graphs can't exhaust the interpreter's recursion limit.
+  for target in targets:
+    if target in visited:
+      continue
+    visited.add(target)
     path.add(target)
-    if target not in visited:
-      visited.add(target)
-      for dependency in target.dependencies:
-        inverted_deps[dependency].add(target)
-        invert(dependency)
+    stack = [(target, iter(target.dependencies))]
+    while stack:
+      current, dependencies = stack[-1]
+      for dependency in dependencies:
+        inverted_deps[dependency].add(current)
+        if dependency in path:
+          path_list = list(path)
+          cycle_head = path_list.index(dependency)
+          cycle = path_list[cycle_head:] + [dependency]
+          raise CycleException(cycle)
+        if dependency not in visited:
+          visited.add(dependency)
+          path.add(dependency)
+          stack.append((dependency, iter(dependency.dependencies)))
+          break
       else:
-        roots.add(target)
-    path.remove(target)
-
-  for target in targets:
-    invert(target)
+        stack.pop()
+        path.remove(current)
+        roots.add(current)
 
   ordered = []
   visited.clear()
 
-  def topological_sort(target):
-    if target not in visited:
-      visited.add(target)
-      if target in inverted_deps:
-        for dep in inverted_deps[target]:
-          topological_sort(dep)
-      ordered.append(target)
-
   for root in roots:
-    topological_sort(root)
+    if root in visited:
+      continue
+    visited.add(root)
+    stack = [(root, iter(inverted_deps.get(root, ())))]
+    while stack:
+      current, dependents = stack[-1]
+      for dependent in dependents:
+        if dependent not in visited:
+          visited.add(dependent)
+          stack.append((dependent, iter(inverted_deps.get(dependent, ()))))
+          break
+      else:
+        stack.pop()
+        ordered.append(current)
 
   return ordered
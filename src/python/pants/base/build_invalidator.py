@@ -8,12 +8,13 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import errno
 import hashlib
 import os
+import threading
 from collections import namedtuple
 
 from pants.base.hash_utils import hash_all
 from pants.base.target import Target
 from pants.fs.fs import safe_filename
-from pants.util.dirutil import safe_mkdir
+from pants.util.dirutil import safe_delete, safe_mkdir
 
 
 # A CacheKey represents some version of a set of targets.
@@ -96,9 +97,19 @@ class CacheKeyGenerator(object):
 class BuildInvalidator(object):
   """Invalidates build targets based on the SHA1 hash of source files and other inputs."""
 
+  # The name of the single-file store used by IndexedBuildInvalidator.
+  INDEX_FILE_NAME = 'index'
+
   def __init__(self, root):
     self._root = os.path.join(root, GLOBAL_CACHE_KEY_GEN_VERSION)
     safe_mkdir(self._root)
+    # An index left behind by an IndexedBuildInvalidator may be stale with respect to .hash files we
+    # write, so we discard it. The next IndexedBuildInvalidator will migrate our files instead.
+    safe_delete(self._index_file)
+
+  @property
+  def _index_file(self):
+    return os.path.join(self._root, self.INDEX_FILE_NAME)
 
   def needs_update(self, cache_key):
     """Check if the given cached item is invalid.
@@ -127,6 +138,9 @@ class BuildInvalidator(object):
       if e.errno != errno.ENOENT:
         raise
 
+  def flush(self):
+    """Durably persists any pending updates."""
+
   def existing_hash(self, id):
     """Returns the existing hash for the specified id.
 
@@ -155,3 +169,121 @@ class BuildInvalidator(object):
       if e.errno != errno.ENOENT:
         raise
       return None  # File doesn't exist.
+
+
+class IndexedBuildInvalidator(BuildInvalidator):
+  """A BuildInvalidator that keeps all of its entries in a single append-only file.
+
+  All entries are read in one go on first access, updates are appended to the file and made durable
+  by `flush`, and the file is compacted when it accumulates too many superseded entries. Any .hash
+  files written by a BuildInvalidator over the same root are migrated into the index when it is
+  loaded.
+  """
+
+  # Compact the index on load once it holds this many more records than live entries.
+  _COMPACTION_SLACK = 1000
+
+  def __init__(self, root):
+    self._root = os.path.join(root, GLOBAL_CACHE_KEY_GEN_VERSION)
+    self._lock = threading.RLock()
+    self._entries = None
+    self._fp = None
+
+  def force_invalidate_all(self):
+    with self._lock:
+      self._close()
+      safe_mkdir(self._root, clean=True)
+      self._entries = {}
+
+  def force_invalidate(self, cache_key):
+    with self._lock:
+      self._append(self._entry_name(cache_key.id), None)
+      # Unlike an update, losing an invalidation could leave a stale entry looking valid. Nothing
+      # is appended, and so the index may not be open, if the key had no entry to invalidate.
+      if self._fp:
+        self._fp.flush()
+
+  def flush(self):
+    with self._lock:
+      if self._fp:
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+
+  def _entry_name(self, id):
+    return safe_filename(id, extension='.hash')
+
+  def _write_sha(self, cache_key):
+    with self._lock:
+      self._append(self._entry_name(cache_key.id), cache_key.hash)
+
+  def _read_sha_by_id(self, id):
+    with self._lock:
+      return self._load().get(self._entry_name(id))
+
+  def _append(self, name, hash):
+    entries = self._load()
+    if hash is None:
+      if entries.pop(name, None) is None:
+        return
+    else:
+      if entries.get(name) == hash:
+        return
+      entries[name] = hash
+    if self._fp is None:
+      self._fp = open(self._index_file, 'a')
+    self._fp.write('{}\t{}\n'.format(name, hash or ''))
+
+  def _close(self):
+    if self._fp:
+      self._fp.close()
+      self._fp = None
+
+  def _load(self):
+    if self._entries is not None:
+      return self._entries
+
+    safe_mkdir(self._root)
+    entries = {}
+    num_records = 0
+    try:
+      with open(self._index_file, 'r') as fp:
+        for line in fp:
+          name, sep, hash = line.rstrip('\n').partition('\t')
+          if not sep:
+            continue  # A torn write from an interrupted run.
+          num_records += 1
+          if hash:
+            entries[name] = hash
+          else:
+            entries.pop(name, None)
+    except IOError as e:
+      if e.errno != errno.ENOENT:
+        raise
+
+    migrated = self._migrate_hash_files(entries)
+    if migrated or num_records > 2 * len(entries) + self._COMPACTION_SLACK:
+      self._rewrite(entries)
+      for path in migrated:
+        safe_delete(path)
+    self._entries = entries
+    return entries
+
+  def _migrate_hash_files(self, entries):
+    """Imports any .hash files under the root into entries, returning their paths."""
+    migrated = []
+    for name in os.listdir(self._root):
+      if name.endswith('.hash'):
+        path = os.path.join(self._root, name)
+        with open(path, 'rb') as fd:
+          entries[name] = fd.read().strip()
+        migrated.append(path)
+    return migrated
+
+  def _rewrite(self, entries):
+    tmp_path = '{}.{}.tmp'.format(self._index_file, os.getpid())
+    with open(tmp_path, 'w') as fp:
+      for name, hash in entries.items():
+        fp.write('{}\t{}\n'.format(name, hash))
+      fp.flush()
+      os.fsync(fp.fileno())
+    os.rename(tmp_path, self._index_file)
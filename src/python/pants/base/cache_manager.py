@@ -191,10 +191,19 @@ class InvalidationCacheManager(object):
                cache_key_generator,
                build_invalidator_dir,
                invalidate_dependents,
-               fingerprint_strategy=None):
+               fingerprint_strategy=None,
+               build_invalidator=None,
+               build_graph=None):
+    """
+    :param build_invalidator: An optional BuildInvalidator to record target versions in. If not
+      specified, a BuildInvalidator over `build_invalidator_dir` is used.
+    :param build_graph: The optional BuildGraph containing the targets to be checked. If specified,
+      its memoized topological order is used when checks request one.
+    """
+    self._build_graph = build_graph
     self._cache_key_generator = cache_key_generator
     self._invalidate_dependents = invalidate_dependents
-    self._invalidator = BuildInvalidator(build_invalidator_dir)
+    self._invalidator = build_invalidator or BuildInvalidator(build_invalidator_dir)
     self._fingerprint_strategy = fingerprint_strategy
 
   def update(self, vts):
@@ -205,6 +214,10 @@ class InvalidationCacheManager(object):
     self._invalidator.update(vts.cache_key)
     vts.valid = True
 
+  def flush(self):
+    """Durably persists all updates made so far."""
+    self._invalidator.flush()
+
   def force_invalidate(self, vts):
     """Force invalidation of a VersionedTargetSet."""
     for vt in vts.versioned_targets:
@@ -243,8 +256,11 @@ class InvalidationCacheManager(object):
     Returns a list of VersionedTargets, each representing one input target.
     """
     def vt_iter():
-      if topological_order:
-        sorted_targets = [t for t in reversed(sort_targets(targets)) if t in targets]
+      if topological_order and self._build_graph:
+        sorted_targets = self._build_graph.topologically_ordered(targets)
+      elif topological_order:
+        target_set = set(targets)
+        sorted_targets = [t for t in reversed(sort_targets(targets)) if t in target_set]
       else:
         sorted_targets = sorted(targets)
       for target in sorted_targets:
@@ -0,0 +1,109 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import os
+import threading
+import time
+
+from pants.base.hash_utils import hash_file
+from pants.util.fileutil import atomic_write, modified_within_racy_window, stat_key
+
+
+class FileDigestCache(object):
+  """A persistent cache of file content digests keyed by file stat metadata.
+
+  A cached digest is only reused while the (size, mtime_ns, inode) of the file it was computed from
+  are unchanged, so a warm lookup costs a single stat instead of a full read of the file.
+
+  Most code should not use an instance directly, but should call `FileDigestCache.digest_file`,
+  which consults the cache activated for this pants run, if any.
+  """
+
+  # Bump this to discard all previously persisted entries.
+  VERSION = 1
+
+  _active = None
+
+  @classmethod
+  def activate(cls, cache):
+    """Makes `cache` the cache consulted by `FileDigestCache.digest_file`."""
+    cls._active = cache
+
+  @classmethod
+  def deactivate(cls):
+    """Deactivates the active cache, if any, and returns it."""
+    cache, cls._active = cls._active, None
+    return cache
+
+  @classmethod
+  def digest_file(cls, path):
+    """Returns the sha1 hexdigest of the contents of the file at path.
+
+    Uses the active cache if there is one, and otherwise reads and hashes the file.
+    """
+    cache = cls._active
+    return cache.digest(path) if cache else hash_file(path)
+
+  def __init__(self, path):
+    """
+    :param string path: The file to persist the cache to. It's read, if it exists, on construction.
+    """
+    self._path = path
+    self._lock = threading.Lock()
+    self._entries = self._load()
+    self._dirty = False
+    self.hits = 0
+    self.misses = 0
+
+  def _load(self):
+    try:
+      with open(self._path, 'r') as fp:
+        data = json.load(fp)
+    except (IOError, ValueError):
+      # A missing or corrupt cache file is just a cold cache.
+      return {}
+    if not isinstance(data, dict) or data.get('version') != self.VERSION:
+      return {}
+    return data.get('entries', {})
+
+  def digest(self, path):
+    """Returns the sha1 hexdigest of the contents of the file at path, hashing it only if needed."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = list(stat_key(stat))
+    with self._lock:
+      entry = self._entries.get(path)
+      if entry and entry[:3] == key:
+        self.hits += 1
+        return entry[3]
+      self.misses += 1
+
+    hashed_at = time.time()
+    digest = hash_file(path)
+    with self._lock:
+      if modified_within_racy_window(stat.st_mtime, hashed_at):
+        self._entries.pop(path, None)
+      else:
+        self._entries[path] = key + [digest]
+      self._dirty = True
+    return digest
+
+  def save(self):
+    """Atomically persists the cache, if it changed since it was loaded.
+
+    Entries for files that no longer exist, e.g., because they were deleted or renamed, are dropped.
+    """
+    with self._lock:
+      # Check existence in case of a clean-all. We don't want to write anything in that case.
+      if not self._dirty or not os.path.isdir(os.path.dirname(self._path)):
+        return
+      for path in [path for path in self._entries if not os.path.exists(path)]:
+        del self._entries[path]
+      with atomic_write(self._path) as fp:
+        json.dump({'version': self.VERSION, 'entries': self._entries}, fp)
+      self._dirty = False
@@ -0,0 +1,172 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+from pants.util.fileutil import atomic_write, modified_within_racy_window
+from pants.util.strutil import ensure_text
+
+
+class FilesystemSnapshot(object):
+  """An index of directory listings, each validated against the mtime of its directory.
+
+  Only the subdirectories of a directory and those of its files matching `file_pattern` are
+  indexed. A directory's mtime changes whenever an entry is added to, removed from or renamed
+  within it, so a warm listing costs a single stat instead of a listdir plus a stat per entry.
+
+  Most code should not use an instance directly, but should call `FilesystemSnapshot.active`,
+  which returns the snapshot activated for this pants run, or else a process-wide in-memory one.
+  """
+
+  class Listing(namedtuple('Listing', ['dirs', 'links', 'files'])):
+    """The indexed entries of a directory.
+
+    :param dirs: The sorted names of subdirectories, including symlinks to directories.
+    :param links: The subset of `dirs` that are symlinks, which walks don't descend into.
+    :param files: The sorted names of non-directory entries that match the snapshot's file pattern.
+    """
+
+  # Bump this to discard all previously persisted entries.
+  VERSION = 1
+
+  _active = None
+  _default = None
+  _default_lock = threading.Lock()
+
+  @classmethod
+  def activate(cls, snapshot):
+    """Makes `snapshot` the snapshot returned by `FilesystemSnapshot.active`."""
+    cls._active = snapshot
+
+  @classmethod
+  def deactivate(cls):
+    """Deactivates the active snapshot, if any, and returns it."""
+    snapshot, cls._active = cls._active, None
+    return snapshot
+
+  @classmethod
+  def active(cls, file_pattern):
+    """Returns the active snapshot, or else a process-wide in-memory snapshot.
+
+    :param file_pattern: The compiled regex the returned snapshot must index files with.
+    """
+    snapshot = cls._active
+    if snapshot and snapshot.file_pattern == file_pattern:
+      return snapshot
+    with cls._default_lock:
+      if not cls._default or cls._default.file_pattern != file_pattern:
+        cls._default = cls(file_pattern)
+      return cls._default
+
+  def __init__(self, file_pattern, path=None):
+    """
+    :param file_pattern: A compiled regex matched against file names to decide which are indexed.
+    :param string path: The file to persist the snapshot to, or None for an in-memory snapshot.
+      The file is read, if it exists, on construction.
+    """
+    self.file_pattern = file_pattern
+    self._path = path
+    self._lock = threading.Lock()
+    self._entries = self._load()
+    self._dirty = False
+    self.hits = 0
+    self.misses = 0
+
+  def _load(self):
+    if not self._path:
+      return {}
+    try:
+      with open(self._path, 'r') as fp:
+        data = json.load(fp)
+    except (IOError, ValueError):
+      # A missing or corrupt snapshot file is just a cold snapshot.
+      return {}
+    if (not isinstance(data, dict) or data.get('version') != self.VERSION or
+        data.get('file_pattern') != self.file_pattern.pattern):
+      return {}
+    return data.get('entries', {})
+
+  def listing(self, directory):
+    """Returns the Listing of `directory`, or None if it is not a directory that can be listed."""
+    directory = os.path.normpath(ensure_text(directory))
+    try:
+      stat = os.stat(directory)
+    except OSError:
+      return None
+    mtime = int(stat.st_mtime * 1000000000)
+    with self._lock:
+      entry = self._entries.get(directory)
+      if entry and entry[0] == mtime:
+        self.hits += 1
+        return self.Listing(*entry[1:])
+      self.misses += 1
+
+    listed_at = time.time()
+    try:
+      names = os.listdir(directory)
+    except OSError:
+      return None
+    dirs, links, files = [], [], []
+    for name in sorted(names):
+      path = os.path.join(directory, name)
+      if os.path.isdir(path):
+        dirs.append(name)
+        if os.path.islink(path):
+          links.append(name)
+      elif self.file_pattern.match(name):
+        files.append(name)
+
+    with self._lock:
+      # We don't keep listings of directories that might be modified again without their mtime
+      # changing.
+      if modified_within_racy_window(stat.st_mtime, listed_at):
+        self._entries.pop(directory, None)
+      else:
+        self._entries[directory] = [mtime, dirs, links, files]
+      self._dirty = True
+    return self.Listing(dirs, links, files)
+
+  def walk(self, top):
+    """Walks the tree under `top` like `os.walk(top, topdown=True)`.
+
+    Yields a (dirpath, dirnames, filenames) tuple for each directory; as with `os.walk`, callers may
+    remove names from `dirnames` to avoid descending into those directories. Only files matching
+    the snapshot's file pattern are yielded.
+    """
+    top = ensure_text(top)
+    listing = self.listing(top)
+    if listing is None:
+      return
+    pending = [(top, listing)]
+    while pending:
+      dirpath, listing = pending.pop()
+      dirnames = list(listing.dirs)
+      yield dirpath, dirnames, list(listing.files)
+      for dirname in reversed(dirnames):
+        if dirname not in listing.links:
+          subdir = os.path.join(dirpath, dirname)
+          sublisting = self.listing(subdir)
+          if sublisting is not None:
+            pending.append((subdir, sublisting))
+
+  def save(self):
+    """Atomically persists the snapshot, if it is backed by a file and changed since it was loaded."""
+    with self._lock:
+      # Check existence in case of a clean-all. We don't want to write anything in that case.
+      if (not self._path or not self._dirty or
+          not os.path.isdir(os.path.dirname(self._path))):
+        return
+      with atomic_write(self._path) as fp:
+        json.dump({'version': self.VERSION,
+                   'file_pattern': self.file_pattern.pattern,
+                   'entries': self._entries},
+                  fp)
+      self._dirty = False
@@ -13,6 +13,7 @@ from hashlib import sha1
 from twitter.common.collections import OrderedSet
 
 from pants.base.build_environment import get_buildroot
+from pants.base.file_digest_cache import FileDigestCache
 from pants.base.validation import assert_list
 from pants.util.meta import AbstractClass
 
@@ -139,8 +140,7 @@ class SourcesField(PayloadField):
     hasher.update(self._rel_path)
     for source in sorted(self.relative_to_buildroot()):
       hasher.update(source)
-      with open(os.path.join(get_buildroot(), source), 'rb') as f:
-        hasher.update(f.read())
+      hasher.update(FileDigestCache.digest_file(os.path.join(get_buildroot(), source)))
     return hasher.hexdigest()
 
 
@@ -225,8 +225,7 @@ def hash_bundle(bundle):
     buildroot_relative_path = os.path.relpath(abs_path, get_buildroot())
     hasher.update(buildroot_relative_path)
     hasher.update(bundle.filemap[abs_path])
-    with open(abs_path, 'rb') as f:
-      hasher.update(f.read())
+    hasher.update(FileDigestCache.digest_file(abs_path))
   return hasher.hexdigest()
 
 
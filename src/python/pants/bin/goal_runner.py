@@ -7,6 +7,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import logging
 import logging.config
+import os
 import sys
 
 import pkg_resources
@@ -16,11 +17,14 @@ from pants.backend.jvm.tasks.nailgun_task import NailgunTask  # XXX(pl)
 from pants.base.build_environment import get_buildroot
 from pants.base.build_file import BuildFile
 from pants.base.build_file_address_mapper import BuildFileAddressMapper
+from pants.base.build_file_code_cache import BuildFileCodeCache
 from pants.base.build_file_parser import BuildFileParser
 from pants.base.build_graph import BuildGraph
 from pants.base.cmd_line_spec_parser import CmdLineSpecParser
 from pants.base.config import Config
 from pants.base.extension_loader import load_plugins_and_backends
+from pants.base.file_digest_cache import FileDigestCache
+from pants.base.filesystem_snapshot import FilesystemSnapshot
 from pants.base.workunit import WorkUnit
 from pants.engine.round_engine import RoundEngine
 from pants.goal.context import Context
@@ -102,9 +106,20 @@ class GoalRunner(object):
     else:
       self.run_tracker.log(Report.INFO, '(To run a reporting server: ./pants server)')
 
-    self.build_file_parser = BuildFileParser(build_configuration=build_configuration,
-                                             root_dir=self.root_dir,
-                                             run_tracker=self.run_tracker)
+    if self.global_options.file_digest_cache:
+      digest_cache_path = os.path.join(self.global_options.pants_workdir, 'file_digests.json')
+      FileDigestCache.activate(FileDigestCache(digest_cache_path))
+    if self.global_options.build_file_snapshot:
+      snapshot_path = os.path.join(self.global_options.pants_workdir, 'build_file_snapshot.json')
+      FilesystemSnapshot.activate(BuildFile.create_snapshot(snapshot_path))
+
+    code_cache_path = (os.path.join(self.global_options.pants_workdir, 'build_file_code.marshal')
+                       if self.global_options.build_file_code_cache else None)
+    self.build_file_parser = BuildFileParser(
+      build_configuration=build_configuration,
+      root_dir=self.root_dir,
+      run_tracker=self.run_tracker,
+      code_cache=BuildFileCodeCache(code_cache_path))
     self.address_mapper = BuildFileAddressMapper(self.build_file_parser)
     self.build_graph = BuildGraph(run_tracker=self.run_tracker,
                                   address_mapper=self.address_mapper)
@@ -193,6 +208,9 @@ class GoalRunner(object):
       fail()
       raise
     finally:
+      self._close_file_digest_cache()
+      self._close_build_file_code_cache()
+      self._close_build_file_snapshot()
       self.run_tracker.end()
       # Must kill nailguns only after run_tracker.end() is called, otherwise there may still
       # be pending background work that needs a nailgun.
@@ -200,9 +218,34 @@ class GoalRunner(object):
         # TODO: This is JVM-specific and really doesn't belong here.
         # TODO: Make this more selective? Only kill nailguns that affect state?
         # E.g., checkstyle may not need to be killed.
-        NailgunTask.killall()
+        NailgunTask.killall(pants_workdir=self.global_options.pants_workdir)
     return result
 
+  def _close_file_digest_cache(self):
+    digest_cache = FileDigestCache.deactivate()
+    if digest_cache:
+      digest_cache.save()
+      try:
+        self.run_tracker.run_info.add_infos(('file_digest_cache_hits', digest_cache.hits),
+                                            ('file_digest_cache_misses', digest_cache.misses))
+      except IOError:
+        pass  # If the goal is clean-all then the run info dir no longer exists...
+      self.run_tracker.log(Report.DEBUG, 'File digest cache: {} hits, {} misses.'.format(
+        digest_cache.hits, digest_cache.misses))
+
+  def _close_build_file_code_cache(self):
+    code_cache = self.build_file_parser.code_cache
+    code_cache.save()
+    self.run_tracker.log(Report.DEBUG, 'BUILD file code cache: {} hits, {} misses.'.format(
+      code_cache.hits, code_cache.misses))
+
+  def _close_build_file_snapshot(self):
+    snapshot = FilesystemSnapshot.deactivate()
+    if snapshot:
+      snapshot.save()
+      self.run_tracker.log(Report.DEBUG, 'BUILD file snapshot: {} hits, {} misses.'.format(
+        snapshot.hits, snapshot.misses))
+
   def _do_run(self):
     # Update the reporting settings, now that we have flags etc.
     def is_quiet_task():
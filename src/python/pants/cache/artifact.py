@@ -6,12 +6,18 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import errno
+import io
+import itertools
+import multiprocessing
 import os
 import shutil
 import tarfile
+import tempfile
+from collections import deque
+from multiprocessing.pool import ThreadPool
 
 from pants.util.contextutil import open_tar
-from pants.util.dirutil import safe_mkdir, safe_mkdir_for, safe_walk
+from pants.util.dirutil import safe_delete, safe_mkdir, safe_mkdir_for, safe_walk
 
 
 class ArtifactError(Exception):
@@ -72,52 +78,208 @@ class DirectoryArtifact(Artifact):
 
 
 class TarballArtifact(Artifact):
-  """An artifact stored in a tarball."""
-  def __init__(self, artifact_root, tarfile, compression=9):
+  """An artifact stored in a tarball.
+
+  The tarball can be in one of several formats:
+
+    - 'tgz': A gzipped tarball.
+    - 'tar': An uncompressed tarball, which is quicker to create and extract but bigger.
+    - 'chunked': An uncompressed tarball of gzipped tarballs, each holding a share of the files.
+      The chunks are compressed and extracted in parallel.
+
+  Extraction detects the format of the tarball it is given, regardless of the format the artifact
+  was constructed with.
+
+  An artifact constructed without a tarfile can only be extracted from a stream, via
+  `extract_stream`.
+  """
+
+  FORMATS = ('tgz', 'tar', 'chunked')
+
+  # The first member of a chunked tarball. Its contents name the format.
+  FORMAT_MEMBER = '.pants-artifact-format'
+
+  # Chunked tarballs hold chunks of about this many (uncompressed) bytes.
+  CHUNK_SIZE_BYTES = 4 * 1024 * 1024
+
+  def __init__(self, artifact_root, tarfile, compression=9, format='tgz'):
     Artifact.__init__(self, artifact_root)
+    if format not in self.FORMATS:
+      raise ValueError('Artifact format must be one of {}: {}'.format(', '.join(self.FORMATS),
+                                                                       format))
     self._tarfile = tarfile
     self._compression = compression
+    self._format = format
+
+  def _check_tarfile(self):
+    if self._tarfile is None:
+      raise ArtifactError('Artifact has no tarfile: it can only be extracted from a stream.')
 
   def collect(self, paths):
-    # In our tests, gzip is slightly less compressive than bzip2 on .class files,
-    # but decompression times are much faster.
-    mode = 'w:gz'
+    self._check_tarfile()
+    if self._format == 'chunked':
+      self._collect_chunked(paths)
+      return
 
-    tar_kwargs = {'dereference': True, 'errorlevel': 2}
-    tar_kwargs['compresslevel'] = self._compression
+    if self._format == 'tgz':
+      # In our tests, gzip is slightly less compressive than bzip2 on .class files,
+      # but decompression times are much faster.
+      mode = 'w:gz'
+      tar_kwargs = {'compresslevel': self._compression}
+    else:
+      mode = 'w'
+      tar_kwargs = {}
 
-    with open_tar(self._tarfile, mode, **tar_kwargs) as tarout:
+    with open_tar(self._tarfile, mode, dereference=True, errorlevel=2, **tar_kwargs) as tarout:
       for path in paths or ():
         # Adds dirs recursively.
         relpath = os.path.relpath(path, self._artifact_root)
         tarout.add(path, relpath)
         self._relpaths.add(relpath)
 
+  def _collect_chunked(self, paths):
+    dirs = []
+    chunks = [[]]
+    chunk_size = 0
+    for path in paths or ():
+      relpath = os.path.relpath(path, self._artifact_root)
+      self._relpaths.add(relpath)
+      for entry, is_dir in self._walk(path):
+        if is_dir:
+          dirs.append(entry)
+        else:
+          if chunk_size >= self.CHUNK_SIZE_BYTES:
+            chunks.append([])
+            chunk_size = 0
+          chunks[-1].append(entry)
+          chunk_size += os.path.getsize(entry)
+    # Directories go in the first chunk so empty ones are restored too.
+    chunks[0][:0] = dirs
+
+    chunk_dir = os.path.dirname(os.path.abspath(self._tarfile))
+    chunk_files = []
+    try:
+      for _ in chunks:
+        fd, chunk_file = tempfile.mkstemp(dir=chunk_dir, suffix='.chunk')
+        os.close(fd)
+        chunk_files.append(chunk_file)
+      self._map_in_parallel(self._write_chunk, zip(chunk_files, chunks))
+
+      with open_tar(self._tarfile, 'w', errorlevel=2) as tarout:
+        format_info = tarfile.TarInfo(self.FORMAT_MEMBER)
+        format_info.size = len(self._format)
+        tarout.addfile(format_info, io.BytesIO(self._format.encode('ascii')))
+        for i, chunk_file in enumerate(chunk_files):
+          tarout.add(chunk_file, 'chunk-{:05d}.tgz'.format(i))
+    finally:
+      for chunk_file in chunk_files:
+        safe_delete(chunk_file)
+
+  def _walk(self, path):
+    """Yields (path, is_dir) for path and, if it is a directory, everything under it.
+
+    Like `tarfile.add` with `dereference=True`, follows symlinks.
+    """
+    if not os.path.isdir(path):
+      yield path, False
+      return
+    yield path, True
+    for root, dirnames, filenames in safe_walk(path, followlinks=True):
+      for dirname in dirnames:
+        yield os.path.join(root, dirname), True
+      for filename in filenames:
+        yield os.path.join(root, filename), False
+
+  def _write_chunk(self, args):
+    chunk_file, entries = args
+    with open_tar(chunk_file, 'w:gz', compresslevel=self._compression, dereference=True,
+                  errorlevel=2) as tarout:
+      for entry in entries:
+        tarout.add(entry, os.path.relpath(entry, self._artifact_root), recursive=False)
+
   def extract(self):
+    self._check_tarfile()
+    with open(self._tarfile, 'rb') as fileobj:
+      self.extract_stream(fileobj)
+
+  def extract_stream(self, fileobj):
+    """Extract the files in a tarball read sequentially from `fileobj`, without seeking.
+
+    This allows extracting an artifact as it's downloaded, rather than after. Every entry is
+    recorded in the artifact's paths before it's extracted, so that if extraction fails part way,
+    `get_paths` still covers anything it wrote.
+
+    :param fileobj: A file-like object with a `read(size)` method.
+    """
     try:
-      with open_tar(self._tarfile, 'r', errorlevel=2) as tarin:
-        # Note: We create all needed paths proactively, even though extractall() can do this for us.
-        # This is because we may be called concurrently on multiple artifacts that share directories,
-        # and there will be a race condition inside extractall(): task T1 A) sees that a directory
-        # doesn't exist and B) tries to create it. But in the gap between A) and B) task T2 creates
-        # the same directory, so T1 throws "File exists" in B).
-        # This actually happened, and was very hard to debug.
-        # Creating the paths here up front allows us to squelch that "File exists" error.
-        paths = []
-        dirs = set()
-        for tarinfo in tarin.getmembers():
-          paths.append(tarinfo.name)
-          if tarinfo.isdir():
-            dirs.add(tarinfo.name)
-          else:
-            dirs.add(os.path.dirname(tarinfo.name))
-        for d in dirs:
-          try:
-            os.makedirs(os.path.join(self._artifact_root, d))
-          except OSError as e:
-            if e.errno != errno.EEXIST:
-              raise
-        tarin.extractall(self._artifact_root)
-        self._relpaths.update(paths)
+      with open_tar(fileobj, 'r|*', errorlevel=2) as tarin:
+        members = iter(tarin)
+        first = next(members, None)
+        if first is None:
+          return
+        if first.name == self.FORMAT_MEMBER:
+          artifact_format = tarin.extractfile(first).read()
+          if artifact_format != b'chunked':
+            raise ArtifactError('Unsupported artifact format: {}'.format(artifact_format))
+          self._extract_chunks(tarin, members)
+        else:
+          self._extract_members(tarin, itertools.chain([first], members))
     except tarfile.ReadError as e:
       raise ArtifactError(e.message)
+
+  def _extract_chunks(self, tarin, chunk_members):
+    # Chunks are read into memory in sequence, and extracted in parallel. We bound the number read
+    # but not yet extracted.
+    def chunks():
+      for chunk_member in chunk_members:
+        yield tarin.extractfile(chunk_member).read()
+    self._map_in_parallel(self._extract_chunk, chunks())
+
+  def _extract_chunk(self, chunk):
+    with open_tar(io.BytesIO(chunk), 'r:gz', errorlevel=2) as tarin:
+      self._extract_members(tarin, tarin)
+
+  def _extract_members(self, tarin, members):
+    # Note: We create all needed paths ourselves, even though extract() can do this for us.
+    # This is because we may be called concurrently on multiple artifacts that share directories,
+    # and there will be a race condition inside extract(): task T1 A) sees that a directory
+    # doesn't exist and B) tries to create it. But in the gap between A) and B) task T2 creates
+    # the same directory, so T1 throws "File exists" in B).
+    # This actually happened, and was very hard to debug.
+    # Creating the paths here allows us to squelch that "File exists" error.
+    for tarinfo in members:
+      self._relpaths.add(tarinfo.name)
+      self._ensure_dir(self._containing_dir(tarinfo))
+      tarin.extract(tarinfo, self._artifact_root)
+
+  @staticmethod
+  def _map_in_parallel(func, items):
+    """Returns the results of calling func on each item, calling it on several items at once.
+
+    Consumes `items` only a little ahead of the calls, so it may be a lazy iterator.
+    """
+    num_workers = multiprocessing.cpu_count()
+    pool = ThreadPool(processes=num_workers)
+    try:
+      pending = deque()
+      results = []
+      for item in items:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= 2 * num_workers:
+          results.append(pending.popleft().get())
+      results.extend(result.get() for result in pending)
+      return results
+    finally:
+      pool.close()
+      pool.join()
+
+  @staticmethod
+  def _containing_dir(tarinfo):
+    return tarinfo.name if tarinfo.isdir() else os.path.dirname(tarinfo.name)
+
+  def _ensure_dir(self, relpath):
+    try:
+      os.makedirs(os.path.join(self._artifact_root, relpath))
+    except OSError as e:
+      if e.errno != errno.EEXIST:
+        raise
@@ -9,6 +9,7 @@ import logging
 import os
 import sys
 
+from pants.cache.artifact_cache_metrics import ArtifactCacheMetrics
 
 # Note throughout the distinction between the artifact_root (which is where the artifacts are
 # originally built and where the cache restores them to) and the cache root path/URL (which is
@@ -61,6 +62,15 @@ class ArtifactCache(object):
     """
     self.artifact_root = artifact_root
 
+  @property
+  def metrics_name(self):
+    """The backend name this cache's operations are recorded under in `ArtifactCacheMetrics`."""
+    return type(self).__name__
+
+  def measure(self, operation):
+    """Times the enclosed block as an operation. See `ArtifactCacheMetrics.measure`."""
+    return ArtifactCacheMetrics.instance().measure(self.metrics_name, operation)
+
   def insert(self, cache_key, paths, overwrite=False):
     """Cache the output of a build.
 
@@ -77,18 +87,22 @@ class ArtifactCache(object):
     if missing_files:
       raise ArtifactCacheError('Tried to cache nonexistent files {0}'.format(missing_files))
 
-    if not overwrite:
-      if self.has(cache_key):
-        logger.debug('Skipping insert of existing artifact: ', cache_key)
+    with self.measure('insert') as measurement:
+      if not overwrite:
+        if self.has(cache_key):
+          logger.debug('Skipping insert of existing artifact: ', cache_key)
+          measurement.outcome = 'exists'
+          return False
+
+      try:
+        self.try_insert(cache_key, paths)
+        measurement.outcome = 'inserted'
+        return True
+      except NonfatalArtifactCacheError as e:
+        logger.error('Error while writing to artifact cache: {0}. '.format(e))
+        measurement.error = True
         return False
 
-    try:
-      self.try_insert(cache_key, paths)
-      return True
-    except NonfatalArtifactCacheError as e:
-      logger.error('Error while writing to artifact cache: {0}. '.format(e))
-      return False
-
   def try_insert(self, cache_key, paths):
     """Attempt to cache the output of a build, without error-handling.
 
@@ -121,6 +135,24 @@ class ArtifactCache(object):
     """
     pass
 
+  def batches_reads(self):
+    """Returns True if `use_cached_files_many` is faster than `use_cached_files` on each key.
+
+    Callers reading many keys from caches that don't batch reads are better off calling
+    `use_cached_files` concurrently themselves, e.g. via `call_use_cached_files`.
+    """
+    return False
+
+  def use_cached_files_many(self, cache_keys):
+    """Use the files cached for each of the given keys.
+
+    Returns a list of results, one per key and in the same order, each as described for
+    `use_cached_files`. This default implementation reads the keys one after another.
+
+    :param list cache_keys: A list of CacheKey objects.
+    """
+    return [self.use_cached_files(cache_key) for cache_key in cache_keys]
+
   def delete(self, cache_key):
     """Delete the artifacts for the specified key.
 
@@ -157,3 +189,18 @@ def call_insert(tup):
   """
   cache, key, files, overwrite = tup
   return cache.insert(key, files, overwrite)
+
+def call_with_metrics(tup):
+  """Importable helper for multi-proc calling of another helper, that also ships back metrics.
+
+  Artifact cache metrics recorded in a subprocess are lost unless returned to the calling process.
+  This calls a helper such as `call_use_cached_files` and returns a pair of its result and a
+  snapshot of the metrics recorded while calling it, which the caller should `merge` into its own
+  `ArtifactCacheMetrics.instance()`.
+
+  :param tup: A pair of a helper function and its tuple arg,
+              eg (call_insert, (some_cache_instance, cache_key, [some_file], False))
+  """
+  func, args = tup
+  res = func(args)
+  return res, ArtifactCacheMetrics.instance().drain()
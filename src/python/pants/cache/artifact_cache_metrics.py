@@ -0,0 +1,190 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class Measurement(object):
+  """Details of a single measured operation, filled in by the code performing it.
+
+  :param int bytes: The number of bytes the operation read, wrote or transferred.
+  :param string outcome: A short description of the result, e.g., 'hit' or 'miss'.
+  :param bool error: Whether the operation failed. Set automatically if it raised.
+  """
+
+  def __init__(self):
+    self.bytes = 0
+    self.outcome = None
+    self.error = False
+
+
+class ArtifactCacheMetrics(object):
+  """Records the latency, bytes and errors of artifact cache operations, per cache backend.
+
+  Caches record into the per-process instance returned by `ArtifactCacheMetrics.instance`. Work done
+  in other processes is recorded there, so must be shipped back and `merge`d in; see
+  `pants.cache.artifact_cache.call_with_metrics`.
+
+  Also records the round trip times of pings to remote caches.
+  """
+
+  # We keep at most this many latencies per operation, for computing percentiles.
+  MAX_SAMPLES = 10000
+
+  _instance = None
+  _pid = None
+  _instance_lock = threading.Lock()
+
+  @classmethod
+  def instance(cls):
+    """Returns this process's metrics."""
+    with cls._instance_lock:
+      # A forked process starts afresh, so that what it ships back excludes its parent's metrics.
+      if cls._instance is None or cls._pid != os.getpid():
+        cls._instance = cls()
+        cls._pid = os.getpid()
+      return cls._instance
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._init_state()
+
+  def _init_state(self):
+    # (backend, operation) -> stats dict.
+    self._stats = {}
+    # netloc -> round trip secs.
+    self._pings = {}
+
+  @staticmethod
+  def _new_stats():
+    return {
+      'count': 0,
+      'errors': 0,
+      'bytes': 0,
+      'total_secs': 0.0,
+      'max_secs': 0.0,
+      'outcomes': defaultdict(int),
+      'samples': [],
+    }
+
+  @contextmanager
+  def measure(self, backend, operation):
+    """Times the enclosed block as an operation on the given backend.
+
+    Yields a `Measurement`, which the block can fill in with further details.
+
+    :param string backend: A name for the cache backend, e.g., 'remote:cache.example.com'.
+    :param string operation: A name for the operation, e.g., 'read' or 'GET'.
+    """
+    measurement = Measurement()
+    start = time.time()
+    try:
+      yield measurement
+    except Exception:
+      measurement.error = True
+      raise
+    finally:
+      self.record(backend, operation, time.time() - start, num_bytes=measurement.bytes,
+                  outcome=measurement.outcome, error=measurement.error)
+
+  def record(self, backend, operation, secs, num_bytes=0, outcome=None, error=False):
+    """Records a single operation on the given backend."""
+    with self._lock:
+      stats = self._stats.get((backend, operation))
+      if stats is None:
+        stats = self._stats[(backend, operation)] = self._new_stats()
+      stats['count'] += 1
+      stats['errors'] += 1 if error else 0
+      stats['bytes'] += num_bytes
+      stats['total_secs'] += secs
+      stats['max_secs'] = max(stats['max_secs'], secs)
+      if outcome:
+        stats['outcomes'][outcome] += 1
+      if len(stats['samples']) < self.MAX_SAMPLES:
+        stats['samples'].append(secs)
+
+  def record_ping(self, netloc, secs):
+    """Records the round trip time to a remote cache, as measured by a `Pinger`."""
+    with self._lock:
+      self._pings[netloc] = secs
+
+  def reset(self):
+    """Forgets everything recorded so far."""
+    with self._lock:
+      self._init_state()
+
+  def drain(self):
+    """Returns a picklable snapshot of everything recorded so far, and forgets it."""
+    with self._lock:
+      snapshot = {
+        'stats': [(key, dict(stats, outcomes=dict(stats['outcomes'])))
+                  for key, stats in self._stats.items()],
+        'pings': dict(self._pings),
+      }
+      self._init_state()
+      return snapshot
+
+  def merge(self, snapshot):
+    """Adds in a snapshot returned by `drain`, typically from another process."""
+    with self._lock:
+      for key, other in snapshot['stats']:
+        stats = self._stats.get(tuple(key))
+        if stats is None:
+          stats = self._stats[tuple(key)] = self._new_stats()
+        for field in ('count', 'errors', 'bytes', 'total_secs'):
+          stats[field] += other[field]
+        stats['max_secs'] = max(stats['max_secs'], other['max_secs'])
+        for outcome, count in other['outcomes'].items():
+          stats['outcomes'][outcome] += count
+        room = self.MAX_SAMPLES - len(stats['samples'])
+        stats['samples'].extend(other['samples'][:room])
+      self._pings.update(snapshot['pings'])
+
+  def get_all(self):
+    """Returns a summary of each operation on each backend, as a list of dicts."""
+    def percentile(sorted_samples, p):
+      if not sorted_samples:
+        return 0.0
+      return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * p))]
+
+    ret = []
+    with self._lock:
+      for (backend, operation), stats in sorted(self._stats.items()):
+        samples = sorted(stats['samples'])
+        ret.append({
+          'backend': backend,
+          'operation': operation,
+          'count': stats['count'],
+          'errors': stats['errors'],
+          'bytes': stats['bytes'],
+          'outcomes': dict(stats['outcomes']),
+          'total_secs': stats['total_secs'],
+          'mean_secs': stats['total_secs'] / stats['count'],
+          'p50_secs': percentile(samples, 0.5),
+          'p90_secs': percentile(samples, 0.9),
+          'max_secs': stats['max_secs'],
+        })
+    return ret
+
+  def get_pings(self):
+    """Returns the round trip times recorded for remote caches, as a dict of netloc -> secs."""
+    with self._lock:
+      return dict(self._pings)
+
+  def get_as_dict(self):
+    """Returns all metrics as a dict, with the results of `get_all` and `get_pings`."""
+    return {'operations': self.get_all(), 'pings': self.get_pings()}
+
+  def write_json(self, path):
+    """Writes all metrics to the given file, as JSON."""
+    with open(path, 'w') as fp:
+      json.dump(self.get_as_dict(), fp, indent=2, sort_keys=True)
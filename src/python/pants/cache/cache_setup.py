@@ -10,7 +10,9 @@ import urlparse
 
 from six.moves import range
 
+from pants.cache.artifact import TarballArtifact
 from pants.cache.artifact_cache import ArtifactCacheError
+from pants.cache.content_addressed_artifact_cache import ContentAddressedArtifactCache
 from pants.cache.local_artifact_cache import LocalArtifactCache, TempLocalArtifactCache
 from pants.cache.pinger import Pinger
 from pants.cache.restful_artifact_cache import RESTfulArtifactCache
@@ -44,8 +46,13 @@ def select_best_url(spec, pinger, log):
   return best_url
 
 
+LOCAL_CACHE_LAYOUTS = ('tarball', 'content-addressed')
+
+
 def create_artifact_cache(log, artifact_root, spec, task_name, compression,
-                          action='using', local=None):
+                          action='using', local=None, max_concurrent_reads=None,
+                          local_layout='tarball', local_max_size_bytes=0, local_hardlinks=False,
+                          artifact_format='tgz'):
   """Returns an artifact cache for the specified spec.
 
   spec can be:
@@ -64,26 +71,53 @@ def create_artifact_cache(log, artifact_root, spec, task_name, compression,
                           providing checksums.
   :param str action: A verb, eg 'read' or 'write' for printed messages.
   :param LocalArtifactCache local: A local cache for use by created remote caches
+  :param int max_concurrent_reads: The maximum number of artifacts created remote caches read at
+                                   once; see `RESTfulArtifactCache`.
+  :param str local_layout: How created local caches store artifacts: 'tarball' for a compressed
+                           tarball per artifact, or 'content-addressed' for files deduplicated
+                           across artifacts; see `ContentAddressedArtifactCache`.
+  :param int local_max_size_bytes: The size beyond which created content-addressed caches evict
+                                   their least recently used artifacts, or 0 for no maximum.
+  :param bool local_hardlinks: Whether created content-addressed caches restore files as hardlinks.
+  :param str artifact_format: The format of created artifacts, one of `TarballArtifact.FORMATS`.
+                              Reads detect the format of the artifacts they read.
   """
   if not spec:
     raise EmptyCacheSpecError()
   if compression not in range(10):
     raise ValueError('compression value must be an integer between 0 and 9 inclusive: {com}'.format(
       com=compression))
+  if local_layout not in LOCAL_CACHE_LAYOUTS:
+    raise ValueError('local_layout must be one of {layouts}: {layout}'.format(
+      layouts=', '.join(LOCAL_CACHE_LAYOUTS), layout=local_layout))
+  if artifact_format not in TarballArtifact.FORMATS:
+    raise ValueError('artifact_format must be one of {formats}: {format}'.format(
+      formats=', '.join(TarballArtifact.FORMATS), format=artifact_format))
 
   def recurse(new_spec, new_local=local):
     return create_artifact_cache(log=log, artifact_root=artifact_root, spec=new_spec,
                                  task_name=task_name, compression=compression, action=action,
-                                 local=new_local)
+                                 local=new_local, max_concurrent_reads=max_concurrent_reads,
+                                 local_layout=local_layout,
+                                 local_max_size_bytes=local_max_size_bytes,
+                                 local_hardlinks=local_hardlinks,
+                                 artifact_format=artifact_format)
 
   def is_remote(spec):
     return spec.startswith('http://') or spec.startswith('https://')
 
   if isinstance(spec, basestring):
     if spec.startswith('/') or spec.startswith('~'):
+      if local_layout == 'content-addressed':
+        log.debug('{0} {1} content-addressed local artifact cache at {2}'
+                  .format(task_name, action, spec))
+        return ContentAddressedArtifactCache(artifact_root, spec, task_name, compression,
+                                             max_size_bytes=local_max_size_bytes,
+                                             hardlink=local_hardlinks,
+                                             artifact_format=artifact_format)
       path = os.path.join(spec, task_name)
       log.debug('{0} {1} local artifact cache at {2}'.format(task_name, action, path))
-      return LocalArtifactCache(artifact_root, path, compression)
+      return LocalArtifactCache(artifact_root, path, compression, artifact_format=artifact_format)
     elif is_remote(spec):
       # Caches are supposed to be close, and we don't want to waste time pinging on no-op builds.
       # So we ping twice with a short timeout.
@@ -92,8 +126,10 @@ def create_artifact_cache(log, artifact_root, spec, task_name, compression,
       if best_url:
         url = best_url.rstrip('/') + '/' + task_name
         log.debug('{0} {1} remote artifact cache at {2}'.format(task_name, action, url))
-        local = local or TempLocalArtifactCache(artifact_root, compression)
-        return RESTfulArtifactCache(artifact_root, url, local)
+        local = local or TempLocalArtifactCache(artifact_root, compression,
+                                                artifact_format=artifact_format)
+        return RESTfulArtifactCache(artifact_root, url, local,
+                                    max_concurrent_reads=max_concurrent_reads)
       else:
         log.warn('{0} has no reachable artifact cache in {1}.'.format(task_name, spec))
         return None
@@ -103,7 +139,7 @@ def create_artifact_cache(log, artifact_root, spec, task_name, compression,
     return recurse(spec[0])
   elif isinstance(spec, (list, tuple)) and len(spec) is 2:
     first = recurse(spec[0])
-    if not isinstance(first, LocalArtifactCache):
+    if not isinstance(first, (LocalArtifactCache, ContentAddressedArtifactCache)):
       raise LocalCacheSpecRequiredError(
         'First of two cache specs must be a local cache path. Found: {0}'.format(spec[0]))
     if not is_remote(spec[1]):
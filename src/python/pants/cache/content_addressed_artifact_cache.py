@@ -0,0 +1,352 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import errno
+import json
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+
+from pants.base.hash_utils import hash_file
+from pants.cache.artifact_cache import UnreadableArtifact
+from pants.cache.local_artifact_cache import BaseLocalArtifactCache, ChunkReader
+from pants.util.dirutil import safe_delete, safe_mkdir, safe_mkdir_for, safe_walk
+
+
+logger = logging.getLogger(__name__)
+
+
+BLOB_DIR = '.blobs'
+MANIFEST_EXTENSION = '.manifest'
+
+# Unreferenced blobs younger than this may be about to be referenced by a manifest that another
+# process is writing, so garbage collection leaves them be.
+_BLOB_GRACE_PERIOD_SECS = 60 * 60
+
+# Records the bytes of blobs added to a store since it was last collected, across processes.
+_GC_PENDING_FILE = '.gc-pending'
+
+
+GarbageCollection = namedtuple('GarbageCollection',
+                               ['manifests_deleted', 'blobs_deleted', 'bytes_freed', 'bytes_kept'])
+
+
+def _blob_path(blob_root, digest):
+  return os.path.join(blob_root, digest[:2], digest)
+
+
+def _read_manifest(path):
+  with open(path, 'r') as fp:
+    manifest = json.load(fp)
+  if manifest.get('version') != ContentAddressedArtifactCache.VERSION:
+    raise ValueError('Unsupported manifest version in {}'.format(path))
+  return manifest
+
+
+def collect_garbage(store_root, max_size_bytes=0):
+  """Deletes unreferenced blobs from a content addressed store, and evicts artifacts if it's too big.
+
+  While the blobs in the store take up more than `max_size_bytes`, the least recently used artifacts
+  are deleted, along with any blobs only they referenced. Blobs still within their grace period are
+  left for a later collection, though no longer counted against the maximum, since they may be
+  about to be referenced by a concurrent insert.
+
+  :param string store_root: The root of the store, as passed to `ContentAddressedArtifactCache`.
+  :param int max_size_bytes: The maximum total size of the stored blobs, or 0 for no maximum.
+  :returns: A `GarbageCollection` summarizing what was collected.
+  """
+  blob_root = os.path.join(store_root, BLOB_DIR)
+  now = time.time()
+
+  manifests = []  # (last use time, path, digests)
+  refcounts = defaultdict(int)
+  manifests_deleted = 0
+  for root, dirs, files in safe_walk(store_root):
+    if root == store_root and BLOB_DIR in dirs:
+      dirs.remove(BLOB_DIR)
+    for filename in files:
+      if filename.endswith(MANIFEST_EXTENSION):
+        path = os.path.join(root, filename)
+        try:
+          last_used = os.stat(path).st_mtime
+          digests = set(digest for _, digest, _ in _read_manifest(path)['files'])
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+          # Unreadable manifests can never be restored from, so are just garbage.
+          safe_delete(path)
+          manifests_deleted += 1
+          continue
+        manifests.append((last_used, path, digests))
+        for digest in digests:
+          refcounts[digest] += 1
+
+  blob_sizes = {}
+  blobs_deleted = 0
+  bytes_freed = 0
+  for root, _, files in safe_walk(blob_root):
+    for filename in files:
+      path = os.path.join(root, filename)
+      try:
+        blob_stat = os.stat(path)
+      except OSError:
+        continue
+      referenced = filename in refcounts
+      if not referenced and now - blob_stat.st_mtime > _BLOB_GRACE_PERIOD_SECS:
+        # Includes temporary files abandoned by interrupted inserts.
+        safe_delete(path)
+        blobs_deleted += 1
+        bytes_freed += blob_stat.st_size
+      elif referenced:
+        blob_sizes[filename] = blob_stat.st_size
+
+  bytes_kept = sum(blob_sizes.values())
+  bytes_deferred = 0
+  if max_size_bytes and bytes_kept > max_size_bytes:
+    for _, path, digests in sorted(manifests):
+      if bytes_kept - bytes_deferred <= max_size_bytes:
+        break
+      safe_delete(path)
+      manifests_deleted += 1
+      for digest in digests:
+        refcounts[digest] -= 1
+        if refcounts[digest] == 0 and digest in blob_sizes:
+          size = blob_sizes.pop(digest)
+          blob = _blob_path(blob_root, digest)
+          try:
+            # Inserts touch the blobs they reference, so re-check now that it's unreferenced.
+            young = now - os.stat(blob).st_mtime <= _BLOB_GRACE_PERIOD_SECS
+          except OSError:
+            young = False
+          if young:
+            bytes_deferred += size
+          else:
+            safe_delete(blob)
+            blobs_deleted += 1
+            bytes_freed += size
+            bytes_kept -= size
+
+  return GarbageCollection(manifests_deleted, blobs_deleted, bytes_freed, bytes_kept)
+
+
+class ContentAddressedArtifactCache(BaseLocalArtifactCache):
+  """A local artifact cache that stores each distinct file just once, keyed by its content digest.
+
+  An artifact is stored as a manifest listing its files and their digests, so identical files in
+  different artifacts, even those of different tasks sharing a store, take up space only once.
+  The store is laid out as:
+
+    <store_root>/.blobs/<digest prefix>/<digest>: file contents.
+    <store_root>/<namespace>/<cache key id>/<cache key hash>.manifest: artifact manifests.
+
+  If the store grows beyond its maximum size, the least recently used artifacts are evicted.
+  """
+
+  # Bump this to ignore all previously written manifests.
+  VERSION = 1
+
+  # Inserts of this fraction of the maximum store size trigger a garbage collection.
+  _GC_THRESHOLD_FRACTION = 0.1
+
+  _gc_lock = threading.Lock()
+
+  def __init__(self, artifact_root, store_root, namespace, compression, max_size_bytes=0,
+               hardlink=False, artifact_format='tgz'):
+    """
+    :param str artifact_root: The path under which cacheable products will be read/written.
+    :param str store_root: The root of the store, which may be shared by several caches.
+    :param str namespace: The name of the directory under `store_root` for this cache's manifests,
+                          typically the name of the task using the cache.
+    :param int compression: The gzip compression level for artifacts created for upload to a remote
+                            cache.
+    :param int max_size_bytes: The maximum total size of the store's blobs, or 0 for no maximum.
+    :param bool hardlink: Restore files as hardlinks to the store rather than as copies. Only safe if
+                          restored files are replaced rather than modified in place.
+    :param str artifact_format: The format of artifacts created for upload to a remote cache; see
+                                `TarballArtifact`.
+    """
+    super(ContentAddressedArtifactCache, self).__init__(artifact_root, compression,
+                                                        artifact_format=artifact_format)
+    self._store_root = os.path.realpath(os.path.expanduser(store_root))
+    self._cache_root = os.path.join(self._store_root, namespace)
+    self._blob_root = os.path.join(self._store_root, BLOB_DIR)
+    self._max_size_bytes = max_size_bytes
+    self._hardlink = hardlink
+
+    safe_mkdir(self._cache_root)
+    safe_mkdir(self._blob_root)
+
+  @property
+  def metrics_name(self):
+    return 'local:{}'.format(self._cache_root)
+
+  def has(self, cache_key):
+    return os.path.isfile(self._manifest_for_key(cache_key))
+
+  @contextmanager
+  def insert_paths(self, cache_key, paths):
+    """Store paths as an artifact, and yield the path to a tarball of them for upload."""
+    self._store_paths(cache_key, paths)
+    with self._tmpfile(cache_key, 'write') as tmp:
+      self._collect(tmp.name, paths)
+      yield tmp.name
+
+  def try_insert(self, cache_key, paths):
+    self._store_paths(cache_key, paths)
+
+  def store_and_use_artifact(self, cache_key, src):
+    artifact = self._stream_artifact()
+    self._extract_stream(artifact, ChunkReader(src))
+    # Store exactly the extracted entries: their directories may hold other files too.
+    self._store_paths(cache_key, list(artifact.get_paths()), recursive=False)
+    return True
+
+  def use_cached_files(self, cache_key):
+    manifest_path = self._manifest_for_key(cache_key)
+    with self.measure('read') as measurement:
+      try:
+        try:
+          manifest = _read_manifest(manifest_path)
+        except IOError as e:
+          if e.errno == errno.ENOENT:
+            measurement.outcome = 'miss'
+            return False
+          raise
+        for relpath in manifest['dirs']:
+          safe_mkdir(os.path.join(self.artifact_root, relpath))
+        for relpath, digest, mode in manifest['files']:
+          dst = os.path.join(self.artifact_root, relpath)
+          self._restore(_blob_path(self._blob_root, digest), dst, mode)
+          measurement.bytes += os.path.getsize(dst)
+        # The manifest's mtime records when the artifact was last used, for LRU eviction.
+        os.utime(manifest_path, None)
+        measurement.outcome = 'hit'
+        return True
+      except Exception as e:
+        logger.warn('Error while reading from local artifact cache: {0}'.format(e))
+        measurement.outcome = 'unreadable'
+        measurement.error = True
+        return UnreadableArtifact(cache_key, e)
+
+  def delete(self, cache_key):
+    # Blobs the artifact referenced are deleted, if unreferenced, by the next garbage collection.
+    safe_delete(self._manifest_for_key(cache_key))
+
+  def _manifest_for_key(self, cache_key):
+    # Note: it's important to use the id as well as the hash, because two different targets
+    # may have the same hash if both have no sources, but we may still want to differentiate them.
+    return os.path.join(self._cache_root, cache_key.id, cache_key.hash) + MANIFEST_EXTENSION
+
+  def _restore(self, blob, dst, mode):
+    # Restored files always replace, rather than overwrite, any existing file: it may be a hardlink
+    # to a blob.
+    safe_mkdir_for(dst)
+    tmp = '{}.{}.{}.tmp'.format(dst, os.getpid(), threading.current_thread().ident)
+    try:
+      # A hardlink shares the blob's mode, so only link blobs whose mode is the one recorded.
+      if self._hardlink and stat.S_IMODE(os.stat(blob).st_mode) == mode:
+        try:
+          os.link(blob, tmp)
+          os.rename(tmp, dst)
+          return
+        except OSError as e:
+          # E.g., the store and the artifact root are on different filesystems.
+          if e.errno != errno.EXDEV:
+            raise
+      shutil.copyfile(blob, tmp)
+      os.chmod(tmp, mode)
+      os.rename(tmp, dst)
+    finally:
+      safe_delete(tmp)
+
+  def _store_paths(self, cache_key, paths, recursive=True):
+    dirs = set()
+    files = {}
+    bytes_added = [0]
+
+    def store_file(path):
+      relpath = os.path.relpath(path, self.artifact_root)
+      files[relpath] = [relpath, self._store_blob(path, bytes_added), os.stat(path).st_mode & 0o777]
+
+    for path in paths:
+      if os.path.isdir(path):
+        dirs.add(os.path.relpath(path, self.artifact_root))
+        if recursive:
+          for root, dirnames, filenames in safe_walk(path, followlinks=True):
+            for dirname in dirnames:
+              dirs.add(os.path.relpath(os.path.join(root, dirname), self.artifact_root))
+            for filename in filenames:
+              store_file(os.path.join(root, filename))
+      else:
+        store_file(path)
+
+    manifest = {
+      'version': self.VERSION,
+      'dirs': sorted(dirs),
+      'files': sorted(files.values()),
+    }
+    manifest_path = self._manifest_for_key(cache_key)
+    safe_mkdir_for(manifest_path)
+    with self._tmpfile(cache_key, 'manifest') as tmp:
+      json.dump(manifest, tmp)
+      tmp.close()
+      os.rename(tmp.name, manifest_path)
+
+    self._maybe_collect_garbage(bytes_added[0])
+
+  def _store_blob(self, path, bytes_added):
+    digest = hash_file(path)
+    blob = _blob_path(self._blob_root, digest)
+    if os.path.exists(blob):
+      # Mark the blob as recently referenced, so garbage collection doesn't race this insert.
+      os.utime(blob, None)
+    else:
+      safe_mkdir_for(blob)
+      fd, tmp = tempfile.mkstemp(dir=os.path.dirname(blob), suffix='.tmp')
+      try:
+        with os.fdopen(fd, 'wb') as out, open(path, 'rb') as src:
+          shutil.copyfileobj(src, out)
+        os.chmod(tmp, os.stat(path).st_mode & 0o777)
+        os.rename(tmp, blob)
+        bytes_added[0] += os.path.getsize(blob)
+      finally:
+        safe_delete(tmp)
+    return digest
+
+  def _maybe_collect_garbage(self, bytes_added):
+    # The bytes added since the last collection are tallied in the store, so that a collection is
+    # due after the same amount of inserts however many processes they are spread across. The
+    # tally is read and written without a lock between processes, so is only approximate.
+    if not self._max_size_bytes or not bytes_added:
+      return
+    pending_file = os.path.join(self._store_root, _GC_PENDING_FILE)
+    with self._gc_lock:
+      try:
+        with open(pending_file, 'r') as fp:
+          pending = int(fp.read())
+      except (IOError, ValueError):
+        pending = 0
+      pending += bytes_added
+      due = pending >= self._max_size_bytes * self._GC_THRESHOLD_FRACTION
+      fd, tmp = tempfile.mkstemp(dir=self._store_root, suffix='.tmp')
+      try:
+        with os.fdopen(fd, 'w') as fp:
+          fp.write(str(0 if due else pending))
+        os.rename(tmp, pending_file)
+      finally:
+        safe_delete(tmp)
+      if not due:
+        return
+      gc = collect_garbage(self._store_root, self._max_size_bytes)
+    if gc.manifests_deleted or gc.blobs_deleted:
+      logger.debug('Evicted {} artifacts and {} blobs ({} bytes) from {}.'
+                   .format(gc.manifests_deleted, gc.blobs_deleted, gc.bytes_freed,
+                           self._store_root))
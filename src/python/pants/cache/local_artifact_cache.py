@@ -19,19 +19,70 @@ from pants.util.dirutil import safe_delete, safe_mkdir, safe_mkdir_for
 
 logger = logging.getLogger(__name__)
 
+
+class ChunkReader(object):
+  """Adapts an iterator over byte chunks to a readable file-like object.
+
+  Optionally copies every chunk it reads to a `tee` file. Counts the bytes it reads in `bytes_read`.
+  """
+
+  def __init__(self, chunks, tee=None):
+    self._chunks = iter(chunks)
+    self._tee = tee
+    self.bytes_read = 0
+    self._buffer = b''
+    self._offset = 0
+
+  def _next_chunk(self):
+    for chunk in self._chunks:
+      if chunk:
+        self.bytes_read += len(chunk)
+        if self._tee:
+          self._tee.write(chunk)
+        return chunk
+    return b''
+
+  def read(self, size=-1):
+    pieces = []
+    while size != 0:
+      if self._offset >= len(self._buffer):
+        self._buffer, self._offset = self._next_chunk(), 0
+        if not self._buffer:
+          break
+      end = len(self._buffer) if size < 0 else self._offset + size
+      piece = self._buffer[self._offset:end]
+      self._offset += len(piece)
+      pieces.append(piece)
+      if size > 0:
+        size -= len(piece)
+    return b''.join(pieces)
+
+  def drain(self):
+    """Reads, and so tees, any chunks that remain."""
+    while self._next_chunk():
+      pass
+
+
 class BaseLocalArtifactCache(ArtifactCache):
-  def __init__(self, artifact_root, compression):
+  def __init__(self, artifact_root, compression, artifact_format='tgz'):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param int compression: The gzip compression level for created artifacts.
                             Valid values are 0-9.
+    :param str artifact_format: The format of created artifacts; see `TarballArtifact`.
     """
     super(BaseLocalArtifactCache, self).__init__(artifact_root)
     self._compression = compression
+    self._artifact_format = artifact_format
     self._cache_root = None
 
   def _artifact(self, path):
-    return TarballArtifact(self.artifact_root, path, self._compression)
+    return TarballArtifact(self.artifact_root, path, self._compression,
+                           format=self._artifact_format)
+
+  def _stream_artifact(self):
+    """An artifact with no tarball of its own, to extract from a stream via `_extract_stream`."""
+    return self._artifact(None)
 
   @contextmanager
   def _tmpfile(self, cache_key, use):
@@ -43,18 +94,44 @@ class BaseLocalArtifactCache(ArtifactCache):
   def insert_paths(self, cache_key, paths):
     """Gather paths into artifact, store it, and yield the path to stored artifact tarball."""
     with self._tmpfile(cache_key, 'write') as tmp:
-      self._artifact(tmp.name).collect(paths)
+      self._collect(tmp.name, paths)
       yield self._store_tarball(cache_key, tmp.name)
 
+  def _collect(self, tarfile, paths):
+    with self.measure('compress') as measurement:
+      self._artifact(tarfile).collect(paths)
+      measurement.bytes = os.path.getsize(tarfile)
+
+  def _extract_stream(self, artifact, reader):
+    """Extract the artifact read from `reader`, then drain the reader.
+
+    If reading or extraction fails, deletes any files already extracted, so that a failed download
+    doesn't leave a partial artifact in the workdir.
+    """
+    # When reading from a remote cache, this includes the time spent waiting for the download.
+    with self.measure('extract') as measurement:
+      try:
+        artifact.extract_stream(reader)
+        reader.drain()
+      except Exception:
+        # Directories may hold files that aren't from this artifact, so we leave them be.
+        for path in artifact.get_paths():
+          if os.path.islink(path) or not os.path.isdir(path):
+            safe_delete(path)
+        raise
+      measurement.bytes = reader.bytes_read
+
   def store_and_use_artifact(self, cache_key, src):
     """
       Read the contents of an tarball from an iterator and return an artifact stored in the cache
+
+      The tarball is extracted as it is read, so a download of it overlaps its extraction.
     """
     with self._tmpfile(cache_key, 'read') as tmp:
-      for chunk in src:
-        tmp.write(chunk)
+      reader = ChunkReader(src, tee=tmp)
+      self._extract_stream(self._artifact(tmp.name), reader)
       tmp.close()
-      self._artifact(self._store_tarball(cache_key, tmp.name)).extract()
+      self._store_tarball(cache_key, tmp.name)
       return True
 
   def _store_tarball(self, cache_key, src):
@@ -63,17 +140,23 @@ class BaseLocalArtifactCache(ArtifactCache):
 
 class LocalArtifactCache(BaseLocalArtifactCache):
   """An artifact cache that stores the artifacts in local files."""
-  def __init__(self, artifact_root, cache_root, compression):
+  def __init__(self, artifact_root, cache_root, compression, artifact_format='tgz'):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param str cache_root: The locally cached files are stored under this directory.
     :param int compression: The gzip compression level for created artifacts (1-9 or false-y).
+    :param str artifact_format: The format of created artifacts; see `TarballArtifact`.
     """
-    super(LocalArtifactCache, self).__init__(artifact_root, compression)
+    super(LocalArtifactCache, self).__init__(artifact_root, compression,
+                                             artifact_format=artifact_format)
     self._cache_root = os.path.realpath(os.path.expanduser(cache_root))
 
     safe_mkdir(self._cache_root)
 
+  @property
+  def metrics_name(self):
+    return 'local:{}'.format(self._cache_root)
+
   def has(self, cache_key):
     return os.path.isfile(self._cache_file_for_key(cache_key))
 
@@ -84,17 +167,25 @@ class LocalArtifactCache(BaseLocalArtifactCache):
     return dest
 
   def use_cached_files(self, cache_key):
-    try:
-      tarfile = self._cache_file_for_key(cache_key)
-      if os.path.exists(tarfile):
-        self._artifact(tarfile).extract()
-        return True
-    except Exception as e:
-      # TODO(davidt): Consider being more granular in what is caught.
-      logger.warn('Error while reading from local artifact cache: {0}'.format(e))
-      return UnreadableArtifact(cache_key, e)
-
-    return False
+    with self.measure('read') as measurement:
+      try:
+        tarfile = self._cache_file_for_key(cache_key)
+        if os.path.exists(tarfile):
+          with self.measure('extract') as extract_measurement:
+            extract_measurement.bytes = os.path.getsize(tarfile)
+            self._artifact(tarfile).extract()
+          measurement.bytes = extract_measurement.bytes
+          measurement.outcome = 'hit'
+          return True
+      except Exception as e:
+        # TODO(davidt): Consider being more granular in what is caught.
+        logger.warn('Error while reading from local artifact cache: {0}'.format(e))
+        measurement.outcome = 'unreadable'
+        measurement.error = True
+        return UnreadableArtifact(cache_key, e)
+
+      measurement.outcome = 'miss'
+      return False
 
   def try_insert(self, cache_key, paths):
     with self.insert_paths(cache_key, paths) as tmp:
@@ -115,15 +206,25 @@ class TempLocalArtifactCache(BaseLocalArtifactCache):
     This implementation does not have a backing _cache_root, and never
     actually stores files between calls, but is useful for handling file IO for a remote cache.
   """
-  def __init__(self, artifact_root, compression):
+  def __init__(self, artifact_root, compression, artifact_format='tgz'):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     """
-    super(TempLocalArtifactCache, self).__init__(artifact_root, compression=compression)
+    super(TempLocalArtifactCache, self).__init__(artifact_root, compression=compression,
+                                                 artifact_format=artifact_format)
+
+  @property
+  def metrics_name(self):
+    return 'temp'
 
   def _store_tarball(self, cache_key, src):
     return src
 
+  def store_and_use_artifact(self, cache_key, src):
+    # Nothing is stored, so there's no need to write the tarball anywhere: just extract it.
+    self._extract_stream(self._stream_artifact(), ChunkReader(src))
+    return True
+
   def has(self, cache_key):
     return False
 
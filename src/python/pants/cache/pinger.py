@@ -10,6 +10,7 @@ from multiprocessing.pool import ThreadPool
 
 from six.moves import range
 
+from pants.cache.artifact_cache_metrics import ArtifactCacheMetrics
 from pants.util.contextutil import Timer
 
 
@@ -48,6 +49,7 @@ class Pinger(object):
         new_rt_secs = Pinger.UNREACHABLE
       rt_secs = min(rt_secs, new_rt_secs)
     _global_pinger_memo[netloc] = rt_secs
+    ArtifactCacheMetrics.instance().record_ping(netloc, rt_secs)
     return rt_secs
 
   def pings(self, netlocs):
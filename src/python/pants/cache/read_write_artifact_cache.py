@@ -49,6 +49,15 @@ class ReadWriteArtifactCache(ArtifactCache):
     else:
       return None
 
+  def batches_reads(self):
+    return bool(self._read_artifact_cache) and self._read_artifact_cache.batches_reads()
+
+  def use_cached_files_many(self, cache_keys):
+    if self._read_artifact_cache:
+      return self._read_artifact_cache.use_cached_files_many(cache_keys)
+    else:
+      return [None] * len(cache_keys)
+
   def delete(self, cache_key):
     if self._write_artifact_cache:
       self._write_artifact_cache.delete(cache_key)
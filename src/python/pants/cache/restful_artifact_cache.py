@@ -6,10 +6,14 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import logging
+import os
+import threading
 import urlparse
+from multiprocessing.pool import ThreadPool
 
 import requests
 from requests import RequestException
+from requests.adapters import HTTPAdapter
 
 from pants.cache.artifact import TarballArtifact
 from pants.cache.artifact_cache import (ArtifactCache, ArtifactCacheError,
@@ -29,24 +33,44 @@ class InvalidRESTfulCacheProtoError(ArtifactCacheError):
   pass
 
 class RequestsSession(object):
+  """A per-process requests session that keeps connections to cache servers alive for reuse."""
+
+  # The number of connections kept alive per host. This bounds the useful concurrency of requests
+  # to any one cache server.
+  POOL_MAXSIZE = 16
+
   _session = None
+  _pid = None
+  _lock = threading.Lock()
+
   @classmethod
   def instance(cls):
-    if cls._session is None:
-      cls._session = requests.Session()
-    return cls._session
+    with cls._lock:
+      # A session inherited across a fork would share its pooled sockets with the parent process.
+      if cls._session is None or cls._pid != os.getpid():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=cls.POOL_MAXSIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        cls._session = session
+        cls._pid = os.getpid()
+      return cls._session
 
 class RESTfulArtifactCache(ArtifactCache):
   """An artifact cache that stores the artifacts on a RESTful service."""
 
   READ_SIZE_BYTES = 4 * 1024 * 1024
 
-  def __init__(self, artifact_root, url_base, local):
+  DEFAULT_MAX_CONCURRENT_READS = 8
+
+  def __init__(self, artifact_root, url_base, local, max_concurrent_reads=None):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param str url_base: The prefix for urls on some RESTful service. We must be able to PUT and GET to any
               path under this base.
     :param BaseLocalArtifactCache local: local cache instance for storing and creating artifacts
+    :param int max_concurrent_reads: The maximum number of artifacts `use_cached_files_many` reads
+              at once.
     """
     super(RESTfulArtifactCache, self).__init__(artifact_root)
     parsed_url = urlparse.urlparse(url_base)
@@ -61,6 +85,12 @@ class RESTfulArtifactCache(ArtifactCache):
     self._netloc = parsed_url.netloc
     self._path_prefix = parsed_url.path.rstrip(b'/')
     self._localcache = local
+    self._max_concurrent_reads = min(max_concurrent_reads or self.DEFAULT_MAX_CONCURRENT_READS,
+                                     RequestsSession.POOL_MAXSIZE)
+
+  @property
+  def metrics_name(self):
+    return 'remote:{}'.format(self._netloc)
 
   def try_insert(self, cache_key, paths):
     # Delegate creation of artifact to local cache.
@@ -82,17 +112,42 @@ class RESTfulArtifactCache(ArtifactCache):
       return self._localcache.use_cached_files(cache_key)
 
     remote_path = self._remote_path_for_key(cache_key)
+    with self.measure('read') as measurement:
+      try:
+        response = self._request('GET', remote_path)
+        if response is not None:
+          # Delegate storage and extraction to local cache
+          def counting_iter():
+            for chunk in response.iter_content(self.READ_SIZE_BYTES):
+              measurement.bytes += len(chunk)
+              yield chunk
+          measurement.outcome = 'hit'
+          return self._localcache.store_and_use_artifact(cache_key, counting_iter())
+      except Exception as e:
+        logger.warn('\nError while reading from remote artifact cache: {0}\n'.format(e))
+        measurement.outcome = 'unreadable'
+        measurement.error = True
+        return UnreadableArtifact(cache_key, e)
+
+      measurement.outcome = 'miss'
+      return False
+
+  def batches_reads(self):
+    return True
+
+  def use_cached_files_many(self, cache_keys):
+    # Reads are dominated by latency, so we issue several at once over the shared session's pooled
+    # connections. Each artifact is extracted as it's downloaded, so extraction overlaps both its
+    # own download and the downloads of other artifacts.
+    num_workers = min(self._max_concurrent_reads, len(cache_keys))
+    if num_workers <= 1:
+      return super(RESTfulArtifactCache, self).use_cached_files_many(cache_keys)
+    pool = ThreadPool(processes=num_workers)
     try:
-      response = self._request('GET', remote_path)
-      if response is not None:
-        # Delegate storage and extraction to local cache
-        byte_iter = response.iter_content(self.READ_SIZE_BYTES)
-        return self._localcache.store_and_use_artifact(cache_key, byte_iter)
-    except Exception as e:
-      logger.warn('\nError while reading from remote artifact cache: {0}\n'.format(e))
-      return UnreadableArtifact(cache_key, e)
-
-    return False
+      return pool.map(self.use_cached_files, cache_keys, chunksize=1)
+    finally:
+      pool.close()
+      pool.join()
 
   def delete(self, cache_key):
     self._localcache.delete(cache_key)
@@ -109,32 +164,36 @@ class RESTfulArtifactCache(ArtifactCache):
 
     session = RequestsSession.instance()
 
-    try:
-      response = None
-      if 'PUT' == method:
-        response = session.put(url, data=body, timeout=self._timeout_secs)
-      elif 'GET' == method:
-        response = session.get(url, timeout=self._timeout_secs, stream=True)
-      elif 'HEAD' == method:
-        response = session.head(url, timeout=self._timeout_secs)
-      elif 'DELETE' == method:
-        response = session.delete(url, timeout=self._timeout_secs)
-      else:
-        raise ValueError('Unknown request method {0}'.format(method))
-
-      # Allow all 2XX responses. E.g., nginx returns 201 on PUT. HEAD may return 204.
-      if int(response.status_code / 100) == 2:
-        return response
-      elif response.status_code == 404:
-        logger.debug('404 returned for {0} request to {1}'.format(method, self._url_string(path)))
-        return None
-      else:
-        raise NonfatalArtifactCacheError('Failed to {0} {1}. Error: {2} {3}'.format(method,
-                                                                         self._url_string(path),
-                                                                         response.status_code,
-                                                                         response.reason))
-    except RequestException as e:
-      raise NonfatalArtifactCacheError(e)
+    # Times the request up to the arrival of the response headers: a GET's body is streamed later.
+    with self.measure(method) as measurement:
+      try:
+        response = None
+        if 'PUT' == method:
+          measurement.bytes = os.fstat(body.fileno()).st_size
+          response = session.put(url, data=body, timeout=self._timeout_secs)
+        elif 'GET' == method:
+          response = session.get(url, timeout=self._timeout_secs, stream=True)
+        elif 'HEAD' == method:
+          response = session.head(url, timeout=self._timeout_secs)
+        elif 'DELETE' == method:
+          response = session.delete(url, timeout=self._timeout_secs)
+        else:
+          raise ValueError('Unknown request method {0}'.format(method))
+
+        measurement.outcome = str(response.status_code)
+        # Allow all 2XX responses. E.g., nginx returns 201 on PUT. HEAD may return 204.
+        if int(response.status_code / 100) == 2:
+          return response
+        elif response.status_code == 404:
+          logger.debug('404 returned for {0} request to {1}'.format(method, self._url_string(path)))
+          return None
+        else:
+          raise NonfatalArtifactCacheError('Failed to {0} {1}. Error: {2} {3}'.format(method,
+                                                                           self._url_string(path),
+                                                                           response.status_code,
+                                                                           response.reason))
+      except RequestException as e:
+        raise NonfatalArtifactCacheError(e)
 
   def _url_string(self, path):
     proto = 'http'
@@ -6,20 +6,26 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import threading
 from collections import defaultdict
 
 from pants.util.dirutil import safe_mkdir_for
+from pants.util.fileutil import atomic_write
 
 
 class AggregatedTimings(object):
   """Aggregates timings over multiple invocations of 'similar' work.
 
-  If filepath is not none, stores the timings in that file. Useful for finding bottlenecks."""
+  If filepath is not none, stores the timings in that file, at the end of the run. Useful for
+  finding bottlenecks. Until then timings are only aggregated in memory, so recording a timing costs
+  the same however many came before."""
+
   def __init__(self, path=None):
     # Map path -> timing in seconds (a float)
     self._timings_by_path = defaultdict(float)
     self._tool_labels = set()
     self._path = path
+    self._lock = threading.Lock()
     safe_mkdir_for(self._path)
 
   def add_timing(self, label, secs, is_tool=False):
@@ -28,13 +34,22 @@ class AggregatedTimings(object):
     secs - a double, so fractional seconds are allowed.
     is_tool - whether this label represents a tool invocation.
     """
-    self._timings_by_path[label] += secs
-    if is_tool:
-      self._tool_labels.add(label)
-    # Check existence in case we're a clean-all. We don't want to write anything in that case.
-    if self._path and os.path.exists(os.path.dirname(self._path)):
-      with open(self._path, 'w') as f:
-        for x in self.get_all():
+    with self._lock:
+      self._timings_by_path[label] += secs
+      if is_tool:
+        self._tool_labels.add(label)
+
+  def save(self):
+    """Writes all the timings to the file, sorted in decreasing order.
+
+    Called at the end of the run.
+    """
+    with self._lock:
+      # Check existence in case we're a clean-all. We don't want to write anything in that case.
+      if not self._path or not os.path.exists(os.path.dirname(self._path)):
+        return
+      with atomic_write(self._path) as f:
+        for x in self._get_all():
           f.write('{label}: {timing}\n'.format(**x))
 
   def get_all(self):
@@ -42,5 +57,9 @@ class AggregatedTimings(object):
 
     Each value is a dict: { path: <path>, timing: <timing in seconds> }
     """
+    with self._lock:
+      return self._get_all()
+
+  def _get_all(self):
     return [{ 'label': x[0], 'timing': x[1], 'is_tool': x[0] in self._tool_labels}
             for x in sorted(self._timings_by_path.items(), key=lambda x: x[1], reverse=True)]
@@ -80,7 +80,8 @@ class Context(object):
     self._workspace = workspace or (ScmWorkspace(self._scm) if self._scm else None)
     self._spec_excludes = spec_excludes
     self._replace_targets(target_roots)
-    self._synthetic_targets = defaultdict(list)
+    # (derived_from, synthetic target) pairs, in creation order.
+    self._synthetic_targets = []
 
   @property
   def config(self):
@@ -259,7 +260,7 @@ class Context(object):
     new_target = self.build_graph.get_target(address)
 
     if derived_from:
-      self._synthetic_targets[derived_from].append(new_target)
+      self._synthetic_targets.append((derived_from, new_target))
 
     return new_target
 
@@ -275,13 +276,15 @@ class Context(object):
                           `False` or preorder by default.
     :returns: A list of matching targets.
     """
-    target_root_addresses = [target.address for target in self.target_roots]
     target_set = self._collect_targets(self.target_roots, postorder=postorder)
 
+    # Synthetic targets are considered in creation order, so targets created since the last call
+    # only extend the list of synthetic roots and the build graph can extend its memoized closure
+    # of the previous list instead of walking the synthetic closure from scratch.
     synthetics = OrderedSet()
-    for derived_from, synthetic_targets in self._synthetic_targets.items():
+    for derived_from, synthetic_target in self._synthetic_targets:
       if derived_from in target_set or derived_from in synthetics:
-        synthetics.update(synthetic_targets)
+        synthetics.add(synthetic_target)
 
     synthetic_set = self._collect_targets(synthetics, postorder=postorder)
 
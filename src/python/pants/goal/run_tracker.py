@@ -19,6 +19,7 @@ from urlparse import urlparse
 from pants.base.run_info import RunInfo
 from pants.base.worker_pool import SubprocPool, WorkerPool
 from pants.base.workunit import WorkUnit
+from pants.cache.artifact_cache_metrics import ArtifactCacheMetrics
 from pants.goal.aggregated_timings import AggregatedTimings
 from pants.goal.artifact_cache_stats import ArtifactCacheStats
 from pants.reporting.report import Report
@@ -105,6 +106,12 @@ class RunTracker(Subsystem):
     self.artifact_cache_stats = \
       ArtifactCacheStats(os.path.join(self.run_info_dir, 'artifact_cache_stats'))
 
+    # Latency, byte and error metrics for each artifact cache backend, written out as JSON at the
+    # end of the run.
+    self.artifact_cache_metrics = ArtifactCacheMetrics.instance()
+    self.artifact_cache_metrics_file = os.path.join(self.run_info_dir,
+                                                    'artifact_cache_metrics.json')
+
     # Number of threads for foreground work.
     self._num_foreground_workers = self.get_options().num_foreground_workers
 
@@ -231,7 +238,8 @@ class RunTracker(Subsystem):
         'run_info': json.dumps(self.run_info.get_as_dict()),
         'cumulative_timings': json.dumps(self.cumulative_timings.get_all()),
         'self_timings': json.dumps(self.self_timings.get_all()),
-        'artifact_cache_stats': json.dumps(self.artifact_cache_stats.get_all())
+        'artifact_cache_stats': json.dumps(self.artifact_cache_stats.get_all()),
+        'artifact_cache_metrics': json.dumps(self.artifact_cache_metrics.get_as_dict()),
         }
 
       headers = {"Content-type": "application/x-www-form-urlencoded", "Accept": "text/plain"}
@@ -286,6 +294,11 @@ class RunTracker(Subsystem):
       except IOError:
         pass  # If the goal is clean-all then the run info dir no longer exists...
 
+    if os.path.exists(self.run_info_dir):
+      self.artifact_cache_metrics.write_json(self.artifact_cache_metrics_file)
+    self.cumulative_timings.save()
+    self.self_timings.save()
+
     self.report.close()
     self.upload_stats()
 
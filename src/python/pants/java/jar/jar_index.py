@@ -0,0 +1,125 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import io
+import os
+import threading
+import time
+
+from pex.compatibility import to_bytes
+
+from pants.util.contextutil import open_zip
+from pants.util.dirutil import safe_mkdir
+from pants.util.fileutil import atomic_write, modified_within_racy_window, stat_key
+
+
+class JarIndex(object):
+  """A persistent index of the entries in jar files.
+
+  Listing a jar means opening it and reading its central directory, which adds up across the
+  hundreds of jars on a typical classpath. The index persists each jar's listing, and reuses it
+  while the (size, mtime_ns, inode) of the jar are unchanged, so a warm lookup costs a stat and a
+  read of a small text file.
+
+  Each jar's listing is persisted in its own file, written atomically, so an index dir may be shared
+  by multiple threads and pants runs.
+  """
+
+  # Bump this to discard all previously persisted listings.
+  VERSION = 1
+
+  _instances = {}
+  _instances_lock = threading.Lock()
+
+  @classmethod
+  def for_workdir(cls, pants_workdir):
+    """Returns the index shared by all tasks that use the given pants workdir."""
+    index_dir = os.path.join(pants_workdir, 'jar_index')
+    with cls._instances_lock:
+      if index_dir not in cls._instances:
+        cls._instances[index_dir] = cls(index_dir)
+      return cls._instances[index_dir]
+
+  def __init__(self, index_dir):
+    """
+    :param string index_dir: The directory to persist listings to. Created on demand.
+    """
+    self._index_dir = index_dir
+    self._lock = threading.Lock()
+    self._entries_by_key = {}
+    self.hits = 0
+    self.misses = 0
+
+  def _key(self, stat):
+    return '{} {} {} {}'.format(self.VERSION, *stat_key(stat))
+
+  def entries(self, jar_path):
+    """Returns the names of all the entries in the jar at jar_path, in order, as a tuple."""
+    real_path = os.path.realpath(jar_path)
+    stat = os.stat(real_path)
+    key = self._key(stat)
+    with self._lock:
+      entries = self._entries_by_key.get((real_path, key))
+      if entries is not None:
+        self.hits += 1
+        return entries
+
+    listing_path = os.path.join(self._index_dir,
+                                hashlib.sha1(real_path.encode('utf-8')).hexdigest())
+    entries = self._read_listing(listing_path, key)
+    if entries is None:
+      listed_at = time.time()
+      with open_zip(real_path, 'r') as jar:
+        entries = tuple(self._decode_entry_name(name) for name in jar.namelist())
+      if not modified_within_racy_window(stat.st_mtime, listed_at):
+        self._write_listing(listing_path, key, entries)
+      with self._lock:
+        self.misses += 1
+    else:
+      with self._lock:
+        self.hits += 1
+
+    with self._lock:
+      self._entries_by_key[(real_path, key)] = entries
+    return entries
+
+  @staticmethod
+  def _decode_entry_name(name):
+    # Zip entry names can come in any encoding, and in practice some jars have utf-8 encoded entry
+    # names without flagging them as such. So we try utf-8 first, and otherwise fall back to cp437,
+    # the encoding the zip format specifies for unflagged names, which can decode any bytes.
+    name = to_bytes(name)
+    try:
+      return name.decode('utf-8')
+    except UnicodeDecodeError:
+      return name.decode('cp437')
+
+  def class_files(self, jar_path):
+    """Returns the names of all the class file entries in the jar at jar_path, in order."""
+    return [entry for entry in self.entries(jar_path) if entry.endswith('.class')]
+
+  def _read_listing(self, listing_path, key):
+    try:
+      with io.open(listing_path, 'r', encoding='utf-8', newline='') as fp:
+        lines = fp.read().split('\n')
+    except (IOError, UnicodeDecodeError):
+      # A missing or corrupt listing is just a cold one.
+      return None
+    # The first line is the key, and every line, including the last, ends with a newline.
+    if len(lines) < 2 or lines[0] != key or lines[-1] != '':
+      return None
+    return tuple(lines[1:-1])
+
+  def _write_listing(self, listing_path, key, entries):
+    if any('\n' in entry for entry in entries):
+      return
+    safe_mkdir(self._index_dir)
+    with atomic_write(listing_path, 'wb') as fp:
+      for line in (key,) + entries:
+        fp.write(line.encode('utf-8'))
+        fp.write(b'\n')
@@ -20,7 +20,7 @@ from twitter.common.collections import maybe_list
 from pants.base.build_environment import get_buildroot
 from pants.java.executor import Executor, SubprocessExecutor
 from pants.java.nailgun_client import NailgunClient
-from pants.util.dirutil import safe_open
+from pants.util.dirutil import safe_delete, safe_open, safe_walk
 
 
 logger = logging.getLogger(__name__)
@@ -43,25 +43,29 @@ class NailgunExecutor(Executor):
     @classmethod
     def parse(cls, endpoint):
       """Parses an endpoint from a string of the form exe:fingerprint:pid:port"""
-      components = endpoint.split(':')
+      # Split from the right, so that the exe path may contain colons.
+      components = endpoint.rsplit(':', 3)
       if len(components) != 4:
         raise ValueError('Invalid endpoint spec {}'.format(endpoint))
       exe, fingerprint, pid, port = components
       return cls(exe, fingerprint, int(pid), int(port))
 
+    def spec(self):
+      """Returns this endpoint as a string of the form parsed by `parse`."""
+      return '{}:{}:{}:{}'.format(self.exe, self.fingerprint, self.pid, self.port)
+
   # Used to identify we own a given java nailgun server
   _PANTS_NG_ARG_PREFIX = b'-Dpants.buildroot'
   _PANTS_NG_ARG = b'{0}={1}'.format(_PANTS_NG_ARG_PREFIX, get_buildroot())
 
   _PANTS_FINGERPRINT_ARG_PREFIX = b'-Dpants.nailgun.fingerprint='
 
-  @staticmethod
-  def _check_pid(pid):
-    try:
-      os.kill(pid, 0)
-      return True
-    except OSError:
-      return False
+  # Each executor registers the server it spawned in this file in its workdir, so that finding a
+  # server needs no scan of the process table.
+  _REGISTRY_FILE = 'nailgun.pid'
+
+  # The spawned server's pid is handed from the spawning child process to the parent in this file.
+  _SPAWNED_PID_FILE = 'nailgun.spawned.pid'
 
   @staticmethod
   def create_owner_arg(workdir):
@@ -116,12 +120,18 @@ class NailgunExecutor(Executor):
         pass
 
   @classmethod
-  def killall(cls, everywhere=False):
+  def killall(cls, everywhere=False, workdir_root=None):
     """Kills all nailgun servers started by pants.
 
     :param bool everywhere: If ``True`` Kills all pants-started nailguns on this machine; otherwise
       restricts the nailguns killed to those started for the current build root.
+    :param string workdir_root: If given, and not `everywhere`, only the nailguns registered by
+      executors with workdirs under this dir are killed. These are found through their registry
+      files, without scanning all processes on the machine.
     """
+    if workdir_root and not everywhere:
+      return cls._killall_registered(workdir_root)
+
     success = True
     for proc in cls._find_ngs(everywhere=everywhere):
       try:
@@ -131,27 +141,75 @@ class NailgunExecutor(Executor):
         success = False
     return success
 
-  @staticmethod
-  def _find_ng_listen_port(proc):
-    for connection in proc.get_connections(kind=b'tcp'):
-      if connection.status == b'LISTEN':
-        host, port = connection.laddr
-        return port
-    return None
+  @classmethod
+  def _killall_registered(cls, workdir_root):
+    success = True
+    for dirpath, _, filenames in safe_walk(workdir_root):
+      if cls._REGISTRY_FILE in filenames:
+        try:
+          cls.kill_registered(dirpath)
+        except OSError:
+          success = False
+    return success
+
+  @classmethod
+  def kill_registered(cls, workdir):
+    """Kills the nailgun server registered by the executor with the given workdir, if it's running.
+
+    Returns ``True`` if a server was killed.
+
+    :raises OSError: if the server could not be killed.
+    """
+    endpoint = cls._find(workdir)
+    if not endpoint:
+      return False
+    cls._log_kill(endpoint.pid, endpoint.port)
+    try:
+      os.kill(endpoint.pid, 9)
+    finally:
+      safe_delete(cls._registry_path(workdir))
+    return True
+
+  @classmethod
+  def _registry_path(cls, workdir):
+    return os.path.join(workdir, cls._REGISTRY_FILE)
+
+  @classmethod
+  def _register(cls, workdir, endpoint):
+    registry_path = cls._registry_path(workdir)
+    tmp_path = '{}.{}.tmp'.format(registry_path, os.getpid())
+    with safe_open(tmp_path, 'w') as fp:
+      fp.write(endpoint.spec())
+    os.rename(tmp_path, registry_path)
+
+  @classmethod
+  def _is_registered_server(cls, endpoint, workdir):
+    """Checks that the endpoint's pid is still the server the workdir's executor spawned.
+
+    Looks at that single process only, and guards against the pid having been reused.
+    """
+    try:
+      cmdline = psutil.Process(endpoint.pid).cmdline
+      return (cls.create_owner_arg(workdir) in cmdline and
+              cls._create_fingerprint_arg(endpoint.fingerprint) in cmdline)
+    except (psutil.AccessDenied, psutil.NoSuchProcess):
+      return False
 
   @classmethod
   def _find(cls, workdir):
-    owner_arg = cls.create_owner_arg(workdir)
-    for proc in cls._find_ngs(everywhere=False):
-      try:
-        if owner_arg in proc.cmdline:
-          fingerprint = cls.parse_fingerprint_arg(proc.cmdline)
-          port = cls._find_ng_listen_port(proc)
-          exe = proc.cmdline[0]
-          if fingerprint and port:
-            return cls.Endpoint(exe, fingerprint, proc.pid, port)
-      except (psutil.AccessDenied, psutil.NoSuchProcess):
-        pass
+    """Returns the endpoint of the live server registered for the workdir, if any.
+
+    Stale registrations are removed.
+    """
+    registry_path = cls._registry_path(workdir)
+    try:
+      with open(registry_path, 'r') as fp:
+        endpoint = cls.Endpoint.parse(fp.read().strip())
+    except (IOError, ValueError):
+      return None
+    if cls._is_registered_server(endpoint, workdir):
+      return endpoint
+    safe_delete(registry_path)
     return None
 
   def __init__(self, workdir, nailgun_classpath, distribution=None, ins=None):
@@ -194,14 +252,25 @@ class NailgunExecutor(Executor):
 
   def kill(self):
     """Kills the nailgun server owned by this executor if its currently running."""
+    try:
+      self.kill_registered(self._workdir)
+    except OSError:
+      pass
 
+  def ensure_healthy(self):
+    """Kills the nailgun server owned by this executor if it's running but refuses connections.
+
+    A server killed here is respawned on the next use of this executor.
+    """
     endpoint = self._get_nailgun_endpoint()
     if endpoint:
-      self._log_kill(endpoint.pid, endpoint.port)
-      try:
-        os.kill(endpoint.pid, 9)
-      except OSError:
-        pass
+      sock = self._create_ngclient(endpoint.port, None, None).try_connect()
+      if sock:
+        sock.close()
+      else:
+        logger.debug('Killing unresponsive ng server launched with {endpoint}'
+                     .format(endpoint=repr(endpoint)))
+        self.kill()
 
   def _get_nailgun_endpoint(self):
     endpoint = self._find(self._workdir)
@@ -211,7 +280,7 @@ class NailgunExecutor(Executor):
 
   def _find_and_stat_nailgun_server(self, new_fingerprint):
     endpoint = self._get_nailgun_endpoint()
-    running = endpoint and self._check_pid(endpoint.pid)
+    running = endpoint is not None  # Only live servers are found.
     updated = endpoint and endpoint.fingerprint != new_fingerprint
     updated = updated or (endpoint and endpoint.exe != self._distribution.java)
     return endpoint, running, updated
@@ -246,7 +315,7 @@ class NailgunExecutor(Executor):
                                        ' line: {line}'.format(line=line))
     return int(match.group(1))
 
-  def _await_nailgun_server(self, stdout, stderr, debug_desc):
+  def _await_nailgun_server(self, fingerprint, stdout, stderr, debug_desc):
     # TODO(Eric Ayers) Make these cmdline/config parameters once we have a global way to fetch
     # the global options scope.
     nailgun_timeout_seconds = 10
@@ -270,17 +339,19 @@ class NailgunExecutor(Executor):
             'Failed to read ng output after {sec} seconds.\n {desc}'
             .format(sec=nailgun_timeout_seconds, desc=debug_desc))
 
+    pid = self._await_spawned_pid(port_parse_start, nailgun_timeout_seconds, debug_desc)
+
     attempt = 0
     while nailgun:
       sock = nailgun.try_connect()
       if sock:
         sock.close()
-        endpoint = self._get_nailgun_endpoint()
-        if endpoint:
-          logger.debug('Connected to ng server launched with {endpoint}'
-                       .format(endpoint=repr(endpoint)))
-        else:
+        endpoint = self.Endpoint(self._distribution.java, fingerprint, pid, port)
+        if not self._is_registered_server(endpoint, self._workdir):
           raise NailgunClient.NailgunError('Failed to connect to ng server.')
+        self._register(self._workdir, endpoint)
+        logger.debug('Connected to ng server launched with {endpoint}'
+                     .format(endpoint=repr(endpoint)))
         return nailgun
       elif attempt > max_socket_connect_attempts:
         raise nailgun.NailgunError('Failed to connect to ng output after {count} connect attempts'
@@ -289,6 +360,24 @@ class NailgunExecutor(Executor):
       logger.debug('Failed to connect on attempt {count}'.format(count=attempt))
       time.sleep(0.1)
 
+  def _await_spawned_pid(self, start, timeout_seconds, debug_desc):
+    pid_file = os.path.join(self._workdir, self._SPAWNED_PID_FILE)
+    while True:
+      try:
+        with open(pid_file, 'r') as fp:
+          content = fp.read()
+        # The spawning process writes a trailing newline last, so we never see a partial pid.
+        if content.endswith('\n'):
+          safe_delete(pid_file)
+          return int(content)
+      except IOError:
+        pass
+      if time.time() - start > timeout_seconds:
+        raise NailgunClient.NailgunError(
+          'Failed to read ng server pid after {sec} seconds.\n {desc}'
+          .format(sec=timeout_seconds, desc=debug_desc))
+      time.sleep(0.01)
+
   def _create_ngclient(self, port, stdout, stderr):
     return NailgunClient(port=port, ins=self._ins, out=stdout, err=stderr, workdir=get_buildroot())
 
@@ -298,11 +387,12 @@ class NailgunExecutor(Executor):
 
     with safe_open(self._ng_out, 'w'):
       pass  # truncate
+    safe_delete(os.path.join(self._workdir, self._SPAWNED_PID_FILE))
 
     pid = os.fork()
     if pid != 0:
       # In the parent tine - block on ng being up for connections
-      return self._await_nailgun_server(stdout, stderr,
+      return self._await_nailgun_server(fingerprint, stdout, stderr,
                                         'jvm_options={jvm_options} classpath={classpath}'
                                         .format(jvm_options=jvm_options, classpath=classpath))
 
@@ -329,6 +419,8 @@ class NailgunExecutor(Executor):
 
     logger.debug('Spawned ng server with fingerprint {fingerprint} @ {pid}'
                  .format(fingerprint=fingerprint, pid=process.pid))
+    with safe_open(os.path.join(self._workdir, self._SPAWNED_PID_FILE), 'w') as fp:
+      fp.write('{}\n'.format(process.pid))
     # Prevents finally blocks and atexit handlers from being executed, unlike sys.exit(). We
     # don't want to execute finally blocks because we might, e.g., clean up tempfiles that the
     # parent still needs.
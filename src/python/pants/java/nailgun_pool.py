@@ -0,0 +1,225 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import psutil
+
+from pants.java.nailgun_executor import NailgunExecutor
+from pants.util.dirutil import safe_mkdir, touch
+
+
+logger = logging.getLogger(__name__)
+
+
+class NailgunExecutorPool(object):
+  """A pool of warm nailgun servers, with up to `max_servers` servers per fingerprint.
+
+  A server's fingerprint covers the distribution and jvm options it runs with, so concurrent
+  invocations of a JVM tool each lease a different server instead of serializing on one, or
+  restarting it. The classpath is left out of the fingerprint, as some tools are run with a
+  different classpath every time, which would otherwise start up to `max_servers` more servers on
+  each run. Instead, a server is restarted when leased for a different classpath than it last ran,
+  and invocations prefer to lease a server that last ran their classpath.
+
+  Each server is owned by a NailgunExecutor with a workdir of its own under the pool's workdir, so
+  servers stay warm across pants runs. Servers that have not been leased for `idle_timeout_secs`
+  are killed, as are idle servers of other fingerprints when free memory is too low to start
+  another. If there's still too little free memory, a lease waits for a server to be released,
+  unless none are leased, in which case one is started regardless.
+  """
+
+  # The heap size we assume for a server whose jvm options don't set a maximum heap size.
+  DEFAULT_SERVER_MEMORY_BYTES = 512 * 1024 * 1024
+
+  # The mtime of this file in an executor workdir records when its server was last leased.
+  _LAST_USED_FILE = 'last_used'
+
+  # The number of seconds to wait for a lease to be returned at a time. We wait with a timeout,
+  # because otherwise python ignores SIGINT when waiting on a condition variable.
+  _POLL_SECS = 1
+
+  _XMX_RE = re.compile(r'^-Xmx(\d+)([kKmMgG]?)$')
+
+  _UNIT_BYTES = {'': 1, 'k': 1024, 'm': 1024 * 1024, 'g': 1024 * 1024 * 1024}
+
+  @classmethod
+  def server_memory_bytes(cls, jvm_options):
+    """Returns the memory a server run with the given jvm options may use, based on its -Xmx."""
+    memory = cls.DEFAULT_SERVER_MEMORY_BYTES
+    for option in jvm_options:
+      match = cls._XMX_RE.match(option)
+      if match:
+        # As in java, the last -Xmx wins.
+        memory = int(match.group(1)) * cls._UNIT_BYTES[match.group(2).lower()]
+    return memory
+
+  @staticmethod
+  def _fingerprint(distribution, jvm_options):
+    components = [distribution.java, repr(distribution.version), '\0'.join(sorted(jvm_options))]
+    return hashlib.sha1('\1'.join(components).encode('utf-8')).hexdigest()
+
+  def __init__(self, workdir, nailgun_classpath, max_servers, idle_timeout_secs):
+    """
+    :param string workdir: The directory holding the workdirs of the pool's executors.
+    :param nailgun_classpath: The classpath of the nailgun server.
+    :param int max_servers: The maximum number of servers per fingerprint.
+    :param int idle_timeout_secs: Kill servers not leased for this many seconds.
+    """
+    if max_servers < 1:
+      raise ValueError('A pool needs at least 1 server per fingerprint, given {}'
+                       .format(max_servers))
+    self._workdir = workdir
+    self._nailgun_classpath = nailgun_classpath
+    self._max_servers = max_servers
+    self._idle_timeout_secs = idle_timeout_secs
+
+    self._cond = threading.Condition()
+    # fingerprint -> the executor workdirs not leased out, least recently used first.
+    self._idle = {}
+    # fingerprint -> the number of executor workdirs, leased or not.
+    self._num_slots = defaultdict(int)
+    # The workdirs of the executors leased out.
+    self._leased = set()
+    # The workdir -> the classpath it was last leased for, by this pool.
+    self._classpaths = {}
+    # The workdir -> memory needed of the new servers that may not have started yet. Free memory
+    # doesn't reflect these, so we count them against it when deciding to start another.
+    self._spawning = {}
+    self._reaped_idle = False
+
+  @contextmanager
+  def lease(self, distribution, jvm_options, classpath):
+    """Yields a NailgunExecutor no other thread is using, for running the given jvm invocation.
+
+    Blocks until a server for the invocation's fingerprint is free, or may be started.
+
+    :param distribution: The java distribution to run the server with.
+    :param list jvm_options: The jvm options of the invocation.
+    :param list classpath: The classpath of the invocation.
+    """
+    fingerprint = self._fingerprint(distribution, jvm_options)
+    slot = self._acquire(fingerprint, jvm_options, classpath)
+    try:
+      executor = NailgunExecutor(slot, self._nailgun_classpath, distribution=distribution)
+      try:
+        executor.ensure_healthy()
+      finally:
+        self._spawned(slot)
+      yield executor
+    finally:
+      self._release(fingerprint, slot)
+
+  def reap_idle(self, idle_secs=None, keep_fingerprint=None):
+    """Kills the servers in the pool that have not been leased for idle_secs.
+
+    :param int idle_secs: The idle time after which to kill a server. Defaults to the pool's
+      idle timeout.
+    :param string keep_fingerprint: If given, the servers with this fingerprint are not killed.
+    :returns: The number of servers killed.
+    """
+    idle_secs = self._idle_timeout_secs if idle_secs is None else idle_secs
+    killed = 0
+    now = time.time()
+    with self._cond:
+      for fingerprint in self._list_dir(self._workdir):
+        if fingerprint == keep_fingerprint:
+          continue
+        for slot in self._slots_on_disk(fingerprint):
+          if slot not in self._leased and now - self._last_used(slot) >= idle_secs:
+            try:
+              if NailgunExecutor.kill_registered(slot):
+                killed += 1
+            except OSError as e:
+              logger.warn('Failed to kill idle ng server in {}: {}'.format(slot, e))
+    return killed
+
+  def _acquire(self, fingerprint, jvm_options, classpath=()):
+    with self._cond:
+      if not self._reaped_idle:
+        self._reaped_idle = True
+        self.reap_idle()
+      if fingerprint not in self._idle:
+        # Servers started for this fingerprint by previous runs may still be warm.
+        self._idle[fingerprint] = sorted(self._slots_on_disk(fingerprint), key=self._last_used)
+        self._num_slots[fingerprint] = len(self._idle[fingerprint])
+
+      classpath = tuple(classpath)
+      while True:
+        idle = self._idle[fingerprint]
+        if idle:
+          # Prefer the most recently used server that last ran this classpath, so needn't restart.
+          # Failing that, prefer the most recently used server, as the most likely to still be warm.
+          matching = [slot for slot in idle if self._classpaths.get(slot) == classpath]
+          slot = (matching or idle)[-1]
+          idle.remove(slot)
+          break
+        if (self._num_slots[fingerprint] < self._max_servers and
+            self._has_memory_for_server(fingerprint, jvm_options)):
+          slot = os.path.join(self._workdir, fingerprint, str(self._num_slots[fingerprint]))
+          self._num_slots[fingerprint] += 1
+          self._spawning[slot] = self.server_memory_bytes(jvm_options)
+          break
+        self._cond.wait(self._POLL_SECS)
+      self._leased.add(slot)
+      self._classpaths[slot] = classpath
+    self._touch_last_used(slot)
+    return slot
+
+  def _spawned(self, slot):
+    with self._cond:
+      if self._spawning.pop(slot, None) is not None:
+        self._cond.notify_all()
+
+  def _release(self, fingerprint, slot):
+    self._touch_last_used(slot)
+    with self._cond:
+      self._spawning.pop(slot, None)
+      self._leased.discard(slot)
+      self._idle[fingerprint].append(slot)
+      self._cond.notify()
+
+  def _has_memory_for_server(self, fingerprint, jvm_options):
+    needed = self.server_memory_bytes(jvm_options) + sum(self._spawning.values())
+    if psutil.virtual_memory().available >= needed:
+      return True
+    # Make room by killing the idle servers of other fingerprints, regardless of the idle timeout.
+    if (self.reap_idle(idle_secs=0, keep_fingerprint=fingerprint) and
+        psutil.virtual_memory().available >= needed):
+      return True
+    # Waiting only helps if a leased server may be released. Otherwise we'd wait forever, so we
+    # start the server regardless, as a run without the pool would.
+    return not self._leased
+
+  def _slots_on_disk(self, fingerprint):
+    fingerprint_dir = os.path.join(self._workdir, fingerprint)
+    return [os.path.join(fingerprint_dir, name) for name in self._list_dir(fingerprint_dir)
+            if name.isdigit()]
+
+  @staticmethod
+  def _list_dir(path):
+    try:
+      return os.listdir(path)
+    except OSError:
+      return []
+
+  def _last_used(self, slot):
+    try:
+      return os.path.getmtime(os.path.join(slot, self._LAST_USED_FILE))
+    except OSError:
+      return 0
+
+  def _touch_last_used(self, slot):
+    safe_mkdir(slot)
+    touch(os.path.join(slot, self._LAST_USED_FILE))
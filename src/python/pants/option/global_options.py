@@ -63,8 +63,40 @@ def register_global_options(register):
            help='If writing to build artifacts to cache, overwrite (instead of skip) existing.')
   register('--cache-key-gen-version', advanced=True, default='200', recursive=True,
            help='The cache key generation. Bump this to invalidate every artifact for a scope.')
+  register('--build-invalidator-layout', advanced=True, choices=['files', 'indexed'],
+           default='files', recursive=True,
+           help="How to store each task's target versions: one .hash file per target set, or a "
+                "single indexed file per task. Switching layouts migrates or discards the other "
+                "layout's state.")
   register('--cache-compression', advanced=True, type=int, default=5, recursive=True,
            help='The gzip compression level for created artifacts.')
+  register('--cache-artifact-format', advanced=True, choices=['tgz', 'tar', 'chunked'],
+           default='tgz', recursive=True,
+           help='The format of created artifacts: a gzipped tarball, an uncompressed tarball, or '
+                'a tarball of gzipped chunks that are compressed and extracted in parallel. '
+                'Artifacts of any format can be read regardless of this setting.')
+  register('--local-artifact-cache-layout', advanced=True, choices=['tarball', 'content-addressed'],
+           default='tarball', recursive=True,
+           help='How local artifact caches store artifacts: as a compressed tarball per artifact, '
+                'or with each distinct file stored once, by content, across all artifacts.')
+  register('--local-artifact-cache-max-size-mb', advanced=True, type=int, default=0,
+           recursive=True,
+           help='Evict the least recently used artifacts from content-addressed local artifact '
+                'caches that grow beyond this size. 0 means no maximum.')
+  register('--local-artifact-cache-hardlinks', advanced=True, action='store_true', recursive=True,
+           help='Restore files from content-addressed local artifact caches as hardlinks rather '
+                'than copies. Only safe if tools replace, rather than modify, their outputs.')
+  register('--cache-max-concurrent-reads', advanced=True, type=int, default=8, recursive=True,
+           help='The maximum number of artifacts to read from a remote artifact cache at once.')
+  register('--file-digest-cache', action='store_true', default=True, advanced=True,
+           help='Persist source file digests between runs, keyed by file size, mtime and inode, '
+                'so that unchanged files are not re-read when fingerprinting targets.')
+  register('--build-file-snapshot', action='store_true', default=True, advanced=True,
+           help='Persist the directory listings used to find BUILD files between runs, keyed by '
+                'directory mtime, so that unchanged directories are not re-listed.')
+  register('--build-file-code-cache', action='store_true', advanced=True,
+           help='Persist the compiled code of BUILD files between runs, keyed by their contents. '
+                'BUILD files are still executed on every run.')
   register('--print-exception-stacktrace', action='store_true',
            help='Print to console the full exception stack trace if encountered.')
   register('--fail-fast', action='store_true',
@@ -74,6 +106,9 @@ def register_global_options(register):
            default=10 * 365 * 86400,  # 10 years.
            help='the time in seconds before we consider re-resolving an open-ended '
                 'requirement, e.g. "flask>=0.2" if a matching distribution is available on disk.')
+  register('--python-chroot-cache', action='store_true', default=True, advanced=True,
+           help='Keep the PEX environments built for running python targets between runs, keyed '
+                'by their requirements and sources, rather than building a new one every run.')
   register('--pants-support-baseurls', type=Options.list, advanced=True, recursive=True,
            default = [ 'https://dl.bintray.com/pantsbuild/bin/build-support' ],
            help='List of urls from which binary tools are downloaded.  Urls are searched in order'
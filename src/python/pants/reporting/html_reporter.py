@@ -8,6 +8,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import cgi
 import os
 import re
+import time
 import uuid
 from collections import defaultdict, namedtuple
 
@@ -35,6 +36,12 @@ class HtmlReporter(Reporter):
   #   template_dir: Where to find mustache templates.
   Settings = namedtuple('Settings', Reporter.Settings._fields + ('html_dir', 'template_dir'))
 
+  # The timings and artifact cache views aggregate over the whole run, so they cost more to render
+  # the longer it runs. Rather than whenever a workunit ends, we refresh them at most this often,
+  # and once more when the report closes. The artifact cache metrics, which summarize up to
+  # thousands of latencies per operation, are only rendered when the report closes.
+  VIEWS_REFRESH_INTERVAL_SECS = 1.0
+
   def __init__(self, run_tracker, settings):
     Reporter.__init__(self, run_tracker, settings)
      # The main report, and associated tool outputs, go under this dir.
@@ -53,6 +60,9 @@ class HtmlReporter(Reporter):
     # We redirect stdout, stderr etc. of tool invocations to these files.
     self._output_files = defaultdict(dict)  # workunit_id -> {path -> fileobj}.
 
+    # When we last refreshed the aggregated views.
+    self._views_refreshed_at = None
+
   def report_path(self):
     """The path to the main report file."""
     return os.path.join(self._html_dir, 'build.html')
@@ -64,6 +74,8 @@ class HtmlReporter(Reporter):
 
   def close(self):
     """Implementation of Reporter callback."""
+    self._refresh_views()
+    self._render_cache_metrics()
     self._report_file.close()
     # Make sure everything's closed.
     for files in self._output_files.values():
@@ -135,6 +147,17 @@ class HtmlReporter(Reporter):
     s += self._renderer.render_name('workunit_end', args)
     self._emit(s)
 
+    now = time.time()
+    if (self._views_refreshed_at is None or
+        now - self._views_refreshed_at >= self.VIEWS_REFRESH_INTERVAL_SECS):
+      self._views_refreshed_at = now
+      self._refresh_views()
+
+    for f in self._output_files[workunit.id].values():
+      f.close()
+
+  def _refresh_views(self):
+    """Re-renders the views that aggregate over the whole run."""
     # Update the timings.
     def render_timings(timings):
       timings_dict = timings.get_all()
@@ -170,8 +193,21 @@ class HtmlReporter(Reporter):
     self._overwrite('artifact_cache_stats',
                     render_cache_stats(self.run_tracker.artifact_cache_stats))
 
-    for f in self._output_files[workunit.id].values():
-      f.close()
+  def _render_cache_metrics(self):
+    """Renders the artifact cache metrics for the whole run."""
+    artifact_cache_metrics = self.run_tracker.artifact_cache_metrics
+    operations = artifact_cache_metrics.get_all()
+    for item in operations:
+      for key in ('mean_secs', 'p90_secs', 'max_secs'):
+        item[key + '_string'] = '{:.3f}'.format(item[key])
+    pings = [{'netloc': netloc, 'secs_string': '{:.3f}'.format(secs)}
+             for netloc, secs in sorted(artifact_cache_metrics.get_pings().items())]
+    args = {
+      'operations': operations,
+      'pings': pings
+    }
+    self._overwrite('artifact_cache_metrics',
+                    self._renderer.render_name('artifact_cache_metrics', args))
 
   def handle_output(self, workunit, label, s):
     """Implementation of Reporter callback."""
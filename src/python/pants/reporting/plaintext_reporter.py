@@ -65,6 +65,11 @@ class PlainTextReporter(Reporter):
       self.emit(b'\n====================')
       self.emit(b'\n')
       self.emit(self._format_artifact_cache_stats(self.run_tracker.artifact_cache_stats))
+      self.emit(b'\n')
+      self.emit(b'\nArtifact Cache Metrics')
+      self.emit(b'\n======================')
+      self.emit(b'\n')
+      self.emit(self._format_artifact_cache_metrics(self.run_tracker.artifact_cache_metrics))
     self.emit(b'\n')
 
   def start_workunit(self, workunit):
@@ -157,6 +162,14 @@ class PlainTextReporter(Reporter):
     b'\n'.join([b'{cache_name} - Hits: {num_hits} Misses: {num_misses}'.format(**x)
                 for x in stats])
 
+  def _format_artifact_cache_metrics(self, artifact_cache_metrics):
+    lines = [b'{backend} {operation} - Count: {count} Errors: {errors} Bytes: {bytes} '
+             b'Mean: {mean_secs:.3f}s p90: {p90_secs:.3f}s Max: {max_secs:.3f}s'.format(**x)
+             for x in artifact_cache_metrics.get_all()]
+    lines.extend([b'{} - Ping: {:.3f}s'.format(netloc, secs)
+                  for netloc, secs in sorted(artifact_cache_metrics.get_pings().items())])
+    return b'\n'.join(lines) if lines else b'No artifact cache operations.'
+
   def _indent(self, workunit):
     return b'  ' * (len(workunit.ancestors()) - 1)
 
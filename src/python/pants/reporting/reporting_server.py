@@ -99,13 +99,15 @@ class PantsHandler(BaseHTTPServer.BaseHTTPRequestHandler):
       self_timings_path = os.path.join(report_dir, 'self_timings')
       cumulative_timings_path = os.path.join(report_dir, 'cumulative_timings')
       artifact_cache_stats_path = os.path.join(report_dir, 'artifact_cache_stats')
+      artifact_cache_metrics_path = os.path.join(report_dir, 'artifact_cache_metrics')
       run_info['timestamp_text'] = \
         datetime.fromtimestamp(float(run_info['timestamp'])).strftime('%H:%M:%S on %A, %B %d %Y')
       args.update({'run_info': run_info,
                    'report_path': report_relpath,
                    'self_timings_path': self_timings_path,
                    'cumulative_timings_path': cumulative_timings_path,
-                   'artifact_cache_stats_path': artifact_cache_stats_path})
+                   'artifact_cache_stats_path': artifact_cache_stats_path,
+                   'artifact_cache_metrics_path': artifact_cache_metrics_path})
       if run_id == 'latest':
         args['is_latest'] = run_info['id']
       args.update({
@@ -7,8 +7,16 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import os
 import shutil
+import uuid
+from contextlib import contextmanager
 
 from pants.util.contextutil import temporary_file
+from pants.util.dirutil import safe_delete
+
+
+# A file modified within this many seconds of being read might be modified again without its mtime
+# changing, given coarse filesystem timestamps.
+RACY_WINDOW_SECS = 2
 
 
 def atomic_copy(src, dst):
@@ -16,3 +24,43 @@ def atomic_copy(src, dst):
   with temporary_file(root_dir=os.path.dirname(dst)) as tmp_dst:
     shutil.copyfile(src, tmp_dst.name)
     os.rename(tmp_dst.name, dst)
+
+
+@contextmanager
+def atomic_write(path, mode='w'):
+  """A with-context that yields a file object to write the new contents of path to.
+
+  The file is written next to path, and renamed over it on success, so readers never see it half
+  written. If the block raises, path is left as it was.
+
+  :param str mode: The mode to open the file object in.
+  """
+  tmp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+  try:
+    with open(tmp_path, mode) as fp:
+      yield fp
+    os.rename(tmp_path, path)
+  finally:
+    safe_delete(tmp_path)
+
+
+def stat_key(stat):
+  """Returns the (size, mtime in nanoseconds, inode) of an `os.stat` result, as a tuple.
+
+  Memoizing a value computed from a file's contents under this key avoids recomputing it while the
+  file is unchanged. Only do so if the file wasn't modified within the racy window of reading it,
+  though: see `modified_within_racy_window`.
+  """
+  return stat.st_size, int(stat.st_mtime * 1000000000), stat.st_ino
+
+
+def modified_within_racy_window(mtime, read_at):
+  """Whether a file with the given mtime, read at the given time, might since have changed unseen.
+
+  If so, it might be modified again without its mtime changing, so values computed from it should
+  not be memoized by its stat.
+
+  :param float mtime: The mtime of the file, in seconds.
+  :param float read_at: The time at which reading the file started, in seconds.
+  """
+  return read_at - mtime <= RACY_WINDOW_SECS
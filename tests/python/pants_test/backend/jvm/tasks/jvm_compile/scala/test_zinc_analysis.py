@@ -12,6 +12,7 @@ import unittest
 
 from pants.backend.jvm.tasks.jvm_compile.analysis_parser import ParseError
 from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis import ZincAnalysis
+from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis_compact import is_compact_analysis
 from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis_parser import ZincAnalysisParser
 from pants.util.contextutil import Timer, temporary_dir
 from pants.util.dirutil import safe_rmtree
@@ -86,6 +87,60 @@ class ZincAnalysisTest(unittest.TestCase):
     self.assertMultiLineEqual(expected, actual)
 
 
+  def test_compact_format(self):
+    parser = ZincAnalysisParser()
+    simple_dir = os.path.join(os.path.dirname(__file__), 'testdata', 'simple')
+    text_path = os.path.join(simple_dir, 'simple.analysis')
+    analysis = parser.parse_from_path(text_path)
+
+    with temporary_dir() as tmpdir:
+      compact_path = os.path.join(tmpdir, 'simple.compact')
+      parser.write_compact_to_path(analysis, compact_path)
+      self.assertTrue(is_compact_analysis(compact_path))
+      self.assertFalse(is_compact_analysis(text_path))
+      self.assertLess(os.path.getsize(compact_path), os.path.getsize(text_path))
+
+      # Parsing the compact file yields the same analysis, and the same text when written back out.
+      compact_analysis = parser.parse_from_path(compact_path)
+      self.assertTrue(analysis == compact_analysis)
+      expected_text_path = os.path.join(tmpdir, 'expected')
+      actual_text_path = os.path.join(tmpdir, 'actual')
+      analysis.write_to_path(expected_text_path)
+      compact_analysis.write_to_path(actual_text_path)
+      with open(expected_text_path, 'r') as expected, open(actual_text_path, 'r') as actual:
+        self.assertMultiLineEqual(expected.read(), actual.read())
+
+      # The section-specific parsers agree with the text format.
+      parser.validate_analysis(compact_path)
+      self.assertTrue(parser.is_nonempty_analysis(compact_path))
+      self.assertEqual(parser.parse_products_from_path(text_path, '/classes'),
+                       parser.parse_products_from_path(compact_path, '/classes'))
+      self.assertEqual(parser.parse_deps_from_path(text_path, lambda: {}, '/classes'),
+                       parser.parse_deps_from_path(compact_path, lambda: {}, '/classes'))
+
+      empty_path = os.path.join(tmpdir, 'empty.compact')
+      parser.write_compact_to_path(analysis.split([[]])[0], empty_path)
+      self.assertFalse(parser.is_nonempty_analysis(empty_path))
+
+      # Rebasing a compact file rewrites its paths just as rebasing a text file does, including
+      # removing items that mention a removed path.
+      rebasings = [('/src/pants/examples/src/scala/org/pantsbuild/example/hello/exe', None),
+                   ('/src/pants', '/_PANTS_HOME_PLACEHOLDER')]
+      rebased_text_path = os.path.join(tmpdir, 'rebased.analysis')
+      rebased_compact_path = os.path.join(tmpdir, 'rebased.compact')
+      parser.rebase_from_path(text_path, rebased_text_path, rebasings)
+      parser.rebase_from_path(compact_path, rebased_compact_path, rebasings)
+      self.assertTrue(is_compact_analysis(rebased_compact_path))
+      self.assertTrue(parser.parse_from_path(rebased_text_path) ==
+                      parser.parse_from_path(rebased_compact_path))
+
+      # A truncated compact file is detected.
+      with open(compact_path, 'r+b') as truncated:
+        truncated.seek(-20, os.SEEK_END)
+        truncated.truncate()
+      with self.assertRaises(ParseError):
+        parser.parse_from_path(compact_path)
+
   # Test on large-scale analysis files.
   def test_analysis_files(self):
     if os.environ.get(_TEST_DATA_SOURCE_ENV_VAR):
@@ -0,0 +1,106 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import threading
+import unittest
+
+from pants.backend.jvm.tasks.jvm_compile.analysis_tools import AnalysisWriter
+from pants.util.contextutil import temporary_dir
+
+
+class FakeAnalysis(object):
+  def __init__(self, content, started=None, proceed=None):
+    self.content = content
+    self._started = started
+    self._proceed = proceed
+
+  def write_to_path(self, outfile_path, rebasings=None):
+    if self._started:
+      self._started.set()
+      self._proceed.wait()
+    with open(outfile_path, 'w') as outfile:
+      outfile.write(self.content)
+
+
+class FailingAnalysis(object):
+  def write_to_path(self, outfile_path, rebasings=None):
+    raise IOError('Disk full')
+
+
+class AnalysisWriterTest(unittest.TestCase):
+  def _read(self, path):
+    with open(path, 'r') as infile:
+      return infile.read()
+
+  def test_write_and_flush(self):
+    writer = AnalysisWriter()
+    with temporary_dir() as tmpdir:
+      a = os.path.join(tmpdir, 'a')
+      b = os.path.join(tmpdir, 'b')
+      writer.write(FakeAnalysis('A'), a)
+      writer.write(FakeAnalysis('B'), b)
+      writer.flush()
+      self.assertEqual('A', self._read(a))
+      self.assertEqual('B', self._read(b))
+      self.assertEqual(['a', 'b'], sorted(os.listdir(tmpdir)))
+
+  def test_superseded_writes_are_coalesced(self):
+    writer = AnalysisWriter()
+    started = threading.Event()
+    proceed = threading.Event()
+    with temporary_dir() as tmpdir:
+      blocker = os.path.join(tmpdir, 'blocker')
+      path = os.path.join(tmpdir, 'analysis')
+      writes = []
+
+      class RecordingAnalysis(FakeAnalysis):
+        def write_to_path(self, outfile_path, rebasings=None):
+          writes.append(self.content)
+          super(RecordingAnalysis, self).write_to_path(outfile_path, rebasings)
+
+      # Hold up the writer thread, so the following writes to path are all pending at once.
+      writer.write(FakeAnalysis('blocker', started, proceed), blocker)
+      started.wait()
+      for content in ('1', '2', '3'):
+        writer.write(RecordingAnalysis(content), path)
+      proceed.set()
+      writer.flush()
+      self.assertEqual(['3'], writes)
+      self.assertEqual('3', self._read(path))
+
+  def test_flush_path_waits_only_for_that_path(self):
+    writer = AnalysisWriter()
+    started = threading.Event()
+    proceed = threading.Event()
+    with temporary_dir() as tmpdir:
+      a = os.path.join(tmpdir, 'a')
+      b = os.path.join(tmpdir, 'b')
+      writer.write(FakeAnalysis('A'), a)
+      writer.write(FakeAnalysis('B', started, proceed), b)
+      started.wait()
+      # The write to b is held up, but a is already written.
+      writer.flush(a)
+      self.assertEqual('A', self._read(a))
+      self.assertFalse(os.path.exists(b))
+      proceed.set()
+      writer.flush(b)
+      self.assertEqual('B', self._read(b))
+
+  def test_flush_raises_write_errors(self):
+    writer = AnalysisWriter()
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'analysis')
+      writer.write(FailingAnalysis(), path)
+      with self.assertRaises(IOError):
+        writer.flush()
+      # The error is only raised once.
+      writer.flush()
+      self.assertFalse(os.path.exists(path))
+
+  def test_flush_without_writes(self):
+    AnalysisWriter().flush()
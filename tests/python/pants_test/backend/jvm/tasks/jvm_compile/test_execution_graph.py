@@ -0,0 +1,104 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import threading
+import unittest
+from multiprocessing.pool import ThreadPool
+
+from pants.backend.jvm.tasks.jvm_compile.execution_graph import (ExecutionFailure, ExecutionGraph,
+                                                                 Job)
+
+
+class ThreadedPool(object):
+  """Runs work on threads, like a WorkerPool without the workunit accounting."""
+
+  def __init__(self, num_workers):
+    self._pool = ThreadPool(processes=num_workers)
+
+  def submit_async_work(self, work):
+    for args in work.args_tuples:
+      self._pool.apply_async(work.func, args)
+
+  def shutdown(self):
+    self._pool.close()
+    self._pool.join()
+
+
+class RecordingLog(object):
+  def __init__(self):
+    self.errors = []
+
+  def error(self, msg):
+    self.errors.append(msg)
+
+
+class ExecutionGraphTest(unittest.TestCase):
+  def setUp(self):
+    self.pool = ThreadedPool(4)
+    self.log = RecordingLog()
+    self.events = []
+    self._lock = threading.Lock()
+
+  def tearDown(self):
+    self.pool.shutdown()
+
+  def record(self, event):
+    with self._lock:
+      self.events.append(event)
+
+  def job(self, key, dependencies, fn=None):
+    return Job(key,
+               fn or (lambda: self.record(('run', key))),
+               dependencies,
+               on_success=lambda: self.record(('success', key)),
+               on_failure=lambda: self.record(('failure', key)))
+
+  def execute(self, jobs):
+    ExecutionGraph(jobs).execute(self.pool, self.log)
+
+  def test_runs_dependencies_first(self):
+    self.execute([self.job('a', ['b', 'c']), self.job('b', ['c']), self.job('c', [])])
+    successes = [key for event, key in self.events if event == 'success']
+    self.assertEquals(['c', 'b', 'a'], successes)
+
+  def test_runs_independent_jobs_concurrently(self):
+    # Each job waits for the other to start, so this only completes if they run at once.
+    started = {'a': threading.Event(), 'b': threading.Event()}
+    def wait_for(key, other):
+      def fn():
+        started[key].set()
+        self.assertTrue(started[other].wait(10))
+      return fn
+    self.execute([self.job('a', [], fn=wait_for('a', 'b')),
+                  self.job('b', [], fn=wait_for('b', 'a'))])
+    self.assertEquals({'a', 'b'}, set(key for event, key in self.events if event == 'success'))
+
+  def test_fails_fast(self):
+    def fail():
+      raise ValueError('boom')
+    with self.assertRaises(ExecutionFailure) as cm:
+      self.execute([self.job('a', [], fn=fail), self.job('b', ['a']), self.job('c', ['b'])])
+    self.assertEquals(['a'], [key for key, _ in cm.exception.failures])
+    self.assertEquals(['b', 'c'], cm.exception.canceled)
+    self.assertEquals([('failure', 'a')], self.events)
+    self.assertEquals(1, len(self.log.errors))
+
+  def test_failed_on_success_is_a_failure(self):
+    def fail():
+      raise ValueError('boom')
+    jobs = [Job('a', lambda: None, [], on_success=fail), self.job('b', ['a'])]
+    with self.assertRaises(ExecutionFailure):
+      self.execute(jobs)
+    self.assertEquals([], self.events)
+
+  def test_invalid_graphs(self):
+    with self.assertRaises(ExecutionGraph.InvalidGraph):
+      ExecutionGraph([self.job('a', ['missing'])])
+    with self.assertRaises(ExecutionGraph.InvalidGraph):
+      ExecutionGraph([self.job('a', ['b']), self.job('b', ['a'])])
+    with self.assertRaises(ExecutionGraph.InvalidGraph):
+      ExecutionGraph([self.job('a', []), self.job('a', [])])
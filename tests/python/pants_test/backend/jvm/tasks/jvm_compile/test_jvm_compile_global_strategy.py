@@ -0,0 +1,112 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import shutil
+import StringIO
+
+import mock
+
+from pants.backend.jvm.tasks.jvm_compile.analysis_tools import AnalysisTools
+from pants.backend.jvm.tasks.jvm_compile.jvm_compile_global_strategy import JvmCompileGlobalStrategy
+from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis import ZincAnalysis
+from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis_parser import ZincAnalysisParser
+from pants.goal.products import UnionProducts
+from pants_test.base_test import BaseTest
+
+
+_TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'scala', 'testdata', 'simple')
+
+_WELCOME = '/src/pants/examples/src/scala/org/pantsbuild/example/hello/welcome/Welcome.scala'
+_EXE = '/src/pants/examples/src/scala/org/pantsbuild/example/hello/exe/Exe.scala'
+
+
+class FakeVersionedTargetSet(object):
+  def __init__(self, target):
+    self.targets = [target]
+    self.valid = False
+
+  def update(self):
+    self.valid = True
+
+
+class JvmCompileGlobalStrategyTest(BaseTest):
+  def _analysis_text(self, analysis):
+    buf = StringIO.StringIO()
+    analysis.write(buf)
+    return buf.getvalue()
+
+  def _parse(self, path):
+    return ZincAnalysisParser().parse_from_path(path)
+
+  def _strategy(self, workdir):
+    options = mock.Mock(confs=['default'],
+                        clear_invalid_analysis=False,
+                        # Scratch files are left in the test's buildroot, rather than deleted by a
+                        # background worker pool hook.
+                        delete_scratch=False,
+                        partition_size_hint=1,
+                        missing_deps='off',
+                        missing_direct_deps='off',
+                        unnecessary_deps='off',
+                        changed_targets_heuristic_limit=0)
+    analysis_tools = AnalysisTools('/no/java/home', ZincAnalysisParser(), ZincAnalysis)
+    return JvmCompileGlobalStrategy(self.context(), options, workdir, analysis_tools,
+                                    lambda source: source.endswith('.scala'))
+
+  def test_compile_chunk_reads_up_to_date_upstream_analysis(self):
+    workdir = os.path.join(self.pants_workdir, 'compile')
+    strategy = self._strategy(workdir)
+    strategy.pre_compile()
+    strategy.context.products.safe_create_data('compile_classpath', UnionProducts)
+
+    welcome = self.make_target('src/scala/welcome')
+    exe = self.make_target('src/scala/exe', dependencies=[welcome])
+    strategy._sources_by_target = {welcome: [_WELCOME], exe: [_EXE]}
+    strategy._deleted_sources = []
+
+    # Everything is invalid, as after a clean build with a prior global analysis.
+    shutil.copy(os.path.join(_TEST_DATA_DIR, 'simple.analysis'), strategy._invalid_analysis_file)
+
+    splits = {
+      welcome: os.path.join(_TEST_DATA_DIR, 'simple_split0.analysis'),
+      exe: os.path.join(_TEST_DATA_DIR, 'simple_split1.analysis'),
+    }
+    upstream_texts = []
+
+    def compile_vts(vts, sources, analysis_file, upstream_analysis, classpath, outdir,
+                    progress_message):
+      upstream_file = upstream_analysis.get(outdir)
+      upstream_texts.append(self._analysis_text(self._parse(upstream_file))
+                            if upstream_file else None)
+      shutil.copy(splits[vts.targets[0]], analysis_file)
+
+    partitions = [FakeVersionedTargetSet(welcome), FakeVersionedTargetSet(exe)]
+    invalidation_check = mock.Mock(invalid_vts_partitioned=partitions)
+    writer = strategy._analysis_writer
+    with mock.patch.object(writer, 'flush', wraps=writer.flush) as flush:
+      strategy.compile_chunk(invalidation_check,
+                             all_targets=[welcome, exe],
+                             relevant_targets=[welcome, exe],
+                             invalid_targets=[welcome, exe],
+                             extra_compile_time_classpath_elements=[],
+                             compile_vts=compile_vts,
+                             register_vts=lambda compile_contexts: None,
+                             update_artifact_cache_vts_work=None)
+      # Only the valid analysis, which the compiler reads, need be written before each partition.
+      self.assertEqual([mock.call(strategy._analysis_file)] * 2, flush.call_args_list)
+
+    # The second partition sees the first's analysis as its upstream.
+    self.assertEqual(None, upstream_texts[0])
+    self.assertEqual(self._analysis_text(self._parse(splits[welcome])), upstream_texts[1])
+    self.assertTrue(all(vts.valid for vts in partitions))
+
+    strategy.post_compile()
+    self.assertEqual(self._analysis_text(self._parse(os.path.join(_TEST_DATA_DIR,
+                                                                  'simple.analysis'))),
+                     self._analysis_text(self._parse(strategy._analysis_file)))
+    self.assertEqual([], self._parse(strategy._invalid_analysis_file).stamps.sources.keys())
@@ -7,16 +7,20 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import os
 import subprocess
+import unittest
 from collections import defaultdict
 from textwrap import dedent
 
 from pants.backend.core.targets.resources import Resources
-from pants.backend.jvm.tasks.junit_run import JUnitRun
+from pants.backend.core.tasks.duration_sharding import shard_by_duration
+from pants.backend.jvm.tasks.junit_run import JUnitRun, _read_test_durations
 from pants.base.exceptions import TaskError
 from pants.goal.products import MultipleRootedProducts
 from pants.ivy.bootstrapper import Bootstrapper
 from pants.java.distribution.distribution import Distribution
 from pants.java.executor import SubprocessExecutor
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_open
 from pants_test.jvm.jvm_tool_task_test_base import JvmToolTaskTestBase
 
 
@@ -126,6 +130,96 @@ class JUnitRunnerTest(JvmToolTaskTestBase):
     self.execute(context)
 
 
+class ParallelJvmsTest(unittest.TestCase):
+  """Tests for how junit_run spreads tests across concurrent JVMs."""
+
+  def test_shard_by_duration(self):
+    durations = {'A': 10.0, 'B': 7.0, 'C': 5.0, 'D': 3.0, 'E': 2.0}
+    shards = shard_by_duration(sorted(durations), durations, 2)
+    self.assertEqual([['A', 'D'], ['B', 'C', 'E']], shards)
+
+  def test_shard_unknown_durations_default_to_mean(self):
+    durations = {'A': 4.0, 'B': 2.0}
+    shards = shard_by_duration(['A', 'B', 'C'], durations, 2)
+    self.assertEqual([['A'], ['C', 'B']], shards)
+
+  def test_shard_no_more_shards_than_tests(self):
+    self.assertEqual([['A'], ['B']], shard_by_duration(['A', 'B'], {}, 4))
+
+  def test_read_test_durations(self):
+    with temporary_dir() as report_dir:
+      with safe_open(os.path.join(report_dir, 'TEST-org.pantsbuild.FooTest.xml'), 'w') as fp:
+        fp.write('<testsuite name="org.pantsbuild.FooTest" failures="0" time="1.5"/>')
+      with safe_open(os.path.join(report_dir, 'TEST-org.pantsbuild.BadTest.xml'), 'w') as fp:
+        fp.write('<testsuite')
+      durations = _read_test_durations(report_dir, ['org.pantsbuild.FooTest#testFoo',
+                                                    'org.pantsbuild.BadTest',
+                                                    'org.pantsbuild.NewTest'])
+      self.assertEqual({'org.pantsbuild.FooTest#testFoo': 1.5}, durations)
+
+
+class CachedResultsTest(JvmToolTaskTestBase):
+  """Tests for how junit_run saves the results of targets whose tests passed."""
+
+  class FakeRunner(object):
+    def __init__(self, outdir, tests_by_target):
+      self._outdir = outdir
+      self._tests_by_target = tests_by_target
+
+    def test_output_files(self, target):
+      return [(os.path.join(self._outdir, 'TEST-{}.xml'.format(test)),
+               os.path.join(self._outdir, '{}.out.txt'.format(test)),
+               os.path.join(self._outdir, '{}.err.txt'.format(test)))
+              for test in self._tests_by_target[target]]
+
+  @classmethod
+  def task_type(cls):
+    return JUnitRun
+
+  def write_report(self, outdir, test, failures=0, errors=0):
+    with safe_open(os.path.join(outdir, 'TEST-{}.xml'.format(test)), 'w') as fp:
+      fp.write('<testsuite name="{}" failures="{}" errors="{}"/>'.format(test, failures, errors))
+    with safe_open(os.path.join(outdir, '{}.out.txt'.format(test)), 'w') as fp:
+      fp.write('output of {}'.format(test))
+
+  def test_report_passed(self):
+    task = self.create_task(self.context())
+    with temporary_dir() as outdir:
+      self.write_report(outdir, 'Passed')
+      self.write_report(outdir, 'Failed', failures=1)
+      self.write_report(outdir, 'Errored', errors=2)
+      with safe_open(os.path.join(outdir, 'TEST-Truncated.xml'), 'w') as fp:
+        fp.write('<testsuite name="Truncated"')
+
+      def report_passed(test):
+        return task._report_passed(os.path.join(outdir, 'TEST-{}.xml'.format(test)))
+
+      self.assertTrue(report_passed('Passed'))
+      self.assertFalse(report_passed('Failed'))
+      self.assertFalse(report_passed('Errored'))
+      self.assertFalse(report_passed('Truncated'))
+
+  def test_save_results(self):
+    passed = self.make_target('tests:passed')
+    failed = self.make_target('tests:failed')
+    not_run = self.make_target('tests:not_run')
+    task = self.create_task(self.context(target_roots=[passed, failed, not_run]))
+    with temporary_dir() as outdir:
+      # A test class with no tests, e.g., a helper, has no report.
+      self.write_report(outdir, 'PassedTest')
+      self.write_report(outdir, 'OtherPassedTest')
+      self.write_report(outdir, 'FailedTest', failures=1)
+      task._runner = self.FakeRunner(outdir, {passed: ['PassedTest', 'Helper'],
+                                              failed: ['OtherPassedTest', 'FailedTest'],
+                                              not_run: ['NotRunTest']})
+      task._save_results([passed, failed, not_run])
+
+    self.assertEqual(['PassedTest.out.txt', 'TEST-PassedTest.xml'],
+                     [os.path.basename(path) for path in task.results_files(passed)])
+    self.assertEqual([], task.results_files(failed))
+    self.assertEqual([], task.results_files(not_run))
+
+
 class EmmaTest(JvmToolTaskTestBase):
   """Tests for junit_run.Emma class"""
   # TODO(Jin Feng) to be implemented
@@ -12,8 +12,9 @@ from textwrap import dedent
 
 import coverage
 
-from pants.backend.python.tasks.pytest_run import PytestRun, PythonTestFailure
+from pants.backend.python.tasks.pytest_run import PytestRun, PythonTestFailure, PythonTestResult
 from pants.util.contextutil import environment_as, pushd
+from pants.util.dirutil import safe_open
 from pants_test.backend.python.tasks.python_task_test import PythonTaskTest
 
 
@@ -22,20 +23,21 @@ class PythonTestBuilderTestBase(PythonTaskTest):
   def task_type(cls):
     return PytestRun
 
-  def run_tests(self, targets):
+  def run_tests(self, targets, **extra_options):
     options = {
       'colors': False,
       'level': 'info'  # When debugging a test failure it may be helpful to set this to 'debug'.
     }
+    options.update(extra_options)
     self.set_options(**options)
     context = self.context(target_roots=targets)
     pytest_run_task = self.create_task(context)
     with pushd(self.build_root):
       pytest_run_task.execute()
 
-  def run_failing_tests(self, targets, failed_targets):
+  def run_failing_tests(self, targets, failed_targets, **extra_options):
     with self.assertRaises(PythonTestFailure) as cm:
-      self.run_tests(targets=targets)
+      self.run_tests(targets=targets, **extra_options)
 
     failed_targets_from_exc = cm.exception.failed_targets
     self.assertEqual(set(failed_targets_from_exc), set(failed_targets))
@@ -157,6 +159,24 @@ class PythonTestBuilderTest(PythonTestBuilderTestBase):
   def test_mixed(self):
     self.run_failing_tests(targets=[self.green, self.red], failed_targets=[self.red])
 
+  def test_mixed_in_parallel_processes(self):
+    self.run_failing_tests(targets=[self.green, self.red], failed_targets=[self.red],
+                           parallel_processes=2)
+
+  def test_junit_xml_in_parallel_processes(self):
+    report_basedir = os.path.join(self.build_root, 'dist', 'junit')
+    with environment_as(JUNIT_XML_BASE=report_basedir):
+      self.run_failing_tests(targets=[self.red, self.green], failed_targets=[self.red],
+                             parallel_processes=2)
+
+      files = glob.glob(os.path.join(report_basedir, '*.xml'))
+      self.assertEqual(1, len(files))
+      root = DOM.parse(files[0]).documentElement
+      self.assertEqual(2, int(root.getAttribute('tests')))
+      self.assertEqual(1, int(root.getAttribute('failures')))
+      classnames = set(elem.getAttribute('classname') for elem in root.childNodes)
+      self.assertEqual({'tests.test_core_green.CoreGreenTest', 'tests.test_core_red'}, classnames)
+
   def test_junit_xml(self):
     # We expect xml of the following form:
     # <testsuite errors=[Ne] failures=[Nf] skips=[Ns] tests=[Nt] ...>
@@ -261,3 +281,114 @@ class PythonTestBuilderTest(PythonTestBuilderTestBase):
       all_statements, not_run_statements = self.load_coverage_data(covered_file)
       self.assertEqual([1, 2, 5, 6], all_statements)
       self.assertEqual([], not_run_statements)
+
+
+class PythonTestShardingTest(PythonTestBuilderTestBase):
+  def setUp(self):
+    super(PythonTestShardingTest, self).setUp()
+    self.create_file('tests/a/test_a.py', 'def test_a(): pass')
+    self.create_file('tests/b/test_b.py', 'def test_b(): assert False')
+    self.add_to_build_file('tests/a', "python_tests(name='a', sources=['test_a.py'])")
+    self.add_to_build_file('tests/b', "python_tests(name='b', sources=['test_b.py'])")
+    self.a = self.target('tests/a')
+    self.b = self.target('tests/b')
+    self.shard_dir = os.path.join(self.build_root, '.shards', '0')
+    self.sources = ['tests/a/test_a.py', 'tests/b/test_b.py']
+
+  def test_failures_attributed_from_shard_resultlog(self):
+    # pytest reports tests relative to the working dir of the process that ran them.
+    resultlog = os.path.join(self.shard_dir, 'resultlog')
+    with safe_open(resultlog, 'w') as fp:
+      fp.write(dedent("""\
+        . ../../tests/a/test_a.py::test_a
+        F ../../tests/b/test_b.py::test_b
+         def test_b(): assert False
+         ../../tests/b/test_b.py:1: AssertionError
+        """))
+    PytestRun._relativize_resultlog(resultlog, self.shard_dir, self.sources)
+    with open(resultlog) as fp:
+      self.assertEqual(['. tests/a/test_a.py::test_a', 'F tests/b/test_b.py::test_b'],
+                       [line.rstrip() for line in fp if not line.startswith(' ')])
+    self.assertEqual([self.b],
+                     PytestRun._get_failed_targets_from_resultlogs(resultlog, [self.a, self.b]))
+
+  def write_junit_xml(self, path, classname, name, time, failures=0):
+    with safe_open(path, 'w') as fp:
+      fp.write('<testsuite errors="0" failures="{failures}" name="pytest" skips="0" tests="1" '
+               'time="{time}"><testcase classname="{classname}" name="{name}" time="{time}"/>'
+               '</testsuite>'.format(failures=failures, classname=classname, name=name, time=time))
+
+  def test_junit_xmls_merged_with_durations(self):
+    shard_xmls = [os.path.join(self.shard_dir, 'a.xml'), os.path.join(self.shard_dir, 'b.xml')]
+    self.write_junit_xml(shard_xmls[0], '......tests.a.test_a', 'test_a', 1.5)
+    self.write_junit_xml(shard_xmls[1], '......tests.b.test_b', 'test_b', 2.5, failures=1)
+    for shard_xml in shard_xmls:
+      PytestRun._relativize_junit_xml(shard_xml, self.shard_dir, self.sources)
+    merged_xml = os.path.join(self.build_root, 'dist', 'junit.xml')
+    PytestRun._merge_junit_xmls(shard_xmls, merged_xml)
+
+    root = DOM.parse(merged_xml).documentElement
+    self.assertEqual(2, int(root.getAttribute('tests')))
+    self.assertEqual(1, int(root.getAttribute('failures')))
+    self.assertEqual(['tests.a.test_a', 'tests.b.test_b'],
+                     [elem.getAttribute('classname') for elem in root.childNodes])
+    self.assertEqual({self.a.id: 1.5, self.b.id: 2.5},
+                     PytestRun._get_durations_from_junit_xml(merged_xml, [self.a, self.b]))
+
+
+class PythonTestCachedResultsTest(PythonTestBuilderTestBase):
+  def setUp(self):
+    super(PythonTestCachedResultsTest, self).setUp()
+    self.create_file('tests/a/test_a.py', 'def test_a(): pass')
+    self.create_file('tests/b/test_b.py', 'def test_b(): assert False')
+    self.add_to_build_file('tests/a', "python_tests(name='a', sources=['test_a.py'])")
+    self.add_to_build_file('tests/b', "python_tests(name='b', sources=['test_b.py'])")
+    self.a = self.target('tests/a')
+    self.b = self.target('tests/b')
+    self.task = self.create_task(self.context(target_roots=[self.a, self.b]))
+
+    self.resultlog = os.path.join(self.build_root, 'resultlog')
+    with safe_open(self.resultlog, 'w') as fp:
+      fp.write(dedent("""\
+        . tests/a/test_a.py::test_a
+        s tests/a/test_a.py::test_skipped
+         skipped for a reason
+        F tests/b/test_b.py::test_b
+         def test_b(): assert False
+         tests/b/test_b.py:1: AssertionError
+        """))
+
+  def saved_results(self, target):
+    results = {}
+    for path in self.task.results_files(target):
+      with open(path) as fp:
+        results[os.path.basename(path)] = fp.read()
+    return results
+
+  def test_resultlog_split_by_target(self):
+    self.task._save_results([self.a, self.b], PythonTestResult.rc(1), [], self.resultlog)
+    self.assertEqual({'resultlog': dedent("""\
+                        . tests/a/test_a.py::test_a
+                        s tests/a/test_a.py::test_skipped
+                         skipped for a reason
+                        """)},
+                     self.saved_results(self.a))
+    self.assertEqual({}, self.saved_results(self.b))
+
+  def test_junit_xml_saved_for_lone_target(self):
+    junit_xml = os.path.join(self.build_root, 'junit.xml')
+    with safe_open(junit_xml, 'w') as fp:
+      fp.write('<testsuite/>')
+
+    self.task._save_results([self.a, self.b], PythonTestResult.rc(1), [], self.resultlog,
+                            junit_xml)
+    self.assertEqual(['resultlog'], sorted(self.saved_results(self.a)))
+
+    self.task._save_results([self.a], PythonTestResult.rc(0), [], self.resultlog, junit_xml)
+    self.assertEqual(['junit.xml', 'resultlog'], sorted(self.saved_results(self.a)))
+
+  def test_nothing_saved_for_runs_cut_short(self):
+    self.task._save_results([self.a, self.b], PythonTestResult.rc(1), ['--maxfail=1'],
+                            self.resultlog)
+    self.task._save_results([self.a, self.b], PythonTestResult.rc(2), [], self.resultlog)
+    self.assertEqual({}, self.saved_results(self.a))
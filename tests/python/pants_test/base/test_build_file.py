@@ -10,11 +10,10 @@ import shutil
 import tempfile
 import unittest
 
-import six
 from twitter.common.collections import OrderedSet
 
 from pants.base.build_file import BuildFile
-from pants.util.dirutil import safe_mkdir, safe_open, touch
+from pants.util.dirutil import safe_mkdir, touch
 
 
 class BuildFileTest(unittest.TestCase):
@@ -214,21 +213,3 @@ class BuildFileTest(unittest.TestCase):
     """
     self.assertIsInstance(BuildFile.InvalidRootDirError(), BuildFile.BuildFileError)
     self.assertIsInstance(BuildFile.MissingBuildFileError(), BuildFile.BuildFileError)
-
-  def test_code(self):
-    with safe_open(self.fullpath('BUILD.code'), 'w') as fp:
-      fp.write('lib = java_library(name="jake", age=42)')
-    build_file = self.create_buildfile('BUILD.code')
-
-    parsed_locals = {}
-    six.exec_(build_file.code(), {'java_library': dict}, parsed_locals)
-    lib = parsed_locals.pop('lib', None)
-    self.assertEqual(dict(name='jake', age=42), lib)
-
-  def test_code_syntax_error(self):
-    with safe_open(self.fullpath('BUILD.badsyntax'), 'w') as fp:
-      fp.write('java_library(name=if)')
-    build_file = self.create_buildfile('BUILD.badsyntax')
-    with self.assertRaises(SyntaxError) as e:
-      build_file.code()
-    self.assertEqual(build_file.full_path, e.exception.filename)
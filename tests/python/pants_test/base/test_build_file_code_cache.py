@@ -0,0 +1,70 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.base.build_file import BuildFile
+from pants.base.build_file_code_cache import BuildFileCodeCache
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_open
+
+
+class BuildFileCodeCacheTest(unittest.TestCase):
+  def _write(self, path, contents):
+    with safe_open(path, 'w') as fp:
+      fp.write(contents)
+
+  def _build_file(self, root_dir, relpath, contents):
+    self._write(os.path.join(root_dir, relpath), contents)
+    return BuildFile(root_dir, relpath)
+
+  def _evaluate(self, code):
+    namespace = {}
+    exec(code, namespace)
+    return namespace['value']
+
+  def test_hit_after_save_and_reload(self):
+    with temporary_dir() as root_dir:
+      build_file = self._build_file(root_dir, 'a/BUILD', 'value = 42\n')
+      cache_path = os.path.join(root_dir, 'code.marshal')
+
+      cache = BuildFileCodeCache(cache_path)
+      self.assertEqual(42, self._evaluate(cache.code(build_file)))
+      self.assertEqual((0, 1), (cache.hits, cache.misses))
+      cache.save()
+
+      reloaded = BuildFileCodeCache(cache_path)
+      self.assertEqual(42, self._evaluate(reloaded.code(build_file)))
+      self.assertEqual((1, 0), (reloaded.hits, reloaded.misses))
+
+  def test_changed_contents_are_recompiled(self):
+    with temporary_dir() as root_dir:
+      build_file = self._build_file(root_dir, 'a/BUILD', 'value = 1\n')
+      cache = BuildFileCodeCache()
+      self.assertEqual(1, self._evaluate(cache.code(build_file)))
+
+      self._build_file(root_dir, 'a/BUILD', 'value = 2\n')
+      self.assertEqual(2, self._evaluate(cache.code(build_file)))
+      self.assertEqual((0, 2), (cache.hits, cache.misses))
+
+  def test_syntax_error(self):
+    with temporary_dir() as root_dir:
+      build_file = self._build_file(root_dir, 'a/BUILD', 'value = (\n')
+      with self.assertRaises(SyntaxError) as e:
+        BuildFileCodeCache().code(build_file)
+      self.assertEqual(build_file.full_path, e.exception.filename)
+
+  def test_corrupt_cache_file(self):
+    with temporary_dir() as root_dir:
+      build_file = self._build_file(root_dir, 'a/BUILD', 'value = 42\n')
+      cache_path = os.path.join(root_dir, 'code.marshal')
+      self._write(cache_path, 'not marshal data')
+
+      cache = BuildFileCodeCache(cache_path)
+      self.assertEqual(42, self._evaluate(cache.code(build_file)))
+      self.assertEqual(1, cache.misses)
@@ -10,7 +10,8 @@ import os
 import tempfile
 from contextlib import contextmanager
 
-from pants.base.build_invalidator import BuildInvalidator, CacheKeyGenerator
+from pants.base.build_invalidator import (GLOBAL_CACHE_KEY_GEN_VERSION, BuildInvalidator, CacheKey,
+                                          CacheKeyGenerator, IndexedBuildInvalidator)
 from pants.util.contextutil import temporary_dir
 
 
@@ -58,3 +59,74 @@ def test_env(content=TEST_CONTENT):
 #     assert cache.needs_update(key)
 #     cache.update(key)
 #     assert not cache.needs_update(key)
+
+
+def test_indexed_update_persists():
+  with temporary_dir() as d:
+    key = CacheKey('a.b.c', 'hash1', 1)
+    invalidator = IndexedBuildInvalidator(d)
+    assert invalidator.needs_update(key)
+    invalidator.update(key)
+    assert not invalidator.needs_update(key)
+    invalidator.flush()
+
+    reloaded = IndexedBuildInvalidator(d)
+    assert not reloaded.needs_update(key)
+    assert reloaded.needs_update(CacheKey('a.b.c', 'hash2', 1))
+    assert 'hash1' == reloaded.existing_hash('a.b.c')
+
+
+def test_indexed_force_invalidate():
+  with temporary_dir() as d:
+    key = CacheKey('a.b.c', 'hash1', 1)
+    invalidator = IndexedBuildInvalidator(d)
+    invalidator.update(key)
+    invalidator.flush()
+    invalidator.force_invalidate(key)
+    assert invalidator.needs_update(key)
+    assert IndexedBuildInvalidator(d).needs_update(key)
+
+    invalidator.update(key)
+    invalidator.force_invalidate_all()
+    assert invalidator.needs_update(key)
+    assert IndexedBuildInvalidator(d).needs_update(key)
+
+
+def test_indexed_force_invalidate_missing_key():
+  with temporary_dir() as d:
+    key = CacheKey('a.b.c', 'hash1', 1)
+    invalidator = IndexedBuildInvalidator(d)
+    invalidator.force_invalidate(key)
+    assert invalidator.needs_update(key)
+    invalidator.flush()
+    assert IndexedBuildInvalidator(d).needs_update(key)
+
+
+def test_indexed_migrates_hash_files():
+  with temporary_dir() as d:
+    key = CacheKey('a.b.c', 'hash1', 1)
+    BuildInvalidator(d).update(key)
+
+    invalidator = IndexedBuildInvalidator(d)
+    assert not invalidator.needs_update(key)
+    root = os.path.join(d, GLOBAL_CACHE_KEY_GEN_VERSION)
+    assert [BuildInvalidator.INDEX_FILE_NAME] == os.listdir(root)
+
+    # Going back to the file-per-target layout discards the index rather than trusting it later.
+    legacy = BuildInvalidator(d)
+    assert legacy.needs_update(key)
+    assert IndexedBuildInvalidator(d).needs_update(key)
+
+
+def test_indexed_compaction():
+  with temporary_dir() as d:
+    invalidator = IndexedBuildInvalidator(d)
+    for i in range(2 * IndexedBuildInvalidator._COMPACTION_SLACK):
+      invalidator.update(CacheKey('a.b.c', 'hash{}'.format(i), 1))
+    invalidator.flush()
+
+    last_hash = 'hash{}'.format(2 * IndexedBuildInvalidator._COMPACTION_SLACK - 1)
+    assert last_hash == IndexedBuildInvalidator(d).existing_hash('a.b.c')
+    index_file = os.path.join(d, GLOBAL_CACHE_KEY_GEN_VERSION, BuildInvalidator.INDEX_FILE_NAME)
+    with open(index_file) as fp:
+      assert 1 == len(fp.readlines())
@@ -0,0 +1,111 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+import unittest
+
+from pants.base.file_digest_cache import FileDigestCache
+from pants.base.hash_utils import hash_file
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import touch
+
+
+class FileDigestCacheTest(unittest.TestCase):
+  def _write(self, path, contents, age_secs=60):
+    with open(path, 'w') as fp:
+      fp.write(contents)
+    mtime = time.time() - age_secs
+    touch(path, (mtime, mtime))
+
+  def test_hit_after_save_and_reload(self):
+    with temporary_dir() as tmpdir:
+      src = os.path.join(tmpdir, 'a.txt')
+      self._write(src, 'a_contents')
+      cache_path = os.path.join(tmpdir, 'digests.json')
+
+      cache = FileDigestCache(cache_path)
+      self.assertEqual(hash_file(src), cache.digest(src))
+      self.assertEqual((0, 1), (cache.hits, cache.misses))
+      cache.save()
+
+      reloaded = FileDigestCache(cache_path)
+      self.assertEqual(hash_file(src), reloaded.digest(src))
+      self.assertEqual((1, 0), (reloaded.hits, reloaded.misses))
+
+  def test_changed_file_is_rehashed(self):
+    with temporary_dir() as tmpdir:
+      src = os.path.join(tmpdir, 'a.txt')
+      self._write(src, 'a_contents', age_secs=120)
+      cache = FileDigestCache(os.path.join(tmpdir, 'digests.json'))
+      cache.digest(src)
+
+      self._write(src, 'a_contents_different', age_secs=60)
+      self.assertEqual(hash_file(src), cache.digest(src))
+      self.assertEqual((0, 2), (cache.hits, cache.misses))
+
+  def test_recently_modified_file_is_not_cached(self):
+    with temporary_dir() as tmpdir:
+      src = os.path.join(tmpdir, 'a.txt')
+      self._write(src, 'a_contents', age_secs=0)
+      cache = FileDigestCache(os.path.join(tmpdir, 'digests.json'))
+      cache.digest(src)
+      cache.digest(src)
+      self.assertEqual((0, 2), (cache.hits, cache.misses))
+
+  def test_entries_of_deleted_files_are_dropped_on_save(self):
+    with temporary_dir() as tmpdir:
+      kept = os.path.join(tmpdir, 'kept.txt')
+      deleted = os.path.join(tmpdir, 'deleted.txt')
+      self._write(kept, 'kept_contents')
+      self._write(deleted, 'deleted_contents')
+      cache_path = os.path.join(tmpdir, 'digests.json')
+
+      cache = FileDigestCache(cache_path)
+      cache.digest(kept)
+      cache.digest(deleted)
+      cache.save()
+
+      os.unlink(deleted)
+      reloaded = FileDigestCache(cache_path)
+      self.assertEqual(set([kept, deleted]), set(reloaded._entries))
+      # A change is needed for the cache to be saved at all.
+      self._write(kept, 'kept_contents_changed')
+      reloaded.digest(kept)
+      reloaded.save()
+      self.assertEqual([kept], list(FileDigestCache(cache_path)._entries))
+
+  def test_corrupt_cache_file(self):
+    with temporary_dir() as tmpdir:
+      src = os.path.join(tmpdir, 'a.txt')
+      self._write(src, 'a_contents')
+      cache_path = os.path.join(tmpdir, 'digests.json')
+      with open(cache_path, 'w') as fp:
+        fp.write('{not json')
+
+      cache = FileDigestCache(cache_path)
+      self.assertEqual(hash_file(src), cache.digest(src))
+      cache.save()
+
+      reloaded = FileDigestCache(cache_path)
+      reloaded.digest(src)
+      self.assertEqual(1, reloaded.hits)
+
+  def test_digest_file_uses_active_cache(self):
+    with temporary_dir() as tmpdir:
+      src = os.path.join(tmpdir, 'a.txt')
+      self._write(src, 'a_contents')
+      self.assertEqual(hash_file(src), FileDigestCache.digest_file(src))
+
+      cache = FileDigestCache(os.path.join(tmpdir, 'digests.json'))
+      FileDigestCache.activate(cache)
+      try:
+        FileDigestCache.digest_file(src)
+        FileDigestCache.digest_file(src)
+      finally:
+        self.assertIs(cache, FileDigestCache.deactivate())
+      self.assertEqual((1, 1), (cache.hits, cache.misses))
@@ -0,0 +1,95 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import re
+import time
+import unittest
+
+from pants.base.filesystem_snapshot import FilesystemSnapshot
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_mkdir, touch
+
+
+class FilesystemSnapshotTest(unittest.TestCase):
+  PATTERN = re.compile(r'^BUILD(\.[a-zA-Z0-9_-]+)?$')
+
+  def _age(self, *paths):
+    mtime = time.time() - 60
+    for path in paths:
+      os.utime(path, (mtime, mtime))
+
+  def _tree(self, root):
+    safe_mkdir(os.path.join(root, 'a', 'b'))
+    safe_mkdir(os.path.join(root, 'c'))
+    touch(os.path.join(root, 'a', 'BUILD'))
+    touch(os.path.join(root, 'a', 'BUILD.extra'))
+    touch(os.path.join(root, 'a', 'Foo.java'))
+    touch(os.path.join(root, 'a', 'b', 'BUILD'))
+    touch(os.path.join(root, 'c', 'BUILD'))
+    self._age(root, os.path.join(root, 'a'), os.path.join(root, 'a', 'b'), os.path.join(root, 'c'))
+
+  def test_listing(self):
+    with temporary_dir() as root:
+      self._tree(root)
+      snapshot = FilesystemSnapshot(self.PATTERN)
+      listing = snapshot.listing(os.path.join(root, 'a'))
+      self.assertEqual(['b'], listing.dirs)
+      self.assertEqual([], listing.links)
+      self.assertEqual(['BUILD', 'BUILD.extra'], listing.files)
+      self.assertIsNone(snapshot.listing(os.path.join(root, 'a', 'BUILD')))
+      self.assertIsNone(snapshot.listing(os.path.join(root, 'missing')))
+
+  def test_hit_after_save_and_reload(self):
+    with temporary_dir() as root:
+      self._tree(root)
+      path = os.path.join(root, 'snapshot.json')
+      snapshot = FilesystemSnapshot(self.PATTERN, path=path)
+      list(snapshot.walk(os.path.join(root, 'a')))
+      self.assertEqual((0, 2), (snapshot.hits, snapshot.misses))
+      snapshot.save()
+
+      reloaded = FilesystemSnapshot(self.PATTERN, path=path)
+      self.assertEqual(['BUILD', 'BUILD.extra'], reloaded.listing(os.path.join(root, 'a')).files)
+      self.assertEqual((1, 0), (reloaded.hits, reloaded.misses))
+
+      # A snapshot of files matching a different pattern can't be reused.
+      other = FilesystemSnapshot(re.compile(r'.*\.java$'), path=path)
+      self.assertEqual(['Foo.java'], other.listing(os.path.join(root, 'a')).files)
+      self.assertEqual((0, 1), (other.hits, other.misses))
+
+  def test_changed_directory_is_relisted(self):
+    with temporary_dir() as root:
+      self._tree(root)
+      snapshot = FilesystemSnapshot(self.PATTERN)
+      snapshot.listing(os.path.join(root, 'c'))
+
+      touch(os.path.join(root, 'c', 'BUILD.new'))
+      self.assertEqual(['BUILD', 'BUILD.new'], snapshot.listing(os.path.join(root, 'c')).files)
+      self.assertEqual((0, 2), (snapshot.hits, snapshot.misses))
+
+  def test_recently_modified_directory_is_not_cached(self):
+    with temporary_dir() as root:
+      snapshot = FilesystemSnapshot(self.PATTERN)
+      touch(os.path.join(root, 'BUILD'))
+      snapshot.listing(root)
+      snapshot.listing(root)
+      self.assertEqual((0, 2), (snapshot.hits, snapshot.misses))
+
+  def test_walk(self):
+    with temporary_dir() as root:
+      self._tree(root)
+      os.symlink(os.path.join(root, 'c'), os.path.join(root, 'a', 'link'))
+      snapshot = FilesystemSnapshot(self.PATTERN)
+
+      walked = {}
+      for dirpath, dirnames, filenames in snapshot.walk(root):
+        walked[os.path.relpath(dirpath, root)] = filenames
+        if 'c' in dirnames:
+          dirnames.remove('c')
+      # Pruned directories and symlinked directories are not descended into.
+      self.assertEqual({'.': [], 'a': ['BUILD', 'BUILD.extra'], 'a/b': ['BUILD']}, walked)
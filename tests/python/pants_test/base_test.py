@@ -124,6 +124,7 @@ class BaseTest(unittest.TestCase):
       'pants_distdir': os.path.join(self.build_root, 'dist'),
       'pants_configdir': os.path.join(self.build_root, 'config'),
       'cache_key_gen_version': '0-test',
+      'build_invalidator_layout': 'files',
     }
     BuildRoot().path = self.build_root
 
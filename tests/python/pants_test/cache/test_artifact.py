@@ -0,0 +1,91 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+from contextlib import contextmanager
+
+from pants.cache.artifact import TarballArtifact
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_mkdir, safe_open, safe_rmtree
+
+
+class TarballArtifactTest(unittest.TestCase):
+  FILES = {
+    'out/a/muppet': 'kermit',
+    'out/b/muppet': 'piggy',
+    'out/b/c/muppet': 'gonzo',
+    'other': 'animal',
+  }
+
+  @contextmanager
+  def setup_artifact_root(self):
+    with temporary_dir() as artifact_root:
+      for relpath, contents in self.FILES.items():
+        with safe_open(os.path.join(artifact_root, relpath), 'w') as fp:
+          fp.write(contents)
+      safe_mkdir(os.path.join(artifact_root, 'out', 'empty'))
+      yield artifact_root
+
+  def _assert_restored(self, artifact_root):
+    for relpath, contents in self.FILES.items():
+      with open(os.path.join(artifact_root, relpath), 'r') as fp:
+        self.assertEqual(contents, fp.read())
+    self.assertTrue(os.path.isdir(os.path.join(artifact_root, 'out', 'empty')))
+
+  def _round_trip(self, write_format, read_format, chunk_size_bytes=None):
+    class SmallChunkTarballArtifact(TarballArtifact):
+      CHUNK_SIZE_BYTES = chunk_size_bytes or TarballArtifact.CHUNK_SIZE_BYTES
+
+    with self.setup_artifact_root() as artifact_root:
+      with temporary_dir() as tmpdir:
+        tarball = os.path.join(tmpdir, 'artifact')
+        paths = [os.path.join(artifact_root, 'out'), os.path.join(artifact_root, 'other')]
+        SmallChunkTarballArtifact(artifact_root, tarball, format=write_format).collect(paths)
+        safe_rmtree(paths[0])
+        os.unlink(paths[1])
+
+        artifact = TarballArtifact(artifact_root, tarball, format=read_format)
+        artifact.extract()
+        self._assert_restored(artifact_root)
+        self.assertTrue(set(paths).issubset(set(artifact.get_paths())))
+        # The chunks were extracted, not the chunked tarball itself.
+        self.assertFalse(os.path.exists(os.path.join(artifact_root, TarballArtifact.FORMAT_MEMBER)))
+        return os.listdir(tmpdir)
+
+  def test_tgz(self):
+    self._round_trip('tgz', 'tgz')
+
+  def test_tar(self):
+    self._round_trip('tar', 'tar')
+
+  def test_chunked(self):
+    # Each file gets its own chunk.
+    self._round_trip('chunked', 'chunked', chunk_size_bytes=1)
+
+  def test_chunked_leaves_no_temporary_files(self):
+    self.assertEqual(['artifact'], self._round_trip('chunked', 'chunked', chunk_size_bytes=1))
+
+  def test_format_is_detected(self):
+    self._round_trip('chunked', 'tgz', chunk_size_bytes=1)
+    self._round_trip('tar', 'chunked')
+    self._round_trip('tgz', 'tar')
+
+  def test_extract_chunked_stream(self):
+    with self.setup_artifact_root() as artifact_root:
+      with temporary_dir() as tmpdir:
+        tarball = os.path.join(tmpdir, 'artifact')
+        TarballArtifact(artifact_root, tarball, format='chunked').collect(
+          [os.path.join(artifact_root, 'out'), os.path.join(artifact_root, 'other')])
+        with temporary_dir() as restore_root:
+          with open(tarball, 'rb') as fp:
+            TarballArtifact(restore_root, None).extract_stream(fp)
+          self._assert_restored(restore_root)
+
+  def test_bad_format(self):
+    with self.assertRaises(ValueError):
+      TarballArtifact('/tmp', 'artifact', format='zip')
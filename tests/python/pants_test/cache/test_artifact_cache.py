@@ -13,7 +13,8 @@ from contextlib import contextmanager
 from threading import Thread
 
 from pants.base.build_invalidator import CacheKey
-from pants.cache.artifact_cache import call_insert, call_use_cached_files
+from pants.cache.artifact_cache import call_insert, call_use_cached_files, call_with_metrics
+from pants.cache.artifact_cache_metrics import ArtifactCacheMetrics
 from pants.cache.cache_setup import (CacheSpecFormatError, EmptyCacheSpecError,
                                      InvalidCacheSpecError, LocalCacheSpecRequiredError,
                                      RemoteCacheSpecRequiredError, create_artifact_cache,
@@ -93,9 +94,9 @@ class TestArtifactCache(unittest.TestCase):
         httpd_thread.join()
 
   @contextmanager
-  def setup_rest_cache(self, local=None):
+  def setup_rest_cache(self, local=None, artifact_format='tgz'):
     with temporary_dir() as artifact_root:
-      local = local or TempLocalArtifactCache(artifact_root, 0)
+      local = local or TempLocalArtifactCache(artifact_root, 0, artifact_format=artifact_format)
       with self.setup_server() as base_url:
         yield RESTfulArtifactCache(artifact_root, base_url, local)
 
@@ -167,6 +168,11 @@ class TestArtifactCache(unittest.TestCase):
     with self.setup_rest_cache() as artifact_cache:
       self.do_test_artifact_cache(artifact_cache)
 
+  def test_restful_cache_chunked_artifacts(self):
+    with self.setup_rest_cache(artifact_format='chunked') as artifact_cache:
+      self.do_test_artifact_cache(artifact_cache)
+      self.do_test_use_cached_files_many(artifact_cache)
+
   def do_test_artifact_cache(self, artifact_cache):
     key = CacheKey('muppet_key', 'fake_hash', 42)
     with self.setup_test_file(artifact_cache.artifact_root) as path:
@@ -235,6 +241,69 @@ class TestArtifactCache(unittest.TestCase):
           self.assertTrue(local.has(key))
           self.assertTrue(bool(local.use_cached_files(key)))
 
+  def do_test_use_cached_files_many(self, artifact_cache, writer=None):
+    writer = writer or artifact_cache
+    keys = [CacheKey('muppet_key{}'.format(i), 'fake_hash', 42) for i in range(4)]
+    paths = [os.path.join(artifact_cache.artifact_root, 'muppet{}'.format(i)) for i in range(4)]
+    for key, path in zip(keys, paths)[:3]:
+      with open(path, 'w') as outfile:
+        outfile.write(path)
+      writer.insert(key, [path])
+      os.unlink(path)
+
+    results = artifact_cache.use_cached_files_many(keys)
+    self.assertEquals([True, True, True, False], map(bool, results))
+    for path in paths[:3]:
+      with open(path, 'r') as infile:
+        self.assertEquals(path, infile.read())
+    return keys
+
+  def test_restful_cache_use_cached_files_many(self):
+    with self.setup_rest_cache() as artifact_cache:
+      self.assertTrue(artifact_cache.batches_reads())
+      self.do_test_use_cached_files_many(artifact_cache)
+
+  def test_local_backed_remote_cache_use_cached_files_many(self):
+    with self.setup_server() as url:
+      with self.setup_local_cache() as local:
+        tmp = TempLocalArtifactCache(local.artifact_root, 0)
+        remote = RESTfulArtifactCache(local.artifact_root, url, tmp)
+        combined = RESTfulArtifactCache(local.artifact_root, url, local)
+
+        # Artifacts downloaded while they're extracted are also backfilled into the local cache.
+        keys = self.do_test_use_cached_files_many(combined, writer=remote)
+        self.assertEquals([True, True, True, False], [local.has(key) for key in keys])
+        self.assertTrue(bool(local.use_cached_files(keys[0])))
+
+  def test_local_cache_use_cached_files_many(self):
+    with self.setup_local_cache() as artifact_cache:
+      self.assertFalse(artifact_cache.batches_reads())
+      self.do_test_use_cached_files_many(artifact_cache)
+
+  def test_failed_stream_removes_extracted_files(self):
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        cache = LocalArtifactCache(artifact_root, cache_root, compression=0, artifact_format='tar')
+        key = CacheKey('muppet_key', 'fake_hash', 42)
+        paths = [os.path.join(artifact_root, name) for name in ('muppet0', 'muppet1')]
+        for path in paths:
+          with open(path, 'w') as outfile:
+            outfile.write(TEST_CONTENT1)
+        with cache.insert_paths(key, paths) as tarball:
+          with open(tarball, 'rb') as infile:
+            contents = infile.read()
+        for path in paths:
+          os.unlink(path)
+
+        def interrupted_download():
+          # The header and (padded) contents of the first file only.
+          yield contents[:1024]
+          raise IOError('Connection reset.')
+
+        with self.assertRaises(IOError):
+          cache.store_and_use_artifact(key, interrupted_download())
+        self.assertEquals([], os.listdir(artifact_root))
+
   def test_multiproc(self):
     context = create_context()
     key = CacheKey('muppet_key', 'fake_hash', 42)
@@ -250,3 +319,43 @@ class TestArtifactCache(unittest.TestCase):
       with self.setup_test_file(cache.artifact_root) as path:
         context.subproc_map(call_insert, [(cache, key, [path], False)])
       self.assertEquals(context.subproc_map(call_use_cached_files, [(cache, key)]), [True])
+
+  def _operations(self):
+    return {(x['backend'], x['operation']): x for x in ArtifactCacheMetrics.instance().get_all()}
+
+  def test_local_cache_metrics(self):
+    ArtifactCacheMetrics.instance().reset()
+    with self.setup_local_cache() as cache:
+      self.do_test_artifact_cache(cache)
+      operations = self._operations()
+      read = operations[(cache.metrics_name, 'read')]
+      self.assertEquals(2, read['count'])
+      self.assertEquals({'hit': 1, 'miss': 1}, read['outcomes'])
+      self.assertEquals(0, read['errors'])
+      self.assertTrue(read['bytes'] > 0)
+      self.assertEquals({'inserted': 1}, operations[(cache.metrics_name, 'insert')]['outcomes'])
+      self.assertEquals(1, operations[(cache.metrics_name, 'compress')]['count'])
+      self.assertEquals(1, operations[(cache.metrics_name, 'extract')]['count'])
+
+  def test_restful_cache_metrics(self):
+    ArtifactCacheMetrics.instance().reset()
+    with self.setup_rest_cache() as cache:
+      self.do_test_artifact_cache(cache)
+      operations = self._operations()
+      read = operations[(cache.metrics_name, 'read')]
+      self.assertEquals({'hit': 1, 'miss': 1}, read['outcomes'])
+      get = operations[(cache.metrics_name, 'GET')]
+      self.assertEquals(2, get['count'])
+      self.assertEquals(1, get['outcomes']['404'])
+      self.assertEquals(read['bytes'], operations[(cache.metrics_name, 'PUT')]['bytes'])
+
+  def test_multiproc_metrics(self):
+    context = create_context()
+    key = CacheKey('muppet_key', 'fake_hash', 42)
+
+    with self.setup_local_cache() as cache:
+      ArtifactCacheMetrics.instance().reset()
+      results = context.subproc_map(call_with_metrics, [(call_use_cached_files, (cache, key))])
+      self.assertEquals([False], [res for res, _ in results])
+      ArtifactCacheMetrics.instance().merge(results[0][1])
+      self.assertEquals({'miss': 1}, self._operations()[(cache.metrics_name, 'read')]['outcomes'])
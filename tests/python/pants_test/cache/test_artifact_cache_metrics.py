@@ -0,0 +1,74 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import os
+import unittest
+
+from pants.cache.artifact_cache_metrics import ArtifactCacheMetrics
+from pants.util.contextutil import temporary_dir
+
+
+class ArtifactCacheMetricsTest(unittest.TestCase):
+  def test_record(self):
+    metrics = ArtifactCacheMetrics()
+    metrics.record('remote:foo', 'GET', 1.0, num_bytes=10, outcome='200')
+    metrics.record('remote:foo', 'GET', 3.0, num_bytes=20, outcome='404')
+    metrics.record('local:bar', 'read', 0.5, error=True)
+
+    read, get = metrics.get_all()
+    self.assertEquals(('local:bar', 'read', 1, 1), (read['backend'], read['operation'],
+                                                   read['count'], read['errors']))
+    self.assertEquals(2, get['count'])
+    self.assertEquals(0, get['errors'])
+    self.assertEquals(30, get['bytes'])
+    self.assertEquals({'200': 1, '404': 1}, get['outcomes'])
+    self.assertEquals(2.0, get['mean_secs'])
+    self.assertEquals(3.0, get['max_secs'])
+
+  def test_measure(self):
+    metrics = ArtifactCacheMetrics()
+    with metrics.measure('local:bar', 'read') as measurement:
+      measurement.bytes = 42
+      measurement.outcome = 'hit'
+    with self.assertRaises(ValueError):
+      with metrics.measure('local:bar', 'read'):
+        raise ValueError()
+
+    stats, = metrics.get_all()
+    self.assertEquals(2, stats['count'])
+    self.assertEquals(1, stats['errors'])
+    self.assertEquals(42, stats['bytes'])
+    self.assertEquals({'hit': 1}, stats['outcomes'])
+
+  def test_drain_and_merge(self):
+    child = ArtifactCacheMetrics()
+    child.record('remote:foo', 'GET', 1.0, num_bytes=10)
+    child.record_ping('foo', 0.25)
+    snapshot = child.drain()
+    self.assertEquals([], child.get_all())
+    self.assertEquals({}, child.get_pings())
+
+    parent = ArtifactCacheMetrics()
+    parent.record('remote:foo', 'GET', 2.0, num_bytes=5)
+    parent.merge(snapshot)
+    stats, = parent.get_all()
+    self.assertEquals(2, stats['count'])
+    self.assertEquals(15, stats['bytes'])
+    self.assertEquals(2.0, stats['max_secs'])
+    self.assertEquals({'foo': 0.25}, parent.get_pings())
+
+  def test_write_json(self):
+    metrics = ArtifactCacheMetrics()
+    metrics.record('remote:foo', 'PUT', 1.0, num_bytes=10)
+    metrics.record_ping('foo', 0.25)
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'metrics.json')
+      metrics.write_json(path)
+      with open(path, 'r') as fp:
+        written = json.load(fp)
+    self.assertEquals(metrics.get_as_dict(), written)
@@ -0,0 +1,202 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+import unittest
+from contextlib import contextmanager
+
+from pants.base.build_invalidator import CacheKey
+from pants.cache.artifact import TarballArtifact
+from pants.cache.content_addressed_artifact_cache import (BLOB_DIR, ContentAddressedArtifactCache,
+                                                          collect_garbage)
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_mkdir_for, safe_walk
+
+
+class ContentAddressedArtifactCacheTest(unittest.TestCase):
+  @contextmanager
+  def setup_cache(self, **kwargs):
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as store_root:
+        yield ContentAddressedArtifactCache(artifact_root, store_root, 'TestTask', compression=0,
+                                            **kwargs)
+
+  def _write(self, cache, relpath, contents):
+    path = os.path.join(cache.artifact_root, relpath)
+    safe_mkdir_for(path)
+    with open(path, 'w') as fp:
+      fp.write(contents)
+    return path
+
+  def _read(self, cache, relpath):
+    with open(os.path.join(cache.artifact_root, relpath), 'r') as fp:
+      return fp.read()
+
+  def _blobs(self, cache):
+    blob_root = os.path.join(cache._store_root, BLOB_DIR)
+    return [os.path.join(root, f) for root, _, files in safe_walk(blob_root) for f in files]
+
+  def _age(self, path, secs):
+    mtime = time.time() - secs
+    os.utime(path, (mtime, mtime))
+
+  def test_insert_and_restore(self):
+    with self.setup_cache() as cache:
+      key = CacheKey('muppet_key', 'fake_hash', 42)
+      self.assertFalse(cache.has(key))
+      self.assertFalse(bool(cache.use_cached_files(key)))
+
+      path = self._write(cache, 'out/a/muppet', 'kermit')
+      self._write(cache, 'out/b/muppet', 'piggy')
+      cache.insert(key, [os.path.join(cache.artifact_root, 'out')])
+      self.assertTrue(cache.has(key))
+
+      with open(path, 'w') as fp:
+        fp.write('gonzo')
+      os.unlink(os.path.join(cache.artifact_root, 'out/b/muppet'))
+
+      self.assertTrue(bool(cache.use_cached_files(key)))
+      self.assertEqual('kermit', self._read(cache, 'out/a/muppet'))
+      self.assertEqual('piggy', self._read(cache, 'out/b/muppet'))
+
+      cache.delete(key)
+      self.assertFalse(cache.has(key))
+
+  def test_identical_files_are_stored_once(self):
+    with self.setup_cache() as cache:
+      key1 = CacheKey('key1', 'hash', 42)
+      key2 = CacheKey('key2', 'hash', 42)
+      cache.insert(key1, [self._write(cache, 'one/muppet', 'kermit')])
+      cache.insert(key2, [self._write(cache, 'two/muppet', 'kermit')])
+      self.assertEqual(1, len(self._blobs(cache)))
+
+  def test_hardlink_restore(self):
+    with self.setup_cache(hardlink=True) as cache:
+      key = CacheKey('muppet_key', 'fake_hash', 42)
+      path = self._write(cache, 'muppet', 'kermit')
+      cache.insert(key, [path])
+      os.unlink(path)
+
+      self.assertTrue(bool(cache.use_cached_files(key)))
+      blob, = self._blobs(cache)
+      self.assertEqual(os.stat(blob).st_ino, os.stat(path).st_ino)
+
+  def test_hardlink_restore_honors_mode(self):
+    with self.setup_cache(hardlink=True) as cache:
+      key1 = CacheKey('key1', 'hash', 42)
+      key2 = CacheKey('key2', 'hash', 42)
+      cache.insert(key1, [self._write(cache, 'one/muppet', 'kermit')])
+      path = self._write(cache, 'two/muppet', 'kermit')
+      os.chmod(path, 0o755)
+      cache.insert(key2, [path])
+      os.unlink(path)
+
+      # The blob has the first file's mode, so the second is restored as a copy.
+      self.assertTrue(bool(cache.use_cached_files(key2)))
+      blob, = self._blobs(cache)
+      self.assertNotEqual(os.stat(blob).st_ino, os.stat(path).st_ino)
+      self.assertEqual(0o755, os.stat(path).st_mode & 0o777)
+
+  def test_missing_blob_is_unreadable(self):
+    with self.setup_cache() as cache:
+      key = CacheKey('muppet_key', 'fake_hash', 42)
+      cache.insert(key, [self._write(cache, 'muppet', 'kermit')])
+      for blob in self._blobs(cache):
+        os.unlink(blob)
+      result = cache.use_cached_files(key)
+      self.assertFalse(bool(result))
+      self.assertIsNotNone(result)
+
+  def test_store_and_use_artifact(self):
+    with self.setup_cache() as cache:
+      key = CacheKey('muppet_key', 'fake_hash', 42)
+      path = self._write(cache, 'out/muppet', 'kermit')
+      self._write(cache, 'out/unrelated', 'animal')
+      with temporary_dir() as tmpdir:
+        tarball = os.path.join(tmpdir, 'artifact.tgz')
+        TarballArtifact(cache.artifact_root, tarball, compression=0).collect([path])
+        os.unlink(path)
+        with open(tarball, 'rb') as fp:
+          self.assertTrue(cache.store_and_use_artifact(key, iter(lambda: fp.read(7), b'')))
+
+      self.assertEqual('kermit', self._read(cache, 'out/muppet'))
+      # Only the artifact's own files were stored.
+      self.assertEqual(1, len(self._blobs(cache)))
+      os.unlink(path)
+      self.assertTrue(bool(cache.use_cached_files(key)))
+      self.assertEqual('kermit', self._read(cache, 'out/muppet'))
+
+  def test_collect_garbage(self):
+    with self.setup_cache() as cache:
+      key = CacheKey('muppet_key', 'fake_hash', 42)
+      cache.insert(key, [self._write(cache, 'muppet', 'kermit')])
+      cache.delete(key)
+
+      # Recently written blobs might be about to be referenced by a concurrent insert.
+      self.assertEqual((0, 0), collect_garbage(cache._store_root)[:2])
+      blob, = self._blobs(cache)
+      self._age(blob, 2 * 60 * 60)
+      gc = collect_garbage(cache._store_root)
+      self.assertEqual((0, 1, len('kermit'), 0), gc)
+      self.assertEqual([], self._blobs(cache))
+
+  def test_lru_eviction(self):
+    with self.setup_cache() as cache:
+      keys = [CacheKey('key{}'.format(i), 'hash', 42) for i in range(3)]
+      for i, key in enumerate(keys):
+        cache.insert(key, [self._write(cache, 'muppet{}'.format(i), 'muppet{}'.format(i))])
+        self._age(cache._manifest_for_key(key), 60 * (10 - i))
+      for blob in self._blobs(cache):
+        self._age(blob, 2 * 60 * 60)
+
+      # Using the oldest artifact makes it the most recently used.
+      os.unlink(os.path.join(cache.artifact_root, 'muppet0'))
+      self.assertTrue(bool(cache.use_cached_files(keys[0])))
+
+      gc = collect_garbage(cache._store_root, max_size_bytes=2 * len('muppet0'))
+      self.assertEqual((1, 1), gc[:2])
+      self.assertEqual([True, False, True], [cache.has(key) for key in keys])
+
+  def test_lru_eviction_spares_young_blobs(self):
+    with self.setup_cache() as cache:
+      keys = [CacheKey('key{}'.format(i), 'hash', 42) for i in range(2)]
+      for i, key in enumerate(keys):
+        cache.insert(key, [self._write(cache, 'muppet{}'.format(i), 'muppet{}'.format(i))])
+        self._age(cache._manifest_for_key(key), 60 * (10 - i))
+
+      # The evicted artifact's blob may be about to be referenced by a concurrent insert, so it's
+      # left for a later collection. It no longer counts against the maximum, though, so the newer
+      # artifact survives.
+      gc = collect_garbage(cache._store_root, max_size_bytes=len('muppet0'))
+      self.assertEqual((1, 0, 0), gc[:3])
+      self.assertEqual([False, True], [cache.has(key) for key in keys])
+      self.assertEqual(2, len(self._blobs(cache)))
+
+  def test_insert_below_threshold_does_not_collect(self):
+    with self.setup_cache(max_size_bytes=1024) as cache:
+      key = CacheKey('key', 'hash', 42)
+      cache.insert(key, [self._write(cache, 'muppet', 'kermit')])
+      cache.delete(key)
+      blob, = self._blobs(cache)
+      self._age(blob, 2 * 60 * 60)
+
+      # Each insert adds to the tally in the store, so the first insert of a process need not
+      # collect, but enough inserts across processes do.
+      cache.insert(CacheKey('key1', 'hash', 42), [self._write(cache, 'muppet1', 'a' * 50)])
+      self.assertEqual(2, len(self._blobs(cache)))
+      cache.insert(CacheKey('key2', 'hash', 42), [self._write(cache, 'muppet2', 'b' * 50)])
+      self.assertEqual(2, len(self._blobs(cache)))
+
+  def test_eviction_on_insert(self):
+    with self.setup_cache(max_size_bytes=10) as cache:
+      key1 = CacheKey('key1', 'hash', 42)
+      key2 = CacheKey('key2', 'hash', 42)
+      cache.insert(key1, [self._write(cache, 'muppet1', 'kermit')])
+      self._age(cache._manifest_for_key(key1), 60)
+      cache.insert(key2, [self._write(cache, 'muppet2', 'piggy!')])
+      self.assertEqual([False, True], [cache.has(key1), cache.has(key2)])
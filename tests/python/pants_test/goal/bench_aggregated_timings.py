@@ -0,0 +1,42 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+"""Benchmarks recording timings late in a run with tens of thousands of distinct workunits.
+
+Recording a timing late in such a run should cost about what it does early on. Rewriting all the
+timings on each one, as AggregatedTimings used to, made the late ones an order of magnitude slower.
+Wall-clock ratios vary too much from machine to machine for this to be a test, so run it by hand:
+
+  ./pants run tests/python/pants_test/goal:bench_aggregated_timings
+"""
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+
+from pants.goal.aggregated_timings import AggregatedTimings
+from pants.util.contextutil import temporary_dir
+
+
+def secs_per_timing(timings, start, count):
+  began = time.time()
+  for i in range(start, start + count):
+    timings.add_timing('main:compile:target-{}'.format(i), 0.001)
+  return (time.time() - began) / count
+
+
+def main():
+  with temporary_dir() as run_info_dir:
+    timings = AggregatedTimings(os.path.join(run_info_dir, 'timings'))
+    early = secs_per_timing(timings, 0, 2000)
+    secs_per_timing(timings, 2000, 16000)
+    late = secs_per_timing(timings, 18000, 2000)
+  print('Per-timing overhead: {:.6f}s over the first 2000 timings, {:.6f}s over the last 2000 '
+        '({:.1f}x).'.format(early, late, late / early))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,56 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+import mock
+
+from pants.goal.aggregated_timings import AggregatedTimings
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_rmtree
+
+
+class AggregatedTimingsTest(unittest.TestCase):
+
+  def read_lines(self, path):
+    with open(path, 'r') as fp:
+      return fp.read().splitlines()
+
+  def test_timings_saved(self):
+    with temporary_dir() as run_info_dir:
+      path = os.path.join(run_info_dir, 'timings')
+      timings = AggregatedTimings(path)
+      timings.add_timing('main:compile', 1.0, is_tool=True)
+      timings.add_timing('main:test', 3.0)
+      timings.add_timing('main:compile', 1.5, is_tool=True)
+      self.assertEqual([{'label': 'main:test', 'timing': 3.0, 'is_tool': False},
+                        {'label': 'main:compile', 'timing': 2.5, 'is_tool': True}],
+                       timings.get_all())
+
+      timings.save()
+      self.assertEqual(['main:test: 3.0', 'main:compile: 2.5'], self.read_lines(path))
+      self.assertEqual(['timings'], os.listdir(run_info_dir))
+
+  def test_nothing_written_after_clean_all(self):
+    with temporary_dir() as run_info_dir:
+      timings = AggregatedTimings(os.path.join(run_info_dir, 'run', 'timings'))
+      safe_rmtree(os.path.join(run_info_dir, 'run'))
+      timings.add_timing('main:clean-all', 1.0)
+      timings.save()
+      self.assertEqual([], os.listdir(run_info_dir))
+
+  def test_nothing_written_until_saved(self):
+    # Recording a timing must not rewrite the timings recorded before it: the file isn't written
+    # until the run ends.
+    with temporary_dir() as run_info_dir:
+      timings = AggregatedTimings(os.path.join(run_info_dir, 'timings'))
+      with mock.patch('pants.goal.aggregated_timings.atomic_write') as atomic_write:
+        for i in range(1000):
+          timings.add_timing('main:compile:target-{}'.format(i), 0.001)
+      self.assertFalse(atomic_write.called)
+      self.assertEqual([], os.listdir(run_info_dir))
@@ -74,6 +74,21 @@ class ContextTest(BaseTest):
     self.assertEquals([syn_b], context.targets(lambda t: t.derived_from != t))
     self.assertEquals([c, b, a], context.targets(lambda t: t.derived_from == t))
 
+  def test_targets_synthetic_created_incrementally(self):
+    a = self.make_target('a')
+    b = self.make_target('b', dependencies=[a])
+    context = self.context(target_roots=[b])
+    self.assertEquals([b, a], context.targets())
+
+    syn_a = context.add_new_target(SyntheticAddress.parse('syn_a'), Target, derived_from=a)
+    self.assertEquals([b, a, syn_a], context.targets())
+    syn_b = context.add_new_target(SyntheticAddress.parse('syn_b'), Target, derived_from=b,
+                                   dependencies=[a])
+    syn_syn_a = context.add_new_target(SyntheticAddress.parse('syn_syn_a'), Target,
+                                       derived_from=syn_a)
+    self.assertEquals([b, a, syn_a, syn_b, syn_syn_a], context.targets())
+    self.assertEquals([a, b, syn_a, syn_b, syn_syn_a], context.targets(postorder=True))
+
   def test_targets_includes_synthetic_dependencies(self):
     a = self.make_target('a')
     b = self.make_target('b')
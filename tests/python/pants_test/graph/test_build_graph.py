@@ -5,6 +5,7 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import sys
 from textwrap import dedent
 
 from pants.base.address import SyntheticAddress
@@ -132,6 +133,18 @@ class BuildGraphTest(BaseTest):
     assertDependencyWalk(a, [a, b, c, d, e])
     assertDependencyWalk(a, [c, d, b, e, a], postorder=True)
 
+  def test_walk_deep_graph(self):
+    chain = [self.make_target('t0')]
+    for i in range(1, 5 * sys.getrecursionlimit()):
+      chain.append(self.make_target('t{}'.format(i), dependencies=[chain[-1]]))
+    walked = []
+    self.build_graph.walk_transitive_dependency_graph([chain[-1].address], walked.append,
+                                                      postorder=True)
+    self.assertEquals(chain, walked)
+    walked = []
+    self.build_graph.walk_transitive_dependee_graph([chain[0].address], walked.append)
+    self.assertEquals(chain, walked)
+
   def test_target_closure(self):
     a = self.make_target('a')
     self.assertEquals([a], a.closure())
@@ -142,6 +155,40 @@ class BuildGraphTest(BaseTest):
     d = self.make_target('d', dependencies=[a, c])
     self.assertEquals([d, a, c, b], d.closure())
 
+  def test_transitive_subgraph_memoized(self):
+    a = self.make_target('a')
+    b = self.make_target('b', dependencies=[a])
+    c = self.make_target('c')
+    closure = self.build_graph.transitive_subgraph_of_addresses([b.address])
+    self.assertEquals([b, a], list(closure))
+
+    # Callers may mutate the returned set without affecting later results.
+    closure.add(c)
+    self.assertEquals([b, a], list(self.build_graph.transitive_subgraph_of_addresses([b.address])))
+
+    # New targets nothing depends on don't disturb memoized closures, but new edges do.
+    d = self.make_target('d', dependencies=[c])
+    self.assertEquals([b, a], list(self.build_graph.transitive_subgraph_of_addresses([b.address])))
+    self.build_graph.inject_dependency(a.address, d.address)
+    self.assertEquals([b, a, d, c],
+                      list(self.build_graph.transitive_subgraph_of_addresses([b.address])))
+    self.assertEquals([c, d, a, b],
+                      list(self.build_graph.transitive_subgraph_of_addresses([b.address],
+                                                                             postorder=True)))
+
+  def test_transitive_subgraph_extends_memoized_prefix(self):
+    a = self.make_target('a')
+    b = self.make_target('b', dependencies=[a])
+    c = self.make_target('c', dependencies=[a])
+    self.assertEquals([b, a], list(self.build_graph.transitive_subgraph_of_addresses([b.address])))
+    self.assertEquals([b, a, c],
+                      list(self.build_graph.transitive_subgraph_of_addresses([b.address,
+                                                                              c.address])))
+    self.assertEquals([a, b, c],
+                      list(self.build_graph.transitive_subgraph_of_addresses([b.address,
+                                                                              c.address],
+                                                                             postorder=True)))
+
   def test_target_walk(self):
     def assertWalk(expected, target):
       results = []
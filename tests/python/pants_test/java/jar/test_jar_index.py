@@ -0,0 +1,90 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+import unittest
+import zipfile
+
+from pants.java.jar.jar_index import JarIndex
+from pants.util.contextutil import open_zip, temporary_dir
+from pants.util.fileutil import RACY_WINDOW_SECS
+
+
+class JarIndexTest(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir_context = temporary_dir()
+    self.tmpdir = self.tmpdir_context.__enter__()
+    self.addCleanup(self.tmpdir_context.__exit__, None, None, None)
+    self.index_dir = os.path.join(self.tmpdir, 'index')
+
+  def write_jar(self, name, *entries):
+    jar_path = os.path.join(self.tmpdir, name)
+    with open_zip(jar_path, 'w') as jar:
+      for entry in entries:
+        jar.writestr(entry, '0xCAFEBABE')
+    # Backdate the jar, so its listing is outside the racy window and gets persisted.
+    mtime = time.time() - RACY_WINDOW_SECS - 10
+    os.utime(jar_path, (mtime, mtime))
+    return jar_path
+
+  def test_entries(self):
+    jar = self.write_jar('a.jar', 'META-INF/MANIFEST.MF', 'org/pantsbuild/A.class',
+                         'org/pantsbuild/a.properties', 'org/pantsbuild/B$1.class')
+    index = JarIndex(self.index_dir)
+    self.assertEqual(('META-INF/MANIFEST.MF', 'org/pantsbuild/A.class',
+                      'org/pantsbuild/a.properties', 'org/pantsbuild/B$1.class'),
+                     index.entries(jar))
+    self.assertEqual(['org/pantsbuild/A.class', 'org/pantsbuild/B$1.class'],
+                     index.class_files(jar))
+    self.assertEqual((1, 1), (index.misses, index.hits))
+
+  def test_non_utf8_entry_names(self):
+    jar = self.write_jar('a.jar', 'org/pantsbuild/A.class')
+    with open_zip(jar, 'a') as zf:
+      # A latin-1 encoded name, not flagged as utf-8.
+      zf.writestr(zipfile.ZipInfo(b'org/pantsbuild/\xe9.class'), '0xCAFEBABE')
+    index = JarIndex(self.index_dir)
+    self.assertEqual(('org/pantsbuild/A.class', 'org/pantsbuild/\u0398.class'), index.entries(jar))
+    self.assertEqual(index.entries(jar), JarIndex(self.index_dir).entries(jar))
+
+  def test_persisted_across_instances(self):
+    jar = self.write_jar('a.jar', 'org/pantsbuild/A.class', 'org/pantsbuild/Ā.class')
+    expected = JarIndex(self.index_dir).entries(jar)
+
+    index = JarIndex(self.index_dir)
+    self.assertEqual(expected, index.entries(jar))
+    self.assertEqual((0, 1), (index.misses, index.hits))
+
+  def test_changed_jar_is_relisted(self):
+    jar = self.write_jar('a.jar', 'org/pantsbuild/A.class')
+    JarIndex(self.index_dir).entries(jar)
+
+    self.write_jar('a.jar', 'org/pantsbuild/A.class', 'org/pantsbuild/B.class')
+    index = JarIndex(self.index_dir)
+    self.assertEqual(('org/pantsbuild/A.class', 'org/pantsbuild/B.class'), index.entries(jar))
+    self.assertEqual(1, index.misses)
+
+  def test_recently_modified_jar_is_not_persisted(self):
+    jar = self.write_jar('a.jar', 'org/pantsbuild/A.class')
+    os.utime(jar, None)
+    JarIndex(self.index_dir).entries(jar)
+    self.assertFalse(os.path.exists(self.index_dir))
+
+  def test_corrupt_listing_is_ignored(self):
+    jar = self.write_jar('a.jar', 'org/pantsbuild/A.class')
+    JarIndex(self.index_dir).entries(jar)
+    for listing in os.listdir(self.index_dir):
+      with open(os.path.join(self.index_dir, listing), 'w') as fp:
+        fp.write('garbage')
+
+    index = JarIndex(self.index_dir)
+    self.assertEqual(('org/pantsbuild/A.class',), index.entries(jar))
+    self.assertEqual(1, index.misses)
+
+  def test_for_workdir(self):
+    self.assertIs(JarIndex.for_workdir(self.tmpdir), JarIndex.for_workdir(self.tmpdir))
@@ -0,0 +1,29 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import subprocess
+import sys
+from contextlib import contextmanager
+
+from pants.java.nailgun_executor import NailgunExecutor
+
+
+@contextmanager
+def fake_nailgun_server(workdir, fingerprint):
+  """Yields a process whose command line carries the identifying args of a spawned ng server.
+
+  The process is killed on exit, if it is still running.
+  """
+  process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)',
+                              NailgunExecutor.create_owner_arg(workdir),
+                              NailgunExecutor._create_fingerprint_arg(fingerprint)])
+  try:
+    yield process
+  finally:
+    if process.poll() is None:
+      process.kill()
+      process.wait()
@@ -0,0 +1,59 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.java.nailgun_executor import NailgunExecutor
+from pants.util.contextutil import temporary_dir
+from pants_test.java.nailgun_utils import fake_nailgun_server
+
+
+class NailgunExecutorRegistryTest(unittest.TestCase):
+
+  def test_endpoint_spec_roundtrip(self):
+    endpoint = NailgunExecutor.Endpoint('C:/jdk/bin/java', 'abc123', 42, 8080)
+    self.assertEqual(endpoint, NailgunExecutor.Endpoint.parse(endpoint.spec()))
+
+  def test_find_unregistered(self):
+    with temporary_dir() as workdir:
+      self.assertIsNone(NailgunExecutor._find(workdir))
+
+  def test_find_registered(self):
+    with temporary_dir() as workdir:
+      with fake_nailgun_server(workdir, 'abc123') as process:
+        endpoint = NailgunExecutor.Endpoint('java', 'abc123', process.pid, 8080)
+        NailgunExecutor._register(workdir, endpoint)
+        self.assertEqual(endpoint, NailgunExecutor._find(workdir))
+
+  def test_find_stale(self):
+    with temporary_dir() as workdir:
+      with fake_nailgun_server(workdir, 'abc123') as process:
+        endpoint = NailgunExecutor.Endpoint('java', 'abc123', process.pid, 8080)
+        NailgunExecutor._register(workdir, endpoint)
+      self.assertIsNone(NailgunExecutor._find(workdir))
+      self.assertFalse(os.path.exists(NailgunExecutor._registry_path(workdir)))
+
+  def test_find_other_process(self):
+    with temporary_dir() as workdir:
+      with temporary_dir() as other_workdir:
+        # The pid is alive, but no longer the server that was registered, e.g., it was reused.
+        with fake_nailgun_server(other_workdir, 'abc123') as process:
+          endpoint = NailgunExecutor.Endpoint('java', 'abc123', process.pid, 8080)
+          NailgunExecutor._register(workdir, endpoint)
+          self.assertIsNone(NailgunExecutor._find(workdir))
+
+  def test_killall_registered(self):
+    with temporary_dir() as workdir_root:
+      workdir = os.path.join(workdir_root, 'Task', '1')
+      with fake_nailgun_server(workdir, 'abc123') as process:
+        NailgunExecutor._register(workdir,
+                                  NailgunExecutor.Endpoint('java', 'abc123', process.pid, 8080))
+        self.assertTrue(NailgunExecutor.killall(workdir_root=workdir_root))
+        process.wait()
+        self.assertIsNotNone(process.returncode)
+        self.assertFalse(os.path.exists(NailgunExecutor._registry_path(workdir)))
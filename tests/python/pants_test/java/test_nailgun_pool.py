@@ -0,0 +1,129 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import threading
+import time
+import unittest
+
+from mock import patch
+
+from pants.java.nailgun_executor import NailgunExecutor
+from pants.java.nailgun_pool import NailgunExecutorPool
+from pants.util.contextutil import temporary_dir
+from pants_test.java.nailgun_utils import fake_nailgun_server
+
+
+class NailgunExecutorPoolTest(unittest.TestCase):
+
+  def pool(self, workdir, max_servers=2, idle_timeout_secs=3600):
+    return NailgunExecutorPool(workdir, 'nailgun.jar', max_servers=max_servers,
+                               idle_timeout_secs=idle_timeout_secs)
+
+  def test_server_memory_bytes(self):
+    self.assertEqual(NailgunExecutorPool.DEFAULT_SERVER_MEMORY_BYTES,
+                     NailgunExecutorPool.server_memory_bytes(['-Xms1g']))
+    self.assertEqual(256 * 1024 * 1024,
+                     NailgunExecutorPool.server_memory_bytes(['-Xmx2g', '-Xmx256m']))
+    self.assertEqual(2 * 1024 * 1024 * 1024, NailgunExecutorPool.server_memory_bytes(['-Xmx2G']))
+
+  def test_concurrent_leases_get_distinct_servers(self):
+    with temporary_dir() as workdir:
+      pool = self.pool(workdir)
+      first = pool._acquire('fp', [])
+      second = pool._acquire('fp', [])
+      self.assertNotEqual(first, second)
+      pool._release('fp', first)
+      self.assertEqual(first, pool._acquire('fp', []))
+
+  def test_fingerprints_get_distinct_servers(self):
+    with temporary_dir() as workdir:
+      pool = self.pool(workdir, max_servers=1)
+      first = pool._acquire('fp1', [])
+      second = pool._acquire('fp2', [])
+      self.assertNotEqual(first, second)
+
+  def test_prefers_server_that_last_ran_classpath(self):
+    with temporary_dir() as workdir:
+      pool = self.pool(workdir)
+      first = pool._acquire('fp', [], ['a.jar'])
+      second = pool._acquire('fp', [], ['b.jar'])
+      pool._release('fp', first)
+      pool._release('fp', second)
+      self.assertEqual(first, pool._acquire('fp', [], ['a.jar']))
+      # With no server that last ran the classpath, the most recently used is restarted for it.
+      self.assertEqual(second, pool._acquire('fp', [], ['c.jar']))
+
+  def test_lease_blocks_at_max_servers(self):
+    with temporary_dir() as workdir:
+      pool = self.pool(workdir, max_servers=1)
+      slot = pool._acquire('fp', [])
+      acquired = []
+      thread = threading.Thread(target=lambda: acquired.append(pool._acquire('fp', [])))
+      thread.start()
+      time.sleep(0.1)
+      self.assertEqual([], acquired)
+      pool._release('fp', slot)
+      thread.join()
+      self.assertEqual([slot], acquired)
+
+  def test_servers_persist_across_pools(self):
+    with temporary_dir() as workdir:
+      pool = self.pool(workdir)
+      slot = pool._acquire('fp', [])
+      pool._release('fp', slot)
+      self.assertEqual(slot, self.pool(workdir)._acquire('fp', []))
+
+  def test_reap_idle(self):
+    with temporary_dir() as workdir:
+      pool = self.pool(workdir, idle_timeout_secs=60)
+      idle_slot = pool._acquire('fp', [])
+      leased_slot = pool._acquire('fp', [])
+      pool._release('fp', idle_slot)
+      old = time.time() - 120
+      for slot in (idle_slot, leased_slot):
+        os.utime(os.path.join(slot, NailgunExecutorPool._LAST_USED_FILE), (old, old))
+
+      with fake_nailgun_server(idle_slot, 'fp') as idle_process:
+        with fake_nailgun_server(leased_slot, 'fp') as leased_process:
+          for slot, process in ((idle_slot, idle_process), (leased_slot, leased_process)):
+            NailgunExecutor._register(slot,
+                                      NailgunExecutor.Endpoint('java', 'fp', process.pid, 1))
+
+          self.assertEqual(1, pool.reap_idle())
+          idle_process.wait()
+          self.assertIsNone(leased_process.poll())
+
+  @patch('pants.java.nailgun_pool.psutil')
+  def test_first_server_waits_for_memory(self, psutil):
+    psutil.virtual_memory.return_value.available = 1024 * 1024 * 1024
+    with temporary_dir() as workdir:
+      pool = self.pool(workdir)
+      other = pool._acquire('fp1', ['-Xmx1g'])
+      pool._spawned(other)
+      psutil.virtual_memory.return_value.available = 0
+      # Releasing the other server may free memory, so a first server waits for that.
+      self.assertFalse(pool._has_memory_for_server('fp2', ['-Xmx1g']))
+      pool._release('fp1', other)
+      # Nothing leased may be released, so waiting would be forever.
+      self.assertTrue(pool._has_memory_for_server('fp2', ['-Xmx1g']))
+
+  @patch('pants.java.nailgun_pool.psutil')
+  def test_spawning_servers_count_against_free_memory(self, psutil):
+    psutil.virtual_memory.return_value.available = 3 * 1024 * 1024 * 1024
+    with temporary_dir() as workdir:
+      pool = self.pool(workdir, max_servers=3)
+      xmx = ['-Xmx1g']
+      first = pool._acquire('fp', xmx)
+      second = pool._acquire('fp', xmx)
+      # Neither server has started, so free memory doesn't yet reflect them: only 1g is left.
+      self.assertFalse(pool._has_memory_for_server('fp', ['-Xmx2g']))
+      self.assertTrue(pool._has_memory_for_server('fp', xmx))
+
+      pool._spawned(first)
+      pool._spawned(second)
+      self.assertTrue(pool._has_memory_for_server('fp', ['-Xmx2g']))
@@ -5,12 +5,17 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import os
+import sys
 import unittest
 
 import mock
+from pex.interpreter import PythonIdentity
+from pkg_resources import Requirement
 
 from pants.backend.python.interpreter_cache import PythonInterpreter, PythonInterpreterCache
 from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import touch
 
 
 class TestInterpreterCache(unittest.TestCase):
@@ -53,3 +58,86 @@ class TestInterpreterCache(unittest.TestCase):
     self._do_test(self._make_bad_requirement(self._interpreter.identity.requirement),
                   (str(self._interpreter.identity.requirement), ),
                   [self._interpreter])
+
+
+class TestInterpreterCacheManifest(unittest.TestCase):
+  def setUp(self):
+    self._interpreter = PythonInterpreter.get()
+    identity = self._interpreter.identity
+    self._filters = ('{}>={}.{}'.format(identity.interpreter, *identity.version[:2]),)
+
+  def _setup_cache(self, scratch_dir, bin_dir, identities):
+    """Sets up a new cache, as a new run would, and returns it with the binaries it probed and
+    the requirements it resolved.
+    """
+    mock_setup = mock.MagicMock().return_value
+    mock_setup.scratch_dir = scratch_dir
+    mock_setup.interpreter_requirement = None
+    mock_setup.setuptools_requirement.return_value = Requirement.parse('setuptools==5.4.1')
+    mock_setup.wheel_requirement.return_value = Requirement.parse('wheel==0.24.0')
+    cache = PythonInterpreterCache(mock_setup, mock.MagicMock())
+
+    probed = []
+    resolved = []
+
+    def from_binary(binary):
+      probed.append(binary)
+      return PythonInterpreter(binary, identities[os.path.realpath(binary)])
+
+    def resolve_interpreter(interpreter, requirement):
+      resolved.append(requirement.key)
+      egg = os.path.join(scratch_dir, 'eggs', requirement.key)
+      touch(egg)
+      return interpreter.with_extra(requirement.key, requirement.specs[0][1], egg)
+
+    cache._resolve_interpreter = mock.Mock(side_effect=resolve_interpreter)
+    with mock.patch.object(PythonInterpreter, 'from_binary', side_effect=from_binary):
+      cache.setup(paths=[bin_dir], filters=self._filters)
+    return cache, probed, resolved
+
+  def test_warm_setup_neither_probes_nor_resolves(self):
+    with temporary_dir() as scratch_dir:
+      with temporary_dir() as bin_dir:
+        binary = os.path.realpath(sys.executable)
+        os.symlink(binary, os.path.join(bin_dir, 'python'))
+        identities = {binary: self._interpreter.identity}
+
+        cache, probed, resolved = self._setup_cache(scratch_dir, bin_dir, identities)
+        self.assertTrue(probed)
+        self.assertEqual(['setuptools', 'wheel'], resolved)
+        interpreters = cache.interpreters
+
+        cache, probed, resolved = self._setup_cache(scratch_dir, bin_dir, identities)
+        self.assertEqual([], probed)
+        self.assertEqual([], resolved)
+        self.assertEqual(interpreters, cache.interpreters)
+        interpreter = list(cache.interpreters)[0]
+        self.assertTrue(interpreter.satisfies([Requirement.parse('setuptools==5.4.1'),
+                                               Requirement.parse('wheel==0.24.0')]))
+
+        # Extras that went missing are resolved again.
+        os.unlink(os.path.join(scratch_dir, 'eggs', 'wheel'))
+        cache, probed, resolved = self._setup_cache(scratch_dir, bin_dir, identities)
+        self.assertEqual([], probed)
+        self.assertEqual(['setuptools', 'wheel'], resolved)
+
+  def test_changed_binary_is_probed_again(self):
+    with temporary_dir() as scratch_dir:
+      with temporary_dir() as bin_dir:
+        binary = os.path.join(os.path.realpath(bin_dir), 'python')
+        touch(binary)
+        version = self._interpreter.identity.version
+        identities = {binary: self._interpreter.identity}
+        self._setup_cache(scratch_dir, bin_dir, identities)
+
+        # Replace the binary with a newer patch release, as an upgrade in place would.
+        newer = PythonIdentity(self._interpreter.identity.interpreter, version[0], version[1],
+                               version[2] + 1)
+        identities = {binary: newer}
+        with open(binary, 'w') as fp:
+          fp.write('upgraded')
+        os.utime(binary, (0, 0))
+        cache, probed, resolved = self._setup_cache(scratch_dir, bin_dir, identities)
+        self.assertIn(binary, probed)
+        self.assertEqual(['setuptools', 'wheel'], resolved)
+        self.assertEqual([newer], [interpreter.identity for interpreter in cache.interpreters])
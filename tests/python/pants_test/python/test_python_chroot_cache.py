@@ -0,0 +1,170 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+import unittest
+import zipfile
+
+import mock
+from pex.interpreter import PythonInterpreter
+from pex.pex_info import PexInfo
+
+from pants.backend.python.python_chroot_cache import PythonChrootCache
+from pants.backend.python.python_requirement import PythonRequirement
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_open
+
+
+class PythonChrootCacheTest(unittest.TestCase):
+
+  def setUp(self):
+    self.interpreter = PythonInterpreter.get()
+    self.resolves = 0
+
+  def resolve(self):
+    self.resolves += 1
+    return []
+
+  def frozen_builder(self, cache, source_root, requirements=()):
+    pex_info = PexInfo.default()
+    pex_info.entry_point = 'main'
+    sources = [('source', os.path.join(source_root, name), name)
+               for name in sorted(os.listdir(source_root))]
+    return cache.frozen_builder(self.interpreter, pex_info, sources, requirements, self.resolve)
+
+  def write_source(self, source_root, name, content):
+    with safe_open(os.path.join(source_root, name), 'w') as fp:
+      fp.write(content)
+
+  def read_pex_file(self, builder, relpath):
+    with open(os.path.join(builder.path(), relpath)) as fp:
+      return fp.read()
+
+  def test_reuse(self):
+    with temporary_dir() as cache_root:
+      with temporary_dir() as source_root:
+        self.write_source(source_root, 'main.py', 'print("hello")')
+        builder = self.frozen_builder(PythonChrootCache(cache_root), source_root)
+        self.assertEqual('print("hello")', self.read_pex_file(builder, 'main.py'))
+        # Sources are not precompiled: the interpreter running the PEX compiles them.
+        self.assertFalse(os.path.exists(os.path.join(builder.path(), 'main.pyc')))
+        self.assertEqual('main', builder.info.entry_point)
+
+        # A new cache instance, as in a later run.
+        cache = PythonChrootCache(cache_root)
+        self.assertEqual(builder.path(), self.frozen_builder(cache, source_root).path())
+        self.assertEqual((1, 0), (cache.hits, cache.misses))
+        self.assertEqual(1, self.resolves)
+
+  def test_source_change_reuses_requirements_layer(self):
+    requirements = [PythonRequirement('foo==1.0')]
+    with temporary_dir() as cache_root:
+      with temporary_dir() as source_root:
+        cache = PythonChrootCache(cache_root)
+        self.write_source(source_root, 'main.py', 'import lib')
+        self.write_source(source_root, 'lib.py', 'x = 1')
+        first = self.frozen_builder(cache, source_root, requirements)
+
+        self.write_source(source_root, 'lib.py', 'x = 2')
+        second = self.frozen_builder(cache, source_root, requirements)
+        self.assertNotEqual(first.path(), second.path())
+        self.assertEqual('x = 1', self.read_pex_file(first, 'lib.py'))
+        self.assertEqual('x = 2', self.read_pex_file(second, 'lib.py'))
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
+        self.assertEqual(1, self.resolves)
+
+        self.frozen_builder(cache, source_root, [PythonRequirement('foo==2.0')])
+        self.assertEqual(2, self.resolves)
+
+  def test_build(self):
+    with temporary_dir() as cache_root:
+      with temporary_dir() as source_root:
+        self.write_source(source_root, 'main.py', 'print("hello")')
+        self.frozen_builder(PythonChrootCache(cache_root), source_root)
+        builder = self.frozen_builder(PythonChrootCache(cache_root), source_root)
+        pex_path = os.path.join(source_root, 'main.pex')
+        builder.build(pex_path)
+        with zipfile.ZipFile(pex_path) as pex:
+          names = pex.namelist()
+        self.assertIn('main.py', names)
+        self.assertIn('__main__.py', names)
+        self.assertIn(PexInfo.PATH, names)
+        self.assertNotIn(PythonChrootCache._PEX_MANIFEST, names)
+
+  def test_prune(self):
+    with temporary_dir() as cache_root:
+      with temporary_dir() as source_root:
+        cache = PythonChrootCache(cache_root)
+        cache.MAX_PEXES_PER_REQUIREMENTS = 2
+        paths = []
+        for i in range(3):
+          self.write_source(source_root, 'main.py', 'x = {}'.format(i))
+          paths.append(self.frozen_builder(cache, source_root).path())
+          # Make sure the PEXes' last used times are distinct.
+          os.utime(paths[-1], (i, i))
+        self.assertEqual([False, True, True], [os.path.exists(path) for path in paths])
+
+  def test_prune_spares_recently_used(self):
+    with temporary_dir() as cache_root:
+      with temporary_dir() as source_root:
+        cache = PythonChrootCache(cache_root)
+        cache.MAX_PEXES_PER_REQUIREMENTS = 1
+        paths = []
+        for i in range(3):
+          self.write_source(source_root, 'main.py', 'x = {}'.format(i))
+          paths.append(self.frozen_builder(cache, source_root).path())
+        # Only the PEX last used outside the grace period may be pruned, as a concurrent run may
+        # still be using the others.
+        long_ago = time.time() - cache.PRUNE_GRACE_SECS - 60
+        os.utime(paths[0], (long_ago, long_ago))
+        self.write_source(source_root, 'main.py', 'x = 3')
+        paths.append(self.frozen_builder(cache, source_root).path())
+        self.assertEqual([False, True, True, True], [os.path.exists(path) for path in paths])
+
+  def test_prune_requirements(self):
+    with temporary_dir() as cache_root:
+      with temporary_dir() as source_root:
+        cache = PythonChrootCache(cache_root)
+        cache.MAX_REQUIREMENTS = 1
+        self.write_source(source_root, 'main.py', 'print("hello")')
+        first = self.frozen_builder(cache, source_root, [PythonRequirement('foo==1.0')])
+        layer_path = os.path.join(cache_root, 'requirements',
+                                  os.path.basename(os.path.dirname(first.path())))
+        self.assertTrue(os.path.isdir(layer_path))
+        long_ago = time.time() - cache.PRUNE_GRACE_SECS - 60
+        for path in (layer_path, os.path.dirname(first.path())):
+          os.utime(path, (long_ago, long_ago))
+
+        second = self.frozen_builder(cache, source_root, [PythonRequirement('foo==2.0')])
+        self.assertFalse(os.path.exists(layer_path))
+        self.assertFalse(os.path.exists(os.path.dirname(first.path())))
+        self.assertTrue(os.path.exists(second.path()))
+
+  def test_read_only_cache(self):
+    with temporary_dir() as cache_root:
+      with temporary_dir() as source_root:
+        self.write_source(source_root, 'main.py', 'print("hello")')
+        path = self.frozen_builder(PythonChrootCache(cache_root), source_root).path()
+        cache = PythonChrootCache(cache_root)
+        with mock.patch('os.utime', side_effect=OSError('Read-only file system')):
+          self.assertEqual(path, self.frozen_builder(cache, source_root).path())
+        self.assertEqual((1, 0), (cache.hits, cache.misses))
+
+  def test_requirements_fingerprint(self):
+    pinned = [PythonRequirement('foo==1.0')]
+    unpinned = [PythonRequirement('foo>=1.0')]
+
+    def fingerprint(requirements, now):
+      return PythonChrootCache.requirements_fingerprint(self.interpreter, ['current'],
+                                                        requirements, requirements_ttl=100,
+                                                        now=now)
+
+    self.assertEqual(fingerprint(pinned, 0), fingerprint(pinned, 1000))
+    self.assertEqual(fingerprint(unpinned, 0), fingerprint(unpinned, 99))
+    self.assertNotEqual(fingerprint(unpinned, 0), fingerprint(unpinned, 100))
+    self.assertNotEqual(fingerprint(pinned, 0), fingerprint(unpinned, 0))
@@ -5,13 +5,22 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import os
+import tarfile
 import unittest
+import zipfile
 
+import mock
+from pex.http import Context
+from pex.interpreter import PythonInterpreter
 from pex.platforms import Platform
+from pex.resolver import resolve
 
-from pants.backend.python.resolver import get_platforms
+from pants.backend.python.python_requirement import PythonRequirement
+from pants.backend.python.resolver import ResolutionMemo, get_platforms, resolve_multi
 from pants.base.config import Config
-from pants.util.contextutil import temporary_file
+from pants.util.contextutil import temporary_dir, temporary_file
+from pants.util.dirutil import safe_mkdir, safe_open, safe_rmtree
 
 
 class ResolverTest(unittest.TestCase):
@@ -31,3 +40,109 @@ platforms: [
     expected_platforms = [Platform.current(), 'linux-x86_64']
     self.assertEqual(set(expected_platforms),
                      set(get_platforms(self.config.getlist('python-setup', 'platforms'))))
+
+
+class ResolveMultiTest(unittest.TestCase):
+  def setUp(self):
+    self.find_links = self.create_dir()
+    self.scratch_dir = self.create_dir()
+    self.python_setup = mock.Mock(scratch_dir=self.scratch_dir, platforms=['current'])
+    self.python_repos = mock.Mock(repos=[], indexes=[])
+    self.python_repos.get_fetchers.side_effect = lambda: []
+    self.python_repos.get_network_context.return_value = Context.get()
+
+    self.create_wheel('foo', '1.0', requires=['bar>=1'])
+    self.create_wheel('bar', '1.0')
+    self.create_sdist('baz', '1.0')
+
+  def create_dir(self):
+    context = temporary_dir()
+    path = context.__enter__()
+    self.addCleanup(context.__exit__, None, None, None)
+    return path
+
+  def create_wheel(self, name, version, requires=()):
+    dist_info = '{}-{}.dist-info'.format(name, version)
+    metadata = 'Metadata-Version: 2.0\nName: {}\nVersion: {}\n'.format(name, version)
+    metadata += ''.join('Requires-Dist: {}\n'.format(req) for req in requires)
+    wheel = 'Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py2-none-any\nTag: py3-none-any\n'
+    path = os.path.join(self.find_links, '{}-{}-py2.py3-none-any.whl'.format(name, version))
+    with zipfile.ZipFile(path, 'w') as whl:
+      whl.writestr('{}.py'.format(name), '')
+      whl.writestr('{}/METADATA'.format(dist_info), metadata)
+      whl.writestr('{}/WHEEL'.format(dist_info), wheel)
+      whl.writestr('{}/RECORD'.format(dist_info), '')
+
+  def create_sdist(self, name, version):
+    with temporary_dir() as source_dir:
+      with safe_open(os.path.join(source_dir, 'setup.py'), 'w') as fp:
+        fp.write('from setuptools import setup\n'
+                 'setup(name={!r}, version={!r}, py_modules=[{!r}])\n'.format(name, version, name))
+      with safe_open(os.path.join(source_dir, '{}.py'.format(name)), 'w') as fp:
+        fp.write('')
+      path = os.path.join(self.find_links, '{}-{}.tar.gz'.format(name, version))
+      with tarfile.open(path, 'w:gz') as sdist:
+        sdist.add(source_dir, '{}-{}'.format(name, version))
+
+  def resolve(self, requirements, ttl=3600):
+    """Returns the names and versions of the distributions the requirements resolve to, and the
+    number of requirement sets that were actually resolved rather than looked up.
+    """
+    with mock.patch('pants.backend.python.resolver.resolve', wraps=resolve) as mock_resolve:
+      distributions = resolve_multi(self.python_setup,
+                                    self.python_repos,
+                                    [PythonRequirement(req) for req in requirements],
+                                    ttl=ttl,
+                                    find_links=[self.find_links])
+    dists = set((dist.key, dist.version) for dists in distributions.values() for dist in dists)
+    return dists, mock_resolve.call_count
+
+  def test_pinned_resolve_is_looked_up(self):
+    expected = set([('foo', '1.0'), ('bar', '1.0'), ('baz', '1.0')])
+    self.assertEqual((expected, 1), self.resolve(['foo==1.0', 'baz==1.0']))
+
+    # Neither the links nor the repos are needed anymore.
+    safe_rmtree(self.find_links)
+    safe_mkdir(self.find_links)
+    self.assertEqual((expected, 0), self.resolve(['baz==1.0', 'foo==1.0']))
+
+  def test_pinned_closure_is_looked_up_past_ttl(self):
+    expected = set([('bar', '1.0'), ('baz', '1.0')])
+    self.assertEqual((expected, 1), self.resolve(['bar==1.0', 'baz==1.0'], ttl=0))
+    self.assertEqual((expected, 0), self.resolve(['bar==1.0', 'baz==1.0'], ttl=0))
+
+  def test_open_ended_transitive_requirement_is_resolved_again_past_ttl(self):
+    # foo is pinned, but its requirement on bar is not.
+    self.assertEqual((set([('foo', '1.0'), ('bar', '1.0')]), 1), self.resolve(['foo==1.0']))
+    self.assertEqual((set([('foo', '1.0'), ('bar', '1.0')]), 0), self.resolve(['foo==1.0']))
+
+    self.create_wheel('bar', '2.0')
+    self.assertEqual((set([('foo', '1.0'), ('bar', '2.0')]), 1),
+                     self.resolve(['foo==1.0'], ttl=0))
+
+  def test_open_ended_resolve_is_looked_up_within_ttl(self):
+    self.assertEqual((set([('bar', '1.0')]), 1), self.resolve(['bar>=1']))
+    self.assertEqual((set([('bar', '1.0')]), 0), self.resolve(['bar>=1']))
+
+    self.create_wheel('bar', '2.0')
+    self.assertEqual((set([('bar', '2.0')]), 1), self.resolve(['bar>=1'], ttl=0))
+
+  def test_different_requirements_are_resolved(self):
+    self.resolve(['bar==1.0'])
+    self.assertEqual((set([('bar', '1.0'), ('baz', '1.0')]), 1),
+                     self.resolve(['bar==1.0', 'baz==1.0']))
+
+  def test_missing_distributions_are_resolved_again(self):
+    self.resolve(['foo==1.0'])
+    safe_rmtree(os.path.join(self.scratch_dir, 'eggs'))
+    self.assertEqual((set([('foo', '1.0'), ('bar', '1.0')]), 1), self.resolve(['foo==1.0']))
+
+  def test_key_covers_2to3(self):
+    interpreter = PythonInterpreter.get()
+
+    def key(**kwargs):
+      return ResolutionMemo.key([PythonRequirement('bar==1.0', **kwargs)], interpreter, 'current',
+                                [])
+
+    self.assertEqual(key(), key(use_2to3=False))
+    self.assertNotEqual(key(), key(use_2to3=True))
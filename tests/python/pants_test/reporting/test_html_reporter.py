@@ -0,0 +1,56 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import unittest
+
+import mock
+
+from pants.base.workunit import WorkUnit
+from pants.reporting.html_reporter import HtmlReporter
+from pants.reporting.report import Report
+from pants.util.contextutil import temporary_dir
+
+
+class HtmlReporterTest(unittest.TestCase):
+
+  def test_views_refreshed_at_most_once_per_interval(self):
+    with temporary_dir() as html_dir:
+      settings = HtmlReporter.Settings(log_level=Report.INFO, html_dir=html_dir, template_dir=None)
+      reporter = HtmlReporter(mock.Mock(), settings)
+      reporter._refresh_views = mock.Mock()
+      reporter._render_cache_metrics = mock.Mock()
+      reporter.open()
+      root = WorkUnit(run_info_dir=html_dir, parent=None, name='main')
+      root.start()
+
+      def run_workunits(count):
+        for i in range(count):
+          workunit = WorkUnit(run_info_dir=html_dir, parent=root, name='work-{}'.format(i))
+          workunit.start()
+          reporter.start_workunit(workunit)
+          reporter.end_workunit(workunit)
+          workunit.end()
+
+      with mock.patch('pants.reporting.html_reporter.time') as mock_time:
+        mock_time.time.return_value = 1000.0
+        run_workunits(100)
+        self.assertEqual(1, reporter._refresh_views.call_count)
+
+        mock_time.time.return_value += HtmlReporter.VIEWS_REFRESH_INTERVAL_SECS / 2
+        run_workunits(100)
+        self.assertEqual(1, reporter._refresh_views.call_count)
+
+        mock_time.time.return_value += HtmlReporter.VIEWS_REFRESH_INTERVAL_SECS
+        run_workunits(100)
+        self.assertEqual(2, reporter._refresh_views.call_count)
+
+        # The artifact cache metrics are only rendered when the report closes.
+        self.assertEqual(0, reporter._render_cache_metrics.call_count)
+
+      reporter.close()
+      self.assertEqual(3, reporter._refresh_views.call_count)
+      self.assertEqual(1, reporter._render_cache_metrics.call_count)
@@ -5,6 +5,8 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import sys
+
 import pytest
 
 from pants.base.build_graph import CycleException, sort_targets
@@ -54,3 +56,31 @@ class SortTargetsTest(BaseTest):
     self.assertEquals(sort_targets([a,b,c,d,e]), [e,d,c,b,a])
     self.assertEquals(sort_targets([b,d,a,e,c]), [e,d,c,b,a])
     self.assertEquals(sort_targets([e,d,c,b,a]), [e,d,c,b,a])
+
+  def test_sort_deep_graph(self):
+    chain = [self.make_target(':t0')]
+    for i in range(1, 5 * sys.getrecursionlimit()):
+      chain.append(self.make_target(':t{}'.format(i), dependencies=[chain[-1]]))
+    self.assertEquals(list(reversed(chain)), sort_targets([chain[-1]]))
+    self.assertEquals(chain, self.build_graph.topological_order())
+
+  def test_topological_order_maintained(self):
+    a = self.make_target(':a')
+    b = self.make_target(':b')
+    c = self.make_target(':c', dependencies=[b])
+    d = self.make_target(':d', dependencies=[a])
+    self.assertEquals([a, b, c, d], self.build_graph.topological_order())
+
+    # Make a depend on c, which was ordered after it.
+    self.build_graph.inject_dependency(a.address, c.address)
+    self.assertEquals([b, c, a, d], self.build_graph.topological_order())
+    self.assertEquals([c, a], self.build_graph.topologically_ordered([a, c]))
+    self.assertEquals([d, a, c, b], self.build_graph.sorted_targets())
+
+  def test_topological_order_cycle(self):
+    c = self.make_target(':c')
+    b = self.make_target(':b', dependencies=[c])
+    a = self.make_target(':a', dependencies=[b])
+    self.build_graph.inject_dependency(c.address, a.address)
+    with pytest.raises(CycleException):
+      self.build_graph.topological_order()
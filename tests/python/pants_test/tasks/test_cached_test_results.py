@@ -0,0 +1,97 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+
+from pants.backend.core.tasks.cached_test_results import (CachedTestResultsMixin,
+                                                          TestResultsFingerprintStrategy)
+from pants.backend.core.tasks.task import Task
+from pants.backend.python.targets.python_library import PythonLibrary
+from pants.backend.python.targets.python_tests import PythonTests
+from pants.base.exceptions import TaskError
+from pants.util.dirutil import safe_open
+from pants_test.tasks.task_test_base import TaskTestBase
+
+
+class FakeTestTask(CachedTestResultsMixin, Task):
+  environment = 'env'
+
+  def test_results_fingerprint_strategy(self, targets):
+    return TestResultsFingerprintStrategy(self.environment)
+
+  def execute(self):
+    pass
+
+
+class CachedTestResultsTest(TaskTestBase):
+
+  @classmethod
+  def task_type(cls):
+    return FakeTestTask
+
+  def setUp(self):
+    super(CachedTestResultsTest, self).setUp()
+    self.create_file('lib/lib.py', 'x = 1')
+    self.make_targets()
+
+  def make_targets(self):
+    self.lib = self.make_target('lib', PythonLibrary, sources=['lib.py'])
+    self.create_file('tests/a/test_a.py', 'a = 1')
+    self.a = self.make_target('tests/a', PythonTests, sources=['test_a.py'],
+                              dependencies=[self.lib])
+    self.create_file('tests/b/test_b.py', 'b = 1')
+    self.b = self.make_target('tests/b', PythonTests, sources=['test_b.py'])
+    self.targets = [self.a, self.b]
+
+  def run_tests(self, failing=()):
+    task = self.create_task(self.context(target_roots=self.targets))
+    ran = []
+
+    def run_tests(targets):
+      ran.extend(targets)
+      for target in targets:
+        with safe_open(os.path.join(task.results_dir(target), 'results'), 'w') as fp:
+          fp.write('failed' if target in failing else 'passed')
+      if failing:
+        raise TaskError(failed_targets=list(failing))
+
+    try:
+      skipped = task.run_tests_with_cached_results(self.targets, run_tests)
+    except TaskError:
+      skipped = None
+    return sorted(ran), skipped
+
+  def test_passed_targets_are_skipped(self):
+    self.assertEqual((sorted(self.targets), []), self.run_tests())
+    self.assertEqual(([], self.targets), self.run_tests())
+
+  def test_failed_targets_rerun(self):
+    self.assertEqual(sorted(self.targets), self.run_tests(failing=[self.a])[0])
+    self.assertEqual(([self.a], [self.b]), self.run_tests())
+
+  def test_dependency_change_reruns_dependents(self):
+    self.run_tests()
+    self.create_file('lib/lib.py', 'x = 2')
+    self.reset_build_graph()
+    self.make_targets()
+    self.assertEqual(([self.a], [self.b]), self.run_tests())
+
+  def test_environment_change_reruns_all(self):
+    self.run_tests()
+    FakeTestTask.environment = 'other env'
+    try:
+      self.assertEqual((sorted(self.targets), []), self.run_tests())
+    finally:
+      FakeTestTask.environment = 'env'
+
+  def test_fingerprint_strategy_is_abstract(self):
+    class NoStrategyTestTask(CachedTestResultsMixin, Task):
+      def execute(self):
+        pass
+
+    with self.assertRaises(TypeError):
+      NoStrategyTestTask(self.context(), self.pants_workdir)
@@ -6,16 +6,21 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import logging
+import os
+import shutil
+import time
 import xml.etree.ElementTree as ET
 from textwrap import dedent
 
 from mock import Mock
 
 from pants.backend.core.register import build_file_aliases as register_core
-from pants.backend.jvm.ivy_utils import IvyModuleRef, IvyUtils
+from pants.backend.jvm.ivy_utils import IvyModuleRef, IvyResolutionCache, IvyUtils
 from pants.backend.jvm.register import build_file_aliases as register_jvm
 from pants.backend.jvm.targets.exclude import Exclude
-from pants.util.contextutil import temporary_file_path
+from pants.backend.jvm.targets.jar_dependency import JarDependency
+from pants.util.contextutil import temporary_dir, temporary_file_path
+from pants.util.dirutil import safe_open, touch
 from pants_test.base_test import BaseTest
 
 
@@ -217,8 +222,101 @@ class IvyUtilsGenerateIvyTest(IvyUtilsTestBase):
           },
           result1)
 
+  def test_resolution_fingerprint(self):
+    jars = list(self.a.payload.jars)
+    excludes = [Exclude(org='org3'), Exclude(org='org4', name='name4')]
+    fingerprint = IvyUtils.resolution_fingerprint(jars, excludes, ['default'])
+    self.assertIsNotNone(fingerprint)
+    self.assertEqual(fingerprint, IvyUtils.resolution_fingerprint(reversed(jars),
+                                                                  reversed(excludes),
+                                                                  ['default']))
+    self.assertNotEqual(fingerprint, IvyUtils.resolution_fingerprint(jars, excludes, ['sources']))
+    self.assertNotEqual(fingerprint, IvyUtils.resolution_fingerprint(jars[:1], excludes,
+                                                                     ['default']))
+    self.assertNotEqual(fingerprint, IvyUtils.resolution_fingerprint(jars, excludes, ['default'],
+                                                                     args=['-debug']))
+
+  def test_resolution_fingerprint_not_reproducible(self):
+    for jar in (JarDependency('org1', 'name1', 'latest.integration'),
+                JarDependency('org1', 'name1', '[1.0,2.0)'),
+                JarDependency('org1', 'name1', '1.0', mutable=True)):
+      self.assertIsNone(IvyUtils.resolution_fingerprint([jar], [], ['default']))
+
+  def test_resolution_cache(self):
+    with temporary_dir() as cache_dir:
+      with temporary_dir() as workdir:
+        jar = os.path.join(workdir, 'ivy-cache', 'org1', 'name1.jar')
+        touch(jar)
+        raw_classpath = os.path.join(workdir, 'resolve1', 'classpath.raw')
+        report = os.path.join(workdir, 'resolve1', 'report.xml')
+        with safe_open(raw_classpath, 'w') as fp:
+          fp.write(jar)
+        with safe_open(report, 'w') as fp:
+          fp.write('<ivy-report/>')
+
+        cache = IvyResolutionCache(cache_dir)
+        self.assertFalse(cache.restore('fp', raw_classpath, {'default': report}))
+        cache.store('fp', raw_classpath, {'default': report})
+
+        restored_classpath = os.path.join(workdir, 'resolve2', 'classpath.raw')
+        restored_report = os.path.join(workdir, 'resolve2', 'report.xml')
+        self.assertTrue(cache.restore('fp', restored_classpath, {'default': restored_report}))
+        with open(restored_classpath) as fp:
+          self.assertEqual(jar, fp.read())
+        with open(restored_report) as fp:
+          self.assertEqual('<ivy-report/>', fp.read())
+
+        # The entry doesn't cover other confs.
+        self.assertFalse(cache.restore('fp', restored_classpath, {'sources': restored_report}))
+
+        # Nor is it restored once its jars are gone from the ivy cache.
+        os.unlink(jar)
+        self.assertFalse(cache.restore('fp', restored_classpath, {'default': restored_report}))
+
+  def test_transitive_closure_with_cycle(self):
+    ivy_info = self.parse_ivy_report('tests/python/pants_test/tasks/ivy_utils_resources/report_with_cycle.xml')
+
+    org1 = IvyModuleRef(org='org1', name='name1', rev='0.0.1')
+    org2 = IvyModuleRef(org='org2', name='name2', rev='0.0.1')
+    org3 = IvyModuleRef(org='org3', name='name3', rev='0.0.1')
+    self.assertEqual([org1, org2, org3], list(ivy_info.transitive_closure(org1)))
+    self.assertEqual([org3, org2], list(ivy_info.transitive_closure(org3)))
+    self.assertIs(ivy_info.transitive_closure(org1), ivy_info.transitive_closure(org1))
+    self.assertEqual([org2, org3], list(ivy_info.get_jars_for_ivy_module(org1)))
+
+  def test_persisted_report_graph(self):
+    resources = 'tests/python/pants_test/tasks/ivy_utils_resources'
+    with temporary_dir() as tmpdir:
+      report = os.path.join(tmpdir, 'report.xml')
+      old = time.time() - 60
+
+      shutil.copy(os.path.join(resources, 'report_with_diamond.xml'), report)
+      os.utime(report, (old, old))
+      ivy_info = IvyUtils._parse_xml_report(report)
+
+      # Another process would read the persisted graph rather than parse the report.
+      persisted = IvyUtils._read_ivy_info(report + '.ivyinfo',
+                                          IvyUtils._report_key(os.stat(report)))
+      self.assertIsNotNone(persisted)
+      self.assertEqual(sorted(ivy_info.to_tuples()), sorted(persisted.to_tuples()))
+
+      # Once the report changes, it's parsed again.
+      shutil.copy(os.path.join(resources, 'report_with_cycle.xml'), report)
+      os.utime(report, (old - 60, old - 60))
+      self.assertIsNone(IvyUtils._read_ivy_info(report + '.ivyinfo',
+                                                IvyUtils._report_key(os.stat(report))))
+      reparsed = IvyUtils._parse_xml_report(report)
+      self.assertEqual(sorted(self.parse_ivy_report(os.path.join(resources,
+                                                                 'report_with_cycle.xml'))
+                              .to_tuples()),
+                       sorted(reparsed.to_tuples()))
+
   def parse_ivy_report(self, path):
-    ivy_info = IvyUtils._parse_xml_report(path)
+    # Parse a copy, so the graph persisted next to the report isn't written to the source tree.
+    with temporary_dir() as tmpdir:
+      report = os.path.join(tmpdir, os.path.basename(path))
+      shutil.copy(path, report)
+      ivy_info = IvyUtils._parse_xml_report(report)
     self.assertIsNotNone(ivy_info)
     return ivy_info
 
@@ -5,10 +5,12 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import os
 import unittest
 
-from pants.util.contextutil import temporary_file
-from pants.util.fileutil import atomic_copy
+from pants.util.contextutil import temporary_dir, temporary_file
+from pants.util.fileutil import (RACY_WINDOW_SECS, atomic_copy, atomic_write,
+                                 modified_within_racy_window, stat_key)
 
 
 class FileutilTest(unittest.TestCase):
@@ -21,3 +23,41 @@ class FileutilTest(unittest.TestCase):
         dst.close()
         with open(dst.name) as new_dst:
           self.assertEquals(src.name, new_dst.read())
+
+  def test_atomic_write(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'file')
+      with atomic_write(path) as fp:
+        fp.write('contents')
+        self.assertFalse(os.path.exists(path))
+      with open(path) as fp:
+        self.assertEquals('contents', fp.read())
+      self.assertEquals(['file'], os.listdir(tmpdir))
+
+  def test_atomic_write_failure_keeps_original(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'file')
+      with open(path, 'w') as fp:
+        fp.write('original')
+      with self.assertRaises(ValueError):
+        with atomic_write(path) as fp:
+          fp.write('partial')
+          raise ValueError()
+      with open(path) as fp:
+        self.assertEquals('original', fp.read())
+      self.assertEquals(['file'], os.listdir(tmpdir))
+
+  def test_stat_key(self):
+    with temporary_file() as fp:
+      fp.write('contents')
+      fp.flush()
+      key = stat_key(os.stat(fp.name))
+      self.assertEquals(key, stat_key(os.stat(fp.name)))
+      fp.write('more')
+      fp.flush()
+      self.assertNotEquals(key, stat_key(os.stat(fp.name)))
+
+  def test_modified_within_racy_window(self):
+    self.assertTrue(modified_within_racy_window(100, 100))
+    self.assertTrue(modified_within_racy_window(100, 100 + RACY_WINDOW_SECS))
+    self.assertFalse(modified_within_racy_window(100, 100 + RACY_WINDOW_SECS + 1))